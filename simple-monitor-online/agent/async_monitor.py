@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+"""
+Monitor de Atividade - Agente Assíncrono (asyncio)
+Variante do OnlineActivityMonitor em que amostragem, envios, consulta de comandos e
+temporizadores são tarefas concorrentes de um único event loop, sem time.sleep:
+    - tick: agenda fixa a cada TICK_SECONDS; a amostra não espera o envio do tick anterior, e
+      os envios dos ticks são feitos um por vez, em ordem
+    - envio: heartbeat (+ sync), tempo real e consulta de comandos como tarefas
+    - canal push: stream SSE na mesma event loop (aiohttp) em vez de uma thread
+    - registro por aplicativo: amostras a cada sample_interval
+
+O contrato de payload é o mesmo de register/send_activity (montados pelos mesmos métodos).
+Chamadas bloqueantes (consulta da janela ativa, spool, execução de comandos) rodam no
+executor padrão. HTTP via aiohttp se instalado; sem ele, o transporte compartilhado
+(requests) roda no executor e o canal push continua na thread do CommandChannel.
+
+Uso:
+    python3 async_monitor.py [url_do_servidor]
+"""
+
+import asyncio
+import functools
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from datetime import datetime
+
+from monitor_online import TICK_SECONDS, OnlineActivityMonitor
+from command_channel import SSEParser, CONNECT_TIMEOUT, READ_TIMEOUT
+
+try:
+    import aiohttp  # Opcional: HTTP nativo do event loop
+except ImportError:
+    aiohttp = None
+
+# Tempo máximo para concluir os envios em andamento ao encerrar
+SHUTDOWN_TIMEOUT = 15
+
+# Envios de tick pendentes: um em andamento e um esperando a vez (os seguintes vão pelo spool)
+MAX_PENDING_TICKS = 2
+
+
+class AsyncResponse:
+    """Resposta já lida (mesma interface de requests.Response usada pela cadência e pelo sync)"""
+
+    def __init__(self, status_code, headers, body):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = body
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class AsyncTransport:
+    """HTTP assíncrono com os mesmos endpoints e timeouts do AgentTransport"""
+
+    def __init__(self, transport):
+        self.transport = transport  # AgentTransport compartilhado (fallback sem aiohttp)
+        self.session = None
+
+    async def open(self):
+        if aiohttp is not None and self.session is None:
+            self.session = aiohttp.ClientSession(headers={'User-Agent': 'WorkTrackAgent/1.0'})
+
+    async def request(self, method, path, params=None, **body):
+        """body: json= ou data= + headers= (mesmos nomes em requests e aiohttp)"""
+        if self.session is None:
+            call = functools.partial(self.transport.request, method, path, params=params, **body)
+            return await asyncio.get_running_loop().run_in_executor(None, call)
+
+        connect, read = self.transport.timeout_for(path)
+        timeout = aiohttp.ClientTimeout(total=connect + read, sock_connect=connect)
+        async with self.session.request(method, self.transport.url(path), params=params,
+                                        timeout=timeout, **body) as response:
+            content = await response.read()
+            return AsyncResponse(response.status, response.headers, content)
+
+    async def post(self, path, payload):
+        """POST com o mesmo formato e compressão do AgentTransport (negociação compartilhada)"""
+        body, negotiated = self.transport.encode_body(path, payload)
+        response = await self.request('POST', path, **body)
+        if self.transport.check_negotiation(path, response, negotiated):
+            response = await self.request('POST', path, json=payload)
+            self.transport.check_negotiation(path, response, None)
+        return response
+
+    async def get(self, path, params=None):
+        return await self.request('GET', path, params=params)
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+
+class AsyncActivityMonitor(OnlineActivityMonitor):
+    def __init__(self, server_url=None):
+        super().__init__(server_url)
+        self.http = AsyncTransport(self.transport)
+        self.sender = None  # Tarefas do event loop substituem a thread de envio
+        self.loop = None
+        self.tasks = set()
+        self.running_keys = set()  # Tarefas com chave em andamento (ex.: esvaziar o spool)
+        self.probe_lock = threading.Lock()  # Uma consulta da janela ativa por vez (no executor)
+        self.tick_lock = None  # Um envio de tick por vez (cadência, lote e sessão são compartilhados)
+        self.pending_ticks = 0
+        self.ticks = 0
+        self.spooled_ticks = 0  # Heartbeats para o spool com os envios anteriores ainda pendentes
+        self.wakeups = 0  # Retornos do loop de ticks e da amostragem por aplicativo
+
+    # ----- tarefas -----
+
+    def spawn(self, coroutine):
+        """Criar tarefa acompanhada (concluída ou cancelada ao encerrar)"""
+        task = self.loop.create_task(coroutine)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    async def run_blocking(self, function, *args):
+        try:
+            return await self.loop.run_in_executor(None, function, *args)
+        except Exception as e:
+            print(f"❌ Erro em tarefa em segundo plano: {e}")
+            return False
+
+    def submit(self, lane, run, key=None, on_overflow=None):
+        """Envios da classe base (spool, presença, acks) rodam no executor"""
+        loop = self.loop
+        if loop is None or loop.is_closed():
+            return run()
+        loop.call_soon_threadsafe(self._spawn_blocking, run, key)
+        return True
+
+    def _spawn_blocking(self, run, key):
+        if key is not None:
+            if key in self.running_keys:
+                return  # Já em andamento: não repetir (ex.: dois esvaziamentos do spool)
+            self.running_keys.add(key)
+        task = self.spawn(self.run_blocking(run))
+        if key is not None:
+            task.add_done_callback(lambda _: self.running_keys.discard(key))
+
+    def sample_blocking(self):
+        with self.probe_lock:
+            return self.sampler.sample()
+
+    async def sample(self):
+        return await self.run_blocking(self.sample_blocking)
+
+    # ----- registro, tick e envio -----
+
+    async def register_async(self):
+        """Registrar computador no servidor (mesmo payload de register)"""
+        try:
+            response = await self.http.post('/api/data', self.build_register())
+        except Exception as e:
+            print(f"❌ Erro na conexão: {e}")
+            return False
+        if response.status_code != 200:
+            print(f"❌ Erro ao registrar: {response.status_code}")
+            return False
+        print("✅ Computador registrado no servidor")
+        self.registration_confirmed(self.session_token(response))
+        return True
+
+    async def tick(self):
+        """Amostra do tick na agenda e envio (equivalente a send_activity + check_commands).
+        Envios um por vez, em ordem: com o servidor lento, o tick seguinte amostra na hora e
+        espera a vez; com MAX_PENDING_TICKS envios pendentes, o heartbeat vai para o spool"""
+        now = datetime.now()
+        current_time = time.time()
+        self.check_new_day(now.date(), current_time)
+
+        # Máquina ociosa ou bloqueada: nenhum heartbeat até o usuário voltar
+        if self.check_idle(current_time):
+            self.last_send_time = current_time
+            await self.poll_commands()
+            return
+
+        if self.http.session is None and not self.pending_ticks:
+            # Sem aiohttp e sem envio pendente: amostra, heartbeat, tempo real e comandos em uma
+            # única ida ao executor (cada ida acorda a thread do executor e depois o event loop)
+            self.pending_ticks += 1
+            try:
+                async with self.tick_lock:
+                    await self.run_blocking(self.tick_blocking, now, current_time)
+            finally:
+                self.pending_ticks -= 1
+            return
+
+        snapshot = await self.sample()
+        if not snapshot:
+            return
+        activity, data = self.observe_sample(snapshot, now)
+        upload = not self.hold_sample(data, activity, current_time)
+        if upload:
+            self.last_send_time = current_time
+
+        if self.pending_ticks >= MAX_PENDING_TICKS:
+            # Envios anteriores ainda em andamento: sem fila de ticks, o minuto vai pelo spool
+            self.spooled_ticks += 1
+            if upload:
+                await self.run_blocking(self.spool_heartbeat, data, current_time)
+            return
+
+        self.pending_ticks += 1
+        try:
+            async with self.tick_lock:
+                if self.http.session is None:
+                    await self.run_blocking(self.deliver_tick, data, current_time, activity, snapshot, upload)
+                    return
+                if upload:
+                    await self.upload_heartbeat_async(data, current_time, activity, snapshot)
+
+                # Depois do heartbeat do tick
+                await self.poll_commands()
+        finally:
+            self.pending_ticks -= 1
+
+    def tick_blocking(self, now, current_time):
+        """Tick inteiro pelo transporte síncrono, no executor (mesma sequência do agente com threads)"""
+        snapshot = self.sample_blocking()
+        activity, data = self.observe_sample(snapshot, now)
+        upload = not self.hold_sample(data, activity, current_time)
+        if upload:
+            self.last_send_time = current_time
+        self.deliver_tick(data, current_time, activity, snapshot, upload)
+
+    def deliver_tick(self, data, captured_at, activity, snapshot, upload):
+        """Envio do tick pelo transporte síncrono, no executor"""
+        if upload:
+            self.upload_heartbeat(data, captured_at, activity, snapshot)
+        self.check_commands()
+
+    async def upload_heartbeat_async(self, data, captured_at, activity, snapshot):
+        """Mesma sequência de upload_heartbeat, sem bloquear o event loop"""
+        payload = self.heartbeat_payload(data)
+        try:
+            response = await self.http.post('/api/data', payload)
+            if self.delta_rejected(response, payload):
+                payload = self.heartbeat_payload(data)  # Completo, com o mesmo token
+                response = await self.http.post('/api/data', payload)
+        except Exception as e:
+            return self.heartbeat_failed(data, captured_at, e)
+        if not self.apply_session(response, payload, data):
+            self.spool_heartbeat(data, captured_at)  # Não processado: o minuto vai pelo spool
+            return False
+        self.cadence.on_response(response, captured_at)
+        self.apply_app_usage(response, payload)
+
+        # Enviar também para WebSocket (tempo real), a menos que o servidor tenha sync
+        if not self.apply_sync(response):
+            try:
+                await self.http.post('/api/websocket', data)
+            except Exception:
+                pass
+
+        return self.heartbeat_delivered(response, data, captured_at, activity, snapshot)
+
+    async def poll_commands(self):
+        try:
+            response = await self.http.get('/api/commands', params={'computer_id': self.computer_id})
+            self.apply_commands(response)
+        except Exception as e:
+            print(f"❌ Erro ao verificar comandos: {e}")
+
+    def dispatch_command(self, command):
+        """Executar comandos no executor (subprocess) sem bloquear o event loop"""
+        self.submit('ack', functools.partial(OnlineActivityMonitor.dispatch_command, self, command))
+
+    # ----- canal push (aiohttp) -----
+
+    async def stream_commands(self):
+        """Canal SSE na event loop, com o mesmo backoff e deduplicação do CommandChannel"""
+        channel = self.command_channel
+        while self.is_running:
+            started = time.monotonic()
+            try:
+                await self.listen_commands(channel)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                pass
+            finally:
+                if channel.connected:
+                    channel.disconnects += 1
+                channel.connected = False
+            await asyncio.sleep(channel.retry_delay(started))
+
+    async def listen_commands(self, channel):
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=CONNECT_TIMEOUT, sock_read=READ_TIMEOUT)
+        async with self.http.session.get(channel.url, params={'computer_id': self.computer_id, 'stream': '1'},
+                                         headers={'Accept': 'text/event-stream'}, timeout=timeout) as response:
+            if response.status != 200:
+                return
+            if 'text/event-stream' not in response.headers.get('Content-Type', ''):
+                # Servidor antigo: resposta JSON normal da consulta
+                channel.supported = False
+                try:
+                    for command in json.loads(await response.read()).get('commands') or []:
+                        self.dispatch_command(command)
+                except ValueError:
+                    pass
+                return
+
+            channel.supported = True
+            channel.connected = True
+            channel.connects += 1
+            parser = SSEParser()
+            async for raw in response.content:
+                event = parser.feed(raw.decode('utf-8', 'replace').rstrip('\r\n'))
+                if event:
+                    self.loop.run_in_executor(None, channel.handle_event, *event)
+
+    # ----- temporizadores -----
+
+    async def sample_foreground(self):
+        """Amostras do registro por aplicativo entre os ticks"""
+        while self.is_running and self.ledger is not None:
+            await asyncio.sleep(self.ledger.sample_interval)
+            self.wakeups += 1
+            if self.ledger is None:
+                break
+            if self.idle_monitor is not None and self.idle_monitor.paused:
+                self.ledger.observe(None, None)  # Ocioso: sem consultar a janela
+            else:
+                snapshot = await self.sample()
+                if snapshot:
+                    self.record_foreground(snapshot)
+
+    async def run(self):
+        """Loop principal: ticks em agenda fixa; envios e canais como tarefas concorrentes"""
+        self.loop = asyncio.get_running_loop()
+        self.tick_lock = asyncio.Lock()
+        self.is_running = True
+        await self.http.open()
+
+        print("👁️ Iniciando monitoramento (asyncio)...")
+        await asyncio.sleep(self.startup_delay())
+        wait = 30
+        registering = self.prepare_registration()
+        while registering and not await self.register_async():
+            if not self.is_running:
+                return
+            pause = self.supervisor.jittered(wait)
+            print(f"❌ Falha ao registrar. Tentando novamente em {pause:.0f}s...")
+            await asyncio.sleep(pause)
+            wait = min(self.supervisor.max_backoff, wait * 2)
+
+        if self.command_channel is not None:
+            if self.http.session is not None:
+                self.spawn(self.stream_commands())
+            else:
+                self.command_channel.start()  # Sem aiohttp: canal na thread própria
+        if self.ledger is not None and self.ledger.sample_interval < TICK_SECONDS:
+            self.spawn(self.sample_foreground())  # Sem isso o registro usa só a amostra do tick
+
+        self.scheduler.start()
+        while self.is_running:
+            tick = self.scheduler.begin()
+            if tick.clock_gap:
+                self.on_clock_gap(tick)
+            self.ticks += 1
+            self.spawn(self.tick())
+            self.flush_app_usage()
+
+            # Agenda fixa: um envio lento não atrasa o próximo tick
+            await asyncio.sleep(self.scheduler.remaining())
+            self.wakeups += 1
+
+    async def shutdown(self):
+        """Concluir os envios em andamento e fechar conexões"""
+        self.is_running = False
+        pending = [task for task in self.tasks if not task.done()]
+        if pending:
+            await asyncio.wait(pending, timeout=SHUTDOWN_TIMEOUT)
+        for task in list(self.tasks):
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        await self.http.close()
+
+    async def main_async(self):
+        try:
+            await self.run()
+        finally:
+            await self.shutdown()
+
+    def start(self):
+        """Iniciar o monitor (bloqueia até interromper)"""
+        print("🚀 Iniciando monitor online (asyncio)...")
+        try:
+            asyncio.run(self.main_async())
+        finally:
+            self.loop = None  # Encerramento (stop) envia o que restou de forma síncrona
+
+
+def main():
+    server_url = sys.argv[1] if len(sys.argv) > 1 else None
+
+    print("=" * 60)
+    print("🌐 MONITOR ONLINE - AGENTE ASSÍNCRONO")
+    print("=" * 60)
+    print(f"Sistema: {platform.system()} {platform.release()}")
+    print(f"Python: {platform.python_version()}")
+    print(f"HTTP: {'aiohttp' if aiohttp is not None else 'requests (executor)'}")
+
+    monitor = AsyncActivityMonitor(server_url)
+    if os.environ.get('WORKTRACK_SERVER_URL') or os.environ.get('SERVER_URL'):
+        print(f"🔧 URL carregada de variável de ambiente: {monitor.server_url}")
+
+    try:
+        monitor.start()
+    except KeyboardInterrupt:
+        print("\n👋 Encerrando monitor...")
+    finally:
+        monitor.stop()
+
+
+if __name__ == "__main__":
+    main()
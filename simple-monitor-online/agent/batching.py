@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Envio de Heartbeats em Lote
+Agrupa N amostras (ou T segundos de amostras) em um único payload heartbeat_batch
+O lote fica dentro da janela de offline do painel (cadence.OFFLINE_WINDOW): com a janela
+padrão de 90s e ticks de 60s, cada lote leva uma amostra ao vivo; lotes maiores pedem a
+janela do servidor ajustada
+"""
+
+import time
+
+from cadence import OFFLINE_WINDOW, TICK_SECONDS
+
+
+def window_limits(offline_window=OFFLINE_WINDOW, tick=TICK_SECONDS):
+    """(amostras, segundos) máximos do lote para que o intervalo entre envios (amostras no lote
+    * tick: a primeira amostra chega um tick depois do envio anterior) fique abaixo da janela"""
+    max_samples = max(1, int((offline_window - 1) // tick))
+    return max_samples, (max_samples - 1) * tick
+
+
+MAX_SAMPLES, MAX_FLUSH_INTERVAL = window_limits()
+
+DEFAULT_MAX_SAMPLES = MAX_SAMPLES
+DEFAULT_FLUSH_INTERVAL = MAX_FLUSH_INTERVAL
+
+# Campos de identidade enviados uma vez por lote (não repetidos em cada amostra)
+IDENTITY_FIELDS = ('computer_id', 'computer_name', 'user_name', 'os_info')
+
+
+def build_batch_payload(entries, replayed=False):
+    """Montar payload heartbeat_batch a partir de [(captured_at, heartbeat), ...]"""
+    first = entries[0][1]
+    payload = {'type': 'heartbeat_batch'}
+    for field in IDENTITY_FIELDS:
+        payload[field] = first.get(field)
+
+    samples = []
+    for captured_at, heartbeat in entries:
+        sample = {k: v for k, v in heartbeat.items()
+                  if k not in IDENTITY_FIELDS and k not in ('type', 'replayed')}
+        sample['captured_at'] = captured_at
+        samples.append(sample)
+
+    payload['samples'] = samples
+    if replayed:
+        payload['replayed'] = True
+    return payload
+
+
+class HeartbeatBatcher:
+    def __init__(self, max_samples=DEFAULT_MAX_SAMPLES, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.max_samples = max(1, min(int(max_samples), MAX_SAMPLES))
+        self.flush_interval = max(0.0, min(float(flush_interval), MAX_FLUSH_INTERVAL))
+        self.entries = []
+        self.first_sample_time = None
+
+    @classmethod
+    def from_config(cls, config):
+        """Criar a partir da seção heartbeat_batch do device_config.json (None se desativado)"""
+        if not config or not config.get('enabled'):
+            return None
+        if config.get('max_samples', DEFAULT_MAX_SAMPLES) > MAX_SAMPLES:
+            print(f"⚠️ heartbeat_batch.max_samples limitado a {MAX_SAMPLES}: o painel marca o dispositivo "
+                  f"offline sem envio há {OFFLINE_WINDOW}s")
+        return cls(max_samples=config.get('max_samples', DEFAULT_MAX_SAMPLES),
+                   flush_interval=config.get('flush_interval', DEFAULT_FLUSH_INTERVAL))
+
+    def add(self, heartbeat, captured_at=None):
+        """Adicionar amostra ao lote atual"""
+        captured_at = captured_at or time.time()
+        if not self.entries:
+            self.first_sample_time = captured_at
+        self.entries.append((captured_at, heartbeat))
+
+    def should_flush(self, now=None):
+        """Lote cheio ou mais antigo que o intervalo de envio"""
+        if not self.entries:
+            return False
+        now = now or time.time()
+        return (len(self.entries) >= self.max_samples or
+                now - self.first_sample_time >= self.flush_interval)
+
+    def take(self):
+        """Retirar todas as amostras pendentes"""
+        entries = self.entries
+        self.entries = []
+        self.first_sample_time = None
+        return entries
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Agente com Threads x Agente asyncio
+Roda OnlineActivityMonitor (loop com time.sleep + thread de envio) e AsyncActivityMonitor
+(event loop) contra um servidor local lento, com ticks em escala reduzida, e mede:
+    - atraso de cada tick em relação à agenda ideal (início + n * TICK_SECONDS)
+    - deriva acumulada no último tick
+    - despertares: trocas de contexto voluntárias do processo (getrusage) e threads ativas
+
+O servidor (benchmarks/local_server.py) roda em um processo separado para não contar nas
+trocas de contexto.
+
+Uso:
+    python3 benchmarks/bench_async_monitor.py
+    python3 benchmarks/bench_async_monitor.py --ticks 40 --tick 0.25 --latency 0.05
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+
+AGENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, AGENT_DIR)
+
+from local_server import spawn
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+def prepare(monitor, probe_cost, ticks, done=None):
+    """Helper de janela simulado, cadência fixa, agenda sem fase/jitter, partida imediata e só o
+    tick amostrando (sem ledger/idle/canal). done: sinalizado na última amostra"""
+    from cadence import AdaptiveCadence
+    from sampling import ActivitySampler
+    from scheduler import TickScheduler
+
+    samples = []
+    done = done or threading.Event()
+
+    def probe():
+        samples.append(time.perf_counter())
+        if len(samples) >= ticks:
+            done.set()
+        time.sleep(probe_cost)
+        return {'window_title': 'bench.py - editor', 'process_name': 'code'}
+
+    monitor.sampler = ActivitySampler(probe)
+    monitor.cadence = AdaptiveCadence(min_interval=1, max_interval=1)
+    monitor.scheduler = TickScheduler(monitor.scheduler.interval)
+    monitor.ledger = None
+    monitor.idle_monitor = None
+    monitor.command_channel = None
+    monitor.registration = None
+    return samples, done
+
+
+def measure(name, samples, tick, started_usage, threads):
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    start = samples[0]
+    lateness = [(at - start) - n * tick for n, at in enumerate(samples)]
+    gaps = [b - a - tick for a, b in zip(samples, samples[1:])]
+    return {
+        'variant': name,
+        'ticks': len(samples),
+        'tick_delay_p95_ms': percentile([abs(g) for g in gaps], 0.95) * 1000,
+        'drift_ms': lateness[-1] * 1000,
+        'voluntary_switches': usage.ru_nvcsw - started_usage.ru_nvcsw,
+        'threads': threads
+    }
+
+
+def run_threaded(server_url, ticks, tick, probe_cost):
+    from monitor_online import OnlineActivityMonitor
+
+    monitor = OnlineActivityMonitor(server_url)
+    samples, done = prepare(monitor, probe_cost, ticks)
+    before = resource.getrusage(resource.RUSAGE_SELF)
+    worker = threading.Thread(target=monitor.start, daemon=True)
+    worker.start()
+    done.wait(ticks * tick * 3 + 10)
+    threads = threading.active_count()
+    result = measure('threads', samples[:ticks], tick, before, threads)
+    monitor.is_running = False
+    worker.join(tick * 2)
+    monitor.stop()
+    return result
+
+
+def run_async(server_url, ticks, tick, probe_cost):
+    import asyncio
+    from async_monitor import AsyncActivityMonitor
+
+    class LoopEvent:
+        """Sinal da thread do executor para o event loop (sem o cenário acordar para conferir)"""
+        def __init__(self):
+            self.loop = asyncio.get_running_loop()
+            self.event = asyncio.Event()
+
+        def set(self):
+            self.loop.call_soon_threadsafe(self.event.set)
+
+    monitor = AsyncActivityMonitor(server_url)
+    result = {}
+
+    async def scenario():
+        done = LoopEvent()
+        samples, _ = prepare(monitor, probe_cost, ticks, done)
+        before = resource.getrusage(resource.RUSAGE_SELF)
+        runner = asyncio.create_task(monitor.main_async())
+        await done.event.wait()
+        result.update(measure('asyncio', samples[:ticks], tick, before, threading.active_count()))
+        result['spooled_ticks'] = monitor.spooled_ticks
+        monitor.is_running = False
+        await runner
+
+    asyncio.run(scenario())
+    monitor.loop = None
+    monitor.stop()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agente com threads x asyncio")
+    parser.add_argument('--ticks', type=int, default=30)
+    parser.add_argument('--tick', type=float, default=0.2, help="segundos por tick (60s reais)")
+    parser.add_argument('--latency', type=float, default=0.05, help="latência de cada requisição")
+    parser.add_argument('--probe-cost', type=float, default=0.01, help="custo da consulta da janela")
+    args = parser.parse_args()
+
+    # Spool e arquivos do agente em um HOME temporário
+    os.environ['HOME'] = tempfile.mkdtemp(prefix='worktrack-bench-')
+    server, server_url = spawn('--latency', args.latency * 1000)
+    try:
+
+        import monitor_online
+        monitor_online.TICK_SECONDS = args.tick
+        monitor_online.PREWARM_LEAD_SECONDS = args.tick * 0.05
+
+        with contextlib.redirect_stdout(io.StringIO()):  # Logs dos monitores
+            results = [run_threaded(server_url, args.ticks, args.tick, args.probe_cost),
+                       run_async(server_url, args.ticks, args.tick, args.probe_cost)]
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"📊 {args.ticks} ticks de {args.tick}s, latência do servidor {args.latency * 1000:.0f}ms, "
+          f"consulta da janela {args.probe_cost * 1000:.0f}ms")
+    for result in results:
+        print(f"   {result['variant']:>8}: atraso do tick p95 {result['tick_delay_p95_ms']:.1f}ms, "
+              f"deriva {result['drift_ms']:.0f}ms, trocas de contexto {result['voluntary_switches']}, "
+              f"threads {result['threads']}" +
+              (f", ticks pelo spool {result['spooled_ticks']}" if result.get('spooled_ticks') else ''))
+
+
+if __name__ == "__main__":
+    main()
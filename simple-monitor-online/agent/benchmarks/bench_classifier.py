@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark da Classificação de Atividades
+Custo por classificação (regras compiladas, com e sem cache) contra a cadeia
+original de any(...) sobre um corpus de 100 mil títulos
+
+Uso:
+    python3 benchmarks/bench_classifier.py
+    python3 benchmarks/bench_classifier.py --corpus titulos.tsv   # "processo<TAB>título" por linha
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from classifier import ActivityClassifier
+
+CORPUS_SIZE = 100000
+
+# Modelos de títulos para o corpus sintético (processo, [títulos com {n} variável])
+TITLE_TEMPLATES = [
+    ('Google Chrome', ['({n}) YouTube - Google Chrome', 'Inbox ({n}) - Gmail', 'Pull request #{n} - GitHub',
+                       'Facebook', '({n}) Instagram', 'Jira - PROJ-{n}', 'Netflix', 'Stack Overflow - pergunta {n}']),
+    ('firefox', ['Mozilla Firefox', 'Twitch - live {n}', 'Documentação Python {n}.{n}', 'Google Docs - relatório {n}']),
+    ('Safari', ['Apple', 'Twitter / X ({n})', 'Notícias {n}']),
+    ('msedge.exe', ['Outlook ({n} não lidas)', 'SharePoint - {n}']),
+    ('Code', ['main.py - projeto - Visual Studio Code', 'app_{n}.js - web - Visual Studio Code']),
+    ('pycharm64.exe', ['projeto - models.py', 'tests_{n}.py']),
+    ('WINWORD.EXE', ['Proposta comercial v{n}.docx - Word']),
+    ('EXCEL.EXE', ['Planilha {n}.xlsx - Excel']),
+    ('Terminal', ['bash - {n}x{n}', 'ssh deploy@servidor-{n}']),
+    ('Slack', ['Slack | #geral | {n} novas', 'Slack | mensagem direta']),
+    ('zoom.us', ['Reunião Zoom {n}:{n}', 'Zoom']),
+    ('steam.exe', ['Steam', 'Biblioteca - {n} jogos']),
+    ('explorer.exe', ['Downloads', 'Documentos ({n} itens)']),
+    ('Spotify', ['Spotify Premium', 'Música {n} - Artista']),
+]
+
+
+def legacy_classify(process_name, window_title):
+    """Classificação original (cadeia de any(...) a cada chamada)"""
+    process_name_lower = process_name.lower()
+    window_title = window_title.lower()
+    if any(browser in process_name_lower for browser in ['chrome', 'firefox', 'safari', 'edge']):
+        if any(site in window_title for site in ['youtube', 'netflix', 'twitch']):
+            return "Assistindo Vídeos"
+        elif any(social in window_title for social in ['facebook', 'instagram', 'twitter']):
+            return "Redes Sociais"
+        else:
+            return "Navegando na Internet"
+    elif any(office in process_name_lower for office in ['word', 'excel', 'powerpoint', 'pages', 'numbers']):
+        return "Trabalhando em Documentos"
+    elif any(dev in process_name_lower for dev in ['code', 'visual', 'pycharm', 'sublime', 'xcode']):
+        return "Programando"
+    elif any(game in process_name_lower for game in ['steam', 'game']):
+        return "Jogando"
+    elif 'terminal' in process_name_lower or 'iterm' in process_name_lower or 'cmd' in process_name_lower:
+        return "Usando Terminal"
+    else:
+        return f"Usando {process_name}"
+
+
+def synthetic_corpus(size=CORPUS_SIZE, seed=42):
+    """Corpus determinístico de (processo, título) com contadores e relógios variáveis"""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        process_name, titles = rng.choice(TITLE_TEMPLATES)
+        title = rng.choice(titles)
+        while '{n}' in title:
+            title = title.replace('{n}', str(rng.randint(0, 999)), 1)
+        corpus.append((process_name, title))
+    return corpus
+
+
+def load_corpus(path):
+    corpus = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            process_name, _, title = line.rstrip('\n').partition('\t')
+            if process_name:
+                corpus.append((process_name, title))
+    return corpus
+
+
+def measure(classify, corpus):
+    """Nanossegundos por classificação"""
+    started = time.perf_counter()
+    for process_name, title in corpus:
+        classify(process_name, title)
+    return (time.perf_counter() - started) / len(corpus) * 1e9
+
+
+def run(corpus):
+    cold = ActivityClassifier(memo_size=0)  # Sem cache: custo das regras compiladas
+    warm = ActivityClassifier()
+
+    mismatches = sum(1 for p, t in corpus if legacy_classify(p, t) != cold.classify(p, t))
+
+    results = {
+        'corpus_size': len(corpus),
+        'mismatches_vs_legacy': mismatches,
+        'legacy_ns': measure(legacy_classify, corpus),
+        'compiled_ns': measure(cold.classify, corpus),
+        'memoized_ns': measure(warm.classify, corpus),
+    }
+    raw = warm._classify_raw.cache_info()
+    normalized = warm.cache_info()
+    results['raw_hit_rate'] = raw.hits / max(1, raw.hits + raw.misses)
+    results['memo_hit_rate'] = normalized.hits / max(1, normalized.hits + normalized.misses)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da classificação de atividades")
+    parser.add_argument('--corpus', help="arquivo TSV processo<TAB>título")
+    parser.add_argument('--size', type=int, default=CORPUS_SIZE)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus) if args.corpus else synthetic_corpus(args.size)
+    results = run(corpus)
+
+    print(f"📊 Corpus: {results['corpus_size']} títulos")
+    print(f"🐢 Original (any):      {results['legacy_ns']:8.0f} ns/classificação")
+    print(f"⚙️ Compilada sem cache: {results['compiled_ns']:8.0f} ns/classificação")
+    print(f"⚡ Compilada + LRU:     {results['memoized_ns']:8.0f} ns/classificação "
+          f"(acertos título exato: {results['raw_hit_rate']:.0%}, normalizado: {results['memo_hit_rate']:.0%})")
+    print(f"🔍 Divergências com a classificação original: {results['mismatches_vs_legacy']}")
+    if results['compiled_ns'] > results['legacy_ns']:
+        print("⚠️ Classificação sem cache mais lenta que a original")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Harness do Canal Push de Comandos
+Sobe um servidor local que imita /api/commands (SSE com chunked encoding, como o
+api/commands.js) e mede com o CommandChannel real:
+    - latência entre o POST do comando e a execução no agente
+    - reconexão quando o servidor encerra o stream (limite de duração da função)
+    - fallback para consulta quando o servidor não tem stream
+
+Uso:
+    python3 benchmarks/bench_command_channel.py
+    python3 benchmarks/bench_command_channel.py --commands 200
+"""
+
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import command_channel
+from command_channel import CommandChannel
+
+COMPUTER_ID = 'bench-agent'
+
+
+class StandInServer:
+    """Servidor local de comandos: stream SSE (opcional) + consulta JSON"""
+
+    def __init__(self, stream=True, max_stream_seconds=None, keepalive=15):
+        self.stream = stream
+        self.max_stream_seconds = max_stream_seconds
+        self.keepalive = keepalive
+        self.pending = []
+        self.subscribers = set()
+        self.lock = threading.Lock()
+        self.streams_opened = 0
+        self.polls = 0
+        self.sequence = 0
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                params = parse_qs(urlparse(self.path).query)
+                if server.stream and params.get('stream'):
+                    return server.serve_stream(self)
+                with server.lock:
+                    server.polls += 1
+                    commands, server.pending = server.pending, []
+                server.send_json(self, {'success': True, 'commands': commands})
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                body = json.loads(self.rfile.read(length) or b'{}')
+                command = server.create(body['computer_id'], body['action'])
+                server.send_json(self, {'success': True, 'command_id': command['id']})
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.httpd.server_port}'
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    @staticmethod
+    def send_json(handler, payload):
+        body = json.dumps(payload).encode()
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def create(self, computer_id, action):
+        with self.lock:
+            self.sequence += 1
+            command = {'id': f'{computer_id}-{self.sequence}', 'computer_id': computer_id,
+                       'action': action, 'created': time.perf_counter(), 'status': 'pending'}
+            if self.subscribers:
+                for events in self.subscribers:
+                    events.put(command)
+            else:
+                self.pending.append(command)
+        return command
+
+    def serve_stream(self, handler):
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'text/event-stream')
+        handler.send_header('Cache-Control', 'no-cache')
+        handler.send_header('Transfer-Encoding', 'chunked')
+        handler.end_headers()
+
+        def write(text):
+            data = text.encode()
+            handler.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+            handler.wfile.flush()
+
+        events = queue.Queue()
+        with self.lock:
+            self.streams_opened += 1
+            for command in self.pending:
+                events.put(command)
+            self.pending = []
+            self.subscribers.add(events)
+
+        started = time.monotonic()
+        try:
+            write('retry: 3000\n\n')
+            while True:
+                remaining = None
+                if self.max_stream_seconds:
+                    remaining = self.max_stream_seconds - (time.monotonic() - started)
+                    if remaining <= 0:
+                        break
+                try:
+                    command = events.get(timeout=min(self.keepalive, remaining or self.keepalive))
+                except queue.Empty:
+                    write(': ping\n\n')
+                    continue
+                write(f"id: {command['id']}\nevent: command\ndata: {json.dumps(command)}\n\n")
+            handler.wfile.write(b'0\r\n\r\n')
+        except OSError:
+            pass
+        finally:
+            with self.lock:
+                self.subscribers.discard(events)
+        handler.close_connection = True
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = []
+        self.actions = []
+        self.event = threading.Event()
+
+    def __call__(self, command):
+        self.latencies.append(time.perf_counter() - command['created'])
+        self.actions.append(command['action'])
+        self.event.set()
+
+    def wait(self, count, timeout=10):
+        deadline = time.monotonic() + timeout
+        while len(self.actions) < count and time.monotonic() < deadline:
+            self.event.wait(0.05)
+            self.event.clear()
+        return len(self.actions) >= count
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+def bench_latency(commands):
+    server = StandInServer()
+    recorder = Recorder()
+    channel = CommandChannel(server.url, COMPUTER_ID, recorder)
+    channel.start()
+    try:
+        assert wait_for(lambda: channel.connected), "canal não conectou"
+        for number in range(commands):
+            server.create(COMPUTER_ID, 'lock')
+            recorder.wait(number + 1)
+        return {'commands': commands, 'delivered': len(recorder.actions),
+                'p50_ms': percentile(recorder.latencies, 0.5) * 1000,
+                'p99_ms': percentile(recorder.latencies, 0.99) * 1000}
+    finally:
+        channel.stop()
+        server.close()
+
+
+def bench_reconnect(cycles):
+    """Servidor encerra o stream a cada 0.5s; comandos criados entre conexões não se perdem"""
+    command_channel.MIN_BACKOFF = 0.05
+    server = StandInServer(max_stream_seconds=0.5)
+    recorder = Recorder()
+    channel = CommandChannel(server.url, COMPUTER_ID, recorder)
+    channel.start()
+    try:
+        for number in range(cycles):
+            wait_for(lambda: server.streams_opened > number)
+            server.create(COMPUTER_ID, 'restart')
+            time.sleep(0.5)
+        recorder.wait(cycles)
+        return {'streams_opened': server.streams_opened, 'delivered': len(recorder.actions),
+                'expected': cycles, 'p99_ms': percentile(recorder.latencies, 0.99) * 1000}
+    finally:
+        channel.stop()
+        server.close()
+
+
+def bench_fallback():
+    """Servidor sem stream: o canal desiste e a consulta (check_commands) continua funcionando"""
+    server = StandInServer(stream=False)
+    recorder = Recorder()
+    channel = CommandChannel(server.url, COMPUTER_ID, recorder)
+    channel.start()
+    try:
+        wait_for(lambda: channel.supported is not None)
+        server.create(COMPUTER_ID, 'shutdown')
+        # Mesmo caminho do monitor: consulta enquanto o canal não está conectado
+        if not channel.connected:
+            response = channel.session.get(server.url + '/api/commands', params={'computer_id': COMPUTER_ID})
+            for command in response.json()['commands']:
+                channel.dispatch(command)
+        return {'supported': channel.supported, 'connected': channel.connected,
+                'delivered_by_polling': len(recorder.actions), 'polls': server.polls}
+    finally:
+        channel.stop()
+        server.close()
+
+
+def run(commands=100, cycles=5):
+    return {
+        'latency': bench_latency(commands),
+        'reconnect': bench_reconnect(cycles),
+        'fallback': bench_fallback()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Harness do canal push de comandos")
+    parser.add_argument('--commands', type=int, default=100)
+    parser.add_argument('--cycles', type=int, default=5)
+    args = parser.parse_args()
+
+    results = run(args.commands, args.cycles)
+    latency, reconnect, fallback = results['latency'], results['reconnect'], results['fallback']
+    print(f"⚡ Push: {latency['delivered']}/{latency['commands']} comandos, "
+          f"latência p50 {latency['p50_ms']:.1f}ms / p99 {latency['p99_ms']:.1f}ms "
+          f"(consulta a cada 60s: até 120000ms)")
+    print(f"🔁 Reconexão: {reconnect['delivered']}/{reconnect['expected']} comandos em "
+          f"{reconnect['streams_opened']} streams (p99 {reconnect['p99_ms']:.0f}ms)")
+    print(f"🐢 Sem stream: suportado={fallback['supported']}, "
+          f"{fallback['delivered_by_polling']} comando(s) pela consulta")
+
+
+if __name__ == "__main__":
+    main()
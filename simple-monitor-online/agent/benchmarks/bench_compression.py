@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark da Compressão do Corpo
+Monta payloads realistas com os construtores do agente e mede, para cada codificação,
+o tamanho comprimido, a razão e o custo de CPU por envio:
+    - heartbeat: um heartbeat ao vivo (abaixo de min_size, vai sem compressão)
+    - lote: heartbeat_batch com o maior lote de uma janela de offline de 300s (4 amostras; a
+      janela padrão de 90s limita o lote a 1 amostra)
+    - spool: reenvio de DRAIN_BATCH_SIZE amostras (volta de uma queda longa)
+    - app_usage: resumo de tempo por aplicativo de um dia
+
+Codificações: gzip níveis 1, 6 (padrão) e 9; zstd nível 3 se o pacote zstandard estiver instalado
+
+Uso:
+    python3 benchmarks/bench_compression.py
+    python3 benchmarks/bench_compression.py --repeat 200
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batching import build_batch_payload, window_limits
+from body_encoding import BodyEncoder, DEFAULT_MIN_SIZE, available_encodings
+from spool import DRAIN_BATCH_SIZE
+
+START = 1_700_000_000.0
+
+WINDOWS = [
+    ('Programando', 'monitor_online.py - simple-monitor-online - Visual Studio Code'),
+    ('Programando', 'Terminal — python3 benchmarks/bench_compression.py — 120×40'),
+    ('Navegando', 'Pull requests · WorkTrackSync - Google Chrome'),
+    ('Comunicação', 'Slack | #desenvolvimento | WorkTrack'),
+    ('E-mail', 'Caixa de entrada - marcos@empresa.com.br - Outlook'),
+    ('Reunião', 'Reunião diária - Microsoft Teams'),
+    ('Documentos', 'Relatório mensal.docx - Word'),
+]
+
+APPS = [('Code', 'Programando'), ('Google Chrome', 'Navegando'), ('Slack', 'Comunicação'),
+        ('Microsoft Outlook', 'E-mail'), ('Microsoft Teams', 'Reunião'), ('Terminal', 'Programando'),
+        ('Microsoft Word', 'Documentos'), ('Finder', 'Sistema'), ('Spotify', 'Outros'),
+        ('Microsoft Excel', 'Documentos'), ('Zoom', 'Reunião'), ('Figma', 'Design')]
+
+
+def heartbeat(rng, at, current):
+    activity, window = WINDOWS[current]
+    return {
+        'type': 'heartbeat',
+        'computer_id': 'mac-3c22fb8e91a4',
+        'computer_name': 'MacBook Pro - Escritório',
+        'user_name': 'Marcos Paulo',
+        'os_info': 'Darwin 23.4.0',
+        'current_activity': activity,
+        'active_window': window,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(at)),
+        'is_active': rng.random() > 0.1,
+        'heartbeat_interval': 60,
+        'upload_queue': {'depth': 0, 'dropped': 0, 'spilled': 0}
+    }
+
+
+def samples(count, seed=11):
+    """[(captured_at, heartbeat), ...] com trocas de janela a cada poucos minutos"""
+    rng = random.Random(seed)
+    entries, current = [], 0
+    for i in range(count):
+        if rng.random() < 0.2:
+            current = rng.randrange(len(WINDOWS))
+        at = START + i * 60
+        entries.append((at, heartbeat(rng, at, current)))
+    return entries
+
+
+def payloads():
+    rng = random.Random(5)
+    usage = [[app, category, rng.randint(60, 7200)] for app, category in APPS]
+    return {
+        'heartbeat': samples(1)[0][1],
+        'lote': build_batch_payload(samples(window_limits(300)[0])),
+        'spool': build_batch_payload(samples(DRAIN_BATCH_SIZE), replayed=True),
+        'app_usage': {'type': 'app_usage', 'computer_id': 'mac-3c22fb8e91a4',
+                      'app_usage': [{'period_start': START, 'period_end': START + 8 * 3600, 'usage': usage}]}
+    }
+
+
+def codecs():
+    """(nome, codificação, encoder) de cada configuração medida"""
+    result = [(f'gzip-{level}', 'gzip', BodyEncoder(min_size=0, gzip_level=level, encodings=('gzip',)))
+              for level in (1, 6, 9)]
+    if 'zstd' in available_encodings():
+        result.append(('zstd-3', 'zstd', BodyEncoder(min_size=0, zstd_level=3, encodings=('zstd',))))
+    return result
+
+
+def measure(encoder, encoding, body, repeat):
+    started = time.thread_time()
+    for _ in range(repeat):
+        data = encoder.compress(body, encoding)
+    cpu = (time.thread_time() - started) / repeat
+    return {
+        'bytes': len(data),
+        'ratio': round(len(body) / len(data), 2),
+        'cpu_ms': round(cpu * 1000, 3),
+        'mb_per_s': round(len(body) / cpu / 1e6, 1) if cpu else None
+    }
+
+
+def run(repeat=50):
+    results = {}
+    for name, payload in payloads().items():
+        body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        results[name] = {
+            'raw_bytes': len(body),
+            'compressed': len(body) >= DEFAULT_MIN_SIZE,  # acima de min_size (padrão do agente)
+            'codecs': {codec: measure(encoder, encoding, body, repeat)
+                       for codec, encoding, encoder in codecs()}
+        }
+    return {'repeat': repeat, 'min_size': DEFAULT_MIN_SIZE, 'encodings': list(available_encodings()),
+            'payloads': results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da compressão do corpo")
+    parser.add_argument('--repeat', type=int, default=50, help="compressões por medida")
+    args = parser.parse_args()
+
+    result = run(args.repeat)
+    if 'zstd' not in result['encodings']:
+        print("ℹ️ zstandard não instalado - medindo só gzip (pip install zstandard)")
+    print(f"🗜️ Compressão do corpo (min_size {result['min_size']} bytes)")
+    for name, stats in result['payloads'].items():
+        note = '' if stats['compressed'] else ' - abaixo de min_size, vai sem compressão'
+        print(f"   {name}: {stats['raw_bytes']} bytes{note}")
+        for codec, m in stats['codecs'].items():
+            print(f"     {codec:>7}: {m['bytes']:>6} bytes ({m['ratio']:.1f}x), "
+                  f"{m['cpu_ms']:.3f} ms de CPU, {m['mb_per_s']} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Simulação da Frota: Fase por Dispositivo e Jitter
+Simula N agentes (TickScheduler + AdaptiveCadence reais, relógio simulado) que iniciam todos
+em poucos segundos (login, reinício após atualização) e mede as requisições por segundo que
+chegam em /api/data, incluindo a volta de uma queda do servidor:
+    - legado: ticks no segundo do login, backoff sem jitter
+    - jitter: só o jitter limitado por tick
+    - fase: só a fase derivada do computer_id
+    - fase+jitter: padrão do agente (seção schedule)
+
+Uso:
+    python3 benchmarks/bench_fleet.py
+    python3 benchmarks/bench_fleet.py --agents 5000 --minutes 60
+"""
+
+import argparse
+import heapq
+import os
+import random
+import sys
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cadence import AdaptiveCadence, DUE_TOLERANCE
+from scheduler import TickScheduler, phase_offset, DEFAULT_JITTER
+
+INTERVAL = 60
+START_WALL = 1_700_000_000.0  # múltiplo de 60: segundo 0 do minuto
+
+MODES = {
+    'legado': {'phase': False, 'jitter': 0, 'backoff_jitter': False},
+    'jitter': {'phase': False, 'jitter': DEFAULT_JITTER, 'backoff_jitter': True},
+    'fase': {'phase': True, 'jitter': 0, 'backoff_jitter': True},
+    'fase+jitter': {'phase': True, 'jitter': DEFAULT_JITTER, 'backoff_jitter': True},
+}
+
+
+class UpperBound:
+    """Backoff sem jitter: uniform() sempre no limite superior"""
+
+    def uniform(self, low, high):
+        return high
+
+
+class Ok:
+    status_code = 200
+    headers = {}
+
+    def json(self):
+        return {'success': True}
+
+
+class SimAgent:
+    def __init__(self, index, mode, now, rng):
+        self.now = now
+        computer_id = f'sim-{index:05d}'
+        self.wall_offset = rng.uniform(-0.05, 0.05)  # relógios sincronizados por NTP
+        self.scheduler = TickScheduler(INTERVAL, monotonic=now, wall=self.wall, boottime=now,
+                                       phase=phase_offset(computer_id) if mode['phase'] else None,
+                                       jitter=mode['jitter'], rng=random.Random(rng.random()))
+        self.cadence = AdaptiveCadence(rng=random.Random(rng.random()) if mode['backoff_jitter']
+                                       else UpperBound())
+        self.cadence.tolerance = DUE_TOLERANCE + self.scheduler.jitter
+
+    def wall(self):
+        return START_WALL + self.now() + self.wall_offset
+
+
+def simulate(mode, agents, minutes, login_spread, outage, seed=7):
+    rng = random.Random(seed)
+    clock = [0.0]
+    now = lambda: clock[0]
+
+    fleet = [SimAgent(i, mode, now, rng) for i in range(agents)]
+    events = []
+    for index, agent in enumerate(fleet):
+        clock[0] = rng.uniform(0, login_spread)
+        agent.scheduler.start()
+        heapq.heappush(events, (clock[0] + agent.scheduler.remaining(), index))
+
+    per_second = Counter()
+    end = minutes * 60
+    while events:
+        at, index = heapq.heappop(events)
+        if at >= end:
+            break
+        clock[0] = at
+        agent = fleet[index]
+        agent.scheduler.begin()
+        cadence = agent.cadence
+        if not cadence.blocked(at) and cadence.due(at):
+            per_second[int(at)] += 1
+            if outage[0] <= at < outage[1]:
+                cadence.on_response(None, at)
+            else:
+                cadence.on_response(Ok(), at)
+                cadence.uploaded(at)
+        heapq.heappush(events, (at + agent.scheduler.remaining(), index))
+
+    counts = [per_second.get(second, 0) for second in range(end)]
+    steady = counts[INTERVAL:outage[0]]  # depois do primeiro minuto, antes da queda
+    recovery = counts[outage[1]:outage[1] + 5 * INTERVAL]
+    by_second = Counter()
+    for second, count in enumerate(steady):
+        by_second[(second + INTERVAL) % INTERVAL] += count
+    mean = sum(steady) / len(steady) if steady else 0.0
+    return {
+        'requests': sum(counts),
+        'mean_rps': mean,
+        'peak_rps': max(steady) if steady else 0,
+        'p99_rps': sorted(steady)[int(0.99 * (len(steady) - 1))] if steady else 0,
+        'peak_to_mean': (max(steady) / mean) if mean else 0.0,
+        'recovery_peak_rps': max(recovery) if recovery else 0,
+        'histogram': [by_second[second] for second in range(INTERVAL)]
+    }
+
+
+def run(agents=1000, minutes=30, login_spread=3.0):
+    outage = (10 * 60, 15 * 60)
+    results = {}
+    for name, mode in MODES.items():
+        results[name] = simulate(mode, agents, minutes, login_spread, outage)
+    return {'agents': agents, 'minutes': minutes, 'login_spread': login_spread, 'outage': outage,
+            'modes': results}
+
+
+def bars(histogram, buckets=12, width=40):
+    """Requisições por segundo do minuto, agrupadas em faixas de 60/buckets segundos"""
+    size = len(histogram) // buckets
+    grouped = [sum(histogram[i * size:(i + 1) * size]) for i in range(buckets)]
+    top = max(grouped) or 1
+    return [(i * size, count, '█' * round(count / top * width)) for i, count in enumerate(grouped)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulação da frota: fase e jitter")
+    parser.add_argument('--agents', type=int, default=1000)
+    parser.add_argument('--minutes', type=int, default=30)
+    parser.add_argument('--login-spread', type=float, default=3.0, help="segundos entre o primeiro e o último login")
+    args = parser.parse_args()
+
+    result = run(args.agents, args.minutes, args.login_spread)
+    start, end = result['outage']
+    print(f"🛰️ {args.agents} agentes, login em {args.login_spread:.0f}s, {args.minutes} min, "
+          f"queda do servidor entre {start // 60} e {end // 60} min")
+    for name, stats in result['modes'].items():
+        print(f"   {name:>12}: média {stats['mean_rps']:.1f} req/s, pico {stats['peak_rps']} req/s "
+              f"(p99 {stats['p99_rps']}, {stats['peak_to_mean']:.0f}x a média), "
+              f"pico após a queda {stats['recovery_peak_rps']} req/s")
+    for name in ('legado', 'fase+jitter'):
+        print(f"\n   {name}: requisições por segundo do minuto (fora da queda)")
+        for second, count, bar in bars(result['modes'][name]['histogram']):
+            print(f"     :{second:02d} {count:>6} {bar}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Comparação do Consumo dos Agentes
+Roda cada variante do agente por uma hora simulada (relógio acelerado) contra o servidor local
+(benchmarks/local_server.py), com a mesma linha do tempo de janelas (bench_window_watch.py)
+no lugar da consulta real da janela ativa:
+    - online: OnlineActivityMonitor (agent/monitor_online.py)
+    - silent / silent_poll: BackgroundMonitor do installer/install_silent.py, com eventos de
+      janela simulados e só com a consulta a cada POLL_INTERVAL
+    - installer: BackgroundMonitor do installer/install.py
+    - root: SilentMonitor gerado pelo install.py da raiz
+    - python: só o interpretador com requests (referência)
+
+Cada variante roda em um processo próprio; o consumo vem do getrusage do processo (wait4):
+segundos de CPU, pico de RSS e despertares (trocas de contexto voluntárias). As requisições, as
+conexões e os bytes no fio (cabeçalhos + corpo) vêm da gravação do servidor local.
+
+Com o relógio acelerado (--scale), sleeps e esperas duram 1/scale do tempo simulado: o número de
+despertares e de requisições é o de uma hora, e o CPU é o do trabalho feito nessa hora.
+
+Uso:
+    python3 benchmarks/bench_footprint.py
+    python3 benchmarks/bench_footprint.py --minutes 60 --scale 120 --output consumo.json
+    python3 benchmarks/bench_footprint.py --variants online,silent
+"""
+
+import argparse
+import bisect
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+AGENT_DIR = os.path.dirname(BENCH_DIR)
+ROOT_DIR = os.path.dirname(AGENT_DIR)
+sys.path.insert(0, AGENT_DIR)
+
+VARIANTS = ['python', 'online', 'silent', 'silent_poll', 'installer', 'root']
+
+
+def install_clock(scale):
+    """Relógio acelerado: time.time/monotonic/clock_gettime andam scale vezes mais rápido, sleeps e
+    esperas com timeout (Event, Condition, Queue) duram 1/scale. Instalado antes de importar o
+    agente, para que os relógios padrão dos argumentos já sejam os acelerados.
+    Retorna a função do tempo simulado decorrido (s)"""
+    real_monotonic, real_sleep, real_gettime = time.monotonic, time.sleep, time.clock_gettime
+    origin, wall, monotonic = real_monotonic(), time.time(), time.monotonic()
+    clocks = {}
+
+    def elapsed():
+        return (real_monotonic() - origin) * scale
+
+    def clock_gettime(clock_id):
+        if clock_id not in clocks:
+            clocks[clock_id] = real_gettime(clock_id)
+        return clocks[clock_id] + elapsed()
+
+    condition_wait = threading.Condition.wait
+
+    def wait(self, timeout=None):
+        return condition_wait(self, None if timeout is None else timeout / scale)
+
+    time.time = lambda: wall + elapsed()
+    time.monotonic = lambda: monotonic + elapsed()
+    time.clock_gettime = clock_gettime
+    time.sleep = lambda seconds: real_sleep(max(0, seconds) / scale)
+    threading.Condition.wait = wait
+    return elapsed
+
+
+def load_installer_code(name, server_url):
+    """Código do monitor gerado por cada instalador"""
+    import importlib.util
+    paths = {'silent': os.path.join(ROOT_DIR, 'installer', 'install_silent.py'),
+             'installer': os.path.join(ROOT_DIR, 'installer', 'install.py'),
+             'root': os.path.join(ROOT_DIR, 'install.py')}
+    spec = importlib.util.spec_from_file_location(f'installer_{name}', paths[name])
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    if name == 'root':
+        return module.get_monitor_code(server_url, os.path.join(os.path.expanduser('~'), '.worktrack_monitor'))
+    return module.SilentInstaller().get_monitor_code()
+
+
+def build_monitor(name, server_url, window, changes):
+    """Variante com a janela ativa da linha do tempo: (iniciar, parar)"""
+    if name == 'python':
+        import requests  # noqa: F401 - todas as variantes carregam requests
+        return (lambda: None), (lambda: None)
+
+    if name == 'online':
+        import monitor_online
+
+        class OnlineMonitor(monitor_online.OnlineActivityMonitor):
+            def get_active_window(self):
+                current = window()
+                return {'window_title': current['title'], 'process_name': current['app']}
+
+        monitor = OnlineMonitor(server_url)
+        return monitor.start, monitor.stop
+
+    namespace = {'__name__': f'worktrack_{name}'}
+    code = load_installer_code('silent' if name == 'silent_poll' else name, server_url)
+    exec(compile(code, f'worktrack_{name}', 'exec'), namespace)
+
+    if name == 'root':
+        class RootMonitor(namespace['SilentMonitor']):
+            def get_current_app(self):
+                return window()['app']
+
+        monitor = RootMonitor()
+        return monitor.run, (lambda: None)
+
+    base = namespace['BackgroundMonitor']
+
+    class InstallerMonitor(base):
+        def get_active_window(self):
+            return dict(window())
+
+    if hasattr(base, 'start_window_watcher'):
+        def start_window_watcher(self):
+            """Eventos do sistema simulados: um por mudança da linha do tempo"""
+            if os.environ.get('WORKTRACK_WATCH_MODE') == 'poll':
+                return False
+            self.event_driven = True
+            threading.Thread(target=self.run_window_watcher, args=(lambda: changes(self),),
+                             daemon=True).start()
+            return True
+
+        InstallerMonitor.start_window_watcher = start_window_watcher
+
+    monitor = InstallerMonitor(server_url)
+
+    def stop():
+        monitor.is_running = False
+        if hasattr(monitor, 'window_event'):
+            monitor.window_event.set()
+
+    return monitor.start, stop
+
+
+def child(name, server_url, minutes, scale, seed):
+    """Processo medido: relógio acelerado, variante rodando em uma thread por minutes simulados"""
+    elapsed = install_clock(scale)
+    from bench_window_watch import build_timeline
+    timeline, _ = build_timeline(minutes / 60, seed)
+    starts = [start for start, _ in timeline]
+
+    def window():
+        return timeline[max(0, bisect.bisect_right(starts, elapsed()) - 1)][1]
+
+    def changes(monitor):
+        while monitor.is_running:
+            index = bisect.bisect_right(starts, elapsed())
+            if index >= len(starts):
+                return
+            time.sleep(starts[index] - elapsed())
+            if timeline[index][1]['app'] != timeline[index - 1][1]['app']:
+                monitor.foreground_changed = True
+            monitor.window_event.set()
+
+    start, stop = build_monitor(name, server_url, window, changes)
+    threading.Thread(target=start, daemon=True).start()
+    time.sleep(minutes * 60)
+    stop()
+    sys.stdout.flush()
+    os._exit(0)
+
+
+def measure(name, minutes, scale, seed):
+    """Rodar uma variante em outro processo: consumo (getrusage) e tráfego (gravação do servidor)"""
+    from local_server import load_recording, spawn, summarize
+
+    workdir = tempfile.mkdtemp(prefix=f'worktrack-footprint-{name}-')
+    recording = os.path.join(workdir, 'trafego.jsonl')
+    server, server_url = spawn('--record', recording)
+    env = dict(os.environ, HOME=workdir)  # Spool, logs e cache do registro isolados
+    if name == 'silent_poll':
+        env['WORKTRACK_WATCH_MODE'] = 'poll'
+    try:
+        with open(os.path.join(workdir, 'saida.log'), 'w') as log:
+            process = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--child', name,
+                                        '--url', server_url, '--minutes', str(minutes),
+                                        '--scale', str(scale), '--seed', str(seed)],
+                                       stdout=log, stderr=subprocess.STDOUT, env=env)
+            _, status, usage = os.wait4(process.pid, 0)
+            process.returncode = os.waitstatus_to_exitcode(status)
+    finally:
+        server.terminate()
+        server.wait()
+
+    traffic = summarize(load_recording(recording)) if os.path.getsize(recording) else \
+        {'requests': 0, 'connections': 0, 'wire_bytes_in': 0, 'wire_bytes_out': 0, 'groups': {}}
+    rss_scale = 1024 * 1024 if sys.platform == 'darwin' else 1024  # ru_maxrss: bytes no macOS, KB no Linux
+    return {
+        'exit_code': process.returncode,
+        'cpu_seconds': round(usage.ru_utime + usage.ru_stime, 3),
+        'peak_rss_mb': round(usage.ru_maxrss / rss_scale, 1),
+        'wakeups': usage.ru_nvcsw,
+        'involuntary_switches': usage.ru_nivcsw,
+        'requests': traffic['requests'],
+        'connections': traffic['connections'],
+        'bytes_sent': traffic['wire_bytes_in'],
+        'bytes_received': traffic['wire_bytes_out'],
+        'requests_by_kind': {group: stats['requests'] for group, stats in traffic['groups'].items()},
+        'workdir': workdir
+    }
+
+
+def run(minutes=60, scale=60, seed=42, variants=None):
+    results = {name: measure(name, minutes, scale, seed) for name in variants or VARIANTS}
+    return {'minutes': minutes, 'scale': scale, 'seed': seed, 'variants': results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consumo das variantes do agente")
+    parser.add_argument('--minutes', type=float, default=60, help="tempo simulado por variante")
+    parser.add_argument('--scale', type=float, default=60, help="aceleração do relógio")
+    parser.add_argument('--seed', type=int, default=42, help="semente da linha do tempo de janelas")
+    parser.add_argument('--variants', default=','.join(VARIANTS), help="variantes separadas por vírgula")
+    parser.add_argument('--output', help="gravar o resultado neste arquivo JSON")
+    parser.add_argument('--child', choices=VARIANTS, help=argparse.SUPPRESS)
+    parser.add_argument('--url', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return child(args.child, args.url, args.minutes, args.scale, args.seed)
+
+    variants = [name.strip() for name in args.variants.split(',') if name.strip()]
+    unknown = set(variants) - set(VARIANTS)
+    if unknown:
+        parser.error(f"variantes desconhecidas: {', '.join(sorted(unknown))}")
+
+    print(f"⏱️ {args.minutes:.0f} min simulados por variante (relógio {args.scale:.0f}x, "
+          f"~{args.minutes * 60 / args.scale:.0f}s reais cada)")
+    result = run(args.minutes, args.scale, args.seed, variants)
+    print(f"   {'variante':>12} {'CPU (s)':>8} {'RSS (MB)':>9} {'despertares':>12} {'requisições':>12} "
+          f"{'conexões':>9} {'enviado':>10} {'recebido':>10}")
+    for name, m in result['variants'].items():
+        failed = f"  ❌ saída {m['exit_code']} (log em {m['workdir']})" if m['exit_code'] else ''
+        print(f"   {name:>12} {m['cpu_seconds']:>8.2f} {m['peak_rss_mb']:>9.1f} {m['wakeups']:>12} "
+              f"{m['requests']:>12} {m['connections']:>9} {m['bytes_sent'] / 1024:>8.1f}KB "
+              f"{m['bytes_received'] / 1024:>8.1f}KB{failed}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+        print(f"📄 Resultado em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks do Caminho Quente do Agente (custo por tick do monitor_online.py)
+    - classificação: get_current_activity sobre um corpus sintético (regras sem cache e com cache)
+    - payload: observe_sample, build_heartbeat, heartbeat_payload (completo e da sessão) e a
+      serialização (json.dumps do requests, JSON compacto, MessagePack)
+    - janela ativa: get_active_window com probes falsos (helper persistente probe_helper_stub.py
+      e um processo por consulta, como o fallback do osascript)
+    - tick: send_activity de ponta a ponta contra benchmarks/local_server.py (envio no próprio
+      tick e com a thread de envio)
+O resultado vai para um JSON (--output) para comparar entre versões (--compare)
+
+Uso:
+    python3 benchmarks/bench_hot_path.py --output hot_path.json
+    python3 benchmarks/bench_hot_path.py --compare hot_path.json --threshold 0.15
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+AGENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, AGENT_DIR)
+
+from bench_classifier import synthetic_corpus
+from bench_wire_format import encoders
+from local_server import SPAWN_SESSION_SECRET, issue_session_token, spawn
+
+STUB_WINDOWS = ('Code|main.py - simple-monitor - Visual Studio Code;Slack|Slack | #geral | WorkTrack;'
+                'Google Chrome|Pull Request #42 - GitHub - Google Chrome')
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def summary(samples):
+    """Estatísticas de tempos em microssegundos"""
+    return {
+        'calls': len(samples),
+        'mean_us': round(sum(samples) / len(samples), 3),
+        'p50_us': round(percentile(samples, 0.50), 3),
+        'p95_us': round(percentile(samples, 0.95), 3),
+        'p99_us': round(percentile(samples, 0.99), 3)
+    }
+
+
+def timed(call, items):
+    """Chamar call(item) para cada item e medir cada chamada"""
+    samples = []
+    for item in items:
+        started = time.perf_counter_ns()
+        call(item)
+        samples.append((time.perf_counter_ns() - started) / 1000)
+    return summary(samples)
+
+
+class OneShotProbe:
+    """Probe falso que abre um processo por consulta (custo do fallback com osascript)"""
+
+    def __init__(self, window):
+        self.command = [sys.executable, '-c', f'print({window!r})']
+
+    def query(self):
+        result = subprocess.run(self.command, capture_output=True, text=True)
+        process_name, _, title = result.stdout.strip().partition('|')
+        return {'process_name': process_name, 'window_title': title}
+
+    def close(self):
+        pass
+
+
+def stub_helper():
+    from probe import ProbeCoprocess
+    os.environ['WORKTRACK_STUB_WINDOWS'] = STUB_WINDOWS
+    return ProbeCoprocess([sys.executable, os.path.join(AGENT_DIR, 'probe_helper_stub.py')])
+
+
+def create_monitor(server_url):
+    import monitor_online
+    with contextlib.redirect_stdout(io.StringIO()):
+        monitor = monitor_online.OnlineActivityMonitor(server_url)
+    monitor.probe_helper = stub_helper()
+    return monitor
+
+
+def bench_classification(monitor, size):
+    from classifier import ActivityClassifier
+    from sampling import ActivitySnapshot
+    snapshots = [ActivitySnapshot(process_name, title, 0, 0) for process_name, title in synthetic_corpus(size)]
+    configured = monitor.classifier
+    results = {}
+    try:
+        monitor.classifier = ActivityClassifier(memo_size=0)
+        results['get_current_activity_cold'] = timed(monitor.get_current_activity, snapshots)
+        monitor.classifier = configured
+        monitor.get_current_activity(snapshots[0])
+        results['get_current_activity_warm'] = timed(monitor.get_current_activity, snapshots)
+    finally:
+        monitor.classifier = configured
+    return results
+
+
+def bench_payload(monitor, repeat):
+    from session import HeartbeatSession
+    snapshot = monitor.sampler.sample()
+    activity = monitor.get_current_activity(snapshot)
+    now = datetime.now()
+    data = monitor.build_heartbeat(snapshot, activity, now)
+    results = {
+        'observe_sample': timed(lambda _: monitor.observe_sample(snapshot, now), range(repeat)),
+        'build_heartbeat': timed(lambda _: monitor.build_heartbeat(snapshot, activity, now), range(repeat))
+    }
+
+    session, monitor.session = monitor.session, None
+    try:
+        results['heartbeat_payload_full'] = timed(lambda _: monitor.heartbeat_payload(data), range(repeat))
+        full = monitor.heartbeat_payload(data)
+        monitor.session = HeartbeatSession(
+            issue_session_token(monitor.computer_id, '0' * 16, time.time(), SPAWN_SESSION_SECRET))
+        monitor.session.accepted(monitor.session.payload(data), data)
+        results['heartbeat_payload_session'] = timed(lambda _: monitor.heartbeat_payload(data), range(repeat))
+        compact = monitor.heartbeat_payload(data)
+    finally:
+        monitor.session = session
+
+    for fmt, encode in encoders().items():
+        for name, payload in (('full', full), ('session', compact)):
+            stats = timed(lambda _: encode(payload), range(repeat))
+            stats['bytes'] = len(encode(payload))
+            results[f'serialize_{fmt}_{name}'] = stats
+    return results
+
+
+def bench_active_window(monitor, repeat):
+    helper = monitor.probe_helper
+    results = {'get_active_window_helper': timed(lambda _: monitor.get_active_window(), range(repeat)),
+               'sampler_sample_helper': timed(lambda _: monitor.sampler.sample(), range(repeat))}
+    monitor.probe_helper = OneShotProbe('Code|main.py - simple-monitor - Visual Studio Code')
+    try:
+        results['get_active_window_subprocess'] = timed(lambda _: monitor.get_active_window(),
+                                                        range(max(1, repeat // 20)))
+    finally:
+        monitor.probe_helper = helper
+    return results
+
+
+def bench_tick(monitor, ticks):
+    def tick(_):
+        # Cada tick é um envio devido (sem espera pelo intervalo nem pela cadência)
+        monitor.last_send_time = 0
+        monitor.cadence.last_upload = 0
+        monitor.send_activity()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        monitor.register()
+        results = {'send_activity_inline': timed(tick, range(ticks))}
+        if monitor.sender is not None:
+            monitor.sender.start()
+            # Só o tempo até o tick liberar (o envio segue na thread de envio)
+            enqueue = []
+            for _ in range(ticks):
+                started = time.perf_counter_ns()
+                tick(None)
+                enqueue.append((time.perf_counter_ns() - started) / 1000)
+                monitor.sender.wait_idle(5)
+            results['send_activity_sender'] = summary(enqueue)
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=AGENT_DIR,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {'python': platform.python_version(), 'platform': platform.platform(),
+            'machine': platform.machine(), 'commit': commit, 'timestamp': datetime.now().isoformat()}
+
+
+def run(repeat=2000, corpus=20000, ticks=200, latency=0):
+    os.environ['HOME'] = tempfile.mkdtemp(prefix='worktrack-bench-')  # Spool e arquivos do agente
+    server, server_url = spawn('--latency', latency)
+    monitor = None
+    try:
+        monitor = create_monitor(server_url)
+        with contextlib.redirect_stdout(io.StringIO()):
+            monitor.transport.prewarm()
+        results = {
+            'classification': bench_classification(monitor, corpus),
+            'payload': bench_payload(monitor, repeat),
+            'active_window': bench_active_window(monitor, repeat),
+            'tick': bench_tick(monitor, ticks)
+        }
+    finally:
+        if monitor is not None:
+            with contextlib.redirect_stdout(io.StringIO()):
+                monitor.stop()
+        server.terminate()
+        server.wait()
+    return {'environment': environment(),
+            'parameters': {'repeat': repeat, 'corpus': corpus, 'ticks': ticks, 'latency_ms': latency},
+            'results': results}
+
+
+def compare(current, baseline, threshold):
+    """Casos cuja mediana piorou mais que threshold (fração) em relação à referência"""
+    regressions = []
+    for suite, cases in current['results'].items():
+        for case, stats in cases.items():
+            before = baseline.get('results', {}).get(suite, {}).get(case)
+            if not before or not before.get('p50_us'):
+                continue
+            change = stats['p50_us'] / before['p50_us'] - 1
+            print(f"   {suite}.{case}: {before['p50_us']:.2f} -> {stats['p50_us']:.2f} µs ({change:+.0%})")
+            if change > threshold:
+                regressions.append((f'{suite}.{case}', change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks do caminho quente do agente")
+    parser.add_argument('--repeat', type=int, default=2000, help="chamadas por medida")
+    parser.add_argument('--corpus', type=int, default=20000, help="títulos classificados")
+    parser.add_argument('--ticks', type=int, default=200, help="ticks de ponta a ponta")
+    parser.add_argument('--latency', type=float, default=0, help="latência do servidor local (ms)")
+    parser.add_argument('--output', help="gravar o resultado neste arquivo JSON")
+    parser.add_argument('--compare', help="JSON de uma execução anterior para comparar")
+    parser.add_argument('--threshold', type=float, default=0.10, help="piora tolerada na mediana")
+    args = parser.parse_args()
+
+    result = run(args.repeat, args.corpus, args.ticks, args.latency)
+    print(f"🔥 Caminho quente do agente ({result['environment']['python']}, "
+          f"commit {result['environment']['commit'] or '?'})")
+    for suite, cases in result['results'].items():
+        print(f"   {suite}")
+        for case, stats in cases.items():
+            size = f", {stats['bytes']} B" if 'bytes' in stats else ''
+            print(f"     {case}: p50 {stats['p50_us']:.2f} µs, p99 {stats['p99_us']:.2f} µs{size}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+        print(f"📄 Resultado em {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"📊 Comparação com {args.compare} (commit {baseline.get('environment', {}).get('commit') or '?'})")
+        regressions = compare(result, baseline, args.threshold)
+        if regressions:
+            for name, change in regressions:
+                print(f"❌ Regressão: {name} {change:+.0%}")
+            sys.exit(1)
+        print("✅ Nenhuma regressão acima do limite")
+
+
+if __name__ == "__main__":
+    main()
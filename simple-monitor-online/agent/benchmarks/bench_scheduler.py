@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Simulação da Agenda de Ticks (relógio simulado)
+Roda dias de operação do agente em segundos, com relógios monotônico, de boot e de parede
+simulados, e compara o loop antigo (sleep(60) após o trabalho, recursão ao falhar o
+registro) com TickScheduler + Supervisor.
+
+Cenário (por padrão 7 dias):
+    - o agente inicia durante uma queda do servidor de 9 h (registro falhando)
+    - trabalho por tick variável, travamentos de 20 s e um de 150 s por dia
+    - notebook suspenso no almoço (1 h) e à noite (13 h)
+    - relógio de parede ajustado (-1 h no dia 2, +90 s no dia 4)
+    - erro crítico no loop a cada 2000 ticks
+
+Mede ticks e heartbeats, deriva, rajadas após retornar da suspensão, suspensões/ajustes
+detectados e a profundidade máxima da pilha (quadros acima do início do agente). As mesmas
+medidas são conferidas em test_scheduler.py
+
+Uso:
+    python3 benchmarks/bench_scheduler.py
+    python3 benchmarks/bench_scheduler.py --days 30
+"""
+
+import argparse
+import os
+import random
+import sys
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scheduler import TickScheduler, Supervisor, phase_offset
+
+HOUR = 3600
+DAY = 24 * HOUR
+INTERVAL = 60
+TOLERANCE = 1  # TICK_TOLERANCE do monitor
+
+
+class SimClock:
+    """boot: tempo real decorrido; monotônico para na suspensão; parede = boot + ajustes"""
+
+    def __init__(self, suspends, jumps, start_wall=1_700_000_000.0):
+        self.boot = 0.0
+        self.suspended = 0.0
+        self.suspends = deque(sorted(suspends))  # (início no boot, duração)
+        self.jumps = sorted(jumps)  # (instante no boot, ajuste)
+        self.start_wall = start_wall
+
+    def monotonic(self):
+        return 10_000.0 + self.boot - self.suspended
+
+    def boottime(self):
+        return 10_000.0 + self.boot
+
+    def wall(self):
+        return self.start_wall + self.boot + sum(delta for at, delta in self.jumps if at <= self.boot)
+
+    def sleep(self, seconds):
+        remaining = max(0.0, seconds)
+        while self.suspends and self.boot + remaining >= self.suspends[0][0]:
+            start, duration = self.suspends.popleft()
+            if start < self.boot:
+                continue
+            remaining -= start - self.boot
+            self.boot = start + duration
+            self.suspended += duration
+        self.boot += remaining
+
+
+class Scenario:
+    def __init__(self, days, seed=42):
+        self.days = days
+        self.end = days * DAY
+        self.random = random.Random(seed)
+        self.outage = (0, 9 * HOUR)
+        self.suspends = []
+        for day in range(days):
+            base = day * DAY
+            self.suspends.append((base + 4 * HOUR, 1 * HOUR))  # almoço (início às 8h)
+            self.suspends.append((base + 11 * HOUR, 13 * HOUR))  # noite
+        self.jumps = [(2 * DAY + 10 * HOUR, -HOUR), (4 * DAY + 2 * HOUR, 90)]
+        self.crash_every = 2000
+
+    def server_up(self, boot):
+        return not (self.outage[0] <= boot < self.outage[1])
+
+    def work(self):
+        roll = self.random.random()
+        if roll < 1 / 840:
+            return 150.0  # travamento maior que o intervalo (~1 por dia acordado)
+        if roll < 0.01:
+            return 20.0
+        return self.random.expovariate(1 / 0.4)
+
+
+def stack_depth():
+    frame, depth = sys._getframe(1), 0
+    while frame is not None:
+        depth += 1
+        frame = frame.f_back
+    return depth
+
+
+class Agent:
+    """Modelo do monitor_loop com TickScheduler + Supervisor (key: computer_id da fase)"""
+
+    def __init__(self, scenario, key=None):
+        self.scenario = scenario
+        self.clock = SimClock(scenario.suspends, scenario.jumps)
+        phase = phase_offset(key, INTERVAL) if key is not None else None
+        self.scheduler = TickScheduler(INTERVAL, self.clock.monotonic, self.clock.wall, self.clock.boottime,
+                                       phase=phase)
+        self.supervisor = Supervisor(sleep=self.clock.sleep, monotonic=self.clock.monotonic,
+                                     rng=random.Random(scenario.days))
+        self.ticks = []  # (monotônico, parede, Tick)
+        self.starts = []  # Índice do primeiro tick de cada início do loop (fora da fase: partida já adiada)
+        self.heartbeats = 0
+        self.last_send = self.clock.wall()
+        self.base_depth = 0
+        self.max_depth = 0
+
+    def running(self):
+        return self.clock.boot < self.scenario.end
+
+    def register(self):
+        self.clock.sleep(0.2)
+        return self.scenario.server_up(self.clock.boot)
+
+    def monitor_loop(self):
+        if not self.supervisor.retry('registro', self.register, self.running):
+            return
+        self.scheduler.start()
+        self.starts.append(len(self.ticks))
+        while self.running():
+            tick = self.scheduler.begin()
+            self.ticks.append((self.clock.monotonic(), self.clock.wall(), tick))
+            self.max_depth = max(self.max_depth, stack_depth() - self.base_depth)
+            if tick.clock_gap:
+                self.last_send = self.clock.wall() - INTERVAL  # on_clock_gap
+            if self.clock.wall() - self.last_send >= INTERVAL - TOLERANCE:
+                self.heartbeats += 1
+                self.last_send = self.clock.wall()
+            if self.scheduler.ticks % self.scenario.crash_every == 0:
+                raise RuntimeError("erro simulado")
+            self.clock.sleep(self.scenario.work())
+            self.clock.sleep(self.scheduler.remaining())
+
+    def run(self):
+        self.base_depth = stack_depth()
+        self.supervisor.run('monitor', self.monitor_loop, self.running)
+        return self
+
+
+class LegacyAgent:
+    """Modelo do loop antigo: recursão ao falhar o registro, sleep(60) após o trabalho"""
+
+    def __init__(self, scenario):
+        self.scenario = scenario
+        self.clock = SimClock(scenario.suspends, scenario.jumps)
+        self.ticks = 0
+        self.heartbeats = 0
+        self.last_send = self.clock.wall()
+        self.base_depth = 0
+        self.max_depth = 0
+        self.recursion_errors = 0
+
+    def running(self):
+        return self.clock.boot < self.scenario.end
+
+    def monitor_loop(self):
+        self.max_depth = max(self.max_depth, stack_depth() - self.base_depth)
+        self.clock.sleep(0.2)
+        if not self.scenario.server_up(self.clock.boot):
+            self.clock.sleep(30)
+            return self.monitor_loop()
+        while self.running():
+            self.ticks += 1
+            if self.clock.wall() - self.last_send >= INTERVAL:
+                self.heartbeats += 1
+                self.last_send = self.clock.wall()
+            try:
+                if self.ticks % self.scenario.crash_every == 0:
+                    raise RuntimeError("erro simulado")
+                self.clock.sleep(self.scenario.work())
+                self.clock.sleep(INTERVAL)
+            except RuntimeError:
+                self.clock.sleep(60)
+
+    def start(self):
+        try:
+            self.monitor_loop()
+        except RecursionError:
+            self.recursion_errors += 1
+            self.clock.sleep(10)
+            if self.running():
+                self.start()
+
+    def run(self):
+        self.base_depth = stack_depth()
+        try:
+            self.start()
+        except RecursionError:
+            self.recursion_errors += 1
+        return self
+
+
+def max_burst(ticks):
+    """Maior número de ticks em qualquer janela de um intervalo (tempo monotônico)"""
+    window, burst = deque(), 0
+    for at, *_ in ticks:
+        window.append(at)
+        while at - window[0] >= INTERVAL:
+            window.popleft()
+        burst = max(burst, len(window))
+    return burst
+
+
+def resume_bursts(ticks):
+    """Ticks no primeiro intervalo após cada retorno da suspensão (1 = sem rajada)"""
+    bursts = []
+    for index, (at, _, tick) in enumerate(ticks):
+        if tick.suspended:
+            bursts.append(sum(1 for later, *_ in ticks[index:] if later - at < INTERVAL))
+    return bursts
+
+
+def run(days=7, key=None):
+    scenario = Scenario(days)
+    awake = days * DAY - sum(duration for _, duration in scenario.suspends)
+    expected = int((awake - scenario.outage[1]) // INTERVAL)
+
+    agent = Agent(scenario, key).run()
+    lateness = sorted(tick.late for _, _, tick in agent.ticks if not tick.skipped)
+    legacy = LegacyAgent(Scenario(days)).run()
+    return {
+        'days': days,
+        'expected_ticks': expected,
+        'scheduler': {
+            'ticks': len(agent.ticks),
+            'heartbeats': agent.heartbeats,
+            'late_p99': lateness[int(0.99 * (len(lateness) - 1))] if lateness else 0.0,
+            'max_burst': max_burst(agent.ticks),
+            'resume_bursts': resume_bursts(agent.ticks),
+            'stats': agent.scheduler.stats(),
+            # Suspensões com o agente em ticks (não durante o registro nem no fim da simulação)
+            'injected_suspends': sum(1 for start, duration in scenario.suspends
+                                     if start >= scenario.outage[1] and start + duration < scenario.end),
+            # Ajustes com o agente em ticks
+            'injected_jumps': sum(1 for at, _ in scenario.jumps if scenario.outage[1] <= at < scenario.end),
+            'restarts': agent.supervisor.restarts,
+            'max_depth': agent.max_depth,
+            'ticks_detail': agent.ticks,
+            'starts': agent.starts
+        },
+        'legacy': {
+            'ticks': legacy.ticks,
+            'heartbeats': legacy.heartbeats,
+            'max_depth': legacy.max_depth,
+            'recursion_errors': legacy.recursion_errors
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulação da agenda de ticks")
+    parser.add_argument('--days', type=int, default=7)
+    args = parser.parse_args()
+
+    result = run(args.days)
+    new, old = result['scheduler'], result['legacy']
+    stats = new['stats']
+    print(f"🗓️ {result['days']} dias simulados - ticks esperados (acordado, servidor no ar): {result['expected_ticks']}")
+    print(f"   antigo: {old['ticks']} ticks, {old['heartbeats']} heartbeats, pilha máx {old['max_depth']} quadros, "
+          f"RecursionError {old['recursion_errors']}x")
+    print(f"   agenda: {new['ticks']} ticks, {new['heartbeats']} heartbeats, pilha máx {new['max_depth']} quadros, "
+          f"reinícios {new['restarts']}")
+    print(f"           atraso p99 {new['late_p99'] * 1000:.0f}ms, {stats['skipped']} ticks pulados, "
+          f"rajada máx {new['max_burst']} tick(s)/{INTERVAL}s, "
+          f"após suspensão {max(new['resume_bursts'], default=0)}")
+    print(f"           suspensões {stats['suspends']}/{new['injected_suspends']} "
+          f"({stats['suspended_seconds'] // HOUR}h), ajustes de relógio {stats['wall_jumps']}/{new['injected_jumps']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark da Thread de Envio
+Simula um dia de ticks (escala de tempo reduzida) contra um servidor lento e com quedas:
+    - inline: cada tick espera o envio (comportamento antigo do monitor_loop)
+    - sender: o tick só enfileira; a thread de envio atende ack > live > backlog
+Mede o tempo que o tick fica bloqueado, a espera das confirmações de comando e
+confere que nenhum heartbeat se perde (entregue + spool == gerado)
+
+Uso:
+    python3 benchmarks/bench_sender.py
+    python3 benchmarks/bench_sender.py --ticks 300 --latency 0.02 --stall 0.3
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sender import UploadSender
+
+
+class SlowServer:
+    """Latência fixa por requisição e, a cada stall_every ticks, uma requisição travada até o timeout"""
+
+    def __init__(self, latency, stall, stall_every, seed=7):
+        self.latency = latency
+        self.stall = stall
+        self.stall_every = stall_every
+        self.random = random.Random(seed)
+        self.delivered = 0
+        self.lock = threading.Lock()
+
+    def post(self, kind):
+        stalled = self.random.random() < 1 / self.stall_every
+        time.sleep(self.stall if stalled else self.latency)
+        if stalled:
+            return False  # Timeout: o heartbeat vai para o spool
+        if kind == 'heartbeat':
+            with self.lock:
+                self.delivered += 1
+        return True
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+def run_mode(mode, ticks, tick_interval, latency, stall, stall_every, capacity):
+    server = SlowServer(latency, stall, stall_every)
+    spool = []
+    ack_waits = []
+    sender = UploadSender(capacity={'live': capacity}) if mode == 'sender' else None
+    if sender is not None:
+        sender.start()
+
+    def upload(n):
+        if not server.post('heartbeat'):
+            spool.append(n)
+        return True
+
+    def ack(queued_at):
+        ack_waits.append(time.perf_counter() - queued_at)
+        return server.post('ack')
+
+    def submit(lane, run, key=None, on_overflow=None):
+        if sender is None:
+            return run()
+        return sender.submit(lane, run, key=key, on_overflow=on_overflow)
+
+    blocked = []
+    next_tick = time.perf_counter()
+    for n in range(ticks):
+        started = time.perf_counter()
+        submit('live', lambda n=n: upload(n), on_overflow=lambda n=n: spool.append(n))
+        submit('live', lambda: server.post('commands'), key='commands')  # Consulta de comandos
+        if n % 20 == 0:
+            queued_at = time.perf_counter()
+            submit('ack', lambda q=queued_at: ack(q))
+        blocked.append(time.perf_counter() - started)
+
+        next_tick += tick_interval
+        time.sleep(max(0, next_tick - time.perf_counter()))
+
+    if sender is not None:
+        sender.stop(timeout=30)
+    return {
+        'mode': mode,
+        'tick_p50_ms': percentile(blocked, 0.5) * 1000,
+        'tick_max_ms': max(blocked) * 1000,
+        'ack_p95_ms': percentile(ack_waits, 0.95) * 1000,
+        'generated': ticks,
+        'delivered': server.delivered,
+        'spooled': len(spool),
+        'stats': sender.stats() if sender is not None else None
+    }
+
+
+def run(ticks=200, tick_interval=0.05, latency=0.005, stall=0.25, stall_every=25, capacity=8):
+    return [run_mode(mode, ticks, tick_interval, latency, stall, stall_every, capacity)
+            for mode in ('inline', 'sender')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da thread de envio")
+    parser.add_argument('--ticks', type=int, default=200)
+    parser.add_argument('--tick-interval', type=float, default=0.05, help="segundos por tick (60s reais)")
+    parser.add_argument('--latency', type=float, default=0.005, help="latência de cada requisição")
+    parser.add_argument('--stall', type=float, default=0.25, help="duração de uma requisição travada (timeout)")
+    parser.add_argument('--stall-every', type=int, default=25)
+    parser.add_argument('--capacity', type=int, default=8, help="capacidade da fila live")
+    args = parser.parse_args()
+
+    for result in run(args.ticks, args.tick_interval, args.latency, args.stall, args.stall_every, args.capacity):
+        lost = result['generated'] - result['delivered'] - result['spooled']
+        print(f"📊 {result['mode']:>6}: tick bloqueado p50 {result['tick_p50_ms']:.2f}ms / "
+              f"máx {result['tick_max_ms']:.1f}ms | ack p95 {result['ack_p95_ms']:.1f}ms | "
+              f"{result['delivered']} entregues + {result['spooled']} no spool (perdidos: {lost})")
+        if result['stats']:
+            stats = result['stats']
+            print(f"        fila: máx espera {stats['max_wait'] * 1000:.0f}ms, "
+                  f"descartes {stats['dropped']}, para o spool {stats['spilled']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Harness da Detecção de Troca de Janela (monitor em background do instalador silencioso)
+Executa o monitor_loop real do BackgroundMonitor com relógio simulado sobre uma linha do
+tempo de janelas e compara com a consulta original a cada 10 segundos:
+despertares, envios, trocas perdidas e latência de detecção
+
+Uso:
+    python3 benchmarks/bench_window_watch.py
+    python3 benchmarks/bench_window_watch.py --hours 24 --seed 7
+"""
+
+import argparse
+import bisect
+import os
+import random
+import sys
+
+INSTALLER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                             'installer')
+sys.path.insert(0, INSTALLER_DIR)
+
+from install_silent import SilentInstaller
+
+LEGACY_POLL_INTERVAL = 10
+
+# (app, título com {n}/{clock} variáveis, duração mínima, duração máxima, peso)
+WINDOW_TEMPLATES = [
+    ('Code', 'main.py - projeto - Visual Studio Code', 60, 1800, 5),
+    ('Google Chrome', 'Pull request #{n} - GitHub', 30, 600, 3),
+    ('Google Chrome', '({clock}) Pomodoro - Google Chrome', 300, 1500, 1),
+    ('Slack', 'Slack | #geral | {n} novas', 10, 300, 3),
+    ('Terminal', 'bash - {n}x{n}', 20, 900, 3),
+    ('explorer.exe', 'Downloads', 1, 2, 2),  # Alt-Tab de passagem
+    ('Outlook', 'Caixa de entrada ({n} não lidas)', 3, 9, 2),  # Olhadas rápidas
+]
+
+
+def build_timeline(hours, seed):
+    """Lista ordenada de (início, janela); títulos com relógio mudam a cada segundo"""
+    rng = random.Random(seed)
+    weights = [template[4] for template in WINDOW_TEMPLATES]
+    timeline = []
+    now, end = 0.0, hours * 3600.0
+    while now < end:
+        app, title, low, high, _ = rng.choices(WINDOW_TEMPLATES, weights)[0]
+        duration = rng.uniform(low, high)
+        counter = rng.randint(1, 99)
+        if '{clock}' in title:
+            # Um evento de título por segundo (contagem regressiva)
+            for second in range(int(duration)):
+                remaining = int(duration) - second
+                text = title.replace('{clock}', f'{remaining // 60:02d}:{remaining % 60:02d}')
+                timeline.append((now + second, {'app': app, 'title': text}))
+        else:
+            text = title
+            while '{n}' in text:
+                text = text.replace('{n}', str(counter), 1)
+            timeline.append((now, {'app': app, 'title': text}))
+            if '{n}' in title and duration > 60:
+                # Contador muda no meio da janela (ex.: nova mensagem)
+                timeline.append((now + duration / 2, {'app': app, 'title': title.replace('{n}', str(counter + 1))}))
+        now += duration
+    return timeline, end
+
+
+def load_monitor_class():
+    namespace = {'__name__': 'background_monitor'}
+    exec(compile(SilentInstaller().get_monitor_code(), 'background_monitor', 'exec'), namespace)
+    return namespace
+
+
+def simulate_event_driven(namespace, timeline, end, event_driven=True):
+    """Rodar o monitor_loop real com relógio simulado; eventos = pontos de mudança da linha do tempo"""
+    starts = [start for start, _ in timeline]
+
+    class SimulatedMonitor(namespace['BackgroundMonitor']):
+        def __init__(self):
+            super().__init__('http://localhost')
+            self.now = 0.0
+            self.clock = lambda: self.now
+            self.start_time = 0.0
+            self.sent = []
+
+        def log(self, message):
+            pass
+
+        def start_window_watcher(self):
+            self.event_driven = event_driven
+            return event_driven
+
+        def get_active_window(self):
+            return timeline[bisect.bisect_right(starts, self.now) - 1][1]
+
+        def wait_for_window_event(self, timeout):
+            target = self.now + max(0, timeout)
+            index = bisect.bisect_right(starts, self.now)
+            fired = self.event_driven and index < len(starts) and starts[index] <= target
+            self.now = starts[index] if fired else target
+            if fired and timeline[index][1]['app'] != timeline[index - 1][1]['app']:
+                self.foreground_changed = True
+            if self.now >= end:
+                self.is_running = False
+            return fired
+
+        def send_activity(self, activity_data):
+            self.sent.append((self.now, activity_data['activity']))
+            return True
+
+    monitor = SimulatedMonitor()
+    monitor.monitor_loop()
+    return monitor.wakeups, monitor.sent, monitor.detector.coalesced
+
+
+def simulate_legacy(timeline, end):
+    """Consulta original: a cada 10 s, envio sempre que o dict da janela muda"""
+    starts = [start for start, _ in timeline]
+    wakeups, sent, last = 0, [], None
+    now = 0.0
+    while now < end:
+        window = timeline[bisect.bisect_right(starts, now) - 1][1]
+        wakeups += 1
+        if window != last:
+            sent.append((now, window))
+            last = window
+        now += LEGACY_POLL_INTERVAL
+    return wakeups, sent
+
+
+def detection_stats(timeline, end, sends, key, debounce):
+    """Trocas reais (atividade efetiva diferente, duração >= debounce): latência até o envio e perdidas"""
+    latencies, missed = [], 0
+    segments = []
+    for index, (start, window) in enumerate(timeline):
+        k = key(window)
+        if segments and segments[-1][2] == k:
+            continue
+        segments.append((start, index, k))
+    send_times = [at for at, _ in sends]
+
+    for position, (start, _, k) in enumerate(segments):
+        stop = segments[position + 1][0] if position + 1 < len(segments) else end
+        if position == 0 or stop - start < debounce:
+            continue
+        found = None
+        for at, sent_key in sends[bisect.bisect_left(send_times, start):]:
+            if at >= stop:
+                break
+            if sent_key == k:
+                found = at
+                break
+        if found is None:
+            missed += 1
+        else:
+            latencies.append(found - start)
+    return latencies, missed
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run(hours=24, seed=42):
+    namespace = load_monitor_class()
+    detector_key = namespace['WindowChangeDetector'].key
+    debounce = namespace['DEBOUNCE_SECONDS']
+    timeline, end = build_timeline(hours, seed)
+
+    def activity_key(activity):
+        # "Usando app - título" -> mesma chave do detector
+        app, _, title = activity[len('Usando '):].partition(' - ')
+        return detector_key({'app': app, 'title': title})
+
+    results = {'hours': hours, 'timeline_events': len(timeline), 'debounce': debounce}
+
+    wakeups, sent = simulate_legacy(timeline, end)
+    latencies, missed = detection_stats(timeline, end, [(at, detector_key(w)) for at, w in sent],
+                                        detector_key, debounce)
+    results['legacy'] = {'wakeups': wakeups, 'sends': len(sent), 'missed': missed,
+                         'latency_p50': percentile(latencies, 0.5), 'latency_p95': percentile(latencies, 0.95)}
+
+    for mode, event_driven in (('events', True), ('poll', False)):
+        wakeups, sent, coalesced = simulate_event_driven(namespace, timeline, end, event_driven)
+        latencies, missed = detection_stats(timeline, end, [(at, activity_key(a)) for at, a in sent],
+                                            detector_key, debounce)
+        results[mode] = {'wakeups': wakeups, 'sends': len(sent), 'missed': missed, 'coalesced': coalesced,
+                         'latency_p50': percentile(latencies, 0.5), 'latency_p95': percentile(latencies, 0.95)}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Harness da detecção de troca de janela")
+    parser.add_argument('--hours', type=float, default=24)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    results = run(args.hours, args.seed)
+    print(f"📊 {results['hours']}h simuladas, {results['timeline_events']} mudanças de janela/título, "
+          f"debounce {results['debounce']}s")
+    labels = {'legacy': '🐢 Consulta 10s (original)', 'events': '⚡ Eventos + debounce',
+              'poll': '⏱️ Consulta + debounce'}
+    for mode, label in labels.items():
+        r = results[mode]
+        print(f"{label:28} despertares: {r['wakeups']:6d}  envios: {r['sends']:5d}  "
+              f"perdidas: {r['missed']:4d}  latência p50/p95: {r['latency_p50']:.1f}s/{r['latency_p95']:.1f}s"
+              + (f"  agrupadas: {r['coalesced']}" if 'coalesced' in r else ''))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark do Formato de Transmissão (JSON x MessagePack)
+Mede o tempo de codificação e os bytes por amostra dos payloads do agente:
+    - requests: json.dumps padrão (o que requests faz com json=)
+    - json: JSON compacto (separadores sem espaços)
+    - msgpack: MessagePack (pacote opcional msgpack)
+Cada formato também é medido com gzip (como vai nos lotes e reenvios acima de min_size)
+
+Payloads: heartbeat completo, heartbeat da sessão (delta), lote e reenvio do spool
+
+Uso:
+    python3 benchmarks/bench_wire_format.py
+    python3 benchmarks/bench_wire_format.py --repeat 2000
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_compression import payloads
+from session import HeartbeatSession
+from wire_format import available_formats, encode, validate
+
+
+def encoders():
+    result = {
+        'requests': lambda payload: json.dumps(payload).encode('utf-8'),
+        'json': lambda payload: encode(payload, 'json')
+    }
+    if 'msgpack' in available_formats():
+        result['msgpack'] = lambda payload: encode(payload, 'msgpack')
+    return result
+
+
+def workloads():
+    """Payloads medidos e o número de amostras em cada um"""
+    base = payloads()
+    session = HeartbeatSession('Xq3vT9bLk2Ze')
+    full = session.payload(base['heartbeat'])
+    session.accepted(full, base['heartbeat'])
+    changed = dict(base['heartbeat'], timestamp='2023-11-14T22:14:20')
+    result = {
+        'heartbeat': (base['heartbeat'], 1),
+        'sessão': (session.payload(changed), 1),
+        'lote': (base['lote'], len(base['lote']['samples'])),
+        'spool': (base['spool'], len(base['spool']['samples']))
+    }
+    for name, (payload, _) in result.items():
+        assert not validate(payload), (name, validate(payload))
+    return result
+
+
+def measure(encoder, payload, samples, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        body = encoder(payload)
+    elapsed = (time.perf_counter() - started) / repeat
+    compressed = len(gzip.compress(body, compresslevel=6, mtime=0))
+    return {
+        'bytes': len(body),
+        'bytes_per_sample': round(len(body) / samples, 1),
+        'gzip_bytes_per_sample': round(compressed / samples, 1),
+        'encode_us': round(elapsed * 1e6, 2),
+        'encode_us_per_sample': round(elapsed * 1e6 / samples, 2)
+    }
+
+
+def run(repeat=500):
+    results = {}
+    for name, (payload, samples) in workloads().items():
+        # Reenvio do spool é grande: menos repetições para o mesmo tempo total
+        count = max(1, repeat // samples) if samples > 50 else repeat
+        results[name] = {'samples': samples,
+                         'formats': {fmt: measure(encoder, payload, samples, count)
+                                     for fmt, encoder in encoders().items()}}
+    return {'repeat': repeat, 'formats': list(encoders()), 'payloads': results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do formato de transmissão")
+    parser.add_argument('--repeat', type=int, default=500, help="codificações por medida")
+    args = parser.parse_args()
+
+    result = run(args.repeat)
+    if 'msgpack' not in result['formats']:
+        print("ℹ️ msgpack não instalado - medindo só JSON (pip install msgpack)")
+    print("📦 Formato de transmissão: codificação e bytes por amostra")
+    for name, stats in result['payloads'].items():
+        print(f"   {name} ({stats['samples']} amostra(s))")
+        for fmt, m in stats['formats'].items():
+            print(f"     {fmt:>8}: {m['bytes_per_sample']:>6.1f} B/amostra "
+                  f"({m['gzip_bytes_per_sample']:.1f} com gzip), "
+                  f"{m['encode_us_per_sample']:.2f} µs/amostra")
+
+
+if __name__ == "__main__":
+    main()
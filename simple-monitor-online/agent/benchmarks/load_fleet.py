@@ -0,0 +1,510 @@
+#!/usr/bin/env python3
+"""
+Gerador de Carga da Frota (asyncio)
+Simula de 1k a 50k agentes contra um servidor local (vercel dev, stand-in ou outro) para
+descobrir quantos dispositivos o caminho de ingestão suporta antes dos heartbeats começarem a
+estourar o timeout. Cada agente simulado usa as peças reais do monitor:
+    - payloads montados pelos métodos do OnlineActivityMonitor (build_register via registro
+      junto do heartbeat, build_heartbeat, heartbeat_payload com sessão, build_batch_payload)
+    - TickScheduler com a fase do computer_id e jitter, AdaptiveCadence (intervalo adaptativo,
+      backoff e Retry-After), HeartbeatSession (heartbeats compactos)
+    - partida sorteada na janela de startup (RegistrationCache.startup_delay)
+    - consulta a /api/commands a cada envio, POST /api/websocket quando o servidor não tem sync
+Trocas de janela seguem uma cadeia de Markov; quedas de rede (--outage) deixam uma fração
+da frota offline: as amostras vão para o spool do agente e voltam como heartbeat_batch.
+
+O HTTP é um cliente HTTP/1.1 keep-alive mínimo sobre asyncio (sem dependências), com um pool
+de --connections conexões compartilhado pela frota. O relatório (vazão, erros por tipo e
+percentis de latência e de espera no pool) vai para um arquivo JSON.
+
+Uso:
+    python3 benchmarks/load_fleet.py --url http://127.0.0.1:3000 --agents 5000 --duration 300
+    python3 benchmarks/load_fleet.py --agents 20000 --interval 60 --outage 120:60:0.3 --output carga.json
+"""
+
+import argparse
+import asyncio
+import heapq
+import json
+import os
+import random
+import ssl
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from urllib.parse import urlencode, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from requests.structures import CaseInsensitiveDict
+
+from async_monitor import AsyncResponse
+from batching import build_batch_payload
+from bench_compression import WINDOWS
+from cadence import AdaptiveCadence, DEFAULT_MAX_INTERVAL, DEFAULT_MIN_INTERVAL, DUE_TOLERANCE, MAX_SERVER_WAIT
+from monitor_online import OnlineActivityMonitor
+from registration import RegistrationCache, DEFAULT_STARTUP_WINDOW
+from sampling import ActivitySnapshot
+from scheduler import TickScheduler, phase_offset, DEFAULT_JITTER
+from session import HeartbeatSession
+from spool import DRAIN_BATCH_SIZE
+from transport import DEFAULT_TIMEOUTS, DEFAULT_TIMEOUT
+from wire_format import available_formats, encode, media_type
+
+DEFAULT_URL = 'http://127.0.0.1:3000'  # vercel dev
+DEFAULT_CONNECTIONS = 256
+DEFAULT_CHANGE_PROBABILITY = 0.15  # troca de janela por tick
+
+
+class RequestTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """Pool de conexões HTTP/1.1 keep-alive (asyncio streams) para um único servidor"""
+
+    def __init__(self, url, size=DEFAULT_CONNECTIONS):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.ssl = ssl.create_default_context() if parts.scheme == 'https' else None
+        self.base = parts.path.rstrip('/')
+        self.host_header = parts.netloc
+        self.size = size
+        self.idle = asyncio.LifoQueue()
+        for _ in range(size):
+            self.idle.put_nowait(None)  # vaga sem conexão aberta
+
+        # Contadores
+        self.opened = 0
+        self.reused = 0
+
+    async def request(self, method, path, body=None, headers=None, params=None, timeout=DEFAULT_TIMEOUT):
+        """(resposta, espera no pool, latência); timeout = (conexão, leitura) como no transporte"""
+        queued = time.perf_counter()
+        connection = await self.idle.get()
+        started = time.perf_counter()
+        target = self.base + path + ('?' + urlencode(params) if params else '')
+        try:
+            while True:
+                reused = connection is not None
+                if connection is None:
+                    connection = await asyncio.wait_for(
+                        asyncio.open_connection(self.host, self.port, ssl=self.ssl), timeout[0])
+                    self.opened += 1
+                try:
+                    response, keep = await asyncio.wait_for(
+                        self.exchange(connection, method, target, body, headers or {}), timeout[1])
+                    break
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    # Conexão ociosa fechada pelo servidor (keep-alive expirado): uma nova
+                    # tentativa em conexão nova, como o urllib3 do transporte
+                    if not reused:
+                        raise
+                    connection[1].close()
+                    connection = None
+            if reused:
+                self.reused += 1
+        except asyncio.TimeoutError:
+            self.release(connection, keep=False)
+            raise RequestTimeout(f'{method} {path}') from None
+        except BaseException:
+            self.release(connection, keep=False)
+            raise
+        self.release(connection, keep)
+        return response, started - queued, time.perf_counter() - started
+
+    def release(self, connection, keep):
+        if connection is not None and not keep:
+            connection[1].close()
+            connection = None
+        self.idle.put_nowait(connection)
+
+    async def exchange(self, connection, method, target, body, headers):
+        reader, writer = connection
+        lines = [f'{method} {target} HTTP/1.1', f'Host: {self.host_header}',
+                 'User-Agent: WorkTrackAgent/1.0', 'Connection: keep-alive',
+                 f'Content-Length: {len(body) if body else 0}']
+        lines += [f'{name}: {value}' for name, value in headers.items()]
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + (body or b''))
+        await writer.drain()
+
+        head = await reader.readuntil(b'\r\n\r\n')
+        status_line, *header_lines = head.decode('latin-1').split('\r\n')
+        status = int(status_line.split(' ', 2)[1])
+        response_headers = CaseInsensitiveDict()
+        for line in header_lines:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                response_headers[name.strip()] = value.strip()
+
+        if response_headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                chunk = await reader.readexactly(size + 2)
+                if size == 0:
+                    break
+                chunks.append(chunk[:-2])
+            content = b''.join(chunks)
+        elif 'Content-Length' in response_headers:
+            content = await reader.readexactly(int(response_headers['Content-Length']))
+        else:
+            content = await reader.read()  # Sem tamanho: corpo até o servidor fechar
+            return AsyncResponse(status, response_headers, content), False
+        keep = response_headers.get('Connection', '').lower() != 'close'
+        return AsyncResponse(status, response_headers, content), keep
+
+    async def close(self):
+        while not self.idle.empty():
+            connection = self.idle.get_nowait()
+            if connection is not None:
+                connection[1].close()
+
+
+class Metrics:
+    """Latência, espera no pool e resultado de cada requisição, por tipo"""
+
+    def __init__(self, started):
+        self.started = started
+        self.latency = defaultdict(list)
+        self.wait = defaultdict(list)
+        self.outcomes = defaultdict(Counter)
+        self.completed = Counter()  # segundo -> respostas recebidas
+        self.offered = Counter()  # segundo -> requisições iniciadas
+        self.events = Counter()
+
+    def second(self):
+        return int(time.perf_counter() - self.started)
+
+    def record(self, kind, outcome, wait=None, latency=None):
+        self.outcomes[kind][outcome] += 1
+        if latency is not None:
+            self.latency[kind].append(latency)
+            self.wait[kind].append(wait)
+            self.completed[self.second()] += 1
+
+    def report(self, duration):
+        kinds = {}
+        for kind, outcomes in self.outcomes.items():
+            total = sum(outcomes.values())
+            errors = total - outcomes['ok']
+            kinds[kind] = {
+                'requests': total,
+                'ok': outcomes['ok'],
+                'error_rate': round(errors / total, 4) if total else 0.0,
+                'outcomes': dict(outcomes),
+                'latency_ms': percentiles(self.latency[kind]),
+                'pool_wait_ms': percentiles(self.wait[kind])
+            }
+        per_second = [self.completed.get(second, 0) for second in range(int(duration))]
+        offered = [self.offered.get(second, 0) for second in range(int(duration))]
+        total = sum(k['requests'] for k in kinds.values())
+        errors = sum(k['requests'] - k['ok'] for k in kinds.values())
+        return {
+            'throughput': {
+                'mean_rps': round(sum(per_second) / duration, 1) if duration else 0.0,
+                'peak_rps': max(per_second, default=0),
+                'offered_mean_rps': round(sum(offered) / duration, 1) if duration else 0.0,
+                'offered_peak_rps': max(offered, default=0),
+                'per_second': per_second
+            },
+            'requests': total,
+            'error_rate': round(errors / total, 4) if total else 0.0,
+            'kinds': kinds,
+            'events': dict(self.events)
+        }
+
+
+def percentiles(values):
+    if not values:
+        return None
+    ordered = sorted(values)
+    pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2)
+    return {'p50': pick(0.50), 'p90': pick(0.90), 'p99': pick(0.99), 'p999': pick(0.999),
+            'max': round(ordered[-1] * 1000, 2)}
+
+
+class SimRegistration:
+    piggyback = True  # Registro vai junto do primeiro heartbeat (padrão do agente)
+
+
+class SimAgent:
+    """Estado de um agente; payloads montados pelos métodos do OnlineActivityMonitor"""
+
+    build_register = OnlineActivityMonitor.build_register
+    build_heartbeat = OnlineActivityMonitor.build_heartbeat
+    upload_queue_stats = OnlineActivityMonitor.upload_queue_stats
+    heartbeat_payload = OnlineActivityMonitor.heartbeat_payload
+    attach_app_usage = OnlineActivityMonitor.attach_app_usage
+    delta_rejected = OnlineActivityMonitor.delta_rejected
+    registration_fields = OnlineActivityMonitor.registration_fields
+
+    registration = SimRegistration()
+    sender = None
+    command_channel = None
+
+    def __init__(self, index, interval, rng, cached, use_session):
+        self.computer_id = f'load-{index:05d}'
+        self.computer_name = f'Estação {index:05d}'
+        self.user_name = f'usuario{index:05d}'
+        self.os_info = rng.choice(('Windows 10', 'Windows 11', 'Darwin 23.4.0', 'Linux 6.5.0'))
+        self.metadata = {'department': rng.choice(('Suporte', 'Vendas', 'Engenharia', 'Financeiro'))}
+        self.scheduler = TickScheduler(interval, phase=phase_offset(self.computer_id, interval),
+                                       jitter=min(DEFAULT_JITTER, interval / 4), rng=rng)
+        self.cadence = AdaptiveCadence(min_interval=interval,
+                                       max_interval=interval * DEFAULT_MAX_INTERVAL / DEFAULT_MIN_INTERVAL,
+                                       max_server_wait=interval * MAX_SERVER_WAIT / DEFAULT_MIN_INTERVAL,
+                                       rng=rng)
+        self.cadence.tolerance = DUE_TOLERANCE + self.scheduler.jitter
+        self.session = HeartbeatSession() if use_session else None
+        self.pending_usage = {}  # Sem registro por aplicativo na simulação
+        self.pending_registration = not cached
+        self.sync_supported = None
+        self.window = rng.randrange(len(WINDOWS))
+        self.spool = []  # [(captured_at, heartbeat)] (memória: o spool real é SQLite)
+        self.busy = False
+
+
+class LoadFleet:
+    def __init__(self, url, agents, interval, duration, connections, startup_window, cached,
+                 outage, change_probability, use_session, fmt, seed):
+        self.pool = ConnectionPool(url, connections)
+        self.interval = interval
+        self.duration = duration
+        self.outage = outage  # (início, duração, fração) ou None
+        self.change_probability = change_probability
+        self.fmt = fmt
+        self.random = random.Random(seed)
+        self.fleet = [SimAgent(i, interval, self.random, self.random.random() < cached, use_session)
+                      for i in range(agents)]
+        self.offline = set()
+        if outage:
+            self.offline = {i for i in range(agents) if self.random.random() < outage[2]}
+        self.startup = RegistrationCache(startup_window=startup_window)
+        self.metrics = None
+        self.tasks = set()
+
+    def in_outage(self, index, elapsed):
+        if not self.outage or index not in self.offline:
+            return False
+        start, length, _ = self.outage
+        return start <= elapsed < start + length
+
+    async def call(self, kind, method, path, payload=None, params=None):
+        """Requisição do agente; None se falhou (timeout ou conexão), resultado contabilizado"""
+        self.metrics.offered[self.metrics.second()] += 1
+        body, headers = None, {}
+        if payload is not None:
+            body = encode(payload, self.fmt)
+            headers['Content-Type'] = media_type(self.fmt)
+        try:
+            response, wait, latency = await self.pool.request(
+                method, path, body, headers, params, DEFAULT_TIMEOUTS.get(path, DEFAULT_TIMEOUT))
+        except RequestTimeout:
+            self.metrics.record(kind, 'timeout')
+            return None
+        except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+            self.metrics.record(kind, type(e).__name__)
+            return None
+        outcome = 'ok' if response.status_code == 200 else f'http_{response.status_code}'
+        self.metrics.record(kind, outcome, wait, latency)
+        return response
+
+    def sample(self, agent, now):
+        """Snapshot da janela do tick (troca com probabilidade change_probability)"""
+        if self.random.random() < self.change_probability:
+            agent.window = self.random.randrange(len(WINDOWS))
+        activity, title = WINDOWS[agent.window]
+        return ActivitySnapshot('app', title, now, 0.0), activity
+
+    async def tick(self, index):
+        agent = self.fleet[index]
+        try:
+            await self.upload(index, agent)
+        except Exception as e:
+            self.metrics.events[f'erro_{type(e).__name__}'] += 1
+        finally:
+            agent.busy = False
+
+    async def upload(self, index, agent):
+        now = time.monotonic()
+        snapshot, activity = self.sample(agent, now)
+        agent.cadence.observe(activity)
+        data = agent.build_heartbeat(snapshot, activity, datetime.now())
+
+        if self.in_outage(index, time.perf_counter() - self.metrics.started):
+            self.metrics.events['offline'] += 1
+            agent.cadence.on_response(None, now)
+            if agent.session is not None:
+                agent.session.resync()
+            agent.spool.append((now, data))
+            return
+        if not agent.cadence.due(now):
+            self.metrics.events['adiado'] += 1
+            agent.spool.append((now, data))
+            return
+
+        payload = agent.heartbeat_payload(data)
+        response = await self.call('heartbeat', 'POST', '/api/data', payload)
+        if response is not None and agent.delta_rejected(response, payload):
+            # Instância sem o estado base: o mesmo heartbeat completo
+            self.metrics.events['resync'] += 1
+            payload = agent.heartbeat_payload(data)
+            response = await self.call('heartbeat', 'POST', '/api/data', payload)
+        if response is None:
+            agent.cadence.on_response(None, now)
+            if agent.session is not None:
+                agent.session.resync()
+            agent.spool.append((now, data))
+            return
+        try:
+            result = response.json() if response.status_code == 200 else {}
+        except ValueError:
+            result = {}
+
+        if agent.session is not None and 'session' in payload:
+            if result.get('session_expired'):
+                self.metrics.events['session_expired'] += 1
+                agent.session.expire()
+                agent.pending_registration = True
+                agent.spool.append((now, data))
+                return
+            agent.session.accepted(payload, data)
+        agent.cadence.on_response(response, now)
+        if response.status_code != 200:
+            agent.spool.append((now, data))
+            return
+        agent.cadence.uploaded(now)
+
+        if result.get('registered'):
+            agent.pending_registration = False
+            self.metrics.events['registrado'] += 1
+        if agent.session is not None and result.get('session'):
+            agent.session.start(result['session'])
+        if result.get('sync'):
+            agent.sync_supported = True
+        else:
+            await self.call('websocket', 'POST', '/api/websocket', data)
+
+        if agent.spool:
+            await self.drain(agent)
+        await self.call('commands', 'GET', '/api/commands', params={'computer_id': agent.computer_id})
+
+    async def drain(self, agent):
+        """Reenviar o spool do agente como heartbeat_batch (como drain_spool)"""
+        batch = agent.spool[:DRAIN_BATCH_SIZE]
+        response = await self.call('batch', 'POST', '/api/data', build_batch_payload(batch, replayed=True))
+        if response is not None and response.status_code == 200:
+            del agent.spool[:len(batch)]
+            self.metrics.events['reenviados'] += len(batch)
+
+    async def run(self):
+        self.metrics = Metrics(time.perf_counter())
+        end = time.monotonic() + self.duration
+        events = []
+        for index, agent in enumerate(self.fleet):
+            agent.scheduler.start(self.startup.startup_delay(self.random))
+            heapq.heappush(events, (time.monotonic() + agent.scheduler.remaining(), index))
+
+        while events:
+            at, index = events[0]
+            if at >= end:
+                break
+            delay = at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(min(delay, 0.5))
+                continue
+            heapq.heappop(events)
+            agent = self.fleet[index]
+            agent.scheduler.begin()
+            if agent.busy:
+                self.metrics.events['tick_ocupado'] += 1  # Envio anterior ainda em andamento
+            else:
+                agent.busy = True
+                task = asyncio.create_task(self.tick(index))
+                self.tasks.add(task)
+                task.add_done_callback(self.tasks.discard)
+            heapq.heappush(events, (time.monotonic() + agent.scheduler.remaining(), index))
+
+        # Envios em andamento terminam (ou estouram o timeout) antes do relatório
+        if self.tasks:
+            await asyncio.wait(set(self.tasks))
+        elapsed = time.perf_counter() - self.metrics.started
+        await self.pool.close()
+        return elapsed
+
+    def report(self, elapsed):
+        result = self.metrics.report(elapsed)
+        result['connections'] = {'size': self.pool.size, 'opened': self.pool.opened,
+                                 'reused': self.pool.reused}
+        result['spool_pending'] = sum(len(agent.spool) for agent in self.fleet)
+        result['sessions_active'] = sum(1 for agent in self.fleet
+                                        if agent.session is not None and agent.session.token)
+        return result
+
+
+def parse_outage(value):
+    """início:duração:fração (segundos, segundos, 0-1)"""
+    start, length, fraction = (float(part) for part in value.split(':'))
+    return start, length, min(1.0, max(0.0, fraction))
+
+
+def run(url=DEFAULT_URL, agents=1000, interval=DEFAULT_MIN_INTERVAL, duration=300,
+        connections=DEFAULT_CONNECTIONS, startup_window=DEFAULT_STARTUP_WINDOW, cached=0.0,
+        outage=None, change_probability=DEFAULT_CHANGE_PROBABILITY, session=True, fmt='json', seed=7):
+    fleet = LoadFleet(url, agents, interval, duration, connections, startup_window, cached, outage,
+                      change_probability, session, fmt, seed)
+    elapsed = asyncio.run(fleet.run())
+    result = fleet.report(elapsed)
+    result['config'] = {'url': url, 'agents': agents, 'interval': interval, 'duration': duration,
+                        'connections': connections, 'startup_window': startup_window, 'cached': cached,
+                        'outage': outage, 'change_probability': change_probability,
+                        'session': session, 'format': fmt, 'elapsed': round(elapsed, 1)}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gerador de carga da frota (asyncio)")
+    parser.add_argument('--url', default=DEFAULT_URL, help="servidor local")
+    parser.add_argument('--agents', type=int, default=1000, help="agentes simulados (1k a 50k)")
+    parser.add_argument('--interval', type=float, default=DEFAULT_MIN_INTERVAL,
+                        help="intervalo dos ticks em segundos (menor = mais carga por agente)")
+    parser.add_argument('--duration', type=float, default=300, help="duração em segundos")
+    parser.add_argument('--connections', type=int, default=DEFAULT_CONNECTIONS, help="tamanho do pool HTTP")
+    parser.add_argument('--startup-window', type=float, default=DEFAULT_STARTUP_WINDOW,
+                        help="janela de partida dos agentes em segundos")
+    parser.add_argument('--cached', type=float, default=0.0,
+                        help="fração de agentes com registro em cache (não registram ao iniciar)")
+    parser.add_argument('--outage', type=parse_outage, help="queda de rede: início:duração:fração")
+    parser.add_argument('--change', type=float, default=DEFAULT_CHANGE_PROBABILITY,
+                        help="probabilidade de troca de janela por tick")
+    parser.add_argument('--no-session', action='store_true', help="heartbeats completos (sem sessão)")
+    parser.add_argument('--format', choices=available_formats(), default='json')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', default='load_fleet.json', help="arquivo JSON do relatório")
+    args = parser.parse_args()
+
+    print(f"🚦 {args.agents} agentes contra {args.url} por {args.duration:.0f}s "
+          f"(intervalo {args.interval:.0f}s, pool {args.connections} conexões)")
+    result = run(args.url, args.agents, args.interval, args.duration, args.connections,
+                 args.startup_window, args.cached, args.outage, args.change, not args.no_session,
+                 args.format, args.seed)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+
+    throughput = result['throughput']
+    print(f"   vazão: média {throughput['mean_rps']} req/s, pico {throughput['peak_rps']} req/s "
+          f"(oferecida: média {throughput['offered_mean_rps']}, pico {throughput['offered_peak_rps']})")
+    print(f"   {result['requests']} requisições, taxa de erro {result['error_rate'] * 100:.2f}%")
+    for kind, stats in result['kinds'].items():
+        latency = stats['latency_ms'] or {}
+        print(f"   {kind:>10}: {stats['requests']} req, erros {stats['error_rate'] * 100:.2f}%, "
+              f"p50 {latency.get('p50')} ms, p99 {latency.get('p99')} ms, máx {latency.get('max')} ms")
+    print(f"   eventos: {result['events']}")
+    print(f"📄 Relatório em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,875 @@
+#!/usr/bin/env python3
+"""
+Servidor Local do Protocolo do Agente (asyncio)
+Substituto do deploy da Vercel para testar e medir o agente sem rede: implementa /api/data,
+/api/commands e /api/websocket como o agente os usa, com o estado em memória:
+    - /api/data: register, heartbeat (sessão com token + delta, sync, registro junto do
+      heartbeat, resumos app_usage por período), heartbeat_batch, activity, app_usage e
+      presence; corpos em JSON ou
+      MessagePack, com ou sem Content-Encoding (anunciados em Accept-Post/Accept-Encoding)
+    - acumulador de minutos com a mesma regra do api/data.js: +1 min por heartbeat, no
+      mínimo 30 s desde o último contado, limite de 16 h por dia; minutos reenviados pelo
+      spool contam no minuto em que foram coletados (minute_tracking)
+    - /api/commands: criação, confirmação, consulta e canal push (SSE, ?stream=1)
+    - /api/websocket: atualização de status (POST) e lista de dispositivos (GET)
+Falhas injetáveis: latência (+ jitter), taxa de erro com status e Retry-After e conexões
+derrubadas sem resposta. O modo gravação (--record) guarda cada requisição em JSON Lines
+(payload decodificado, status, latência e tamanhos) para análise posterior (--summary).
+
+Uso:
+    python3 benchmarks/local_server.py                       # http://127.0.0.1:3000
+    python3 benchmarks/local_server.py --latency 80 --jitter 40 --error-rate 0.02 --record trafego.jsonl
+    python3 benchmarks/local_server.py --summary trafego.jsonl
+    python3 monitor_online.py http://127.0.0.1:3000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import base64
+import hashlib
+import hmac
+import subprocess
+import sys
+import threading
+import time
+import zlib
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from urllib.parse import parse_qsl, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from requests.structures import CaseInsensitiveDict
+
+from body_encoding import available_encodings
+from wire_format import JSON_TYPE, MEDIA_ALIASES, MSGPACK_TYPE, available_formats, decode, media_type
+
+try:
+    import zstandard  # Opcional: corpos zstd
+except ImportError:
+    zstandard = None
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 3000  # mesma porta do vercel dev
+
+MAX_BODY_BYTES = 16 * 1024 * 1024  # corpo recebido e corpo descomprimido
+SESSION_TTL = 24 * 3600
+SESSION_RENEW = SESSION_TTL / 2
+# Sem chave não há sessão (como o api/data.js): nenhum token é emitido nem aceito
+SESSION_SECRET = os.environ.get('WORKTRACK_SESSION_SECRET', '').encode('utf-8') or None
+# Chave dos servidores subidos por spawn() para os benchmarks: a do ambiente ou uma fixa
+SPAWN_SESSION_SECRET = SESSION_SECRET or b'worktrack-bench'
+COMMAND_TTL = 300  # comandos somem depois de 5 min (como api/commands.js)
+STREAM_KEEPALIVE = 15
+STREAM_MAX = 55  # canal SSE encerrado antes do limite da função na Vercel
+DAILY_LIMIT_MINUTES = 960
+MIN_HEARTBEAT_GAP = 30
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 415: 'Unsupported Media Type', 429: 'Too Many Requests',
+           500: 'Internal Server Error', 502: 'Bad Gateway', 503: 'Service Unavailable'}
+
+CLOSE = object()  # Resposta já escrita; fechar a conexão
+
+
+def now_iso():
+    return datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+def today_key(at=None):
+    return datetime.fromtimestamp(at or time.time(), timezone.utc).strftime('%Y-%m-%d')
+
+
+class Faults:
+    """Latência, erros e conexões derrubadas injetados em cada requisição (exceto OPTIONS)"""
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, error_status=503, retry_after=None,
+                 drop_rate=0.0, rng=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.drop_rate = drop_rate
+        self.random = rng or random.Random()
+
+    def delay(self):
+        return max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+
+    def outcome(self):
+        """None = processar normalmente; 'drop' ou status de erro"""
+        roll = self.random.random()
+        if roll < self.drop_rate:
+            return 'drop'
+        if roll < self.drop_rate + self.error_rate:
+            return self.error_status
+        return None
+
+
+class Recorder:
+    """Gravação do tráfego em JSON Lines"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'a', encoding='utf-8')
+        self.lock = threading.Lock()
+
+    def write(self, entry):
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+        with self.lock:
+            self.file.write(line + '\n')
+            self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def _b64url(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def _to_base36(number):
+    digits = ''
+    while True:
+        number, digit = divmod(number, 36)
+        digits = '0123456789abcdefghijklmnopqrstuvwxyz'[digit] + digits
+        if not number:
+            return digits
+
+
+def sign_session(secret, computer_id, metadata_hash, issued_ms):
+    message = f'{computer_id}\n{metadata_hash}\n{issued_ms}'.encode('utf-8')
+    return _b64url(hmac.new(secret, message, hashlib.sha256).digest())[:22]
+
+
+def issue_session_token(computer_id, metadata_hash, now, secret=SESSION_SECRET):
+    """Token assinado como o do api/data.js: computer_id.metadata_hash.emissão (ms, base 36).assinatura;
+    None sem chave"""
+    if not secret:
+        return None
+    metadata_hash = metadata_hash if isinstance(metadata_hash, str) else ''
+    issued_ms = int(now * 1000)
+    return '.'.join((_b64url(str(computer_id).encode('utf-8')), metadata_hash, _to_base36(issued_ms),
+                     sign_session(secret, computer_id, metadata_hash, issued_ms)))
+
+
+def verify_session_token(token, secret=SESSION_SECRET):
+    """{computer_id, metadata_hash, issued_at}; None se adulterado, vencido ou sem chave"""
+    parts = token.split('.') if isinstance(token, str) and secret else []
+    if len(parts) != 4:
+        return None
+    encoded, metadata_hash, issued, signature = parts
+    try:
+        computer_id = base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)).decode('utf-8')
+        issued_ms = int(issued, 36)
+    except ValueError:
+        return None
+    if not computer_id or not hmac.compare_digest(signature, sign_session(secret, computer_id, metadata_hash,
+                                                                          issued_ms)):
+        return None
+    if abs(time.time() - issued_ms / 1000) > SESSION_TTL:
+        return None
+    return {'computer_id': computer_id, 'metadata_hash': metadata_hash, 'issued_at': issued_ms / 1000}
+
+
+class AgentProtocol:
+    """Estado em memória e regras do api/data.js, api/commands.js e api/websocket.js"""
+
+    def __init__(self, heartbeat_interval=0, session_secret=SESSION_SECRET):
+        self.heartbeat_interval = heartbeat_interval
+        self.session_secret = session_secret
+        self.computers = {}  # computer_id -> dados do dispositivo
+        self.activities = defaultdict(list)  # computer_id -> últimas 20 atividades
+        self.accumulator = {}  # (computer_id, dia) -> {'minutes', 'last_activity'}
+        self.last_counted = {}  # computer_id -> instante do último heartbeat contado
+        self.minutes = defaultdict(set)  # computer_id -> minutos (epoch // 60) registrados
+        self.app_usage = defaultdict(dict)  # computer_id -> period_start -> Counter(app -> segundos)
+        self.sessions = {}
+        self.commands = {}
+        self.streams = defaultdict(set)  # computer_id -> filas dos canais SSE abertos
+
+    # Dispositivos e minutos
+
+    def touch(self, data, **fields):
+        computer = self.computers.setdefault(data['computer_id'], {
+            'id': data['computer_id'],
+            'computer_name': 'Computador Desconhecido',
+            'user_name': 'Usuário Desconhecido',
+            'os_info': 'Sistema Desconhecido',
+            'total_time': 0
+        })
+        for field in ('computer_name', 'user_name', 'os_info'):
+            if data.get(field) and data.get(field) != 'undefined':
+                computer[field] = data[field]
+        computer.update(fields, last_seen=time.time(), status='online')
+        return computer
+
+    def remember_activity(self, computer_id, activity, window):
+        history = self.activities[computer_id]
+        history.append({'timestamp': now_iso(), 'activity': activity, 'window': window})
+        del history[:-20]
+
+    def count_heartbeat(self, computer_id, activity):
+        """processHeartbeat: +1 min por heartbeat, ao menos 30 s desde o último contado, até 16 h/dia"""
+        now = time.time()
+        accumulator = self.accumulator.setdefault((computer_id, today_key(now)),
+                                                  {'minutes': 0, 'last_activity': None})
+        last = self.last_counted.get(computer_id)
+        if last is not None:
+            if accumulator['minutes'] >= DAILY_LIMIT_MINUTES or now - last < MIN_HEARTBEAT_GAP:
+                return False
+        accumulator['minutes'] += 1
+        accumulator['last_activity'] = activity
+        self.last_counted[computer_id] = now
+        return True
+
+    def track_minute(self, computer_id, at=None):
+        """saveMinuteTracking: um registro por minuto de relógio"""
+        self.minutes[computer_id].add(int((at or time.time()) // 60))
+
+    def today_minutes(self, computer_id):
+        start = int(datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0).timestamp() // 60)
+        return sum(1 for minute in self.minutes.get(computer_id, ()) if minute >= start)
+
+    # Sessões
+
+    def open_session(self, data):
+        """Token da sessão aberta no registro; None (resposta sem session) sem chave"""
+        if not self.session_secret:
+            return None
+        now = time.time()
+        self.prune_sessions(now)
+        self.sessions[data.get('computer_id')] = {
+            'computer_name': data.get('computer_name'),
+            'user_name': data.get('user_name'),
+            'os_info': data.get('os_info'),
+            'state': {},
+            'seq': 0,
+            'last_used': now
+        }
+        return issue_session_token(data.get('computer_id'), data.get('metadata_hash'), now, self.session_secret)
+
+    def prune_sessions(self, now):
+        for computer_id in [k for k, s in self.sessions.items() if now - s['last_used'] > SESSION_TTL]:
+            del self.sessions[computer_id]
+
+    def expand_session(self, data):
+        """Heartbeat compacto -> (heartbeat completo, token renovado); None se o token é inválido,
+        venceu ou é de um registro com outros metadados; (None, None) para um delta sobre um estado
+        que o servidor não tem (não processado: resync)"""
+        claims = verify_session_token(data['session'], self.session_secret)
+        computer = claims and self.computers.get(claims['computer_id'])
+        if not claims or (computer and isinstance(computer.get('metadata_hash'), str)
+                          and computer['metadata_hash'] != claims['metadata_hash']):
+            return None
+
+        now = time.time()
+        session = self.sessions.get(claims['computer_id'])
+        if session is None:
+            # Token de antes de reiniciar: identidade do cache de dispositivos; só o completo é aceito
+            known = computer or {}
+            session = {field: known.get(field) for field in ('computer_name', 'user_name', 'os_info')}
+            session.update(state={}, seq=None)
+            self.sessions[claims['computer_id']] = session
+        session['last_used'] = now
+
+        fields = {k: v for k, v in data.items()
+                  if k not in ('session', 'seq', 'base', 'sync', 'register', 'app_usage')}
+        base = data.get('base')
+        if base is not None and base != session['seq']:
+            return None, None
+        session['state'] = fields if base is None else dict(session['state'], **fields)
+        if isinstance(data.get('seq'), int):
+            session['seq'] = data['seq']
+        expanded = dict(session['state'], computer_id=claims['computer_id'],
+                        computer_name=session['computer_name'], user_name=session['user_name'],
+                        os_info=session['os_info'])
+        for flag in ('sync', 'app_usage'):
+            if flag in data:
+                expanded[flag] = data[flag]
+        renewed = None
+        if now - claims['issued_at'] > SESSION_RENEW:
+            renewed = issue_session_token(claims['computer_id'], claims['metadata_hash'], now, self.session_secret)
+        return expanded, renewed
+
+    # Comandos
+
+    def expire_commands(self):
+        now = time.time()
+        for command_id in [k for k, c in self.commands.items() if now - c['created'] > COMMAND_TTL]:
+            del self.commands[command_id]
+
+    def take_commands(self, computer_id):
+        self.expire_commands()
+        taken = []
+        for command in self.commands.values():
+            if command['computer_id'] == computer_id and command['status'] == 'pending':
+                command['status'] = 'sent'
+                taken.append(self.public_command(command))
+        return taken
+
+    @staticmethod
+    def public_command(command):
+        return {k: v for k, v in command.items() if k != 'created'}
+
+    def create_command(self, computer_id, action):
+        command = {'id': f'{computer_id}-{int(time.time() * 1000)}', 'computer_id': computer_id,
+                   'action': action, 'timestamp': now_iso(), 'status': 'pending', 'created': time.time()}
+        self.commands[command['id']] = command
+        pushed = False
+        for queue in self.streams.get(computer_id, ()):
+            queue.put_nowait(self.public_command(command))
+            pushed = True
+        if pushed:
+            command['status'] = 'sent'
+        return command, pushed
+
+    # /api/data
+
+    def sync(self, data):
+        return {'sync': True, 'commands': self.take_commands(data['computer_id'])}
+
+    def heartbeat(self, data):
+        if data.get('replayed') and data.get('captured_at'):
+            return self.replayed(data)
+        activity = data.get('current_activity') or 'Ativo'
+        self.count_heartbeat(data['computer_id'], activity)
+        self.track_minute(data['computer_id'])
+        self.touch(data, current_activity=activity, active_window=data.get('active_window'),
+                   total_time=self.today_minutes(data['computer_id']))
+        self.remember_activity(data['computer_id'], activity, data.get('active_window'))
+        return True
+
+    def replayed(self, data):
+        captured_at = data.get('captured_at')
+        if not isinstance(captured_at, (int, float)) or captured_at > time.time():
+            return False
+        self.track_minute(data['computer_id'], captured_at)
+        return True
+
+    def register(self, data):
+        self.touch(data, metadata=data.get('metadata') or {}, metadata_hash=data.get('metadata_hash'))
+
+    def batch(self, data):
+        samples = data.get('samples') if isinstance(data.get('samples'), list) else []
+        accepted = sum(1 for sample in samples
+                       if isinstance(sample, dict)
+                       and self.replayed({'computer_id': data['computer_id'],
+                                          'captured_at': sample.get('captured_at')}))
+        if samples and not data.get('replayed') and isinstance(samples[-1], dict):
+            latest = samples[-1]
+            self.touch(data, current_activity=latest.get('current_activity') or 'Ativo',
+                       active_window=latest.get('active_window'))
+        return {'accepted': accepted}
+
+    def activity(self, data):
+        if data.get('increment_minutes') and data.get('day_date'):
+            accumulator = self.accumulator.setdefault((data['computer_id'], data['day_date']),
+                                                      {'minutes': 0, 'last_activity': None})
+            accumulator['minutes'] += data['increment_minutes']
+            accumulator['last_activity'] = data.get('current_activity')
+            total = accumulator['minutes']
+        else:
+            total = data.get('total_minutes') or 0
+        self.touch(data, current_activity=data.get('current_activity'),
+                   active_window=data.get('active_window'), total_time=total)
+        self.remember_activity(data['computer_id'], data.get('current_activity'), data.get('active_window'))
+
+    def usage(self, computer_id, periods):
+        """Resumos app_usage por período (reenvio sobrescreve, como o upsert do dao.js): period_start aceitos"""
+        accepted = []
+        for period in periods if isinstance(periods, list) else []:
+            period_start = period.get('period_start') if isinstance(period, dict) else None
+            if not isinstance(period_start, (int, float)) or period_start <= 0:
+                continue
+            counter = Counter()
+            for row in period.get('usage') or []:
+                if isinstance(row, list) and len(row) >= 3 and row[0] and isinstance(row[2], (int, float)) and row[2] > 0:
+                    counter[row[0]] += round(row[2])
+            self.app_usage[computer_id][period_start] = counter
+            accepted.append(period_start)
+        return accepted
+
+    def presence(self, data):
+        computer = self.computers.get(data['computer_id'])
+        if computer:
+            computer.update(status='online', last_seen=time.time(), current_activity='Ativo')
+        return {'accepted': True}
+
+    def post_data(self, data):
+        """(status, resposta) de um POST /api/data já decodificado"""
+        result = {}
+        if data.get('type') == 'heartbeat' and data.get('session'):
+            expanded = self.expand_session(data)
+            if expanded is None:
+                return 200, {'success': False, 'session_expired': True, 'timestamp': now_iso()}
+            data, renewed = expanded
+            if data is None:
+                return 200, {'success': False, 'resync': True, 'timestamp': now_iso()}
+            if renewed:
+                result['session'] = renewed
+        kind = data.get('type')
+        if kind in ('register', 'heartbeat', 'heartbeat_batch', 'activity', 'app_usage', 'presence') \
+                and not data.get('computer_id'):
+            return 400, {'success': False, 'error': 'computer_id é obrigatório'}
+
+        if kind == 'register':
+            self.register(data)
+            result['session'] = self.open_session(data)
+        elif kind == 'heartbeat':
+            self.heartbeat(data)
+            if data.get('sync'):
+                result.update(self.sync(data))
+            if data.get('app_usage'):
+                result['app_usage_accepted'] = self.usage(data['computer_id'], data['app_usage'])
+            if data.get('register'):
+                self.register(data)
+                result['registered'] = True
+                result['session'] = self.open_session(data)
+        elif kind == 'heartbeat_batch':
+            result = self.batch(data)
+            if data.get('sync') and not data.get('replayed'):
+                result.update(self.sync(data))
+            if data.get('app_usage'):
+                result['app_usage_accepted'] = self.usage(data['computer_id'], data['app_usage'])
+            if data.get('register') and not data.get('replayed'):
+                self.register(data)
+                result['registered'] = True
+                result['session'] = self.open_session(data)
+        elif kind == 'activity':
+            self.activity(data)
+        elif kind == 'app_usage':
+            result['app_usage_accepted'] = self.usage(data['computer_id'], data.get('app_usage'))
+        elif kind == 'presence':
+            result = self.presence(data)
+
+        if self.heartbeat_interval > 0:
+            result['heartbeat_interval'] = self.heartbeat_interval
+        return 200, dict({'success': True, 'message': 'Dados recebidos (servidor local)',
+                          'timestamp': now_iso()}, **result)
+
+    def devices(self):
+        now = time.time()
+        devices = []
+        for computer_id, computer in self.computers.items():
+            minutes = self.today_minutes(computer_id)
+            accumulator = self.accumulator.get((computer_id, today_key(now)), {'minutes': 0})
+            devices.append({
+                'id': computer_id,
+                'name': computer['computer_name'],
+                'user_name': computer['user_name'],
+                'os_info': computer['os_info'],
+                'is_online': now - computer['last_seen'] < 300,
+                'current_activity': computer.get('current_activity', 'Ativo'),
+                'today_minutes': minutes,
+                'today_formatted': f'{minutes // 60}h {minutes % 60}m',
+                'accumulator_minutes': accumulator['minutes'],
+                'metadata': computer.get('metadata') or {}
+            })
+        return devices
+
+    def get_data(self, query):
+        if query.get('commands') == 'true':
+            return 200, {'success': True, 'commands': []}
+        if query.get('app_usage') == 'true' and query.get('computer_id'):
+            usage = sum(self.app_usage.get(query['computer_id'], {}).values(), Counter())
+            return 200, {'success': True, 'computer_id': query['computer_id'],
+                         'usage': [{'app': app, 'seconds': seconds} for app, seconds in usage.most_common()]}
+        devices = self.devices()
+        online = sum(1 for device in devices if device['is_online'])
+        total = sum(device['today_minutes'] for device in devices)
+        return 200, {
+            'success': True,
+            'computers': devices,
+            'stats': {'total_computers': len(devices), 'online_computers': online,
+                      'offline_computers': len(devices) - online,
+                      'total_hours': round(total / 60, 2), 'total_minutes_unified': total},
+            'activities': dict(self.activities),
+            'timestamp': now_iso(),
+            'source': 'servidor local (memória)'
+        }
+
+    # /api/commands e /api/websocket
+
+    def post_commands(self, body):
+        if body.get('command_id') and body.get('status'):
+            command = self.commands.get(body['command_id'])
+            if command:
+                command.update(status=body['status'], acknowledged_at=now_iso())
+            return 200, {'success': True, 'acknowledged': command is not None}
+        if not body.get('computer_id') or not body.get('action'):
+            return 400, {'success': False, 'error': 'computer_id e action são obrigatórios'}
+        command, pushed = self.create_command(body['computer_id'], body['action'])
+        return 200, {'success': True, 'command_id': command['id'], 'pushed': pushed,
+                     'message': f"Comando {body['action']} criado para {body['computer_id']}"}
+
+    def get_commands(self, query):
+        if not query.get('computer_id'):
+            self.expire_commands()
+            return 200, {'success': True, 'commands': [self.public_command(c) for c in self.commands.values()]}
+        return 200, {'success': True, 'commands': self.take_commands(query['computer_id'])}
+
+    def post_websocket(self, body):
+        if body.get('type') != 'heartbeat':
+            return 400, {'success': False, 'error': 'Tipo de dados não suportado'}
+        if body.get('computer_id'):
+            self.touch(body)
+        return 200, {'success': True, 'message': 'Status atualizado', 'timestamp': now_iso()}
+
+    def get_websocket(self):
+        devices = self.devices()
+        online = sum(1 for device in devices if device['is_online'])
+        return 200, {'success': True, 'devices': devices, 'total_devices': len(devices),
+                     'online_devices': online, 'offline_devices': len(devices) - online,
+                     'timestamp': now_iso()}
+
+
+class LocalServer:
+    """Servidor HTTP/1.1 keep-alive (asyncio) com o protocolo, as falhas e a gravação"""
+
+    def __init__(self, protocol=None, faults=None, recorder=None, verbose=False):
+        self.protocol = protocol or AgentProtocol()
+        self.faults = faults or Faults()
+        self.recorder = recorder
+        self.verbose = verbose
+        self.server = None
+        self.loop = None
+
+        # Contadores
+        self.requests = Counter()  # (método, caminho, status)
+        self.connections = 0
+        self.dropped = 0
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.loop = asyncio.get_running_loop()
+        self.server = await asyncio.start_server(self.handle_connection, host, port,
+                                                 limit=64 * 1024, backlog=1024)
+        return f'http://{host}:{self.server.sockets[0].getsockname()[1]}'
+
+    def start_in_thread(self, host=DEFAULT_HOST, port=0):
+        """Rodar em uma thread com event loop próprio (benchmarks no mesmo processo); devolve a URL"""
+        ready = threading.Event()
+        result = {}
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            result['url'] = loop.run_until_complete(self.start(host, port))
+            ready.set()
+            loop.run_forever()
+
+        threading.Thread(target=run, name='local-server', daemon=True).start()
+        ready.wait()
+        return result['url']
+
+    def close(self):
+        if self.server is not None and self.loop is not None:
+            self.loop.call_soon_threadsafe(self.server.close)
+        if self.recorder is not None:
+            self.recorder.close()
+
+    async def handle_connection(self, reader, writer):
+        self.connections += 1
+        connection = self.connections
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                request_line, *header_lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, _ = request_line.split(' ', 2)
+                except ValueError:
+                    break
+                headers = CaseInsensitiveDict()
+                for line in header_lines:
+                    if ':' in line:
+                        name, value = line.split(':', 1)
+                        headers[name.strip()] = value.strip()
+
+                length = int(headers.get('Content-Length') or 0)
+                if length > MAX_BODY_BYTES:
+                    self.write(writer, 413, {'success': False, 'error': 'Corpo grande demais'}, close=True)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                outcome = await self.respond(method, target, headers, body, writer, (connection, len(head)))
+                await writer.drain()
+                if outcome is CLOSE or headers.get('Connection', '').lower() == 'close':
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, method, target, headers, body, writer, wire):
+        """Responder uma requisição; wire = (conexão, bytes do cabeçalho) para a gravação"""
+        started = time.perf_counter()
+        parts = urlsplit(target)
+        path = parts.path.rstrip('/') or '/'
+        query = dict(parse_qsl(parts.query))
+
+        if method == 'OPTIONS':
+            sent = self.write(writer, 200, None)
+            self.requests[(method, path, 200)] += 1
+            if self.recorder is not None:
+                self.record(method, path, query, headers, body, None, 200, None, started, wire, sent)
+            return None
+
+        fault = self.faults.outcome()
+        delay = self.faults.delay()
+        if delay:
+            await asyncio.sleep(delay)
+        payload, error = None, None
+        if method == 'POST' and fault is None:
+            payload, error = self.read_body(headers, body)
+
+        stream = False
+        if fault == 'drop':
+            self.dropped += 1
+            status, response = None, None
+        elif fault is not None:
+            status, response = fault, {'success': False, 'error': 'Falha injetada (servidor local)'}
+        elif error is not None:
+            status, response = error
+        else:
+            stream = path == '/api/commands' and method == 'GET' and query.get('stream') and query.get('computer_id')
+            status, response = (200, None) if stream else self.route(method, path, query, payload)
+
+        self.requests[(method, path, status)] += 1
+        if self.verbose:
+            kind = payload.get('type') if isinstance(payload, dict) else ''
+            print(f"{method} {path} {kind} -> {status or 'derrubada'} "
+                  f"({(time.perf_counter() - started) * 1000:.1f}ms)")
+
+        sent = 0
+        if status is not None and not stream:
+            extra = {}
+            if status in (429, 503) and self.faults.retry_after is not None:
+                extra['Retry-After'] = str(self.faults.retry_after)
+            sent = self.write(writer, status, response, extra)
+        if self.recorder is not None:
+            self.record(method, path, query, headers, body, payload, status, response, started, wire, sent)
+        if stream:
+            await self.stream_commands(writer, query['computer_id'])
+        return CLOSE if status is None or stream else None
+
+    def read_body(self, headers, body):
+        """(payload, None) ou (None, (status, resposta)) - mesmas regras do readRequestBody"""
+        encoding = headers.get('Content-Encoding', 'identity').strip().lower()
+        media = headers.get('Content-Type', JSON_TYPE).split(';')[0].strip().lower()
+        try:
+            if encoding == 'gzip':
+                decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                body = decompressor.decompress(body, MAX_BODY_BYTES)
+                if decompressor.unconsumed_tail:
+                    raise ValueError('corpo descomprimido grande demais')
+            elif encoding == 'zstd' and zstandard is not None:
+                body = zstandard.ZstdDecompressor().decompress(body, max_output_size=MAX_BODY_BYTES)
+            elif encoding != 'identity':
+                raise LookupError(encoding)
+            if media == MSGPACK_TYPE or media in MEDIA_ALIASES:
+                if 'msgpack' not in available_formats():
+                    raise LookupError(media)
+                payload = decode(body, media)
+            else:
+                payload = json.loads(body or b'{}')
+        except LookupError:
+            return None, (415, {'success': False, 'error': 'Content-Type ou Content-Encoding não suportado'})
+        except Exception as e:
+            return None, (400, {'success': False, 'error': f'Corpo inválido: {e}'})
+        if not isinstance(payload, dict):
+            return None, (400, {'success': False, 'error': 'Corpo deve ser um objeto'})
+        return payload, None
+
+    def route(self, method, path, query, payload):
+        protocol = self.protocol
+        if path == '/api/data':
+            if method == 'POST':
+                return protocol.post_data(payload)
+            if method == 'GET':
+                return protocol.get_data(query)
+        elif path == '/api/commands':
+            if method == 'POST':
+                return protocol.post_commands(payload)
+            if method == 'GET':
+                return protocol.get_commands(query)
+        elif path == '/api/websocket':
+            if method == 'POST':
+                return protocol.post_websocket(payload)
+            if method == 'GET':
+                return protocol.get_websocket()
+        else:
+            return 404, {'success': False, 'error': 'Endpoint não encontrado'}
+        return 405, {'success': False, 'error': 'Método não permitido'}
+
+    def write(self, writer, status, payload, extra=None, close=False):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8') if payload is not None else b''
+        headers = {
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Methods': 'POST, GET, OPTIONS',
+            'Access-Control-Allow-Headers': 'Content-Type, Content-Encoding',
+            'Accept-Encoding': ', '.join(available_encodings()),
+            'Accept-Post': ', '.join(media_type(fmt) for fmt in available_formats()),
+            'Content-Length': str(len(body)),
+            'Connection': 'close' if close else 'keep-alive'
+        }
+        if payload is not None:
+            headers['Content-Type'] = 'application/json; charset=utf-8'
+        headers.update(extra or {})
+        head = [f'HTTP/1.1 {status} {REASONS.get(status, "")}'] + [f'{k}: {v}' for k, v in headers.items()]
+        data = ('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body
+        writer.write(data)
+        return len(data)
+
+    async def stream_commands(self, writer, computer_id):
+        """Canal SSE: comandos pendentes, depois os novos; keepalive e fim após STREAM_MAX"""
+        writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n'
+                     b'Cache-Control: no-cache, no-transform\r\nTransfer-Encoding: chunked\r\n'
+                     b'Connection: close\r\n\r\n' + chunk('retry: 3000\n\n'))
+        queue = asyncio.Queue()
+        for command in self.protocol.take_commands(computer_id):
+            queue.put_nowait(command)
+        subscribers = self.protocol.streams[computer_id]
+        subscribers.add(queue)
+        deadline = time.monotonic() + STREAM_MAX
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    command = await asyncio.wait_for(queue.get(), min(STREAM_KEEPALIVE, remaining))
+                    event = f"id: {command['id']}\nevent: command\ndata: {json.dumps(command)}\n\n"
+                except asyncio.TimeoutError:
+                    event = ': ping\n\n'
+                writer.write(chunk(event))
+                await writer.drain()
+            writer.write(b'0\r\n\r\n')
+        except ConnectionError:
+            pass
+        finally:
+            subscribers.discard(queue)
+            if not subscribers:
+                self.protocol.streams.pop(computer_id, None)
+
+    def record(self, method, path, query, headers, body, payload, status, response, started, wire, sent):
+        connection, head_bytes = wire
+        self.recorder.write({
+            'at': time.time(),
+            'connection': connection,
+            'method': method,
+            'path': path,
+            'query': query,
+            'content_type': headers.get('Content-Type'),
+            'content_encoding': headers.get('Content-Encoding'),
+            'user_agent': headers.get('User-Agent'),
+            'request_bytes': len(body),
+            'wire_bytes': head_bytes + len(body),  # Cabeçalho + corpo recebidos
+            'response_bytes': sent,  # Resposta inteira (0 no canal SSE e nas conexões derrubadas)
+            'payload': payload,
+            'status': status,
+            'response': response,
+            'latency_ms': round((time.perf_counter() - started) * 1000, 2)
+        })
+
+
+def chunk(text):
+    """Bloco do Transfer-Encoding: chunked (eventos do SSE saem assim que escritos)"""
+    data = text.encode('utf-8')
+    return b'%x\r\n%s\r\n' % (len(data), data)
+
+
+def spawn(*options):
+    """Subir o servidor em outro processo (não conta no CPU nem nas trocas de contexto de quem
+    mede): (processo, URL); encerrar com process.terminate()"""
+    process = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--port', '0',
+                                '--session-secret', SPAWN_SESSION_SECRET.decode('utf-8'), *map(str, options)],
+                               stdout=subprocess.PIPE, text=True)
+    return process, process.stdout.readline().split()[-1]  # "🌐 Servidor local em <url>"
+
+
+def load_recording(path):
+    """Entradas gravadas por --record"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def summarize(entries):
+    """Requisições por endpoint/tipo, status, bytes (corpo e no fio) e latência de uma gravação"""
+    groups = defaultdict(list)
+    for entry in entries:
+        payload = entry.get('payload') or {}
+        groups[(entry['method'], entry['path'], payload.get('type', ''))].append(entry)
+    summary = {}
+    for (method, path, kind), items in sorted(groups.items()):
+        latencies = sorted(item['latency_ms'] for item in items)
+        summary[f'{method} {path} {kind}'.strip()] = {
+            'requests': len(items),
+            'status': dict(Counter(str(item['status']) for item in items)),
+            'bytes': sum(item['request_bytes'] for item in items),
+            'wire_bytes': sum(item['wire_bytes'] for item in items),
+            'formats': dict(Counter(f"{item.get('content_type')}|{item.get('content_encoding') or '-'}"
+                                    for item in items)),
+            'latency_p50_ms': latencies[len(latencies) // 2],
+            'latency_max_ms': latencies[-1]
+        }
+    span = entries[-1]['at'] - entries[0]['at'] if len(entries) > 1 else 0
+    return {'requests': len(entries), 'seconds': round(span, 1),
+            'connections': len({entry['connection'] for entry in entries}),
+            'wire_bytes_in': sum(entry['wire_bytes'] for entry in entries),
+            'wire_bytes_out': sum(entry['response_bytes'] for entry in entries),
+            'groups': summary}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local do protocolo do agente")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="0 = porta livre")
+    parser.add_argument('--latency', type=float, default=0, help="latência injetada (ms)")
+    parser.add_argument('--jitter', type=float, default=0, help="variação da latência (± ms)")
+    parser.add_argument('--error-rate', type=float, default=0, help="fração de respostas com erro")
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--retry-after', type=int, default=None, help="Retry-After (s) em 429/503")
+    parser.add_argument('--drop-rate', type=float, default=0, help="fração de conexões derrubadas sem resposta")
+    parser.add_argument('--heartbeat-interval', type=int, default=0, help="dica heartbeat_interval (s)")
+    parser.add_argument('--session-secret', default=os.environ.get('WORKTRACK_SESSION_SECRET', ''),
+                        help="chave dos tokens de sessão (vazia = sem sessão)")
+    parser.add_argument('--record', help="gravar o tráfego neste arquivo JSON Lines")
+    parser.add_argument('--summary', help="resumir uma gravação e sair")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--verbose', action='store_true', help="uma linha por requisição")
+    args = parser.parse_args()
+
+    if args.summary:
+        print(json.dumps(summarize(load_recording(args.summary)), indent=2, ensure_ascii=False))
+        return
+
+    faults = Faults(args.latency / 1000, args.jitter / 1000, args.error_rate, args.error_status,
+                    args.retry_after, args.drop_rate, random.Random(args.seed))
+    protocol = AgentProtocol(args.heartbeat_interval, args.session_secret.encode('utf-8') or None)
+    server = LocalServer(protocol, faults, Recorder(args.record) if args.record else None, args.verbose)
+
+    async def serve():
+        url = await server.start(args.host, args.port)
+        print(f"🌐 Servidor local em {url}", flush=True)
+        async with server.server:
+            await server.server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if server.recorder is not None:
+            server.recorder.close()
+        total = sum(server.requests.values())
+        print(f"\n🛑 {total} requisições, {server.dropped} derrubadas, "
+              f"{len(server.protocol.computers)} dispositivos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Compressão do Corpo das Requisições
+Lotes, reenvios do spool e resumos app_usage são JSON muito repetitivo (os mesmos
+aplicativos e títulos de janela); comprimidos ocupam uma fração dos bytes em links móveis.
+
+- Só corpos a partir de min_size bytes são comprimidos (heartbeats pequenos vão como estão)
+- gzip sempre disponível; zstd se o pacote opcional zstandard estiver instalado
+- Só comprime para codificações que o servidor anunciou no cabeçalho Accept-Encoding das
+  respostas (RFC 7694); servidor antigo (sem o cabeçalho) continua recebendo JSON puro
+- Corpo comprimido vai como application/octet-stream + Content-Encoding: o parser da Vercel
+  entrega o Buffer cru ao handler, que descomprime e lê o JSON
+"""
+
+import gzip
+import time
+
+try:
+    import zstandard  # Opcional: zstd (mais rápido e compacto que gzip)
+except ImportError:
+    zstandard = None
+
+DEFAULT_MIN_SIZE = 1024  # bytes
+DEFAULT_GZIP_LEVEL = 6
+DEFAULT_ZSTD_LEVEL = 3
+
+# Ordem de preferência entre as codificações aceitas pelo servidor
+PREFERENCE = ('zstd', 'gzip')
+
+
+def available_encodings():
+    """Codificações que o agente consegue produzir"""
+    return ('zstd', 'gzip') if zstandard is not None else ('gzip',)
+
+
+def parse_accept_encoding(value):
+    """Codificações do cabeçalho Accept-Encoding (q=0 exclui)"""
+    encodings = set()
+    for item in (value or '').split(','):
+        name, _, params = item.partition(';')
+        name = name.strip().lower()
+        key, _, weight = params.partition('=')
+        try:
+            excluded = key.strip().lower() == 'q' and float(weight) == 0
+        except ValueError:
+            excluded = False
+        if name and not excluded:
+            encodings.add(name)
+    return encodings
+
+
+class BodyEncoder:
+    def __init__(self, min_size=DEFAULT_MIN_SIZE, gzip_level=DEFAULT_GZIP_LEVEL,
+                 zstd_level=DEFAULT_ZSTD_LEVEL, encodings=PREFERENCE):
+        self.min_size = max(0, int(min_size))
+        self.gzip_level = gzip_level
+        self.zstd_level = zstd_level
+        self.encodings = [e for e in encodings if e in available_encodings()]
+        self._zstd = zstandard.ZstdCompressor(level=zstd_level) if zstandard is not None else None
+
+        # Contadores
+        self.compressed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_seconds = 0.0
+        self.rejected = 0  # Servidor respondeu 415 a um corpo comprimido
+
+    @classmethod
+    def from_config(cls, config):
+        """Criar a partir da seção compression do device_config.json (None se desativada)"""
+        config = config or {}
+        if config.get('enabled') is False:
+            return None
+        return cls(min_size=config.get('min_size', DEFAULT_MIN_SIZE),
+                   gzip_level=config.get('gzip_level', DEFAULT_GZIP_LEVEL),
+                   zstd_level=config.get('zstd_level', DEFAULT_ZSTD_LEVEL),
+                   encodings=config.get('encodings', PREFERENCE))
+
+    def choose(self, accepted):
+        """Melhor codificação aceita pelo servidor (None = sem compressão)"""
+        for encoding in self.encodings:
+            if encoding in accepted:
+                return encoding
+        return None
+
+    def compress(self, body, encoding):
+        if encoding == 'zstd':
+            return self._zstd.compress(body)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    def encode(self, body, accepted):
+        """(corpo, codificação) para enviar; codificação None se não compensa comprimir"""
+        if len(body) < self.min_size:
+            return body, None
+        encoding = self.choose(accepted)
+        if encoding is None:
+            return body, None
+
+        started = time.thread_time()
+        data = self.compress(body, encoding)
+        elapsed = time.thread_time() - started
+        if len(data) >= len(body):
+            return body, None
+
+        self.compressed += 1
+        self.bytes_in += len(body)
+        self.bytes_out += len(data)
+        self.cpu_seconds += elapsed
+        return data, encoding
+
+    def stats(self):
+        return {
+            'compressed': self.compressed,
+            'ratio': round(self.bytes_in / self.bytes_out, 2) if self.bytes_out else None,
+            'bytes_saved': self.bytes_in - self.bytes_out,
+            'cpu_ms': round(self.cpu_seconds * 1000, 1),
+            'rejected': self.rejected
+        }
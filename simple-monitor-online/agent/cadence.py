@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Cadência Adaptativa de Envio
+A janela ativa continua sendo amostrada a cada minuto; a cadência decide quando as
+amostras são enviadas:
+    - atividade estável estica o intervalo (até max_interval; opcional, ver OFFLINE_WINDOW)
+    - troca de atividade volta para min_interval e envia na hora
+    - HTTP 429/503 (Retry-After) e a dica heartbeat_interval do servidor impõem um piso
+    - falha sem Retry-After: backoff exponencial com jitter total (a frota não volta junta)
+O intervalo pela atividade fica entre min_interval e max_interval. Esperas impostas pelo
+servidor (Retry-After, heartbeat_interval) e o backoff não passam por esse limite: valem como
+vieram, até o teto próprio max_server_wait
+"""
+
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+# Intervalo entre ticks do monitor (amostra da janela + envio)
+TICK_SECONDS = 60
+DEFAULT_MIN_INTERVAL = TICK_SECONDS
+
+# O painel (api/websocket.js) marca o dispositivo offline sem heartbeat há 90s. Com ticks de
+# 60s, qualquer intervalo acima de um tick vira 120s entre envios: por padrão o intervalo não
+# estica, e um max_interval maior é opcional (com a janela de offline do servidor ajustada).
+# Mesma janela usada para limitar o lote de heartbeats (batching.py)
+OFFLINE_WINDOW = 90
+DEFAULT_MAX_INTERVAL = DEFAULT_MIN_INTERVAL
+DEFAULT_GROWTH = 1.5
+DEFAULT_STEADY_TICKS = 3  # amostras com a mesma atividade antes de esticar o intervalo
+
+# Teto das esperas impostas pelo servidor e do backoff (independente de max_interval)
+MAX_SERVER_WAIT = 3600
+
+# Folga para o jitter do loop de 60s (um envio "devido" em 119.8s não espera mais um tick)
+DUE_TOLERANCE = 2
+
+RETRY_STATUSES = (429, 503)
+
+
+def parse_retry_after(value, now=None):
+    """Retry-After em segundos (número ou data HTTP); None se ausente/inválido"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - (now or time.time()))
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class AdaptiveCadence:
+    def __init__(self, min_interval=DEFAULT_MIN_INTERVAL, max_interval=DEFAULT_MAX_INTERVAL,
+                 growth=DEFAULT_GROWTH, steady_ticks=DEFAULT_STEADY_TICKS, max_server_wait=MAX_SERVER_WAIT,
+                 rng=None):
+        self.min_interval = max(1, float(min_interval))
+        self.max_interval = max(self.min_interval, float(max_interval))
+        self.max_server_wait = max(self.max_interval, float(max_server_wait))
+        self.growth = max(1.0, float(growth))
+        self.steady_ticks = max(1, int(steady_ticks))
+
+        self.interval = self.min_interval  # Intervalo pela atividade
+        self.server_floor = 0  # Dica heartbeat_interval do servidor (até max_server_wait)
+        self.blocked_until = 0  # 429/503: nenhum envio antes disso
+        self.last_upload = 0
+        self.last_activity = None
+        self.steady = 0
+        self.transition = False  # Troca de atividade: enviar no próximo tick
+        self.tolerance = DUE_TOLERANCE
+        self.failures = 0  # Falhas seguidas sem Retry-After (expoente do backoff)
+        self.random = rng or random.Random()
+
+        self.throttled = 0  # Respostas 429/503 recebidas
+
+    @classmethod
+    def from_config(cls, config):
+        """Criar a partir da seção cadence do device_config.json (intervalo fixo se desativada)"""
+        config = config or {}
+        if config.get('enabled') is False:
+            return cls(min_interval=DEFAULT_MIN_INTERVAL, max_interval=DEFAULT_MIN_INTERVAL,
+                       max_server_wait=config.get('max_server_wait', MAX_SERVER_WAIT))
+        if config.get('max_interval', DEFAULT_MAX_INTERVAL) > OFFLINE_WINDOW:
+            print(f"⚠️ cadence.max_interval acima de {OFFLINE_WINDOW}s: o painel pode mostrar o "
+                  f"dispositivo offline entre os envios")
+        return cls(min_interval=config.get('min_interval', DEFAULT_MIN_INTERVAL),
+                   max_interval=config.get('max_interval', DEFAULT_MAX_INTERVAL),
+                   growth=config.get('growth', DEFAULT_GROWTH),
+                   steady_ticks=config.get('steady_ticks', DEFAULT_STEADY_TICKS),
+                   max_server_wait=config.get('max_server_wait', MAX_SERVER_WAIT))
+
+    def clamp(self, seconds):
+        """Intervalo pela atividade: entre min_interval e max_interval"""
+        return min(self.max_interval, max(self.min_interval, seconds))
+
+    def server_wait(self, seconds):
+        """Espera imposta pelo servidor ou backoff: só o teto max_server_wait"""
+        return min(self.max_server_wait, max(0.0, seconds))
+
+    def current_interval(self):
+        """Intervalo efetivo entre envios (telemetria)"""
+        return round(max(self.clamp(self.interval), self.server_floor))
+
+    def observe(self, activity):
+        """Registrar a atividade da amostra: estável estica, troca encurta"""
+        if activity != self.last_activity:
+            if self.last_activity is not None:
+                self.transition = True
+            self.last_activity = activity
+            self.steady = 0
+            self.interval = self.min_interval
+            return
+
+        self.steady += 1
+        if self.steady >= self.steady_ticks:
+            self.interval = self.clamp(self.interval * self.growth)
+
+    def reset(self):
+        """Voltar ao intervalo mínimo (ex.: usuário retornou após ociosidade)"""
+        self.interval = self.min_interval
+        self.steady = 0
+        self.transition = True
+
+    def blocked(self, now=None):
+        return (now or time.time()) < self.blocked_until
+
+    def due(self, now=None):
+        """Envio devido agora? (troca de atividade ou intervalo efetivo cumprido; a troca não
+        fura o piso do servidor)"""
+        now = now or time.time()
+        if self.blocked(now):
+            return False
+        if self.transition and now - self.last_upload >= self.server_floor - self.tolerance:
+            return True
+        return now - self.last_upload >= self.current_interval() - self.tolerance
+
+    def uploaded(self, now=None):
+        self.last_upload = now or time.time()
+        self.transition = False
+
+    def on_response(self, response, now=None):
+        """Aplicar 429/503 + Retry-After ou a dica heartbeat_interval de uma resposta (None = falha de rede)"""
+        now = now or time.time()
+
+        if response is None or response.status_code in RETRY_STATUSES:
+            if response is not None:
+                self.throttled += 1
+                retry_after = parse_retry_after(response.headers.get('Retry-After'), now)
+            else:
+                retry_after = None
+            if retry_after is None:
+                # Sem Retry-After: backoff exponencial com jitter total
+                self.failures += 1
+                retry_after = self.random.uniform(
+                    0, self.server_wait(self.min_interval * 2 ** min(self.failures, 10)))
+            self.blocked_until = now + self.server_wait(retry_after)
+            return
+
+        if response.status_code != 200:
+            return
+        self.failures = 0
+        try:
+            hint = response.json().get('heartbeat_interval')
+        except (ValueError, AttributeError):
+            hint = None
+        self.server_floor = self.server_wait(float(hint)) if isinstance(hint, (int, float)) and hint > 0 else 0
+
+    def stats(self):
+        return {
+            'interval': self.current_interval(),
+            'server_floor': self.server_floor,
+            'blocked_for': max(0, round(self.blocked_until - time.time())),
+            'throttled': self.throttled
+        }
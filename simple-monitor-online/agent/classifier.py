@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Classificação de Atividades
+Regras configuráveis (device_config.json ou arquivo de regras) compiladas em uma
+regex por campo de cada regra, avaliadas na ordem até a primeira que casar, com
+cache LRU por (processo, título normalizado) por cima
+
+Formato das regras (a primeira regra que casar vence):
+    {"category": "Programando", "process": ["code", "pycharm"], "title": ["github"]}
+
+- process: termos procurados no nome do processo (qualquer um)
+- title: termos procurados no título da janela (qualquer um)
+- Termos omitidos não restringem a regra; comparação sem diferenciar maiúsculas
+- Números no título são ignorados (contadores e relógios não geram entradas novas no cache)
+"""
+
+import json
+import os
+import re
+from functools import lru_cache
+
+BROWSERS = ['chrome', 'firefox', 'safari', 'edge']
+
+# Regras padrão (mesmo comportamento da classificação original)
+DEFAULT_RULES = [
+    {'category': 'Assistindo Vídeos', 'process': BROWSERS, 'title': ['youtube', 'netflix', 'twitch']},
+    {'category': 'Redes Sociais', 'process': BROWSERS, 'title': ['facebook', 'instagram', 'twitter']},
+    {'category': 'Navegando na Internet', 'process': BROWSERS},
+    {'category': 'Trabalhando em Documentos', 'process': ['word', 'excel', 'powerpoint', 'pages', 'numbers']},
+    {'category': 'Programando', 'process': ['code', 'visual', 'pycharm', 'sublime', 'xcode']},
+    {'category': 'Jogando', 'process': ['steam', 'game']},
+    {'category': 'Usando Terminal', 'process': ['terminal', 'iterm', 'cmd']},
+]
+DEFAULT_FALLBACK = 'Usando {process}'
+DEFAULT_IDLE = 'Sistema Ativo'
+
+MEMO_SIZE = 4096
+MAX_TITLE_LENGTH = 256
+
+_DIGITS = re.compile(r'\d+')
+
+
+def normalize_title(title):
+    """Título em minúsculas, sem números variáveis (relógios, contadores de não lidas)"""
+    return _DIGITS.sub('#', (title or '')[:MAX_TITLE_LENGTH].lower())
+
+
+def _lower_title(title):
+    """Título em minúsculas (basta quando nenhum termo de título tem número)"""
+    return (title or '')[:MAX_TITLE_LENGTH].lower()
+
+
+def _alternation(terms):
+    """Busca de qualquer um dos termos com uma única regex (None se não há termos)"""
+    if not terms:
+        return None
+    return re.compile('|'.join(re.escape(term) for term in sorted(terms, key=len, reverse=True))).search
+
+
+def compile_rules(rules):
+    """Compilar as regras, na ordem, em grupos: [(busca no processo, ((busca no título, categoria), ...))]
+    Regras consecutivas com os mesmos termos de processo (ex.: as três de navegador) formam um
+    grupo, e o processo é testado uma vez por grupo. Busca None = o campo não restringe a regra"""
+    groups = []
+    for index, rule in enumerate(rules):
+        process_terms = frozenset(term.lower() for term in rule.get('process') or [])
+        title_terms = frozenset(normalize_title(term) for term in rule.get('title') or [])
+        if not rule.get('category') or not (process_terms or title_terms):
+            raise ValueError(f"Regra inválida na posição {index}: {rule}")
+        if not groups or groups[-1][0] != process_terms:
+            groups.append((process_terms, _alternation(process_terms), []))
+        groups[-1][2].append((_alternation(title_terms), rule['category']))
+    return [(process_search, tuple(members)) for _, process_search, members in groups]
+
+
+class ActivityClassifier:
+    def __init__(self, rules=None, fallback=DEFAULT_FALLBACK, idle=DEFAULT_IDLE, memo_size=MEMO_SIZE):
+        self.rules = list(rules or DEFAULT_RULES)
+        self.categories = [rule['category'] for rule in self.rules]
+        self.fallback = fallback
+        self.idle = idle
+        self.groups = compile_rules(self.rules)
+
+        # Sem número nem '#' nos termos de título, o título só em minúsculas casa igual ao normalizado
+        has_digits = any('#' in normalize_title(term) for rule in self.rules for term in rule.get('title') or [])
+        self.title_text = normalize_title if has_digits else _lower_title
+
+        # Caches (camada sobre _match): plano por processo, título exato (atalho) e
+        # (processo, título normalizado). memo_size=0 classifica direto, sem cache
+        self.memo_size = memo_size
+        if memo_size:
+            self._process_plan = lru_cache(maxsize=memo_size)(self._plan)
+            self._classify_raw = lru_cache(maxsize=memo_size)(self._classify_title)
+            self._classify_cached = lru_cache(maxsize=memo_size)(self._classify)
+
+    @classmethod
+    def from_config(cls, device_config, base_dir=None):
+        """Criar a partir do device_config.json (activity_rules ou activity_rules_file)"""
+        spec = device_config.get('activity_rules')
+        rules_file = device_config.get('activity_rules_file')
+        if rules_file:
+            path = os.path.join(base_dir or os.path.dirname(__file__), rules_file)
+            with open(path, 'r', encoding='utf-8') as f:
+                spec = json.load(f)
+
+        if spec is None:
+            return cls()
+        if isinstance(spec, list):
+            return cls(rules=spec)
+        return cls(rules=spec.get('rules'),
+                   fallback=spec.get('fallback', DEFAULT_FALLBACK),
+                   idle=spec.get('idle', DEFAULT_IDLE))
+
+    def _match(self, process_name, window_title):
+        """Classificação sem cache: a primeira regra que casar (uma regex por campo de cada regra)"""
+        process_lower = process_name[:MAX_TITLE_LENGTH].lower()
+        title = None
+        for process_search, rules in self.groups:
+            if process_search is not None and process_search(process_lower) is None:
+                continue
+            for title_search, category in rules:
+                if title_search is None:
+                    return category
+                if title is None:
+                    title = self.title_text(window_title)
+                if title_search(title) is not None:
+                    return category
+        return self.fallback.format(process=process_name)
+
+    def _plan(self, process_name):
+        """Regras candidatas que dependem do título e a categoria caso nenhuma delas case"""
+        process_lower = process_name[:MAX_TITLE_LENGTH].lower()
+        candidates = []
+        for process_search, rules in self.groups:
+            if process_search is not None and process_search(process_lower) is None:
+                continue
+            for title_search, category in rules:
+                if title_search is None:
+                    return tuple(candidates), category
+                candidates.append((title_search, category))
+        return tuple(candidates), self.fallback.format(process=process_name)
+
+    def _classify(self, process_name, normalized_title):
+        candidates, default = self._process_plan(process_name)
+        for title_search, category in candidates:
+            if title_search(normalized_title) is not None:
+                return category
+        return default
+
+    def _classify_title(self, process_name, window_title):
+        candidates, default = self._process_plan(process_name)
+        if not candidates:
+            return default  # Título não influencia a categoria deste processo
+        return self._classify_cached(process_name, normalize_title(window_title))
+
+    def classify(self, process_name, window_title=''):
+        """Categoria da atividade para o processo/título informados"""
+        if not process_name:
+            return self.idle
+        if not self.memo_size:
+            return self._match(process_name, window_title or '')
+        return self._classify_raw(process_name, window_title or '')
+
+    def cache_info(self):
+        """Estatísticas do cache por título normalizado (None sem cache)"""
+        return self._classify_cached.cache_info() if self.memo_size else None
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Canal Push de Comandos (Server-Sent Events)
+Mantém um GET /api/commands?stream=1 aberto e recebe os comandos assim que são criados
+no painel. A consulta a /api/commands a cada minuto continua como rede de segurança: o canal
+fica na memória de uma instância da API, e um comando criado em outra não chega por ele
+
+- Reconexão com backoff exponencial (com jitter total) quando o canal cai
+- Servidor sem suporte a stream (responde JSON): comandos da resposta são executados e o
+  canal espera UNSUPPORTED_RETRY antes de tentar de novo; enquanto isso o monitor consulta
+- Comandos já executados (mesmo id) são ignorados se chegarem pelos dois caminhos
+"""
+
+import json
+import random
+import socket
+import threading
+import time
+from collections import deque
+
+import requests
+
+STREAM_PATH = '/api/commands'
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 45  # maior que o intervalo de keep-alive do servidor (15s)
+
+MIN_BACKOFF = 1
+MAX_BACKOFF = 60
+UNSUPPORTED_RETRY = 600  # servidor sem stream: tentar de novo em 10 min
+STABLE_CONNECTION = 30  # conexão que durou isso zera o backoff
+
+SEEN_IDS = 256
+
+
+class SSEParser:
+    """Monta os eventos do stream linha a linha; feed() retorna (evento, dados) ao fim de cada evento"""
+
+    def __init__(self):
+        self.event = None
+        self.data = []
+
+    def feed(self, line):
+        if not line:
+            event, data = self.event, self.data
+            self.event, self.data = None, []
+            return (event, '\n'.join(data)) if data else None
+        if line.startswith(':'):
+            return None  # Keep-alive
+        field, _, value = line.partition(':')
+        value = value[1:] if value.startswith(' ') else value
+        if field == 'event':
+            self.event = value
+        elif field == 'data':
+            self.data.append(value)
+        return None
+
+
+class CommandChannel:
+    def __init__(self, server_url, computer_id, on_command, user_agent='WorkTrackAgent/1.0'):
+        self.url = server_url.rstrip('/') + STREAM_PATH
+        self.computer_id = computer_id
+        self.on_command = on_command  # Chamado com o dict do comando (thread do canal)
+
+        # Sessão própria: a conexão do stream fica ocupada enquanto o canal está aberto
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': user_agent, 'Accept': 'text/event-stream'})
+
+        self.connected = False
+        self.supported = None  # None = ainda não sabemos se o servidor tem stream
+        self.is_running = False
+        self.thread = None
+        self.response = None
+        self.backoff = MIN_BACKOFF
+        self._stop = threading.Event()
+
+        self.seen = deque(maxlen=SEEN_IDS)
+        self._seen_lock = threading.Lock()
+
+        # Contadores
+        self.connects = 0
+        self.disconnects = 0
+        self.received = 0
+
+    def start(self):
+        if self.thread is not None:
+            return
+        self.is_running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.is_running = False
+        self._stop.set()
+        response = self.response
+        if response is not None:
+            # Derrubar o socket antes de fechar: o close() espera a leitura em andamento, que
+            # só termina no próximo keep-alive do servidor (até 15s)
+            sock = getattr(getattr(response.raw, 'connection', None), 'sock', None)
+            try:
+                if sock is not None:
+                    sock.shutdown(socket.SHUT_RDWR)
+                response.close()
+            except Exception:
+                pass
+        self.session.close()
+
+    def dispatch(self, command):
+        """Executar o comando uma única vez (também usado pela consulta de fallback)"""
+        command_id = command.get('id')
+        if command_id:
+            with self._seen_lock:
+                if command_id in self.seen:
+                    return False
+                self.seen.append(command_id)
+        self.received += 1
+        try:
+            self.on_command(command)
+        except Exception as e:
+            print(f"❌ Erro ao executar comando recebido: {e}")
+        return True
+
+    def _run(self):
+        while self.is_running:
+            started = time.monotonic()
+            try:
+                self._listen()
+            except requests.RequestException:
+                pass
+            except Exception as e:
+                if self.is_running:  # stop() fecha a resposta no meio da leitura
+                    print(f"⚠️ Erro no canal de comandos: {e}")
+            finally:
+                if self.connected:
+                    self.disconnects += 1
+                self.connected = False
+                self.response = None
+
+            if not self.is_running:
+                break
+            self._stop.wait(self.retry_delay(started))
+
+    def retry_delay(self, started):
+        """Espera até a próxima conexão (backoff exponencial com jitter total)"""
+        if self.supported is False:
+            return UNSUPPORTED_RETRY
+        if time.monotonic() - started >= STABLE_CONNECTION:
+            self.backoff = MIN_BACKOFF
+        wait = random.uniform(0, self.backoff)
+        self.backoff = min(MAX_BACKOFF, self.backoff * 2)
+        return wait
+
+    def _listen(self):
+        response = self.session.get(self.url, params={'computer_id': self.computer_id, 'stream': 1},
+                                    stream=True, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+        self.response = response
+        try:
+            if response.status_code != 200:
+                return
+
+            content_type = response.headers.get('Content-Type', '')
+            if 'text/event-stream' not in content_type:
+                # Servidor antigo: resposta JSON normal da consulta
+                self.supported = False
+                try:
+                    for command in response.json().get('commands') or []:
+                        self.dispatch(command)
+                except ValueError:
+                    pass
+                return
+
+            self.supported = True
+            self.connected = True
+            self.connects += 1
+
+            parser = SSEParser()
+            # chunk_size=None: cada chunk HTTP é entregue assim que chega
+            for raw in response.iter_lines(chunk_size=None):
+                if not self.is_running:
+                    break
+                line = raw.decode('utf-8', 'replace') if isinstance(raw, bytes) else raw
+                event = parser.feed(line)
+                if event:
+                    self.handle_event(*event)
+        finally:
+            response.close()
+
+    def handle_event(self, event, payload):
+        if event not in (None, 'command'):
+            return
+        try:
+            command = json.loads(payload)
+        except ValueError:
+            return
+        if isinstance(command, dict) and command.get('action'):
+            self.dispatch(command)
+
+    def stats(self):
+        return {
+            'connected': self.connected,
+            'supported': self.supported,
+            'connects': self.connects,
+            'disconnects': self.disconnects,
+            'received': self.received
+        }
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Detecção de Ociosidade e Tela Bloqueada
+Backends por plataforma atrás da mesma interface (IdleBackend):
+    - Linux: tempo sem entrada via XScreenSaver (libXss) e bloqueio/ociosidade via logind
+    - Windows: GetLastInputInfo e desktop de entrada inacessível (tela bloqueada)
+    - macOS: HIDIdleTime do ioreg e CGSSessionScreenIsLocked (se pyobjc-Quartz disponível)
+
+IdleMonitor pausa os heartbeats enquanto a máquina está ociosa ou bloqueada e
+informa a transição de volta para ativo
+"""
+
+import ctypes
+import ctypes.util
+import os
+import platform
+import re
+import subprocess
+import time
+
+DEFAULT_THRESHOLD = 300  # segundos sem entrada para considerar ociosa
+
+try:
+    import Quartz  # pyobjc-framework-Quartz (opcional, apenas macOS)
+except ImportError:
+    Quartz = None
+
+
+class IdleBackend:
+    """Interface: idle_seconds() -> segundos sem entrada; is_locked() -> bool (None = desconhecido)"""
+    name = 'nenhum'
+
+    def idle_seconds(self):
+        return None
+
+    def is_locked(self):
+        return None
+
+    def close(self):
+        pass
+
+
+class _XScreenSaverInfo(ctypes.Structure):
+    _fields_ = [('window', ctypes.c_ulong), ('state', ctypes.c_int), ('kind', ctypes.c_int),
+                ('til_or_since', ctypes.c_ulong), ('idle', ctypes.c_ulong), ('event_mask', ctypes.c_ulong)]
+
+
+class X11IdleBackend(IdleBackend):
+    """Tempo sem entrada via extensão MIT-SCREEN-SAVER (conexão X mantida aberta)"""
+    name = 'x11'
+
+    def __init__(self, display_name=None):
+        xlib_path = ctypes.util.find_library('X11')
+        xss_path = ctypes.util.find_library('Xss')
+        if not xlib_path or not xss_path:
+            raise OSError("libX11/libXss não encontradas")
+        self.xlib = ctypes.CDLL(xlib_path)
+        self.xss = ctypes.CDLL(xss_path)
+
+        self.xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        self.xlib.XOpenDisplay.restype = ctypes.c_void_p
+        self.xlib.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        self.xlib.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+        self.xlib.XDefaultRootWindow.restype = ctypes.c_ulong
+        self.xlib.XFree.argtypes = [ctypes.c_void_p]
+        self.xss.XScreenSaverAllocInfo.restype = ctypes.POINTER(_XScreenSaverInfo)
+        self.xss.XScreenSaverQueryInfo.argtypes = [ctypes.c_void_p, ctypes.c_ulong,
+                                                   ctypes.POINTER(_XScreenSaverInfo)]
+
+        display = display_name or os.environ.get('DISPLAY')
+        if not display:
+            raise OSError("DISPLAY não definido")
+        self.display = self.xlib.XOpenDisplay(display.encode())
+        if not self.display:
+            raise OSError(f"Não foi possível abrir o display {display}")
+        self.root = self.xlib.XDefaultRootWindow(self.display)
+        self.info = self.xss.XScreenSaverAllocInfo()
+
+    def idle_seconds(self):
+        if not self.xss.XScreenSaverQueryInfo(self.display, self.root, self.info):
+            return None
+        return self.info.contents.idle / 1000
+
+    def close(self):
+        if self.display:
+            self.xlib.XFree(self.info)
+            self.xlib.XCloseDisplay(self.display)
+            self.display = None
+
+
+class LogindIdleBackend(IdleBackend):
+    """Bloqueio e ociosidade da sessão via loginctl (LockedHint / IdleHint / IdleSinceHint)"""
+    name = 'logind'
+
+    def __init__(self, session_id=None):
+        self.session_id = session_id or os.environ.get('XDG_SESSION_ID') or 'self'
+        self.cached = (0, None)  # (instante, propriedades): uma chamada ao loginctl por verificação
+        if self._properties() is None:
+            raise OSError("loginctl indisponível")
+
+    def _properties(self):
+        at, props = self.cached
+        if time.monotonic() - at < 1:
+            return props
+        props = self._query()
+        self.cached = (time.monotonic(), props)
+        return props
+
+    def _query(self):
+        try:
+            result = subprocess.run(['loginctl', 'show-session', self.session_id,
+                                     '-p', 'LockedHint', '-p', 'IdleHint', '-p', 'IdleSinceHint'],
+                                    capture_output=True, text=True, timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        if result.returncode != 0:
+            return None
+        return dict(line.split('=', 1) for line in result.stdout.splitlines() if '=' in line)
+
+    def idle_seconds(self):
+        props = self._properties()
+        if not props or props.get('IdleHint') != 'yes':
+            return 0 if props else None
+        since = int(props.get('IdleSinceHint') or 0)  # microssegundos (tempo real)
+        return max(0.0, time.time() - since / 1e6) if since else None
+
+    def is_locked(self):
+        props = self._properties()
+        return props.get('LockedHint') == 'yes' if props else None
+
+
+class LinuxIdleBackend(IdleBackend):
+    """XScreenSaver para o tempo sem entrada, logind para bloqueio (e ociosidade sem X11)"""
+    name = 'linux'
+
+    def __init__(self):
+        self.x11 = self._try(X11IdleBackend)
+        self.logind = self._try(LogindIdleBackend)
+        if not self.x11 and not self.logind:
+            raise OSError("Nenhum backend de ociosidade disponível (X11/logind)")
+        self.name = '+'.join(backend.name for backend in (self.x11, self.logind) if backend)
+
+    @staticmethod
+    def _try(backend_class):
+        try:
+            return backend_class()
+        except Exception:
+            return None
+
+    def idle_seconds(self):
+        if self.x11:
+            return self.x11.idle_seconds()
+        return self.logind.idle_seconds()
+
+    def is_locked(self):
+        return self.logind.is_locked() if self.logind else None
+
+    def close(self):
+        if self.x11:
+            self.x11.close()
+
+
+class WindowsIdleBackend(IdleBackend):
+    name = 'windows'
+
+    class LASTINPUTINFO(ctypes.Structure):
+        _fields_ = [('cbSize', ctypes.c_uint), ('dwTime', ctypes.c_uint)]
+
+    def __init__(self):
+        self.user32 = ctypes.windll.user32
+        self.kernel32 = ctypes.windll.kernel32
+        self.kernel32.GetTickCount.restype = ctypes.c_uint
+        self.user32.OpenInputDesktop.restype = ctypes.c_void_p
+        self.user32.SwitchDesktop.argtypes = [ctypes.c_void_p]
+        self.user32.CloseDesktop.argtypes = [ctypes.c_void_p]
+        self.last_input = self.LASTINPUTINFO()
+        self.last_input.cbSize = ctypes.sizeof(self.LASTINPUTINFO)
+
+    def idle_seconds(self):
+        if not self.user32.GetLastInputInfo(ctypes.byref(self.last_input)):
+            return None
+        # GetTickCount volta a zero a cada ~49 dias
+        return ((self.kernel32.GetTickCount() - self.last_input.dwTime) & 0xFFFFFFFF) / 1000
+
+    def is_locked(self):
+        """Com a tela bloqueada o desktop de entrada não pode ser ativado"""
+        desktop = self.user32.OpenInputDesktop(0, False, 0x0100)  # DESKTOP_SWITCHDESKTOP
+        if not desktop:
+            return True
+        try:
+            return not self.user32.SwitchDesktop(desktop)
+        finally:
+            self.user32.CloseDesktop(desktop)
+
+
+class MacIdleBackend(IdleBackend):
+    name = 'macos'
+
+    _HID_IDLE = re.compile(r'"HIDIdleTime" = (\d+)')
+
+    def idle_seconds(self):
+        try:
+            result = subprocess.run(['ioreg', '-c', 'IOHIDSystem', '-d', '4'],
+                                    capture_output=True, text=True, timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        match = self._HID_IDLE.search(result.stdout)
+        return int(match.group(1)) / 1e9 if match else None  # nanossegundos
+
+    def is_locked(self):
+        if Quartz is None:
+            return None
+        session = Quartz.CGSessionCopyCurrentDictionary() or {}
+        return bool(session.get('CGSSessionScreenIsLocked', False))
+
+
+def create_idle_backend():
+    """Backend da plataforma atual (IdleBackend sem detecção se nenhum estiver disponível)"""
+    system = platform.system()
+    try:
+        if system == "Windows":
+            return WindowsIdleBackend()
+        if system == "Darwin":
+            return MacIdleBackend()
+        return LinuxIdleBackend()
+    except Exception as e:
+        print(f"⚠️ Detecção de ociosidade indisponível: {e}")
+        return IdleBackend()
+
+
+class IdleMonitor:
+    def __init__(self, backend, threshold=DEFAULT_THRESHOLD):
+        self.backend = backend
+        self.threshold = max(1, float(threshold))
+
+        self.paused = False
+        self.reason = None  # 'idle' ou 'locked'
+        self.paused_since = None
+
+    @classmethod
+    def from_config(cls, config, backend=None):
+        """Criar a partir da seção idle do device_config.json (None se desativado)"""
+        config = config or {}
+        if config.get('enabled') is False:
+            return None
+        return cls(backend or create_idle_backend(), threshold=config.get('threshold', DEFAULT_THRESHOLD))
+
+    def check(self):
+        """Estado atual: ('locked' | 'idle' | None, segundos sem entrada)"""
+        try:
+            if self.backend.is_locked():
+                return 'locked', None
+            idle = self.backend.idle_seconds()
+        except Exception:
+            return None, None
+        if idle is not None and idle >= self.threshold:
+            return 'idle', idle
+        return None, idle
+
+    def poll(self, now=None):
+        """Atualizar o estado; retorna 'paused', 'resumed' ou None (sem transição)"""
+        now = now or time.time()
+        reason, idle = self.check()
+
+        if reason and not self.paused:
+            self.paused = True
+            self.reason = reason
+            # Ociosidade começou na última entrada, não no momento da verificação
+            self.paused_since = now - idle if idle else now
+            return 'paused'
+
+        if not reason and self.paused:
+            self.paused = False
+            return 'resumed'
+
+        if reason:
+            self.reason = reason
+        return None
+
+    def close(self):
+        self.backend.close()
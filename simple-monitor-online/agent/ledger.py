@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Registro de Tempo em Primeiro Plano por Aplicativo
+Acumula, com resolução de segundos, o tempo de cada (aplicativo, categoria) entre
+amostras e fecha um resumo compacto (app_usage) a cada poucos minutos. O resumo vai junto
+do próximo heartbeat, identificado pelo início do período (reenvio não soma de novo no servidor)
+
+Desativado por padrão (app_usage.enabled). Alimentado pela amostra de cada tick, sem
+consulta extra da janela ativa; sample_interval menor que o tick acrescenta amostras entre
+os ticks (mais precisão, mais consultas)
+
+Memória limitada: as chaves ficam em uma lista e os tempos em um array('Q') de
+milissegundos; acima de max_apps, aplicativos novos são somados em OVERFLOW_APP
+"""
+
+import time
+from array import array
+
+DEFAULT_SAMPLE_INTERVAL = 60  # segundos entre amostras (60 = só a amostra do tick)
+DEFAULT_FLUSH_INTERVAL = 300  # segundos entre resumos
+DEFAULT_MAX_APPS = 256
+
+# Intervalos maiores que isso (suspensão, travamento) contam só até este limite
+MAX_GAP_FACTOR = 2
+
+OVERFLOW_APP = 'Outros'
+
+
+class ForegroundLedger:
+    def __init__(self, sample_interval=DEFAULT_SAMPLE_INTERVAL, flush_interval=DEFAULT_FLUSH_INTERVAL,
+                 max_apps=DEFAULT_MAX_APPS):
+        self.sample_interval = max(1, float(sample_interval))
+        self.flush_interval = max(self.sample_interval, float(flush_interval))
+        self.max_apps = max(1, int(max_apps))
+        self.max_gap = self.sample_interval * MAX_GAP_FACTOR
+
+        self.keys = []  # [(app, categoria)]
+        self.index = {}  # (app, categoria) -> posição em millis
+        self.millis = array('Q')
+
+        self.current = None  # Posição da chave em primeiro plano desde last_observed
+        self.last_observed = None
+        self.period_start = None
+        self.untracked_ms = 0  # Sem janela (bloqueado, sem sessão gráfica)
+
+    @classmethod
+    def from_config(cls, config):
+        """Criar a partir da seção app_usage do device_config.json (None se desativado)"""
+        if not config or not config.get('enabled'):
+            return None
+        return cls(sample_interval=config.get('sample_interval', DEFAULT_SAMPLE_INTERVAL),
+                   flush_interval=config.get('flush_interval', DEFAULT_FLUSH_INTERVAL),
+                   max_apps=config.get('max_apps', DEFAULT_MAX_APPS))
+
+    def _slot(self, app, category):
+        key = (app, category)
+        slot = self.index.get(key)
+        if slot is None:
+            if len(self.keys) >= self.max_apps:
+                key = (OVERFLOW_APP, category)
+                slot = self.index.get(key)
+                if slot is not None:
+                    return slot
+            slot = len(self.keys)
+            self.keys.append(key)
+            self.index[key] = slot
+            self.millis.append(0)
+        return slot
+
+    def observe(self, app, category, now=None):
+        """Fechar o intervalo desde a última amostra e abrir um novo para (app, categoria)"""
+        now = now or time.time()
+        if self.last_observed is not None:
+            elapsed = min(max(0.0, now - self.last_observed), self.max_gap)
+            if self.current is None:
+                self.untracked_ms += int(elapsed * 1000)
+            else:
+                self.millis[self.current] += int(elapsed * 1000)
+        elif self.period_start is None:
+            self.period_start = now
+
+        self.current = self._slot(app, category) if app else None
+        self.last_observed = now
+
+    def should_flush(self, now=None):
+        if self.period_start is None or not self.keys:
+            return False
+        return (now or time.time()) - self.period_start >= self.flush_interval
+
+    def summary(self):
+        """Resumo compacto: [[app, categoria, segundos], ...] dos aplicativos com tempo no período"""
+        return [[app, category, round(ms / 1000)]
+                for (app, category), ms in zip(self.keys, self.millis) if ms >= 500]
+
+    def total_seconds(self):
+        return sum(self.millis) / 1000
+
+    def close_period(self):
+        """Resumo do período ({'period_start', 'period_end', 'usage'}) e início do próximo"""
+        period = {'period_start': self.period_start, 'period_end': self.last_observed,
+                  'usage': self.summary()}
+        self.reset()
+        return period
+
+    def reset(self):
+        """Iniciar um novo período após o envio (o aplicativo atual continua contando)"""
+        current_key = self.keys[self.current] if self.current is not None else None
+        self.keys = []
+        self.index = {}
+        self.millis = array('Q')
+        self.untracked_ms = 0
+        self.period_start = self.last_observed
+        self.current = self._slot(*current_key) if current_key else None
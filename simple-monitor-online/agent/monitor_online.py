@@ -2,7 +2,7 @@
 """
 Monitor de Atividade - Agente Online
 Sistema de monitoramento via HTTP/REST API
-Compatível com macOS e Windows
+Compatível com macOS, Windows e Linux (X11)
 """
 
 import json
@@ -11,10 +11,39 @@ import os
 import sys
 import threading
 import subprocess
-import requests
+import shlex
+from collections import OrderedDict
 from datetime import datetime, date
 import platform
 
+from transport import get_transport
+from body_encoding import BodyEncoder
+from wire_format import WireCodec
+from spool import HeartbeatSpool
+from batching import HeartbeatBatcher, build_batch_payload
+from sampling import ActivitySampler
+from probe import ProbeCoprocess, macos_helper_command
+from x11_window import X11ActiveWindow, X11ConnectionLost, query_subprocess
+from classifier import ActivityClassifier
+from ledger import ForegroundLedger
+from idle import IdleMonitor
+from cadence import AdaptiveCadence, TICK_SECONDS
+from command_channel import CommandChannel
+from sender import UploadSender
+from scheduler import TickScheduler, Supervisor
+from registration import RegistrationCache
+from session import HeartbeatSession, device_metadata, metadata_hash
+
+# Folga na verificação do intervalo entre envios (ajustes finos do relógio de parede)
+TICK_TOLERANCE = 1
+
+# Antecedência do pré-aquecimento da conexão em relação ao próximo tick
+PREWARM_LEAD_SECONDS = 3
+
+# Resumos app_usage: máximo guardado sem confirmação (24h com o padrão de 300s) e por envio
+MAX_PENDING_USAGE = 288
+USAGE_PER_REQUEST = 12
+
 class OnlineActivityMonitor:
     def __init__(self, server_url=None):
         # Prioridade: argumento > variável de ambiente > default embutido
@@ -27,14 +56,90 @@ class OnlineActivityMonitor:
         else:
             self.server_url = server_url.rstrip('/')
         
+        # Transporte HTTP compartilhado (keep-alive)
+        self.transport = get_transport(self.server_url)
+        
+        # Spool local para heartbeats que falharem (reenviados quando a conexão voltar)
+        try:
+            self.spool = HeartbeatSpool()
+        except Exception as e:
+            print(f"⚠️ Spool local indisponível: {e}")
+            self.spool = None
+        
         # Carregar configuração personalizada se existir
         self.device_config = self.load_device_config()
         
+        # Compressão do corpo de lotes e reenvios grandes (seção compression do device_config.json)
+        self.transport.encoder = BodyEncoder.from_config(self.device_config.get('compression'))
+        
+        # MessagePack no lugar de JSON quando o servidor aceita (seção wire_format do device_config.json)
+        self.transport.codec = WireCodec.from_config(self.device_config.get('wire_format'))
+        
         self.computer_id = self.get_computer_id()
         self.computer_name = self.get_computer_name()
         self.user_name = self.get_user_name()
         self.os_info = self.get_os_info()
         
+        # Classificação de atividades (regras do device_config.json ou padrão)
+        try:
+            self.classifier = ActivityClassifier.from_config(self.device_config)
+        except Exception as e:
+            print(f"⚠️ Regras de atividade inválidas, usando padrão: {e}")
+            self.classifier = ActivityClassifier()
+        
+        # Helper persistente de janela ativa (criado na primeira consulta)
+        self.probe_helper = None
+        self.x11_backend = None  # Linux: leitura direta do X11 (False = indisponível)
+        
+        # Uma consulta da janela ativa por tick (snapshot compartilhado)
+        self.sampler = ActivitySampler(self.get_active_window)
+        
+        # Envio em lote (heartbeat_batch) - ativado pela seção heartbeat_batch do device_config.json
+        self.batcher = HeartbeatBatcher.from_config(self.device_config.get('heartbeat_batch'))
+        self.batch_supported = None  # None = ainda não sabemos se o servidor aceita lotes
+        
+        # Tempo em primeiro plano por aplicativo (resumo app_usage) - seção app_usage do device_config.json
+        self.ledger = ForegroundLedger.from_config(self.device_config.get('app_usage'))
+        
+        # Ociosidade / tela bloqueada: heartbeats pausados até o usuário voltar (seção idle)
+        self.idle_monitor = IdleMonitor.from_config(self.device_config.get('idle'))
+        
+        # Cadência adaptativa de envio (amostragem continua a cada minuto) - seção cadence
+        self.cadence = AdaptiveCadence.from_config(self.device_config.get('cadence'))
+        
+        # Canal push de comandos (SSE); a consulta a /api/commands continua como rede de segurança
+        self.command_channel = None
+        if (self.device_config.get('command_channel') or {}).get('enabled') is not False:
+            self.command_channel = CommandChannel(self.server_url, self.computer_id,
+                                                  self.run_command)
+        
+        # Sync: o heartbeat dispensa o POST /api/websocket e traz comandos pendentes na resposta;
+        # servidores antigos continuam com /api/websocket separado
+        self.sync_supported = None if (self.device_config.get('sync') or {}).get('enabled') is not False else False
+        
+        # Envio em segundo plano com filas de prioridade (seção sender do device_config.json)
+        self.sender = UploadSender.from_config(self.device_config.get('sender'))
+        # Resumos app_usage fechados e ainda não confirmados (period_start -> resumo): vão junto
+        # dos heartbeats até o servidor confirmar
+        self.pending_usage = OrderedDict()
+        
+        # Agenda de ticks (tempo monotônico, sem deriva; fase pelo computer_id e jitter - seção
+        # schedule) e supervisor dos estágios (sem recursão)
+        self.scheduler = TickScheduler.from_config(self.device_config.get('schedule'), TICK_SECONDS,
+                                                   key=self.computer_id)
+        self.cadence.tolerance += self.scheduler.jitter  # Ticks com jitter podem chegar mais cedo
+        self.supervisor = Supervisor()
+        
+        # Cache do último registro e partida escalonada (seção registration do device_config.json)
+        self.registration = RegistrationCache.from_config(self.device_config.get('registration'))
+        self.pending_registration = None  # Impressão digital aguardando confirmação do servidor
+        
+        # Heartbeats compactos: token de sessão + campos alterados (seção session do device_config.json)
+        self.metadata = device_metadata(self.device_config)
+        self.session = None
+        if (self.device_config.get('session') or {}).get('enabled') is not False:
+            self.session = HeartbeatSession()
+        
         # Controle de tempo simplificado
         self.current_day = date.today()
         self.minutes_sent_today = 0  # Contador simples de minutos enviados hoje
@@ -139,10 +244,40 @@ class OnlineActivityMonitor:
         except:
             return "Sistema Desconhecido"
 
+    def get_probe_helper(self):
+        """Helper persistente de janela ativa (macOS ou comando em WORKTRACK_PROBE_HELPER)"""
+        if self.probe_helper is None:
+            custom_command = os.environ.get('WORKTRACK_PROBE_HELPER')
+            if custom_command:
+                command = shlex.split(custom_command)
+            elif platform.system() == "Darwin":
+                command = macos_helper_command()
+            else:
+                return None
+            self.probe_helper = ProbeCoprocess(command)
+        return self.probe_helper
+
+    def get_x11_backend(self):
+        """Backend X11 em processo (Linux), criado na primeira consulta"""
+        if self.x11_backend is None:
+            try:
+                self.x11_backend = X11ActiveWindow()
+            except Exception as e:
+                print(f"⚠️ Janela ativa indisponível no Linux: {e}")
+                self.x11_backend = False
+        return self.x11_backend
+
     def get_active_window(self):
         """Obter janela ativa atual - versão multiplataforma"""
         try:
-            if platform.system() == "Darwin":  # macOS
+            # Preferir o helper persistente (sem novo processo por amostra)
+            helper = self.get_probe_helper()
+            if helper:
+                window_info = helper.query()
+                if window_info:
+                    return window_info
+            
+            if platform.system() == "Darwin":  # macOS - fallback: um osascript por consulta
                 script = '''
                 tell application "System Events"
                     name of application processes whose frontmost is true
@@ -184,60 +319,51 @@ class OnlineActivityMonitor:
                 except ImportError:
                     pass
             
+            elif platform.system() == "Linux":
+                backend = self.get_x11_backend()
+                if backend:
+                    try:
+                        return backend.query()
+                    except X11ConnectionLost as e:
+                        # Servidor X caiu: a libX11 não encerra o processo, seguimos via xprop
+                        print(f"⚠️ {e} - usando xprop")
+                        backend.close()
+                        self.x11_backend = False
+                return query_subprocess()
+            
             return None
         except Exception as e:
             return None
 
-    def get_current_activity(self):
-        """Determinar atividade atual baseada na janela ativa"""
-        window_info = self.get_active_window()
-        
-        if not window_info:
-            return "Sistema Ativo"
-        
-        process_name = window_info['process_name'].lower()
-        window_title = window_info['window_title'].lower()
-        
-        # Categorizar atividades
-        if any(browser in process_name for browser in ['chrome', 'firefox', 'safari', 'edge']):
-            if any(site in window_title for site in ['youtube', 'netflix', 'twitch']):
-                return "Assistindo Vídeos"
-            elif any(social in window_title for social in ['facebook', 'instagram', 'twitter']):
-                return "Redes Sociais"
-            else:
-                return "Navegando na Internet"
-        
-        elif any(office in process_name for office in ['word', 'excel', 'powerpoint', 'pages', 'numbers']):
-            return "Trabalhando em Documentos"
+    def get_current_activity(self, snapshot=None):
+        """Determinar atividade atual baseada na janela ativa (snapshot do tick ou cache recente)"""
+        if snapshot is None:
+            snapshot = self.sampler.current()
         
-        elif any(dev in process_name for dev in ['code', 'visual', 'pycharm', 'sublime', 'xcode']):
-            return "Programando"
+        if not snapshot.has_window:
+            return self.classifier.idle
         
-        elif any(game in process_name for game in ['steam', 'game']):
-            return "Jogando"
-        
-        elif 'terminal' in process_name or 'iterm' in process_name or 'cmd' in process_name:
-            return "Usando Terminal"
-        
-        else:
-            return f"Usando {window_info['process_name']}"
+        # Regras compiladas + cache por (processo, título normalizado)
+        return self.classifier.classify(snapshot.process_name, snapshot.window_title)
+
+    def build_register(self):
+        identity = {
+            'computer_id': self.computer_id,
+            'computer_name': self.computer_name,
+            'user_name': self.user_name,
+            'os_info': self.os_info,
+            'metadata': self.metadata
+        }
+        return dict(identity, type='register', metadata_hash=metadata_hash(identity))
 
     def register(self):
         """Registrar computador no servidor"""
         try:
-            data = {
-                'type': 'register',
-                'computer_id': self.computer_id,
-                'computer_name': self.computer_name,
-                'user_name': self.user_name,
-                'os_info': self.os_info
-            }
-            
-            response = requests.post(f'{self.server_url}/api/data', 
-                                   json=data, timeout=10)
+            response = self.transport.post('/api/data', self.build_register())
             
             if response.status_code == 200:
                 print("✅ Computador registrado no servidor")
+                self.registration_confirmed(self.session_token(response))
                 return True
             else:
                 print(f"❌ Erro ao registrar: {response.status_code}")
@@ -247,6 +373,69 @@ class OnlineActivityMonitor:
             print(f"❌ Erro na conexão: {e}")
             return False
 
+    def prepare_registration(self):
+        """Decidir o registro na partida: True se o register explícito ainda é necessário"""
+        if self.registration is None:
+            return True
+        fingerprint = RegistrationCache.fingerprint(self.build_register(), self.server_url)
+        if self.registration.is_current(fingerprint):
+            print("✅ Registro inalterado (cache) - sem registrar de novo")
+            token = self.registration.session()
+            if token and self.session is not None:
+                self.session.start(token)
+            return False
+        self.pending_registration = fingerprint
+        if self.registration.piggyback:
+            print("📝 Registro vai junto do primeiro heartbeat")
+            return False
+        return True
+
+    def registration_confirmed(self, session=None):
+        """Servidor aceitou o registro: gravar a impressão digital e abrir a sessão"""
+        if session and self.session is not None:
+            self.session.start(session)
+        if self.registration is not None and self.pending_registration:
+            self.registration.save(self.pending_registration, session)
+        self.pending_registration = None
+
+    def renew_registration(self):
+        """Servidor perdeu a sessão: registrar de novo (junto do próximo heartbeat, se possível)"""
+        if self.registration is not None:
+            self.pending_registration = RegistrationCache.fingerprint(self.build_register(), self.server_url)
+            if self.registration.piggyback:
+                return
+        self.submit('backlog', self.register, key='register')
+
+    def session_token(self, response):
+        """Token de sessão devolvido pelo registro (None em servidores sem sessão)"""
+        try:
+            token = response.json().get('session')
+        except (ValueError, AttributeError):
+            return None
+        return token if isinstance(token, str) and token else None
+
+    def apply_registration(self, response):
+        """Registro pendente após um envio entregue: confirmado (registered) ou register separado"""
+        if not self.pending_registration:
+            return
+        try:
+            registered = response.json().get('registered')
+        except (ValueError, AttributeError):
+            registered = None
+        if registered:
+            print("✅ Computador registrado junto do heartbeat")
+            self.registration_confirmed(self.session_token(response))
+        else:
+            # Servidor antigo ignora a flag register: registro normal, fora do caminho do tick
+            self.submit('backlog', self.register, key='register')
+
+    def startup_delay(self):
+        """Adiar a partida por um tempo aleatório (frota ligando no mesmo horário)"""
+        delay = self.registration.startup_delay() if self.registration is not None else 0
+        if delay >= 1:
+            print(f"⏳ Partida adiada em {delay:.0f}s")
+        return delay
+
     def send_activity(self):
         """Enviar heartbeat simples para o servidor"""
         try:
@@ -254,55 +443,31 @@ class OnlineActivityMonitor:
             today = now.date()
             current_time = time.time()
             
-            # Verificar se é um novo dia
-            if today != self.current_day:
-                print(f"🗓️ Novo dia detectado: {today}")
-                self.current_day = today
-                self.minutes_sent_today = 0
-                self.last_send_time = current_time
-                print(f"🔄 Reiniciando para novo dia")
+            self.check_new_day(today, current_time)
             
             # Verificar se passou pelo menos 60 segundos desde o último envio
             time_diff = current_time - self.last_send_time
             
-            if time_diff >= 60:  # 60 segundos = 1 minuto
-                # Obter apenas atividade atual (opcional)
-                activity = self.get_current_activity()
-                window_info = self.get_active_window()
-                
-                # ENVIAR APENAS HEARTBEAT - servidor controla o tempo
-                data = {
-                    'type': 'heartbeat',
-                    'computer_id': self.computer_id,
-                    'computer_name': self.computer_name,
-                    'user_name': self.user_name,
-                    'os_info': self.os_info,
-                    'current_activity': activity,
-                    'active_window': window_info['window_title'] if window_info else None,
-                    'timestamp': now.isoformat(),
-                    'is_active': True
-                }
+            if time_diff >= TICK_SECONDS - TICK_TOLERANCE - self.scheduler.jitter:  # 60 segundos = 1 minuto
+                # Máquina ociosa ou bloqueada: nenhum heartbeat até o usuário voltar
+                if self.check_idle(current_time):
+                    self.last_send_time = current_time
+                    return True
                 
-                response = requests.post(f'{self.server_url}/api/data', 
-                                       json=data, timeout=10)
+                # Uma única consulta da janela ativa neste tick
+                snapshot = self.sampler.sample()
+                activity, data = self.observe_sample(snapshot, now)
                 
-                # Enviar também para WebSocket (tempo real)
-                try:
-                    requests.post(f'{self.server_url}/api/websocket', 
-                                json=data, timeout=5)
-                except:
-                    pass
-                
-                if response.status_code == 200:
-                    # Atualizar apenas o contador local para debug
-                    self.minutes_sent_today += 1
-                    self.last_send_time = current_time
-                    
-                    print(f"💓 Heartbeat enviado - {activity} (Heartbeats hoje: {self.minutes_sent_today})")
+                # Lote ou envio adiado pela cadência: nada a enviar agora
+                if self.hold_sample(data, activity, current_time):
                     return True
-                else:
-                    print(f"❌ Erro ao enviar heartbeat: {response.status_code}")
-                    return False
+                
+                # Envio pela thread de envio: o tick não espera a rede (se a fila
+                # estourar, a amostra vai para o spool com o horário original)
+                self.last_send_time = current_time
+                self.submit('live', lambda: self.upload_heartbeat(data, current_time, activity, snapshot),
+                            on_overflow=lambda: self.spool_heartbeat(data, current_time))
+                return True
             
             return True  # Ainda não passou 1 minuto
                 
@@ -310,18 +475,536 @@ class OnlineActivityMonitor:
             print(f"❌ Erro ao enviar heartbeat: {e}")
             return False
 
-    def check_commands(self):
-        """Verificar comandos pendentes do servidor"""
+    def check_new_day(self, today, current_time):
+        """Zerar o contador local na virada do dia"""
+        if today != self.current_day:
+            print(f"🗓️ Novo dia detectado: {today}")
+            self.current_day = today
+            self.minutes_sent_today = 0
+            self.last_send_time = current_time
+            print(f"🔄 Reiniciando para novo dia")
+
+    def observe_sample(self, snapshot, now):
+        """Classificar a amostra do tick, registrar e montar o heartbeat: (atividade, heartbeat)"""
+        activity = self.get_current_activity(snapshot)
+        self.record_foreground(snapshot, activity)
+        self.cadence.observe(activity)
+        
+        # ENVIAR APENAS HEARTBEAT - servidor controla o tempo
+        return activity, self.build_heartbeat(snapshot, activity, now)
+
+    def hold_sample(self, data, activity, current_time):
+        """Guardar a amostra no lote ou adiar pela cadência; False se ela deve ser enviada agora"""
+        # Modo lote: acumular a amostra e enviar quando o lote encher
+        if self.batcher is not None:
+            self.batcher.add(data, current_time)
+            self.minutes_sent_today += 1
+            self.last_send_time = current_time
+            print(f"🧺 Amostra no lote - {activity} ({len(self.batcher)}/{self.batcher.max_samples})")
+            if self.batcher.should_flush(current_time) and not self.cadence.blocked(current_time):
+                self.submit_batch()
+            return True
+        
+        # Envio ainda não devido (atividade estável ou servidor pediu para esperar):
+        # a amostra fica no spool com o horário original e vai junto no próximo envio
+        if not self.cadence.due(current_time) and self.defer_heartbeat(data, current_time):
+            self.minutes_sent_today += 1
+            self.last_send_time = current_time
+            print(f"⏳ Amostra adiada - {activity} (intervalo atual: {self.cadence.current_interval()}s)")
+            return True
+        return False
+
+    def heartbeat_payload(self, data):
+        """Payload do envio ao vivo: compacto com sessão; sync e register só aqui (a amostra
+        guardada no spool vai completa e sem as flags)"""
+        registering = self.pending_registration and self.registration.piggyback
+        compact = None
+        if self.session is not None and not registering:
+            compact = self.session.payload(data)
+        payload = compact or dict(data)
+        if self.sync_supported is not False:
+            payload['sync'] = True
+        if registering:
+            payload.update(self.registration_fields())
+        self.attach_app_usage(payload)
+        return payload
+
+    def registration_fields(self):
+        """Campos do registro que vão junto do heartbeat (flag register + metadados com hash)"""
+        register = self.build_register()
+        return {'register': True, 'metadata': register['metadata'], 'metadata_hash': register['metadata_hash']}
+
+    def apply_session(self, response, payload, data):
+        """Processar a resposta de um heartbeat da sessão; False se o servidor não a conhece mais"""
+        session = self.session
+        if session is None or 'session' not in payload:
+            return True
+        if response.status_code != 200:
+            session.resync()
+            return True
+        try:
+            result = response.json()
+        except ValueError:
+            result = {}
+        
+        if result.get('session_expired'):
+            print("⚠️ Sessão expirada no servidor - voltando ao heartbeat completo")
+            session.expire()
+            self.renew_registration()
+            return False
+        if result.get('resync'):
+            session.resync()
+            if result.get('success') is False:
+                return False  # Delta não processado (ver delta_rejected)
+        else:
+            session.accepted(payload, data)
+        token = result.get('session')
+        if isinstance(token, str) and token and token != session.token:
+            session.renew(token)  # Token perto de vencer: o servidor mandou outro
+            if self.registration is not None:
+                self.registration.update_session(token)
+        return True
+
+    def delta_rejected(self, response, payload):
+        """Delta recusado por uma instância sem o estado base (resync sem processar): True se o
+        mesmo heartbeat deve ser reenviado completo"""
+        if self.session is None or 'base' not in payload or response.status_code != 200:
+            return False
+        try:
+            result = response.json()
+        except ValueError:
+            return False
+        if result.get('resync') and result.get('success') is False:
+            self.session.resync()
+            return True
+        return False
+
+    def heartbeat_failed(self, data, captured_at, error):
+        print(f"❌ Erro ao enviar heartbeat: {error}")
+        self.cadence.on_response(None, captured_at)
+        if self.session is not None:
+            self.session.resync()  # Entrega incerta: o próximo vai completo
+        self.spool_heartbeat(data, captured_at)
+        return False
+
+    def upload_heartbeat(self, data, captured_at, activity, snapshot):
+        """Enviar o heartbeat do tick (thread de envio); em caso de falha vai para o spool"""
+        payload = self.heartbeat_payload(data)
         try:
-            response = requests.get(f'{self.server_url}/api/commands', 
-                                  params={'computer_id': self.computer_id}, 
-                                  timeout=10)
+            response = self.transport.post('/api/data', payload)
+            if self.delta_rejected(response, payload):
+                payload = self.heartbeat_payload(data)  # Completo, com o mesmo token
+                response = self.transport.post('/api/data', payload)
+        except Exception as e:
+            return self.heartbeat_failed(data, captured_at, e)
+        if not self.apply_session(response, payload, data):
+            self.spool_heartbeat(data, captured_at)  # Não processado: o minuto vai pelo spool
+            return False
+        self.cadence.on_response(response, captured_at)
+        self.apply_app_usage(response, payload)
+        
+        # Enviar também para WebSocket (tempo real), a menos que o servidor tenha sync
+        if not self.apply_sync(response):
+            try:
+                self.transport.post('/api/websocket', data)
+            except:
+                pass
+        
+        return self.heartbeat_delivered(response, data, captured_at, activity, snapshot)
+
+    def heartbeat_delivered(self, response, data, captured_at, activity, snapshot):
+        """Contabilizar a resposta do heartbeat do tick (status != 200: spool)"""
+        if response.status_code != 200:
+            print(f"❌ Erro ao enviar heartbeat: {response.status_code}")
+            self.spool_heartbeat(data, captured_at)
+            return False
+        
+        # Atualizar apenas o contador local para debug
+        self.minutes_sent_today += 1
+        self.cadence.uploaded(captured_at)
+        self.apply_registration(response)
+        
+        stats = self.transport.connection_stats()
+        queue = f", fila: {self.sender.depth()}" if self.sender is not None else ""
+        print(f"💓 Heartbeat enviado - {activity} [{snapshot.probe_latency * 1000:.0f}ms] "
+              f"(Heartbeats hoje: {self.minutes_sent_today}, "
+              f"conexões reutilizadas: {stats['connections_reused']}/{stats['requests']}, "
+              f"intervalo: {self.cadence.current_interval()}s{queue})")
+        
+        # Conexão OK: reenviar o que ficou no spool (menor prioridade)
+        if self.spool and self.spool.pending:
+            self.submit('backlog', self.drain_spool, key='drain_spool')
+        return True
+
+    def submit(self, lane, run, key=None, on_overflow=None):
+        """Entregar uma tarefa de envio à thread de envio (ou executar já, se desativada)"""
+        sender = self.sender
+        if sender is None or not sender.is_running:
+            return run()
+        sender.submit(lane, run, key=key, on_overflow=on_overflow)
+        return True
+
+    def build_heartbeat(self, snapshot, activity, now):
+        """Montar payload de heartbeat a partir do snapshot do tick"""
+        return {
+            'type': 'heartbeat',
+            'computer_id': self.computer_id,
+            'computer_name': self.computer_name,
+            'user_name': self.user_name,
+            'os_info': self.os_info,
+            'current_activity': activity,
+            'active_window': snapshot.window_title if snapshot.has_window else None,
+            'timestamp': now.isoformat(),
+            'is_active': True,
+            'heartbeat_interval': self.cadence.current_interval(),
+            'upload_queue': self.upload_queue_stats()
+        }
+
+    def upload_queue_stats(self):
+        """Profundidade da fila de envio e descartes (None se o envio é no loop principal)"""
+        if self.sender is None:
+            return None
+        stats = self.sender.stats()
+        return {'depth': stats['depth'], 'dropped': stats['dropped'], 'spilled': stats['spilled']}
+
+    def defer_heartbeat(self, data, captured_at):
+        """Guardar a amostra para o próximo envio (reenviada pelo drain_spool com o horário original)"""
+        if not self.spool:
+            return False
+        try:
+            self.spool.append(data, captured_at)
+            return True
+        except Exception as e:
+            print(f"⚠️ Erro ao gravar no spool: {e}")
+            return False
+
+    def check_idle(self, now):
+        """Atualizar o estado de ociosidade; retorna True enquanto os heartbeats estão pausados"""
+        monitor = self.idle_monitor
+        if monitor is None:
+            return False
+        
+        transition = monitor.poll(now)
+        if transition == 'paused':
+            reason = 'tela bloqueada' if monitor.reason == 'locked' else 'sem atividade'
+            print(f"😴 Heartbeats pausados ({reason})")
+            self.submit_batch()  # Não segurar amostras durante a pausa
+        elif transition == 'resumed':
+            self.send_presence(monitor.reason, monitor.paused_since, now)
+            self.cadence.reset()  # Enviar logo o primeiro heartbeat após o retorno
+        
+        if monitor.paused and self.ledger is not None:
+            self.ledger.observe(None, None, now)
+        return monitor.paused
+
+    def send_presence(self, reason, idle_since, now):
+        """Evento único de retorno após ociosidade/bloqueio"""
+        data = {
+            'type': 'presence',
+            'computer_id': self.computer_id,
+            'computer_name': self.computer_name,
+            'user_name': self.user_name,
+            'state': 'active',
+            'previous_state': reason,
+            'idle_since': idle_since,
+            'returned_at': now,
+            'idle_seconds': round(now - idle_since) if idle_since else None
+        }
+        self.submit('live', lambda: self.post_presence(data))
+
+    def post_presence(self, data):
+        try:
+            self.transport.post('/api/data', data)
+            print(f"👋 Usuário voltou após {data['idle_seconds'] or 0}s ({data['previous_state']})")
+            return True
+        except Exception as e:
+            print(f"⚠️ Erro ao enviar retorno de ociosidade: {e}")
+            return False
+
+    def record_foreground(self, snapshot, activity=None):
+        """Registrar a amostra no registro de tempo por aplicativo"""
+        if self.ledger is None:
+            return
+        if not snapshot.has_window:
+            self.ledger.observe(None, None, snapshot.captured_at)
+            return
+        category = activity or self.classifier.classify(snapshot.process_name, snapshot.window_title)
+        self.ledger.observe(snapshot.process_name, category, snapshot.captured_at)
+
+    def sleep_sampling(self, seconds):
+        """Dormir até o próximo tick; com app_usage.sample_interval menor que o tick, amostrar a
+        janela ativa para o registro por aplicativo no caminho (senão ele usa só a amostra do tick)"""
+        deadline = time.monotonic() + seconds
+        while self.ledger is not None and self.is_running:
+            if deadline - time.monotonic() <= self.ledger.sample_interval:
+                break
+            time.sleep(self.ledger.sample_interval)
+            if self.idle_monitor is not None and self.idle_monitor.paused:
+                self.ledger.observe(None, None)  # Ocioso: sem consultar a janela
+            else:
+                self.record_foreground(self.sampler.sample())
+        time.sleep(max(0, deadline - time.monotonic()))
+
+    def wait_next_tick(self):
+        """Aguardar o próximo tick da agenda, pré-aquecendo a conexão pouco antes"""
+        self.sleep_sampling(self.scheduler.remaining() - PREWARM_LEAD_SECONDS)
+        if self.is_running and self.cadence.due(time.time() + PREWARM_LEAD_SECONDS):
+            self.transport.prewarm()
+        time.sleep(self.scheduler.remaining())
+
+    def on_clock_gap(self, tick):
+        """Retorno de suspensão ou ajuste do relógio: um envio neste tick, sem rajada"""
+        if tick.suspended:
+            print(f"💤 Retorno de suspensão ({tick.suspended:.0f}s)")
+            self.transport.reset_connections()  # Conexões keep-alive não sobrevivem à suspensão
+        if tick.wall_jump:
+            print(f"🕒 Relógio do sistema ajustado em {tick.wall_jump:+.0f}s")
+        # Relógio recuado deixaria last_send_time no futuro e bloquearia os envios
+        self.last_send_time = time.time() - TICK_SECONDS
+        self.cadence.reset()
+
+    def flush_app_usage(self, force=False):
+        """Fechar o resumo de tempo por aplicativo (a cada flush_interval); vai junto do próximo
+        heartbeat. Ao encerrar (force), os resumos pendentes vão em um envio próprio"""
+        ledger = self.ledger
+        if ledger is None:
+            return True
+        
+        if ledger.should_flush() or (force and ledger.keys):
+            period = ledger.close_period()
+            self.pending_usage[period['period_start']] = period
+            while len(self.pending_usage) > MAX_PENDING_USAGE:
+                self.pending_usage.popitem(last=False)  # Servidor inalcançável há muito tempo
+        
+        if force and self.pending_usage:
+            return self.post_app_usage()
+        return True
+
+    def attach_app_usage(self, payload):
+        """Resumos pendentes (os mais antigos) junto do envio ao vivo"""
+        if self.pending_usage:
+            payload['app_usage'] = list(self.pending_usage.values())[:USAGE_PER_REQUEST]
+
+    def apply_app_usage(self, response, payload):
+        """Descartar os resumos que o servidor confirmou (os demais vão no próximo envio)"""
+        periods = payload.get('app_usage')
+        if not periods or response.status_code != 200:
+            return
+        try:
+            result = response.json()
+        except ValueError:
+            result = {}
+        
+        accepted = result.get('app_usage_accepted')
+        if accepted is None:
+            # Servidores antigos respondem 200 sem processar o resumo
+            print("⚠️ Servidor não aceita app_usage - registro por aplicativo desativado")
+            self.ledger = None
+            self.pending_usage.clear()
+            return
+        for period_start in accepted:
+            self.pending_usage.pop(period_start, None)
+        total_seconds = sum(seconds for period in periods if period['period_start'] in accepted
+                            for _, _, seconds in period['usage'])
+        print(f"🗂️ Uso por aplicativo enviado: {len(accepted)} período(s), {total_seconds:.0f}s")
+
+    def post_app_usage(self):
+        """Enviar os resumos pendentes sem heartbeat (só ao encerrar o agente)"""
+        payload = {'type': 'app_usage', 'computer_id': self.computer_id}
+        self.attach_app_usage(payload)
+        try:
+            response = self.transport.post('/api/data', payload)
+        except Exception as e:
+            print(f"❌ Erro ao enviar uso por aplicativo: {e}")
+            return False
+        self.apply_app_usage(response, payload)
+        return response.status_code == 200
+
+    def spool_heartbeat(self, data, captured_at):
+        """Guardar heartbeat não entregue no spool local com o horário original"""
+        if not self.spool:
+            return False
+        try:
+            self.spool.append(data, captured_at)
+            print(f"💾 Heartbeat guardado no spool ({self.spool.count()} pendentes)")
+            return True
+        except Exception as e:
+            print(f"⚠️ Erro ao gravar no spool: {e}")
+            return False
+
+    def apply_sync(self, response):
+        """Processar a resposta de um envio com sync; False se o servidor não sincronizou"""
+        if response.status_code != 200:
+            return False
+        try:
+            result = response.json()
+        except ValueError:
+            result = {}
+        
+        # Servidores antigos ignoram a flag sync e respondem sem ela
+        if not result.get('sync'):
+            if self.sync_supported is None:
+                print("⚠️ Servidor não suporta sync - tempo real em chamada separada")
+            self.sync_supported = False
+            return False
+        
+        self.sync_supported = True
+        for command in result.get('commands') or []:
+            self.dispatch_command(command)
+        return True
+
+    def post_batch(self, entries, replayed=False):
+        """Enviar [(captured_at, heartbeat), ...] como um único heartbeat_batch"""
+        payload = build_batch_payload(entries, replayed=replayed)
+        sync = not replayed and self.sync_supported is not False
+        if sync:
+            payload['sync'] = True
+        if not replayed and self.pending_registration and self.registration.piggyback:
+            payload.update(self.registration_fields())
+        if not replayed:
+            self.attach_app_usage(payload)
+        try:
+            response = self.transport.post('/api/data', payload)
+        except Exception as e:
+            print(f"❌ Erro ao enviar lote: {e}")
+            self.cadence.on_response(None)
+            return False
+        self.cadence.on_response(response)
+        
+        if response.status_code != 200:
+            print(f"❌ Erro ao enviar lote: {response.status_code}")
+            return False
+        
+        try:
+            result = response.json()
+        except ValueError:
+            result = {}
+        
+        if sync:
+            self.apply_sync(response)
+        
+        # Servidores antigos respondem 200 para tipos desconhecidos sem processar o lote
+        if result.get('accepted') is None:
+            self.batch_supported = False
+            return False
+        
+        self.batch_supported = True
+        if not replayed:
+            self.apply_registration(response)
+            self.apply_app_usage(response, payload)
+        return True
+
+    def submit_batch(self):
+        """Entregar o lote acumulado à thread de envio"""
+        batcher = self.batcher
+        if batcher is None or not len(batcher):
+            return True
+        entries = batcher.take()
+        return self.submit('live', lambda: self.send_batch(entries),
+                           on_overflow=lambda: self.spool_entries(entries))
+
+    def flush_batch(self):
+        """Enviar as amostras acumuladas no lote agora (pausa por ociosidade e encerramento)"""
+        if self.batcher is None or not len(self.batcher):
+            return True
+        return self.send_batch(self.batcher.take())
+
+    def spool_entries(self, entries):
+        for captured_at, data in entries:
+            self.spool_heartbeat(data, captured_at)
+
+    def send_batch(self, entries):
+        """Enviar amostras do lote como um heartbeat_batch (falha: spool com os horários originais)"""
+        if self.post_batch(entries):
+            print(f"📦 Lote enviado: {len(entries)} heartbeats (Heartbeats hoje: {self.minutes_sent_today})")
             
-            if response.status_code == 200:
-                data = response.json()
-                if data.get('success') and data.get('commands'):
-                    for command in data['commands']:
-                        self.execute_command(command['action'])
+            # Tempo real: apenas a amostra mais recente (dispensado se o servidor tem sync)
+            if not self.sync_supported:
+                try:
+                    self.transport.post('/api/websocket', entries[-1][1])
+                except:
+                    pass
+            
+            if self.spool and self.spool.pending:
+                self.submit('backlog', self.drain_spool, key='drain_spool')
+            return True
+        
+        if self.batch_supported is False:
+            print("⚠️ Servidor não aceita heartbeat_batch - voltando para heartbeats individuais")
+            self.batcher = None
+        
+        # Não perder as amostras: vão para o spool com os horários originais
+        self.spool_entries(entries)
+        return False
+
+    def drain_spool(self, max_batches=4):
+        """Reenviar heartbeats do spool em lotes, parando na primeira falha"""
+        if not self.spool:
+            return 0
+        
+        replayed = 0
+        try:
+            for _ in range(max_batches):
+                batch = self.spool.peek()
+                if not batch:
+                    break
+                
+                # Preferir um único heartbeat_batch por lote do spool
+                if self.batch_supported is not False:
+                    if self.post_batch([(captured_at, data) for _, captured_at, data in batch], replayed=True):
+                        self.spool.ack([row_id for row_id, _, _ in batch])
+                        replayed += len(batch)
+                        continue
+                    if self.batch_supported is not False:
+                        break  # Falha de rede - tentar no próximo envio
+                
+                delivered = []
+                for row_id, captured_at, data in batch:
+                    data['replayed'] = True
+                    data['captured_at'] = captured_at
+                    try:
+                        response = self.transport.post('/api/data', data)
+                    except Exception:
+                        break
+                    if response.status_code != 200:
+                        self.cadence.on_response(response)
+                        break
+                    delivered.append(row_id)
+                
+                self.spool.ack(delivered)
+                replayed += len(delivered)
+                if len(delivered) < len(batch):
+                    break
+        except Exception as e:
+            print(f"⚠️ Erro ao esvaziar spool: {e}")
+        
+        if replayed:
+            print(f"📤 {replayed} heartbeats reenviados do spool ({self.spool.count()} pendentes)")
+        return replayed
+
+    def dispatch_command(self, command):
+        """Executar comando recebido (pelo canal push, sync ou consulta) uma única vez"""
+        if self.command_channel is not None:
+            self.command_channel.dispatch(command)  # Evita executar duas vezes
+        else:
+            self.run_command(command)
+
+    def apply_commands(self, response):
+        if response.status_code == 200:
+            data = response.json()
+            if data.get('success') and data.get('commands'):
+                for command in data['commands']:
+                    self.dispatch_command(command)
+
+    def check_commands(self):
+        """Verificar comandos pendentes do servidor a cada tick. Nem o canal push conectado nem um
+        sync sem comandos dispensam a consulta: o comando pode estar em outra instância da API (a
+        fila fica na memória da função /api/commands); o que chega por mais de um caminho roda
+        uma vez só"""
+        try:
+            response = self.transport.get('/api/commands', 
+                                          params={'computer_id': self.computer_id})
+            self.apply_commands(response)
                         
         except Exception as e:
             print(f"❌ Erro ao verificar comandos: {e}")
@@ -352,56 +1035,103 @@ class OnlineActivityMonitor:
                 elif platform.system() == "Windows":
                     subprocess.run(['shutdown', '/r', '/t', '60'])
                 print("🔄 Reiniciando em 1 minuto")
+            
+            return True
                 
         except Exception as e:
             print(f"❌ Erro ao executar comando {action}: {e}")
+            return False
+
+    def run_command(self, command):
+        """Executar comando recebido e confirmar ao servidor (fila de maior prioridade)"""
+        ok = self.execute_command(command['action'])
+        if command.get('id'):
+            status = 'executed' if ok else 'failed'
+            self.submit('ack', lambda: self.ack_command(command['id'], status))
+
+    def ack_command(self, command_id, status):
+        """Confirmar execução do comando (servidores antigos respondem 400 - ignorado)"""
+        try:
+            response = self.transport.post('/api/commands', {
+                'computer_id': self.computer_id,
+                'command_id': command_id,
+                'status': status
+            })
+            return response.status_code == 200
+        except Exception as e:
+            print(f"⚠️ Erro ao confirmar comando {command_id}: {e}")
+            return False
 
     def monitor_loop(self):
         """Loop principal de monitoramento"""
         print("👁️ Iniciando monitoramento...")
         print("💓 Enviando heartbeat a cada minuto (servidor controla tempo)")
         
-        # Registrar computador
-        if not self.register():
-            print("❌ Falha ao registrar. Tentando novamente em 30s...")
-            time.sleep(30)
-            return self.monitor_loop()
+        # Partida escalonada; registro só se mudou (senão vai junto do primeiro heartbeat)
+        delay = self.startup_delay()
+        deadline = time.monotonic() + delay
+        while self.is_running and time.monotonic() < deadline:
+            time.sleep(min(1, deadline - time.monotonic()))
+        
+        # Registrar computador (tentativas com espera crescente, sem recursão)
+        if self.prepare_registration() and \
+                not self.supervisor.retry('registro', self.register, lambda: self.is_running):
+            return
+        
+        if self.command_channel is not None:
+            self.command_channel.start()
+        if self.sender is not None:
+            self.sender.start()
         
+        self.scheduler.start()
         while self.is_running:
             try:
-                # Enviar heartbeat (servidor incrementa tempo automaticamente)
-                self.send_activity()
+                tick = self.scheduler.begin()
+                if tick.clock_gap:
+                    self.on_clock_gap(tick)
                 
-                # Verificar comandos
-                self.check_commands()
+                try:
+                    # Enviar heartbeat (servidor incrementa tempo automaticamente)
+                    self.send_activity()
+                    self.flush_app_usage()
+                    
+                    # Verificar comandos (depois do heartbeat do tick)
+                    self.submit('live', self.check_commands, key='check_commands')
+                except Exception as e:
+                    print(f"❌ Erro no loop: {e}")
                 
-                # Aguardar 60 segundos para próximo heartbeat
-                time.sleep(60)
+                # Aguardar próximo heartbeat na agenda (o tempo gasto no tick não se acumula)
+                self.wait_next_tick()
                 
             except KeyboardInterrupt:
                 print("\n👋 Monitor interrompido pelo usuário")
                 break
-            except Exception as e:
-                print(f"❌ Erro no loop: {e}")
-                time.sleep(60)
 
     def start(self):
         """Iniciar o monitor"""
         self.is_running = True
         print("🚀 Iniciando monitor online...")
         
-        try:
-            # Apenas loop principal - sem thread separada de heartbeat
-            self.monitor_loop()
-            
-        except Exception as e:
-            print(f"❌ Erro crítico: {e}")
-            time.sleep(10)
-            self.start()  # Reiniciar
+        # Apenas loop principal - sem thread separada de heartbeat; o supervisor reinicia
+        # o loop após um erro crítico (em laço, sem recursão)
+        self.supervisor.run('monitor', self.monitor_loop, lambda: self.is_running)
 
     def stop(self):
         """Parar o monitor"""
         self.is_running = False
+        if self.sender is not None:
+            self.sender.stop()  # Entrega o que estiver na fila; o resto vai para o spool
+        self.flush_batch()
+        self.flush_app_usage(force=True)
+        if self.probe_helper:
+            self.probe_helper.close()
+        if self.x11_backend:
+            self.x11_backend.close()
+        if self.idle_monitor is not None:
+            self.idle_monitor.close()
+        if self.command_channel is not None:
+            self.command_channel.stop()
+        self.transport.close()
         print("🛑 Monitor parado")
 
 def main():
@@ -424,6 +1154,8 @@ def main():
         monitor.start()
     except KeyboardInterrupt:
         print("\n👋 Encerrando monitor...")
+    finally:
+        # Envia o lote pendente antes de sair
         monitor.stop()
 
 if __name__ == "__main__":
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Coprocesso de Consulta da Janela Ativa
+Mantém um helper rodando e consulta via stdin/stdout (protocolo de linhas),
+evitando iniciar um processo novo (osascript) a cada amostra
+
+Protocolo:
+    agente -> helper: "probe"    resposta: "ok\\t<app>\\t<título>" ou "err\\t<mensagem>"
+    agente -> helper: "quit"     encerra o helper
+
+Qualquer executável que siga o protocolo funciona como helper
+(ver probe_helper_stub.py para testes no Linux)
+"""
+
+import os
+import queue
+import subprocess
+import threading
+import time
+
+DEFAULT_TIMEOUT = 2.0  # segundos por consulta
+MIN_RESTART_INTERVAL = 5.0  # espera mínima entre reinícios do helper
+
+HELPER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def macos_helper_command():
+    """Comando do helper JXA no macOS"""
+    return ['osascript', '-l', 'JavaScript', os.path.join(HELPER_DIR, 'probe_helper_macos.js')]
+
+
+class ProbeCoprocess:
+    def __init__(self, command, timeout=DEFAULT_TIMEOUT, min_restart_interval=MIN_RESTART_INTERVAL):
+        self.command = list(command)
+        self.timeout = timeout
+        self.min_restart_interval = min_restart_interval
+
+        self.process = None
+        self.lines = None
+        self.last_start = 0
+        self._lock = threading.Lock()
+
+        # Contadores
+        self.queries = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.restarts = 0
+
+    def _start(self):
+        """Iniciar o helper e a thread leitora de stdout"""
+        now = time.monotonic()
+        if self.last_start and now - self.last_start < self.min_restart_interval:
+            return False  # Evitar loop de reinício se o helper morre logo ao iniciar
+
+        if self.last_start:
+            self.restarts += 1
+        self.last_start = now
+
+        try:
+            self.process = subprocess.Popen(self.command,
+                                            stdin=subprocess.PIPE,
+                                            stdout=subprocess.PIPE,
+                                            stderr=subprocess.DEVNULL,
+                                            text=True, encoding='utf-8', errors='replace',
+                                            bufsize=1)
+        except OSError:
+            self.process = None
+            self.errors += 1
+            return False
+
+        # Cada processo tem sua própria fila: respostas atrasadas de um helper morto são descartadas
+        self.lines = queue.Queue()
+        reader = threading.Thread(target=self._read_lines, args=(self.process, self.lines), daemon=True)
+        reader.start()
+        return True
+
+    @staticmethod
+    def _read_lines(process, lines):
+        """Ler respostas do helper (None sinaliza EOF)"""
+        try:
+            for line in process.stdout:
+                lines.put(line.rstrip('\n'))
+        except (OSError, ValueError):
+            pass
+        lines.put(None)
+
+    def _kill(self):
+        """Encerrar o helper atual"""
+        if self.process is None:
+            return
+        try:
+            self.process.kill()
+            self.process.wait(timeout=1)
+        except Exception:
+            pass
+        self.process = None
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def query(self):
+        """Consultar a janela ativa: {'process_name', 'window_title'} ou None"""
+        with self._lock:
+            # Segunda tentativa apenas se o helper morreu entre uma consulta e outra
+            for _ in range(2):
+                if not self.is_alive():
+                    self._kill()
+                    if not self._start():
+                        return None
+
+                self.queries += 1
+                try:
+                    self.process.stdin.write('probe\n')
+                    self.process.stdin.flush()
+                    line = self.lines.get(timeout=self.timeout)
+                except queue.Empty:
+                    # Helper travado: descartar para não ler a resposta atrasada na próxima consulta
+                    self.timeouts += 1
+                    self._kill()
+                    return None
+                except (OSError, ValueError):
+                    self.errors += 1
+                    self._kill()
+                    continue
+
+                if line is None:
+                    self.errors += 1
+                    self._kill()
+                    continue
+
+                parts = line.split('\t')
+                if parts[0] != 'ok' or len(parts) < 2:
+                    self.errors += 1
+                    return None
+
+                return {
+                    'process_name': parts[1],
+                    'window_title': parts[2] if len(parts) > 2 else ''
+                }
+
+            return None
+
+    def stats(self):
+        return {
+            'queries': self.queries,
+            'timeouts': self.timeouts,
+            'errors': self.errors,
+            'restarts': self.restarts
+        }
+
+    def close(self):
+        """Pedir para o helper sair e encerrar o processo"""
+        with self._lock:
+            if self.is_alive():
+                try:
+                    self.process.stdin.write('quit\n')
+                    self.process.stdin.flush()
+                    self.process.wait(timeout=1)
+                except Exception:
+                    pass
+            self._kill()
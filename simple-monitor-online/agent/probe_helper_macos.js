@@ -0,0 +1,65 @@
+// Helper persistente de janela ativa (macOS / JXA)
+// Executado por: osascript -l JavaScript probe_helper_macos.js
+//
+// Protocolo (uma linha por mensagem, UTF-8):
+//   agente -> helper: "probe"              resposta: "ok\t<app>\t<título>"
+//   agente -> helper: "ping"               resposta: "pong"
+//   agente -> helper: "quit"               encerra o helper
+//   erro:                                  resposta: "err\t<mensagem>"
+
+ObjC.import('Foundation');
+
+var stdin = $.NSFileHandle.fileHandleWithStandardInput;
+var stdout = $.NSFileHandle.fileHandleWithStandardOutput;
+var systemEvents = Application('System Events');
+var buffer = '';
+var running = true;
+
+function clean(text) {
+    return String(text || '').replace(/[\t\r\n]+/g, ' ');
+}
+
+function reply(line) {
+    stdout.writeData($(line + '\n').dataUsingEncoding($.NSUTF8StringEncoding));
+}
+
+function probe() {
+    try {
+        var proc = systemEvents.processes.whose({ frontmost: true })[0];
+        var app = proc.name();
+        var title = '';
+        try {
+            title = proc.windows[0].name() || '';
+        } catch (e) {
+            // Sem permissão de acessibilidade ou app sem janelas
+        }
+        return 'ok\t' + clean(app) + '\t' + clean(title);
+    } catch (e) {
+        return 'err\t' + clean(e);
+    }
+}
+
+while (running) {
+    var data = stdin.availableData;
+    if (data.length === 0) {
+        break; // EOF: agente encerrou
+    }
+    buffer += $.NSString.alloc.initWithDataEncoding(data, $.NSUTF8StringEncoding).js;
+
+    var index;
+    while ((index = buffer.indexOf('\n')) >= 0) {
+        var command = buffer.slice(0, index).trim();
+        buffer = buffer.slice(index + 1);
+
+        if (command === 'probe') {
+            reply(probe());
+        } else if (command === 'ping') {
+            reply('pong');
+        } else if (command === 'quit') {
+            running = false;
+            break;
+        } else if (command) {
+            reply('err\tcomando desconhecido: ' + clean(command));
+        }
+    }
+}
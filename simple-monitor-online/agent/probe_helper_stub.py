@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Helper Falso de Janela Ativa
+Implementa o protocolo de probe.py para testar o supervisor no Linux
+
+Variáveis de ambiente:
+    WORKTRACK_STUB_WINDOWS     janelas em rodízio: "app|título;app|título" (padrão: Terminal)
+    WORKTRACK_STUB_DELAY       atraso em segundos antes de cada resposta
+    WORKTRACK_STUB_EXIT_AFTER  encerra após N consultas (simula helper que morre)
+"""
+
+import os
+import sys
+import time
+
+
+def main():
+    spec = os.environ.get('WORKTRACK_STUB_WINDOWS', 'Terminal|bash')
+    windows = [item.split('|', 1) + [''] for item in spec.split(';') if item]
+    delay = float(os.environ.get('WORKTRACK_STUB_DELAY', '0'))
+    exit_after = int(os.environ.get('WORKTRACK_STUB_EXIT_AFTER', '0'))
+
+    served = 0
+    for line in sys.stdin:
+        command = line.strip()
+        if command == 'quit':
+            break
+        elif command == 'ping':
+            reply = 'pong'
+        elif command == 'probe':
+            if delay:
+                time.sleep(delay)
+            app, title = windows[served % len(windows)][:2]
+            reply = f'ok\t{app}\t{title}'
+            served += 1
+        else:
+            reply = f'err\tcomando desconhecido: {command}'
+
+        sys.stdout.write(reply + '\n')
+        sys.stdout.flush()
+
+        if exit_after and served >= exit_after:
+            break
+
+
+if __name__ == "__main__":
+    main()
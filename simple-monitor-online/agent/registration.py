@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Cache de Registro e Partida Escalonada
+Evita a rajada de registros quando a frota inteira liga no mesmo horário:
+    - impressão digital (SHA-256) do último registro aceito fica em disco; se nome, usuário,
+      SO, metadados e servidor não mudaram, o agente não registra de novo ao iniciar
+    - registro pendente vai junto do primeiro heartbeat (flag register) em vez de um POST
+      separado; servidores sem suporte recebem o register normal pela fila de envio
+    - o token de sessão do último registro fica junto, para os heartbeats compactos (session.py)
+    - a partida é adiada por um tempo aleatório dentro de startup_window
+"""
+
+import hashlib
+import json
+import os
+import random
+import time
+
+DEFAULT_REGISTRATION_PATH = os.path.join(os.path.expanduser("~"), ".worktrack_monitor", "registration.json")
+
+# Registro refeito mesmo sem mudanças depois disso (servidor pode ter perdido o dispositivo)
+DEFAULT_MAX_AGE = 7 * 24 * 3600
+
+# Janela (s) em que a partida do agente é sorteada
+DEFAULT_STARTUP_WINDOW = 60
+
+
+class RegistrationCache:
+    def __init__(self, path=None, max_age=DEFAULT_MAX_AGE, startup_window=DEFAULT_STARTUP_WINDOW,
+                 piggyback=True):
+        self.path = path or DEFAULT_REGISTRATION_PATH
+        self.max_age = max_age
+        self.startup_window = max(0.0, float(startup_window))
+        self.piggyback = piggyback
+
+    @classmethod
+    def from_config(cls, config):
+        """Criar a partir da seção registration do device_config.json (None se desativada)"""
+        config = config or {}
+        if config.get('enabled') is False:
+            return None
+        return cls(max_age=config.get('max_age', DEFAULT_MAX_AGE),
+                   startup_window=config.get('startup_window', DEFAULT_STARTUP_WINDOW),
+                   piggyback=config.get('piggyback', True) is not False)
+
+    @staticmethod
+    def fingerprint(payload, server_url):
+        """Impressão digital do payload de registro para este servidor"""
+        raw = json.dumps([server_url, payload], sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if isinstance(entry, dict) else None
+
+    def is_current(self, fingerprint, now=None):
+        """Registro com esta impressão digital já aceito e ainda dentro de max_age?"""
+        entry = self.load()
+        if not entry or entry.get('fingerprint') != fingerprint:
+            return False
+        registered_at = entry.get('registered_at')
+        if not isinstance(registered_at, (int, float)):
+            return False
+        return 0 <= (now or time.time()) - registered_at < self.max_age
+
+    def session(self):
+        """Token de sessão do último registro aceito (None se o servidor não devolveu)"""
+        entry = self.load()
+        token = entry.get('session') if entry else None
+        return token if isinstance(token, str) and token else None
+
+    def save(self, fingerprint, session=None, now=None):
+        """Gravar o registro aceito (escrita atômica)"""
+        entry = {'fingerprint': fingerprint, 'registered_at': now or time.time()}
+        if session:
+            entry['session'] = session
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self.path)
+            return True
+        except OSError as e:
+            print(f"⚠️ Não foi possível gravar o cache de registro: {e}")
+            return False
+
+    def update_session(self, session):
+        """Trocar o token de sessão guardado (renovado pelo servidor), mantendo o registro"""
+        entry = self.load()
+        if not entry or entry.get('session') == session:
+            return False
+        return self.save(entry.get('fingerprint'), session, entry.get('registered_at'))
+
+    def startup_delay(self, rng=random):
+        """Atraso aleatório da partida (s), uniforme em [0, startup_window]"""
+        return rng.uniform(0, self.startup_window) if self.startup_window else 0.0
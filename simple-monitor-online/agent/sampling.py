@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Amostragem da Janela Ativa
+Uma única consulta por tick gera um snapshot imutável lido pelo categorizador,
+pelo montador de payload e pelo log
+"""
+
+import time
+from collections import namedtuple
+
+# Cache para chamadas avulsas fora do tick (ex.: get_current_activity() sem snapshot)
+DEFAULT_TTL = 2.0
+
+
+class ActivitySnapshot(namedtuple('ActivitySnapshot',
+                                  ['process_name', 'window_title', 'captured_at', 'probe_latency'])):
+    """Snapshot imutável da janela em primeiro plano"""
+    __slots__ = ()
+
+    @property
+    def has_window(self):
+        return self.process_name is not None
+
+    def as_window_info(self):
+        """Formato antigo de get_active_window() (dict ou None)"""
+        if not self.has_window:
+            return None
+        return {'window_title': self.window_title, 'process_name': self.process_name}
+
+
+class ActivitySampler:
+    def __init__(self, probe, ttl=DEFAULT_TTL, clock=time.time):
+        self.probe = probe  # Função que retorna {'window_title', 'process_name'} ou None
+        self.ttl = ttl
+        self.clock = clock
+        self.last_snapshot = None
+        self.probes = 0
+
+    def sample(self):
+        """Consultar a janela ativa uma vez e gerar um novo snapshot"""
+        started = time.perf_counter()
+        try:
+            window_info = self.probe()
+        except Exception:
+            window_info = None
+        latency = time.perf_counter() - started
+        self.probes += 1
+
+        if window_info:
+            snapshot = ActivitySnapshot(window_info.get('process_name') or 'Desconhecido',
+                                        window_info.get('window_title') or '',
+                                        self.clock(), latency)
+        else:
+            snapshot = ActivitySnapshot(None, None, self.clock(), latency)
+
+        self.last_snapshot = snapshot
+        return snapshot
+
+    def current(self):
+        """Snapshot recente (até ttl segundos) ou um novo, para chamadas avulsas"""
+        snapshot = self.last_snapshot
+        if snapshot is None or self.clock() - snapshot.captured_at > self.ttl:
+            snapshot = self.sample()
+        return snapshot
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Agenda de Ticks e Supervisor
+TickScheduler: ticks em uma grade de tempo monotônico (início + n * intervalo), então o
+tempo gasto no tick não se acumula como deriva
+    - tick atrasado mais de um intervalo (trabalho longo, suspensão): os ticks perdidos são
+      pulados em vez de disparados em rajada
+    - suspensão e ajustes do relógio do sistema são detectados comparando os relógios
+      monotônico, de boot (CLOCK_BOOTTIME, conta a suspensão) e de parede
+    - fase por dispositivo (derivada do computer_id) e jitter limitado espalham os ticks da
+      frota ao longo do minuto, em vez de todos dispararem no mesmo segundo após o login
+
+Supervisor: executa os estágios do agente em laço e os reinicia após falhas com espera
+crescente e jitter total, sem recursão (a pilha não cresce durante uma queda longa)
+"""
+
+import hashlib
+import random
+import time
+from collections import namedtuple
+
+DEFAULT_INTERVAL = 60
+
+# Diferença entre relógios (s) a partir da qual há suspensão ou ajuste do relógio
+DEFAULT_GAP_THRESHOLD = 5
+
+# Atraso aleatório máximo (s) somado a cada tick, além da fase do dispositivo
+DEFAULT_JITTER = 5
+
+
+def boottime_clock():
+    """Relógio que conta o tempo suspenso (Linux: CLOCK_BOOTTIME); None se indisponível"""
+    clock_id = getattr(time, 'CLOCK_BOOTTIME', None)
+    if clock_id is None:
+        return None
+    try:
+        time.clock_gettime(clock_id)
+    except OSError:
+        return None
+    return lambda: time.clock_gettime(clock_id)
+
+
+def phase_offset(key, interval=DEFAULT_INTERVAL):
+    """Fase fixa do dispositivo dentro do intervalo (s), derivada de key (computer_id)"""
+    digest = hashlib.sha256(str(key).encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') / 2 ** 64 * interval
+
+
+class Tick(namedtuple('Tick', ['number', 'late', 'skipped', 'suspended', 'wall_jump'])):
+    """late: atraso (s) em relação à agenda; skipped: ticks pulados;
+    suspended: segundos suspenso desde o tick anterior; wall_jump: ajuste do relógio de parede (s)"""
+    __slots__ = ()
+
+    @property
+    def clock_gap(self):
+        return bool(self.suspended or self.wall_jump)
+
+
+class TickScheduler:
+    def __init__(self, interval=DEFAULT_INTERVAL, monotonic=time.monotonic, wall=time.time,
+                 boottime=None, gap_threshold=DEFAULT_GAP_THRESHOLD, phase=None, jitter=0, rng=None):
+        self.interval = float(interval)
+        self.monotonic = monotonic
+        self.wall = wall
+        self.boottime = boottime if boottime is not None else boottime_clock()
+        self.gap_threshold = gap_threshold
+        self.phase = phase % self.interval if phase is not None else None  # segundo do intervalo (parede)
+        self.jitter = max(0.0, min(float(jitter), self.interval / 2))
+        self.random = rng or random.Random()
+
+        self.next_due = None
+        self.next_jitter = 0.0
+        self.last = None  # (monotônico, parede, boot) no último tick
+
+        # Contadores
+        self.ticks = 0
+        self.skipped = 0
+        self.suspends = 0
+        self.suspended_seconds = 0.0
+        self.wall_jumps = 0
+
+    @classmethod
+    def from_config(cls, config, interval=DEFAULT_INTERVAL, key=None):
+        """Criar a partir da seção schedule do device_config.json (fase pelo computer_id em key)"""
+        config = config or {}
+        phase = None
+        if config.get('phase') is not False and key is not None:
+            phase = phase_offset(key, interval)
+        return cls(interval, phase=phase, jitter=config.get('jitter', DEFAULT_JITTER))
+
+    def _read(self):
+        return self.monotonic(), self.wall(), self.boottime() if self.boottime else None
+
+    def start(self, delay=0):
+        """Iniciar a grade: primeiro tick em delay segundos (mais o tempo até a fase, se houver)"""
+        self.last = self._read()
+        self.next_due = self.last[0] + delay + self.phase_delay(self.last[1] + delay)
+        self.next_jitter = self.draw_jitter()
+
+    def phase_delay(self, wall):
+        """Segundos a partir de wall até o próximo instante na fase do dispositivo"""
+        if self.phase is None:
+            return 0.0
+        return (self.phase - wall) % self.interval
+
+    def draw_jitter(self):
+        return self.random.uniform(0, self.jitter) if self.jitter else 0.0
+
+    def begin(self):
+        """Marcar o início do tick devido e avançar a agenda"""
+        if self.next_due is None:
+            self.start()
+        mono, wall, boot = self._read()
+
+        late = max(0.0, mono - self.next_due - self.next_jitter)
+        skipped = int(late // self.interval)
+        # Próximo tick na grade (sem somar o tempo gasto neste tick)
+        self.next_due += (skipped + 1) * self.interval
+
+        suspended, wall_jump = self._gaps(mono, wall, boot)
+        self.last = (mono, wall, boot)
+        if (suspended or wall_jump) and self.phase is not None:
+            # O monotônico parou (ou a parede mudou): realinhar a grade à fase do dispositivo,
+            # a pelo menos meio intervalo deste tick
+            delay = self.phase_delay(wall)
+            self.next_due = mono + (delay if delay >= self.interval / 2 else delay + self.interval)
+        self.next_jitter = self.draw_jitter()
+
+        self.ticks += 1
+        self.skipped += skipped
+        if suspended:
+            self.suspends += 1
+            self.suspended_seconds += suspended
+        if wall_jump:
+            self.wall_jumps += 1
+        return Tick(self.ticks, late, skipped, suspended, wall_jump)
+
+    def _gaps(self, mono, wall, boot):
+        """(segundos suspenso, ajuste do relógio de parede) desde o tick anterior"""
+        last_mono, last_wall, last_boot = self.last
+        d_mono = mono - last_mono
+        d_wall = wall - last_wall
+
+        if boot is not None and last_boot is not None:
+            d_boot = boot - last_boot
+            suspended = d_boot - d_mono
+            wall_jump = d_wall - d_boot
+        else:
+            # Sem relógio de boot: avanço do relógio de parede além do monotônico conta como
+            # suspensão, recuo como ajuste
+            diff = d_wall - d_mono
+            suspended, wall_jump = (diff, 0.0) if diff > 0 else (0.0, diff)
+
+        suspended = suspended if suspended > self.gap_threshold else 0.0
+        wall_jump = wall_jump if abs(wall_jump) > self.gap_threshold else 0.0
+        return suspended, wall_jump
+
+    def remaining(self):
+        """Segundos até o próximo tick"""
+        if self.next_due is None:
+            return 0.0
+        return max(0.0, self.next_due + self.next_jitter - self.monotonic())
+
+    def stats(self):
+        return {
+            'ticks': self.ticks,
+            'skipped': self.skipped,
+            'suspends': self.suspends,
+            'suspended_seconds': round(self.suspended_seconds),
+            'wall_jumps': self.wall_jumps
+        }
+
+
+class Supervisor:
+    def __init__(self, sleep=time.sleep, monotonic=time.monotonic, min_backoff=10, max_backoff=300,
+                 stable_after=600, rng=None):
+        self.sleep = sleep
+        self.monotonic = monotonic
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after  # estágio que rodou isso antes de falhar zera a espera
+        self.restarts = {}  # estágio -> reinícios
+        self.random = rng or random.Random()
+
+    def jittered(self, wait):
+        """Jitter total: espera uniforme entre 0 e o backoff (agentes não voltam juntos)"""
+        return self.random.uniform(0, wait)
+
+    def run(self, name, stage, should_run):
+        """Executar stage() até terminar normalmente; exceções reiniciam o estágio após a espera"""
+        backoff = self.min_backoff
+        while should_run():
+            started = self.monotonic()
+            try:
+                return stage()
+            except KeyboardInterrupt:
+                raise
+            except Exception as e:
+                self.restarts[name] = self.restarts.get(name, 0) + 1
+                if self.monotonic() - started >= self.stable_after:
+                    backoff = self.min_backoff
+                wait = self.jittered(backoff)
+                print(f"❌ Erro crítico em {name}: {e} - reiniciando em {wait:.0f}s")
+                self.sleep(wait)
+                backoff = min(self.max_backoff, backoff * 2)
+        return None
+
+    def retry(self, name, attempt, should_run, delay=30, max_delay=None):
+        """Repetir attempt() até retornar verdadeiro (ex.: registro), com espera crescente"""
+        max_delay = max_delay or self.max_backoff
+        wait = delay
+        while should_run():
+            if attempt():
+                return True
+            self.restarts[name] = self.restarts.get(name, 0) + 1
+            pause = self.jittered(wait)
+            print(f"❌ Falha em {name}. Tentando novamente em {pause:.0f}s...")
+            self.sleep(pause)
+            wait = min(max_delay, wait * 2)
+        return False
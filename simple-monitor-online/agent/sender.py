@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Envio em Segundo Plano com Filas de Prioridade
+O loop principal só amostra e monta os payloads; as requisições rodam em uma thread
+própria, que atende filas limitadas em ordem de prioridade:
+    1. ack      - confirmações de comandos executados
+    2. live     - heartbeat/lote do tick, retorno de ociosidade, consulta de comandos
+    3. backlog  - reenvio do spool
+
+Política de estouro (fila cheia):
+    - ack e live: a tarefa mais antiga sai da fila; se ela tiver on_overflow (heartbeats e
+      lotes: gravar no spool), ele é chamado e nada se perde
+    - backlog: a tarefa nova é descartada
+Tarefas com a mesma chave (key) não se repetem na fila (ex.: esvaziar o spool)
+"""
+
+import threading
+import time
+from collections import deque
+
+LANES = ('ack', 'live', 'backlog')
+
+DROP_OLDEST = 'drop_oldest'
+DROP_NEWEST = 'drop_newest'
+
+DEFAULT_CAPACITY = {'ack': 32, 'live': 8, 'backlog': 16}
+OVERFLOW_POLICY = {'ack': DROP_OLDEST, 'live': DROP_OLDEST, 'backlog': DROP_NEWEST}
+
+# Tempo máximo para entregar o que estiver na fila ao encerrar
+DEFAULT_STOP_TIMEOUT = 15
+
+
+class UploadTask:
+    __slots__ = ('lane', 'run', 'key', 'on_overflow', 'queued_at')
+
+    def __init__(self, lane, run, key=None, on_overflow=None):
+        self.lane = lane
+        self.run = run
+        self.key = key
+        self.on_overflow = on_overflow
+        self.queued_at = time.monotonic()
+
+
+class UploadSender:
+    def __init__(self, capacity=None):
+        self.capacity = dict(DEFAULT_CAPACITY)
+        if capacity:
+            self.capacity.update({lane: max(1, int(size)) for lane, size in capacity.items() if lane in LANES})
+
+        self.queues = {lane: deque() for lane in LANES}
+        self.keys = set()
+        self.condition = threading.Condition()
+        self.is_running = False
+        self.thread = None
+        self.busy = False  # Tarefa em execução (fora das filas)
+
+        # Contadores por fila
+        self.counters = {lane: {'sent': 0, 'failed': 0, 'dropped': 0, 'spilled': 0, 'coalesced': 0}
+                         for lane in LANES}
+        self.max_wait = 0.0  # Maior espera na fila (s)
+
+    @classmethod
+    def from_config(cls, config):
+        """Criar a partir da seção sender do device_config.json (None = envio no loop principal)"""
+        config = config or {}
+        if config.get('enabled') is False:
+            return None
+        return cls(capacity=config.get('capacity'))
+
+    def start(self):
+        if self.thread is not None:
+            return
+        self.is_running = True
+        self.thread = threading.Thread(target=self._run, name='worktrack-sender', daemon=True)
+        self.thread.start()
+
+    def submit(self, lane, run, key=None, on_overflow=None):
+        """Enfileirar uma tarefa; retorna False se ela foi descartada ou já estava na fila"""
+        task = UploadTask(lane, run, key, on_overflow)
+        evicted = None
+        with self.condition:
+            counters = self.counters[lane]
+            if key is not None and key in self.keys:
+                counters['coalesced'] += 1
+                return False
+
+            queue = self.queues[lane]
+            if len(queue) >= self.capacity[lane]:
+                if OVERFLOW_POLICY[lane] == DROP_NEWEST:
+                    counters['dropped'] += 1
+                    return False
+                evicted = queue.popleft()
+                self.keys.discard(evicted.key)
+
+            queue.append(task)
+            if key is not None:
+                self.keys.add(key)
+            self.condition.notify()
+
+        if evicted is not None:
+            self._overflow(evicted)
+        return True
+
+    def _overflow(self, task):
+        counters = self.counters[task.lane]
+        if task.on_overflow is None:
+            counters['dropped'] += 1
+            return
+        counters['spilled'] += 1
+        try:
+            task.on_overflow()
+        except Exception as e:
+            print(f"⚠️ Erro ao guardar tarefa descartada: {e}")
+
+    def _next(self):
+        """Próxima tarefa pela prioridade das filas (chamado com o lock)"""
+        for lane in LANES:
+            queue = self.queues[lane]
+            if queue:
+                task = queue.popleft()
+                self.keys.discard(task.key)
+                return task
+        return None
+
+    def _run(self):
+        while True:
+            with self.condition:
+                task = self._next()
+                while task is None and self.is_running:
+                    self.condition.wait()
+                    task = self._next()
+                if task is None:
+                    break
+                self.busy = True
+
+            self.max_wait = max(self.max_wait, time.monotonic() - task.queued_at)
+            counters = self.counters[task.lane]
+            try:
+                ok = task.run()
+            except Exception as e:
+                print(f"❌ Erro no envio em segundo plano: {e}")
+                ok = False
+            counters['sent' if ok is not False else 'failed'] += 1
+
+            with self.condition:
+                self.busy = False
+                self.condition.notify_all()
+
+    def wait_idle(self, timeout=None):
+        """Aguardar as filas esvaziarem; retorna False se o tempo acabar antes"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.condition:
+            while self.depth() or self.busy:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.condition.wait(remaining)
+        return True
+
+    def stop(self, timeout=DEFAULT_STOP_TIMEOUT):
+        """Entregar o que estiver na fila (até timeout) e parar; o que sobrar passa pelo on_overflow"""
+        if self.thread is None:
+            return
+        self.wait_idle(timeout)
+        with self.condition:
+            self.is_running = False
+            leftover = [task for lane in LANES for task in self.queues[lane]]
+            for queue in self.queues.values():
+                queue.clear()
+            self.keys.clear()
+            self.condition.notify_all()
+        for task in leftover:
+            self._overflow(task)
+        self.thread.join(1)
+        self.thread = None
+
+    def depth(self, lane=None):
+        if lane is not None:
+            return len(self.queues[lane])
+        return sum(len(queue) for queue in self.queues.values())
+
+    def stats(self):
+        """Profundidade e contadores por fila (exportados no heartbeat)"""
+        lanes = {}
+        for lane in LANES:
+            lanes[lane] = dict(self.counters[lane], depth=len(self.queues[lane]))
+        return {
+            'depth': self.depth(),
+            'dropped': sum(c['dropped'] for c in self.counters.values()),
+            'spilled': sum(c['spilled'] for c in self.counters.values()),
+            'max_wait': round(self.max_wait, 3),
+            'lanes': lanes
+        }
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Sessão de Heartbeats (token + delta)
+O registro devolve um token de sessão assinado pelo servidor. Com ele, o heartbeat ao vivo deixa de repetir
+computer_id, computer_name, user_name e os_info e leva só os campos que mudaram desde o
+último heartbeat aceito pelo servidor:
+    - seq numera os heartbeats da sessão; base é o seq do último aceito (ausente = completo)
+    - falha de envio: o próximo heartbeat vai completo (com o token)
+    - resposta resync (delta recusado por uma instância sem o estado base): o mesmo heartbeat é
+      reenviado completo
+    - resposta session_expired: o token é descartado e o agente volta ao payload completo
+    - servidor sem WORKTRACK_SESSION_SECRET não devolve token: heartbeats sempre completos
+    - resposta com session (token perto de vencer): troca do token, sem perder a referência
+Metadados do device_config.json (descrição, departamento, local, tags) vão só no registro,
+com um hash do conteúdo; mudou o hash, muda a impressão digital e o registro é refeito.
+"""
+
+import hashlib
+import json
+import threading
+
+from batching import IDENTITY_FIELDS
+
+# Campos do device_config.json enviados como metadados do dispositivo
+METADATA_FIELDS = ('description', 'department', 'location', 'tags')
+
+_MISSING = object()
+
+
+def device_metadata(config):
+    """Metadados do dispositivo presentes no device_config.json"""
+    return {field: config[field] for field in METADATA_FIELDS if config.get(field) not in (None, '', [])}
+
+
+def metadata_hash(payload):
+    """Hash curto do conteúdo (identidade + metadados)"""
+    raw = json.dumps(payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:16]
+
+
+class HeartbeatSession:
+    def __init__(self, token=None):
+        self.token = token
+        self.seq = 0  # Último seq usado
+        self.base_seq = None  # seq do último heartbeat aceito (referência do delta)
+        self.baseline = None  # Campos do último heartbeat aceito
+        self._lock = threading.Lock()
+
+        # Contadores
+        self.full_sent = 0
+        self.delta_sent = 0
+        self.expired = 0
+
+    def start(self, token):
+        """Nova sessão (token do registro): o primeiro heartbeat vai completo"""
+        with self._lock:
+            if token == self.token:
+                return
+            self.token = token
+            self.baseline = None
+            self.base_seq = None
+
+    def renew(self, token):
+        """Token renovado pelo servidor para a mesma sessão: mantém a referência dos deltas"""
+        with self._lock:
+            if self.token:
+                self.token = token
+
+    def expire(self):
+        with self._lock:
+            self.token = None
+            self.baseline = None
+            self.base_seq = None
+            self.expired += 1
+
+    def resync(self):
+        """Próximo heartbeat completo (entrega incerta ou servidor pediu resync)"""
+        with self._lock:
+            self.baseline = None
+            self.base_seq = None
+
+    def payload(self, data):
+        """Heartbeat compacto (token + campos alterados); None sem sessão"""
+        with self._lock:
+            if not self.token:
+                return None
+            fields = {k: v for k, v in data.items() if k not in IDENTITY_FIELDS}
+            self.seq += 1
+            payload = {'type': data.get('type', 'heartbeat'), 'session': self.token, 'seq': self.seq}
+            if self.baseline is None:
+                payload.update(fields)
+                self.full_sent += 1
+            else:
+                payload.update({k: v for k, v in fields.items() if self.baseline.get(k, _MISSING) != v})
+                payload['base'] = self.base_seq
+                self.delta_sent += 1
+            return payload
+
+    def accepted(self, payload, data):
+        """Servidor aceitou o heartbeat da sessão: ele vira a referência dos próximos deltas"""
+        with self._lock:
+            if payload.get('session') != self.token:
+                return
+            seq = payload.get('seq', 0)
+            if self.base_seq is not None and seq <= self.base_seq:
+                return  # Resposta de um envio mais antigo chegou depois
+            self.baseline = {k: v for k, v in data.items() if k not in IDENTITY_FIELDS}
+            self.base_seq = seq
+
+    def stats(self):
+        return {
+            'active': bool(self.token),
+            'full_sent': self.full_sent,
+            'delta_sent': self.delta_sent,
+            'expired': self.expired
+        }
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Spool Local de Heartbeats
+Fila persistente (SQLite em modo WAL) para heartbeats que falharam no envio
+
+Política de descarte:
+- Cada heartbeat é gravado com o horário original da coleta (captured_at)
+- Payloads ficam comprimidos (zlib) no disco
+- Entradas mais antigas que MAX_AGE_SECONDS são descartadas
+- Se o spool passar de MAX_ENTRIES ou MAX_BYTES, as entradas mais antigas
+  são descartadas primeiro (FIFO) até voltar ao limite, com folga de 10% do limite
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+DEFAULT_SPOOL_PATH = os.path.join(os.path.expanduser("~"), ".worktrack_monitor", "spool.db")
+
+# Limites do spool (7 dias de heartbeats cobrem qualquer queda realista)
+MAX_ENTRIES = 20000
+MAX_BYTES = 8 * 1024 * 1024
+MAX_AGE_SECONDS = 7 * 24 * 3600
+
+# Tamanho de cada lote lido durante o esvaziamento
+DRAIN_BATCH_SIZE = 500
+
+
+class HeartbeatSpool:
+    def __init__(self, path=None, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES,
+                 max_age=MAX_AGE_SECONDS):
+        self.path = path or DEFAULT_SPOOL_PATH
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.evicted = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS heartbeats (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                captured_at REAL NOT NULL,
+                size INTEGER NOT NULL,
+                payload BLOB NOT NULL
+            )
+        ''')
+        # Pendentes em memória: saber se há o que reenviar sem consultar o banco a cada envio
+        self.pending = self.conn.execute('SELECT COUNT(*) FROM heartbeats').fetchone()[0]
+
+    def append(self, payload, captured_at=None):
+        """Gravar heartbeat que não foi entregue"""
+        captured_at = captured_at or time.time()
+        blob = zlib.compress(json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+
+        with self._lock:
+            self.conn.execute('INSERT INTO heartbeats (captured_at, size, payload) VALUES (?, ?, ?)',
+                              (captured_at, len(blob), blob))
+            self._evict()
+
+    def peek(self, limit=DRAIN_BATCH_SIZE):
+        """Ler o lote mais antigo sem removê-lo: lista de (id, captured_at, payload)"""
+        with self._lock:
+            rows = self.conn.execute(
+                'SELECT id, captured_at, payload FROM heartbeats ORDER BY id LIMIT ?',
+                (limit,)).fetchall()
+
+        return [(row_id, captured_at, json.loads(zlib.decompress(blob)))
+                for row_id, captured_at, blob in rows]
+
+    def ack(self, ids):
+        """Remover entradas confirmadas pelo servidor"""
+        if not ids:
+            return
+        with self._lock:
+            self.conn.execute('BEGIN')
+            removed = self.conn.executemany('DELETE FROM heartbeats WHERE id = ?', [(i,) for i in ids]).rowcount
+            self.conn.execute('COMMIT')
+            self.pending = max(0, self.pending - removed)
+
+    def count(self):
+        """Quantidade de heartbeats pendentes"""
+        with self._lock:
+            self.pending = self.conn.execute('SELECT COUNT(*) FROM heartbeats').fetchone()[0]
+            return self.pending
+
+    def _evict(self):
+        """Aplicar a política de descarte (chamado com o lock adquirido)"""
+        cutoff = time.time() - self.max_age
+        removed = self.conn.execute('DELETE FROM heartbeats WHERE captured_at < ?', (cutoff,)).rowcount
+
+        count, total = self.conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM heartbeats').fetchone()
+        if count > self.max_entries:
+            # Descartar as mais antigas em blocos de 10% do limite
+            chunk = max(1, count - self.max_entries, self.max_entries // 10)
+            removed += self.conn.execute(
+                'DELETE FROM heartbeats WHERE id IN (SELECT id FROM heartbeats ORDER BY id LIMIT ?)',
+                (chunk,)).rowcount
+            count, total = self.conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM heartbeats').fetchone()
+        if total > self.max_bytes:
+            # Mais antigas até liberar o excesso mais 10% do limite de bytes
+            excess, last_id = total - self.max_bytes + self.max_bytes // 10, None
+            for row_id, size in self.conn.execute('SELECT id, size FROM heartbeats ORDER BY id'):
+                last_id, excess = row_id, excess - size
+                if excess <= 0:
+                    break
+            removed += self.conn.execute('DELETE FROM heartbeats WHERE id <= ?', (last_id,)).rowcount
+            count, total = self.conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM heartbeats').fetchone()
+
+        self.pending = count
+        if removed:
+            self.evicted += removed
+
+    def close(self):
+        """Fechar o banco do spool"""
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Teste dos resumos de tempo por aplicativo (ledger.py + monitor_online.py)
+    - o resumo vai junto do heartbeat (sem requisição própria) e sai da fila só com a confirmação
+    - reenvio após timeout usa o mesmo period_start: o servidor sobrescreve em vez de somar
+    - servidor antigo (sem app_usage_accepted) desativa o registro
+
+Uso:
+    python3 test_app_usage.py
+    python3 -m pytest -q test_app_usage.py
+"""
+
+import contextlib
+import io
+import time
+
+import monitor_online
+from benchmarks.local_server import AgentProtocol
+from ledger import ForegroundLedger
+from test_support import FakeResponse, ProtocolTransport, isolated_monitor, send_tick
+
+
+def monitor_with_usage(protocol):
+    monitor = isolated_monitor()
+    monitor.session = None
+    monitor.transport = ProtocolTransport(protocol)
+    monitor.ledger = ForegroundLedger(sample_interval=60, flush_interval=120)
+    now = time.time()
+    monitor.ledger.observe('code', 'Programando', now - 180)
+    monitor.ledger.observe('firefox', 'Navegando', now - 120)
+    monitor.ledger.observe('firefox', 'Navegando', now - 60)
+    return monitor
+
+
+def server_usage(protocol, computer_id):
+    _, body = protocol.get_data({'app_usage': 'true', 'computer_id': computer_id})
+    return {row['app']: row['seconds'] for row in body['usage']}
+
+
+def test_usage_rides_on_heartbeat_and_resend_is_idempotent():
+    protocol = AgentProtocol()
+    monitor = monitor_with_usage(protocol)
+    try:
+        assert monitor.flush_app_usage()
+        assert len(monitor.pending_usage) == 1 and not monitor.transport.posts  # Sem envio próprio
+        period_start = next(iter(monitor.pending_usage))
+
+        # Servidor gravou, mas a resposta se perdeu: o resumo continua pendente
+        monitor.transport.timeout_after_processing = True
+        assert send_tick(monitor) is False
+        assert list(monitor.pending_usage) == [period_start]
+
+        # Próximo heartbeat leva o mesmo período; a confirmação tira da fila
+        assert send_tick(monitor) is True
+        assert not monitor.pending_usage
+        sent = [payload['app_usage'] for path, payload in monitor.transport.posts if 'app_usage' in payload]
+        assert [[period['period_start'] for period in periods] for periods in sent] == [[period_start]] * 2
+        assert all(payload['type'] == 'heartbeat' for _, payload in monitor.transport.posts
+                   if 'app_usage' in payload)
+
+        # Gravado uma vez só, mesmo recebido duas
+        assert server_usage(protocol, monitor.computer_id) == {'code': 60, 'firefox': 60}
+
+        assert send_tick(monitor) is True
+        last = [payload for path, payload in monitor.transport.posts if path == '/api/data'][-1]
+        assert 'app_usage' not in last  # Nada pendente: heartbeat normal
+    finally:
+        monitor.spool.close()
+
+
+def test_stop_sends_pending_alone():
+    protocol = AgentProtocol()
+    monitor = monitor_with_usage(protocol)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert monitor.flush_app_usage(force=True)
+        path, payload = monitor.transport.posts[-1]
+        assert payload['type'] == 'app_usage' and len(payload['app_usage']) == 1
+        assert not monitor.pending_usage
+        assert server_usage(protocol, monitor.computer_id) == {'code': 60, 'firefox': 60}
+    finally:
+        monitor.spool.close()
+
+
+def test_pending_capped_oldest_first():
+    monitor = monitor_with_usage(AgentProtocol())
+    original = monitor_online.MAX_PENDING_USAGE
+    monitor_online.MAX_PENDING_USAGE = 2
+    try:
+        starts = []
+        for n in range(3):
+            monitor.ledger.period_start = time.time() - 600 + n
+            monitor.ledger.observe('code', 'Programando', time.time())
+            starts.append(monitor.ledger.period_start)
+            monitor.flush_app_usage()
+        assert list(monitor.pending_usage) == starts[1:]
+    finally:
+        monitor_online.MAX_PENDING_USAGE = original
+        monitor.spool.close()
+
+
+def test_old_server_disables_ledger():
+    monitor = monitor_with_usage(AgentProtocol())
+    try:
+        monitor.flush_app_usage()
+        payload = {'type': 'heartbeat'}
+        monitor.attach_app_usage(payload)
+        with contextlib.redirect_stdout(io.StringIO()):
+            monitor.apply_app_usage(FakeResponse(200, {'success': True}), payload)
+        assert monitor.ledger is None and not monitor.pending_usage
+    finally:
+        monitor.spool.close()
+
+
+if __name__ == "__main__":
+    tests = [test_usage_rides_on_heartbeat_and_resend_is_idempotent, test_stop_sends_pending_alone,
+             test_pending_capped_oldest_first, test_old_server_disables_ledger]
+    print("🧪 TESTE DO TEMPO POR APLICATIVO")
+    print("=" * 40)
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
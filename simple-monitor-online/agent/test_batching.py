@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Teste do envio em lote (batching.py)
+    - o lote fica dentro da janela de offline do painel (cadence.OFFLINE_WINDOW)
+    - envio ao encher e ao passar do intervalo
+    - lote que falha vai para o spool com os horários originais de cada amostra
+
+Uso:
+    python3 test_batching.py
+    python3 -m pytest -q test_batching.py
+"""
+
+import contextlib
+import io
+import time
+
+import batching
+from batching import HeartbeatBatcher, build_batch_payload, window_limits
+from cadence import OFFLINE_WINDOW, TICK_SECONDS
+from test_support import isolated_monitor
+
+START = 1_700_000_000.0
+
+
+@contextlib.contextmanager
+def offline_window(seconds):
+    """Limites do lote como se a janela de offline do painel fosse outra"""
+    previous = batching.MAX_SAMPLES, batching.MAX_FLUSH_INTERVAL
+    batching.MAX_SAMPLES, batching.MAX_FLUSH_INTERVAL = window_limits(seconds)
+    try:
+        yield
+    finally:
+        batching.MAX_SAMPLES, batching.MAX_FLUSH_INTERVAL = previous
+
+
+def upload_gaps(batcher, ticks):
+    """Segundos entre envios com uma amostra por tick (o primeiro envio é o do tick 0)"""
+    uploads = [START]
+    for n in range(1, ticks + 1):
+        now = START + n * TICK_SECONDS
+        batcher.add({'minute': n}, now)
+        if batcher.should_flush(now):
+            batcher.take()
+            uploads.append(now)
+    return [b - a for a, b in zip(uploads, uploads[1:])]
+
+
+def test_batches_stay_inside_offline_window():
+    for window in (OFFLINE_WINDOW, 300, 600):
+        with offline_window(window):
+            # Mesmo pedindo lotes grandes, os limites valem
+            batcher = HeartbeatBatcher(max_samples=50, flush_interval=3600)
+            gaps = upload_gaps(batcher, 60)
+            assert gaps and max(gaps) < window, (window, max(gaps))
+
+    # Janela padrão (90s) com ticks de 60s: uma amostra por envio
+    assert window_limits() == (1, 0)
+    assert upload_gaps(HeartbeatBatcher(), 5) == [TICK_SECONDS] * 5
+
+
+def test_flush_on_size():
+    with offline_window(600):
+        batcher = HeartbeatBatcher(max_samples=3, flush_interval=3600)
+        for n in range(3):
+            assert not batcher.should_flush(START + n)
+            batcher.add({'minute': n}, START + n)
+        assert batcher.should_flush(START + 2)
+        assert [data['minute'] for _, data in batcher.take()] == [0, 1, 2]
+        assert len(batcher) == 0 and not batcher.should_flush(START + 3)
+
+
+def test_flush_on_interval():
+    with offline_window(600):
+        batcher = HeartbeatBatcher(max_samples=10, flush_interval=120)
+        batcher.add({'minute': 0}, START)
+        batcher.add({'minute': 1}, START + 60)
+        assert not batcher.should_flush(START + 119)
+        assert batcher.should_flush(START + 120)  # Idade da amostra mais antiga
+
+
+def test_payload_identity_once():
+    entries = [(START + n * 60, {'type': 'heartbeat', 'computer_id': 'pc-1', 'computer_name': 'PC',
+                                 'user_name': 'ana', 'os_info': 'Linux', 'current_activity': f'a{n}'})
+               for n in range(2)]
+    payload = build_batch_payload(entries, replayed=True)
+    assert payload['computer_id'] == 'pc-1' and payload['replayed'] is True
+    assert payload['samples'] == [{'current_activity': 'a0', 'captured_at': START},
+                                  {'current_activity': 'a1', 'captured_at': START + 60}]
+
+
+def test_failed_batch_goes_to_spool_with_original_times():
+    monitor = isolated_monitor()  # Servidor inalcançável
+    try:
+        start = time.time() - 180  # Dentro de max_age do spool
+        entries = [(start + n * 60, {'type': 'heartbeat', 'computer_id': monitor.computer_id,
+                                     'current_activity': f'a{n}'}) for n in range(3)]
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert monitor.send_batch(entries) is False
+        spooled = monitor.spool.peek()
+        assert [(captured_at, data) for _, captured_at, data in spooled] == entries
+        assert monitor.spool.pending == 3
+    finally:
+        monitor.spool.close()
+
+
+if __name__ == "__main__":
+    tests = [test_batches_stay_inside_offline_window, test_flush_on_size, test_flush_on_interval,
+             test_payload_identity_once, test_failed_batch_goes_to_spool_with_original_times]
+    print("🧪 TESTE DO ENVIO EM LOTE")
+    print("=" * 40)
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
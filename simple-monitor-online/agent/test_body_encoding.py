@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Teste da compressão do corpo (body_encoding.py + transport.py)
+    - Accept-Encoding: q=0 exclui; corpo pequeno ou que não encolhe vai sem compressão
+    - zstd só com o pacote zstandard, e preferido ao gzip quando o servidor aceita os dois
+    - primeiro POST em JSON; depois do Accept-Encoding, corpo gzip como application/octet-stream
+    - 415 ao corpo comprimido: reenvio em JSON na hora e sem compressão até reiniciar
+    - ida e volta contra o servidor local (gzip descomprimido e gravado)
+
+Uso:
+    python3 test_body_encoding.py
+    python3 -m pytest -q test_body_encoding.py
+"""
+
+import contextlib
+import gzip
+import io
+import json
+import os
+import tempfile
+
+import body_encoding
+from benchmarks.local_server import load_recording, spawn
+from body_encoding import BodyEncoder, available_encodings, parse_accept_encoding
+from test_support import FakeResponse
+from transport import AgentTransport
+
+# Lote repetitivo o bastante para passar de min_size e encolher com gzip
+PAYLOAD = {'type': 'heartbeat_batch', 'computer_id': 'pc-1',
+           'heartbeats': [{'current_activity': 'Programando', 'active_window': 'main.py - VS Code'}] * 40}
+
+
+def skip(reason):
+    """Pular o teste (pytest) ou só avisar (execução direta)"""
+    if os.environ.get('PYTEST_CURRENT_TEST'):
+        import pytest
+        pytest.skip(reason)
+    print(f"⏭️ {reason}")
+    return False
+
+
+class FakeSession:
+    """Sessão HTTP que grava as requisições e responde na ordem da fila"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append(kwargs)
+        return self.responses.pop(0)
+
+
+def negotiating_transport(*responses):
+    transport = AgentTransport('http://worktrack.invalid')
+    transport.session = FakeSession(*responses)
+    transport.encoder = BodyEncoder()
+    return transport
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding('gzip, zstd') == {'gzip', 'zstd'}
+    assert parse_accept_encoding('GZIP;q=0.5, zstd;q=0, br') == {'gzip', 'br'}
+    assert parse_accept_encoding('gzip;q=abc') == {'gzip'}
+    assert parse_accept_encoding(None) == set() and parse_accept_encoding('') == set()
+
+
+def test_encode_thresholds_and_gzip_round_trip():
+    encoder = BodyEncoder(encodings=('gzip',))
+    small = json.dumps({'type': 'heartbeat'}).encode('utf-8')
+    assert encoder.encode(small, {'gzip'}) == (small, None)
+
+    body = json.dumps(PAYLOAD).encode('utf-8')
+    assert encoder.encode(body, set()) == (body, None)  # Servidor não anunciou nada
+    assert encoder.encode(body, {'br'}) == (body, None)
+
+    data, encoding = encoder.encode(body, {'gzip'})
+    assert encoding == 'gzip' and len(data) < len(body)
+    assert gzip.decompress(data) == body
+    assert encoder.stats()['compressed'] == 1 and encoder.stats()['bytes_saved'] == len(body) - len(data)
+
+    noise = os.urandom(4096)  # Não encolhe: vai como está
+    assert encoder.encode(noise, {'gzip'}) == (noise, None)
+
+
+def test_zstd_only_when_installed():
+    encoder = BodyEncoder()
+    if body_encoding.zstandard is None:
+        assert 'zstd' not in available_encodings() and encoder.encodings == ['gzip']
+        assert encoder.choose({'zstd', 'gzip'}) == 'gzip' and encoder.choose({'zstd'}) is None
+        return skip("zstandard não instalado: preferência por zstd não testada")
+
+    body = json.dumps(PAYLOAD).encode('utf-8')
+    assert encoder.choose({'zstd', 'gzip'}) == 'zstd'
+    data, encoding = encoder.encode(body, {'gzip', 'zstd'})
+    assert encoding == 'zstd'
+    assert body_encoding.zstandard.ZstdDecompressor().decompress(data, max_output_size=len(body)) == body
+    assert BodyEncoder(encodings=('gzip',)).choose({'zstd', 'gzip'}) == 'gzip'
+
+
+def test_gzip_after_accept_encoding():
+    accepts = FakeResponse(headers={'Accept-Encoding': 'gzip'})
+    transport = negotiating_transport(accepts, accepts, accepts)
+
+    transport.post('/api/data', PAYLOAD)  # Ainda não sabe o que o servidor aceita
+    assert transport.session.calls[0]['json'] == PAYLOAD
+    assert transport.accepted_encodings == {'gzip'}
+
+    transport.post('/api/data', PAYLOAD)
+    call = transport.session.calls[1]
+    assert call['headers']['Content-Encoding'] == 'gzip'
+    assert call['headers']['Content-Type'] == 'application/octet-stream'
+    assert json.loads(gzip.decompress(call['data'])) == PAYLOAD
+
+    transport.post('/api/commands', PAYLOAD)  # Endpoint sem negociação: JSON sempre
+    assert transport.session.calls[2]['json'] == PAYLOAD
+
+
+def test_415_falls_back_to_json():
+    accepts = FakeResponse(headers={'Accept-Encoding': 'gzip'})
+    refused = FakeResponse(415, {'success': False}, {'Accept-Encoding': 'gzip'})
+    transport = negotiating_transport(accepts, refused, accepts, accepts)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        transport.post('/api/data', PAYLOAD)
+        response = transport.post('/api/data', PAYLOAD)
+    assert response.status_code == 200  # O reenvio em JSON é a resposta do post
+    compressed, resent = transport.session.calls[1:3]
+    assert compressed['headers']['Content-Encoding'] == 'gzip'
+    assert resent['json'] == PAYLOAD and 'data' not in resent
+    assert transport.encoding_refused and transport.encoder.rejected == 1
+
+    # Servidor continua anunciando gzip, mas o agente não comprime mais
+    transport.post('/api/data', PAYLOAD)
+    assert transport.session.calls[3]['json'] == PAYLOAD
+    assert transport.accepted_encodings == set()
+
+
+def test_gzip_round_trip_local_server():
+    record = os.path.join(tempfile.mkdtemp(prefix='worktrack-test-'), 'trafego.jsonl')
+    process, url = spawn('--record', record)
+    transport = AgentTransport(url)
+    try:
+        transport.encoder = BodyEncoder()
+        assert transport.post('/api/data', PAYLOAD).status_code == 200
+        assert transport.post('/api/data', PAYLOAD).status_code == 200
+    finally:
+        transport.close()
+        process.terminate()
+        process.communicate(timeout=10)
+
+    first, second = load_recording(record)
+    assert first['content_encoding'] is None and first['payload'] == PAYLOAD
+    assert second['content_encoding'] in available_encodings()
+    assert second['payload'] == PAYLOAD and second['request_bytes'] < first['request_bytes']
+
+
+if __name__ == "__main__":
+    tests = [test_parse_accept_encoding, test_encode_thresholds_and_gzip_round_trip,
+             test_zstd_only_when_installed, test_gzip_after_accept_encoding, test_415_falls_back_to_json,
+             test_gzip_round_trip_local_server]
+    print("🧪 TESTE DA COMPRESSÃO DO CORPO")
+    print("=" * 40)
+    for test in tests:
+        if test() is not False:
+            print(f"✅ {test.__name__}")
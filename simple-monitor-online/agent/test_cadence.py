@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Teste da cadência de envio (cadence.py)
+    - Retry-After e a dica heartbeat_interval valem acima de max_interval (teto max_server_wait)
+    - backoff sem Retry-After cresce além de max_interval; o intervalo pela atividade não
+
+Uso:
+    python3 test_cadence.py
+    python3 -m pytest -q test_cadence.py
+"""
+
+import random
+
+from cadence import AdaptiveCadence, MAX_SERVER_WAIT
+from test_support import FakeResponse
+
+NOW = 1_700_000_000.0
+
+
+class UpperBound(random.Random):
+    """Jitter sempre no limite superior (backoff determinístico)"""
+
+    def uniform(self, a, b):
+        return b
+
+
+def test_retry_after_longer_than_max_interval():
+    cadence = AdaptiveCadence(min_interval=60, max_interval=60)
+    cadence.uploaded(NOW - 60)
+    cadence.on_response(FakeResponse(429, {}, {'Retry-After': '300'}), NOW)
+
+    assert cadence.throttled == 1
+    assert cadence.blocked(NOW + 299) and not cadence.due(NOW + 299)
+    assert not cadence.blocked(NOW + 300) and cadence.due(NOW + 300)
+    assert cadence.current_interval() == 60  # A espera não mexe no intervalo pela atividade
+
+    # Retry-After absurdo: teto próprio, não o max_interval
+    cadence.on_response(FakeResponse(503, {}, {'Retry-After': '86400'}), NOW)
+    assert cadence.blocked(NOW + MAX_SERVER_WAIT - 1) and not cadence.blocked(NOW + MAX_SERVER_WAIT)
+
+
+def test_server_hint_above_max_interval():
+    cadence = AdaptiveCadence(min_interval=60, max_interval=60)
+    cadence.on_response(FakeResponse(200, {'success': True, 'heartbeat_interval': 300}), NOW)
+    assert cadence.current_interval() == 300
+    assert cadence.stats()['server_floor'] == 300
+
+    cadence.uploaded(NOW)
+    assert not cadence.due(NOW + 120)
+    cadence.observe('Programando')
+    cadence.observe('Navegando')  # Troca de atividade não fura o piso do servidor
+    assert cadence.transition and not cadence.due(NOW + 240)
+    assert cadence.due(NOW + 300 - cadence.tolerance)
+
+    cadence.on_response(FakeResponse(200, {'heartbeat_interval': 10 ** 6}), NOW)
+    assert cadence.current_interval() == MAX_SERVER_WAIT
+    cadence.on_response(FakeResponse(200, {'success': True}), NOW)  # Sem dica: volta ao normal
+    assert cadence.current_interval() == 60
+
+
+def test_backoff_beyond_max_interval():
+    cadence = AdaptiveCadence(min_interval=60, max_interval=60, rng=UpperBound())
+    waits = []
+    for _ in range(8):
+        cadence.on_response(None, NOW)
+        waits.append(cadence.blocked_until - NOW)
+    assert waits == [120, 240, 480, 960, 1920, 3600, 3600, 3600]
+
+    cadence.on_response(FakeResponse(200), NOW)
+    assert cadence.failures == 0
+
+
+def test_activity_interval_still_clamped():
+    cadence = AdaptiveCadence(min_interval=60, max_interval=90, growth=2, steady_ticks=1)
+    for _ in range(5):
+        cadence.observe('Programando')
+    assert cadence.current_interval() == 90
+
+
+if __name__ == "__main__":
+    tests = [test_retry_after_longer_than_max_interval, test_server_hint_above_max_interval,
+             test_backoff_beyond_max_interval, test_activity_interval_still_clamped]
+    print("🧪 TESTE DA CADÊNCIA")
+    print("=" * 40)
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
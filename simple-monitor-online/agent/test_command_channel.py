@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Teste do canal push de comandos (command_channel.py + api/commands.js)
+    - com Node instalado: o handler real do api/commands.js atrás de um servidor HTTP local; um
+      comando criado por POST chega ao CommandChannel inscrito no stream
+    - a consulta a /api/commands continua com o canal conectado e depois de um sync sem comandos
+      (a fila pode estar em outra instância da API), e o comando que chega por mais de um caminho
+      roda uma vez só
+
+Uso:
+    python3 test_command_channel.py
+    python3 -m pytest -q test_command_channel.py
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+import requests
+
+from command_channel import CommandChannel
+from test_support import FakeResponse, isolated_monitor
+
+API_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api')
+
+# Servidor Node mínimo com a interface de req/res das funções da Vercel (req.query, req.body,
+# res.status().json())
+VERCEL_ADAPTER = """
+const http = require('http');
+const handler = require(process.argv[2]);
+const server = http.createServer((req, res) => {
+    const url = new URL(req.url, 'http://localhost');
+    req.query = Object.fromEntries(url.searchParams);
+    res.status = code => { res.statusCode = code; return res; };
+    res.json = body => {
+        res.setHeader('Content-Type', 'application/json');
+        res.end(JSON.stringify(body));
+        return res;
+    };
+    let body = '';
+    req.on('data', chunk => { body += chunk; });
+    req.on('end', () => {
+        req.body = body ? JSON.parse(body) : {};
+        handler(req, res);
+    });
+});
+server.listen(0, '127.0.0.1', () => console.log(server.address().port));
+"""
+
+
+def skip(reason):
+    """Pular o teste (pytest) ou só avisar (execução direta)"""
+    if os.environ.get('PYTEST_CURRENT_TEST'):
+        import pytest
+        pytest.skip(reason)
+    print(f"⏭️ {reason}")
+    return False
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "tempo esgotado"
+        time.sleep(0.02)
+
+
+@contextlib.contextmanager
+def commands_api():
+    """api/commands.js servido pelo Node: URL base"""
+    adapter = os.path.join(tempfile.mkdtemp(prefix='worktrack-api-'), 'serve.js')
+    with open(adapter, 'w', encoding='utf-8') as f:
+        f.write(VERCEL_ADAPTER)
+    server = subprocess.Popen(['node', adapter, os.path.join(API_DIR, 'commands.js')],
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    try:
+        port = server.stdout.readline().strip()
+        assert port.isdigit(), "servidor Node não iniciou"
+        yield f'http://127.0.0.1:{port}'
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def test_command_posted_reaches_subscriber():
+    if not shutil.which('node'):
+        return skip("Node não instalado")
+
+    with commands_api() as url:
+        received = []
+        channel = CommandChannel(url, 'pc-1', received.append)
+        channel.start()
+        try:
+            wait_for(lambda: channel.connected)
+            response = requests.post(f'{url}/api/commands', json={'computer_id': 'pc-1', 'action': 'lock'},
+                                     timeout=5).json()
+            assert response['success'] and response['pushed']
+
+            wait_for(lambda: received)
+            assert [(c['id'], c['action']) for c in received] == [(response['command_id'], 'lock')]
+
+            # Outro computador não recebe; a consulta não repete o que já foi pelo canal
+            requests.post(f'{url}/api/commands', json={'computer_id': 'pc-2', 'action': 'lock'}, timeout=5)
+            polled = requests.get(f'{url}/api/commands', params={'computer_id': 'pc-1'}, timeout=5).json()
+            assert polled['commands'] == []
+            time.sleep(0.2)
+            assert len(received) == 1
+        finally:
+            channel.stop()
+
+
+class PollTransport:
+    """Transporte que responde à consulta de comandos com uma fila fixa"""
+
+    def __init__(self, commands):
+        self.commands = commands
+        self.polls = 0
+
+    def get(self, path, params=None, **kwargs):
+        assert path == '/api/commands'
+        self.polls += 1
+        return FakeResponse(200, {'success': True, 'commands': self.commands})
+
+
+def test_poll_continues_while_stream_connected():
+    monitor = isolated_monitor()
+    try:
+        executed = []
+        monitor.run_command = executed.append
+        channel = CommandChannel(monitor.server_url, monitor.computer_id, monitor.run_command)
+        channel.connected = True
+        monitor.command_channel = channel
+        command = {'id': 'pc-1-1', 'action': 'lock'}
+        monitor.transport = PollTransport([dict(command)])
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            # Sync sem comandos (instância sem a fila) e canal conectado: a consulta acontece
+            assert monitor.apply_sync(FakeResponse(200, {'success': True, 'sync': True, 'commands': []}))
+            channel.dispatch(command)  # Pelo canal
+            monitor.check_commands()  # Pela consulta
+            monitor.apply_sync(FakeResponse(200, {'success': True, 'sync': True, 'commands': [dict(command)]}))
+        assert monitor.transport.polls == 1
+        assert executed == [command]
+    finally:
+        monitor.spool.close()
+
+
+if __name__ == "__main__":
+    print("🧪 TESTE DO CANAL DE COMANDOS")
+    print("=" * 40)
+    for test in (test_command_posted_reaches_subscriber, test_poll_continues_while_stream_connected):
+        if test() is not False:
+            print(f"✅ {test.__name__}")
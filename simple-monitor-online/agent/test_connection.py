@@ -1,20 +1,31 @@
 #!/usr/bin/env python3
 """
 Teste de conexão com o servidor online
+Os payloads são conferidos com o esquema compartilhado (wire_format) antes do envio e vão em
+MessagePack quando o servidor anuncia suporte (e o pacote msgpack está instalado)
 """
 
-import requests
 import json
 import platform
 import os
 from datetime import datetime
 
+from transport import get_transport
+from wire_format import WireCodec, validate
+
+def check_schema(data):
+    """Avisar se o payload de teste saiu do esquema compartilhado"""
+    for problem in validate(data):
+        print(f"⚠️ Esquema: {problem}")
+
 def test_connection():
     server_url = os.environ.get('WORKTRACK_SERVER_URL') or "https://simple-monitor-online-qjxx1b0hc-marcos10895s-projects.vercel.app"
     
     print("🧪 TESTE DE CONEXÃO")
     print("=" * 40)
     print(f"🌐 Servidor: {server_url}")
+    transport = get_transport(server_url)
+    transport.codec = WireCodec.from_config(None)
     
     # Teste 1: Registro
     print("\n📝 Testando registro...")
@@ -26,13 +37,16 @@ def test_connection():
             'user_name': os.environ.get('USER', 'test-user'),
             'os_info': f"{platform.system()} {platform.release()}"
         }
+        check_schema(data)
         
-        response = requests.post(f'{server_url}/api/data', json=data, timeout=10)
+        response = transport.post('/api/data', data)
         print(f"Status: {response.status_code}")
         print(f"Response: {response.text}")
         
         if response.status_code == 200:
             print("✅ Registro OK!")
+            formats = sorted(transport.accepted_formats or ['json'])
+            print(f"📦 Formatos aceitos pelo servidor: {', '.join(formats)}")
         else:
             print("❌ Erro no registro")
             
@@ -50,8 +64,9 @@ def test_connection():
             'active_window': 'Terminal',
             'timestamp': datetime.now().isoformat()
         }
+        check_schema(data)
         
-        response = requests.post(f'{server_url}/api/data', json=data, timeout=10)
+        response = transport.post('/api/data', data)
         print(f"Status: {response.status_code}")
         print(f"Response: {response.text}")
         
@@ -66,9 +81,8 @@ def test_connection():
     # Teste 3: Verificar comandos
     print("\n🎮 Testando verificação de comandos...")
     try:
-        response = requests.get(f'{server_url}/api/commands', 
-                              params={'computer_id': f'test-{platform.node()}'}, 
-                              timeout=10)
+        response = transport.get('/api/commands', 
+                                 params={'computer_id': f'test-{platform.node()}'})
         print(f"Status: {response.status_code}")
         print(f"Response: {response.text}")
         
@@ -79,6 +93,12 @@ def test_connection():
             
     except Exception as e:
         print(f"❌ Erro: {e}")
+    
+    # Resumo do transporte
+    stats = transport.connection_stats()
+    print(f"\n🔌 Conexões abertas: {stats['connections_opened']} | reutilizadas: {stats['connections_reused']}")
+    if transport.codec is not None:
+        print(f"📦 Envios em MessagePack: {transport.codec.stats()['encoded'].get('msgpack', 0)}")
 
 if __name__ == "__main__":
     test_connection()
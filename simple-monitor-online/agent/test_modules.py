@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Teste da lista de módulos do agente (agent/MODULES)
+    - todo módulo local importado pelos arquivos da lista também está na lista (senão a
+      instalação nova quebra no import)
+    - os arquivos listados existem e os instaladores copiam exatamente a lista
+
+Uso:
+    python3 test_modules.py
+    python3 -m pytest -q test_modules.py
+"""
+
+import ast
+import importlib.util
+import os
+import tempfile
+from pathlib import Path
+
+AGENT_DIR = Path(__file__).resolve().parent
+INSTALLER_DIR = AGENT_DIR.parent / 'installer'
+
+
+def manifest():
+    with open(AGENT_DIR / 'MODULES', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+
+def local_imports(path):
+    """Módulos do diretório agent/ importados pelo arquivo"""
+    tree = ast.parse(path.read_text(encoding='utf-8'))
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name.split('.')[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module.split('.')[0])
+    return {f'{name}.py' for name in names if (AGENT_DIR / f'{name}.py').exists()}
+
+
+def load_installer(name):
+    spec = importlib.util.spec_from_file_location(f'installer_{name}', INSTALLER_DIR / f'{name}.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_manifest_files_exist():
+    files = manifest()
+    assert files[0] == 'monitor_online.py'
+    assert len(files) == len(set(files))
+    missing = [name for name in files if not (AGENT_DIR / name).exists()]
+    assert not missing, f"listados sem arquivo: {missing}"
+
+
+def test_manifest_covers_local_imports():
+    files = manifest()
+    missing = {}
+    for name in files:
+        if name.endswith('.py'):
+            absent = local_imports(AGENT_DIR / name) - set(files)
+            if absent:
+                missing[name] = sorted(absent)
+    assert not missing, f"módulos importados fora de agent/MODULES: {missing}"
+
+
+def test_installers_copy_manifest():
+    for name in ('install', 'install_silent'):
+        installer = load_installer(name).SilentInstaller()
+        installer.install_dir = Path(tempfile.mkdtemp(prefix=f'worktrack-{name}-'))
+        installer.copy_files()
+        installed = set(os.listdir(installer.install_dir))
+        assert installed == set(manifest()) | {'monitor.py'}, name
+
+
+if __name__ == "__main__":
+    print("🧪 TESTE DA LISTA DE MÓDULOS")
+    print("=" * 40)
+    for test in (test_manifest_files_exist, test_manifest_covers_local_imports, test_installers_copy_manifest):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Teste do supervisor do helper de janela ativa (probe.py)
+Usa o helper falso probe_helper_stub.py: helper que morre após N consultas, reinício com
+espera mínima e helper travado (atraso acima do timeout), conferindo os contadores de stats()
+
+Uso:
+    python3 test_probe.py
+    python3 -m pytest -q test_probe.py
+"""
+
+import contextlib
+import os
+import sys
+import time
+
+from probe import ProbeCoprocess
+
+STUB = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'probe_helper_stub.py')]
+WINDOWS = 'Code|main.py;Slack|geral'
+
+
+@contextlib.contextmanager
+def stub_env(**values):
+    """Variáveis WORKTRACK_STUB_* herdadas pelos helpers iniciados dentro do bloco"""
+    names = {f'WORKTRACK_STUB_{name.upper()}': str(value) for name, value in values.items()}
+    previous = {name: os.environ.get(name) for name in names}
+    os.environ.update(names)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def wait_exit(probe):
+    """Esperar o helper encerrar sozinho (EXIT_AFTER)"""
+    probe.process.wait(timeout=5)
+    assert not probe.is_alive()
+
+
+def test_exit_after_restarts_helper():
+    probe = ProbeCoprocess(STUB, timeout=2, min_restart_interval=0)
+    try:
+        with stub_env(windows=WINDOWS, exit_after=2, delay=0):
+            assert probe.query() == {'process_name': 'Code', 'window_title': 'main.py'}
+            assert probe.query() == {'process_name': 'Slack', 'window_title': 'geral'}
+            wait_exit(probe)
+
+            # Helper morto: a consulta seguinte reinicia e o rodízio recomeça no helper novo
+            assert probe.query() == {'process_name': 'Code', 'window_title': 'main.py'}
+        assert probe.stats() == {'queries': 3, 'timeouts': 0, 'errors': 0, 'restarts': 1}
+    finally:
+        probe.close()
+
+
+def test_restart_is_throttled():
+    probe = ProbeCoprocess(STUB, timeout=2, min_restart_interval=60)
+    try:
+        with stub_env(windows=WINDOWS, exit_after=1, delay=0):
+            assert probe.query() is not None
+            wait_exit(probe)
+
+            # Dentro da espera mínima: nenhuma consulta nem reinício
+            assert probe.query() is None
+            assert probe.query() is None
+        assert probe.stats() == {'queries': 1, 'timeouts': 0, 'errors': 0, 'restarts': 0}
+    finally:
+        probe.close()
+
+
+def test_delay_above_timeout_kills_helper():
+    probe = ProbeCoprocess(STUB, timeout=0.2, min_restart_interval=0)
+    try:
+        with stub_env(windows=WINDOWS, exit_after=0, delay=1):
+            started = time.monotonic()
+            assert probe.query() is None
+            assert time.monotonic() - started < 1  # Não esperou a resposta atrasada
+            assert probe.process is None  # Helper travado descartado
+
+            # O próximo helper também trava: reinício e novo timeout
+            assert probe.query() is None
+        assert probe.stats() == {'queries': 2, 'timeouts': 2, 'errors': 0, 'restarts': 1}
+
+        # Sem atraso, o helper reiniciado responde (a resposta atrasada do anterior não vaza);
+        # timeout folgado porque a primeira consulta também espera o helper novo iniciar
+        probe.timeout = 5
+        with stub_env(windows=WINDOWS, delay=0):
+            assert probe.query() == {'process_name': 'Code', 'window_title': 'main.py'}
+        assert probe.stats() == {'queries': 3, 'timeouts': 2, 'errors': 0, 'restarts': 2}
+    finally:
+        probe.close()
+
+
+if __name__ == "__main__":
+    tests = [test_exit_after_restarts_helper, test_restart_is_throttled, test_delay_above_timeout_kills_helper]
+    print("🧪 TESTE DO HELPER DE JANELA ATIVA")
+    print("=" * 40)
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
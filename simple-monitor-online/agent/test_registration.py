@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Teste do cache de registro e da partida escalonada (registration.py + monitor_online.py)
+    - impressão digital muda com o payload e com o servidor; cache vale até max_age
+    - registro pendente vai junto do primeiro heartbeat e é gravado com o token de sessão
+    - nova partida com o mesmo registro: nenhum register, sessão retomada do cache
+    - atraso de partida dentro de startup_window
+
+Uso:
+    python3 test_registration.py
+    python3 -m pytest -q test_registration.py
+"""
+
+import contextlib
+import io
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.local_server import AgentProtocol
+from registration import RegistrationCache
+from test_support import SESSION_SECRET, ProtocolTransport, isolated_monitor, send_tick
+
+SERVER = 'https://worktrack.example'
+PAYLOAD = {'type': 'register', 'computer_id': 'pc-1', 'computer_name': 'PC', 'metadata': {'setor': 'TI'}}
+
+
+def temp_cache(**kwargs):
+    return RegistrationCache(os.path.join(tempfile.mkdtemp(prefix='worktrack-test-'), 'registration.json'),
+                             **kwargs)
+
+
+def test_fingerprint_and_max_age():
+    fingerprint = RegistrationCache.fingerprint(PAYLOAD, SERVER)
+    assert fingerprint == RegistrationCache.fingerprint(dict(reversed(list(PAYLOAD.items()))), SERVER)
+    assert fingerprint != RegistrationCache.fingerprint(dict(PAYLOAD, computer_name='PC-2'), SERVER)
+    assert fingerprint != RegistrationCache.fingerprint(PAYLOAD, 'http://127.0.0.1:3000')
+
+    cache = temp_cache(max_age=3600)
+    assert not cache.is_current(fingerprint) and cache.session() is None
+    now = time.time()
+    assert cache.save(fingerprint, 'token-1', now=now)
+    assert cache.is_current(fingerprint, now + 60) and cache.session() == 'token-1'
+    assert not cache.is_current(fingerprint, now + 3600)  # Velho demais: registrar de novo
+
+    # Token renovado mantém o registro; arquivo corrompido vale como sem cache
+    assert cache.update_session('token-2') and not cache.update_session('token-2')
+    assert cache.is_current(fingerprint, now + 60) and cache.session() == 'token-2'
+    with open(cache.path, 'w', encoding='utf-8') as f:
+        f.write('{corrompido')
+    assert cache.load() is None and not cache.is_current(fingerprint)
+
+
+def test_startup_delay_within_window():
+    cache = temp_cache(startup_window=60)
+    delays = [cache.startup_delay(random.Random(n)) for n in range(200)]
+    assert all(0 <= delay <= 60 for delay in delays) and max(delays) - min(delays) > 30
+    assert temp_cache(startup_window=0).startup_delay() == 0.0
+
+
+def test_register_rides_on_first_heartbeat_and_is_cached():
+    protocol = AgentProtocol(session_secret=SESSION_SECRET)
+    first = isolated_monitor()
+    second = isolated_monitor()
+    try:
+        first.transport = ProtocolTransport(protocol)
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert first.prepare_registration() is False  # Sem register separado
+        assert first.pending_registration
+
+        assert send_tick(first)
+        path, payload = first.transport.posts[0]
+        assert payload['type'] == 'heartbeat' and payload['register'] is True
+        assert first.pending_registration is None
+        token = first.registration.session()
+        assert token and protocol.computers.get(first.computer_id)
+
+        # Nova partida com o mesmo registro e servidor: nada a registrar, sessão do cache
+        second.computer_id = first.computer_id
+        second.registration = first.registration
+        second.transport = ProtocolTransport(protocol)
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert second.prepare_registration() is False
+        assert second.pending_registration is None
+        assert second.session.token == token
+
+        assert send_tick(second)
+        path, payload = second.transport.posts[0]
+        assert 'register' not in payload and payload['session'] == token  # Heartbeat compacto
+    finally:
+        first.spool.close()
+        second.spool.close()
+
+
+if __name__ == "__main__":
+    tests = [test_fingerprint_and_max_age, test_startup_delay_within_window,
+             test_register_rides_on_first_heartbeat_and_is_cached]
+    print("🧪 TESTE DO CACHE DE REGISTRO")
+    print("=" * 40)
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
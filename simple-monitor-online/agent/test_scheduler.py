@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Teste da agenda de ticks (scheduler.py) sobre a simulação de benchmarks/bench_scheduler.py
+    - pilha: a profundidade não cresce com os dias simulados (sem recursão durante a queda)
+    - sem rajada de ticks ao voltar da suspensão nem após travamentos longos
+    - suspensões e ajustes do relógio de parede detectados
+    - fase por computer_id: espalhada no minuto, fixa por dispositivo e mantida na grade
+    - jitter: cada tick atrasa até jitter segundos depois da fase, sem deslocar a grade
+
+Uso:
+    python3 test_scheduler.py
+    python3 -m pytest -q test_scheduler.py
+"""
+
+import contextlib
+import io
+import os
+import random
+import sys
+
+from scheduler import TickScheduler, phase_offset
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks'))
+
+from bench_scheduler import INTERVAL, run
+
+COMPUTER_ID = 'WT-4F2A9C71'
+_runs = {}
+
+
+def simulate(days, key=None):
+    """Resultado da simulação (Supervisor imprime cada falha: saída descartada)"""
+    if (days, key) not in _runs:
+        with contextlib.redirect_stdout(io.StringIO()):
+            _runs[(days, key)] = run(days, key)
+    return _runs[(days, key)]
+
+
+def test_stack_does_not_grow():
+    short, week = simulate(1)['scheduler'], simulate(7)['scheduler']
+    assert short['max_depth'] == week['max_depth'] <= 5
+    # Só os erros simulados reiniciam o loop (nenhum RecursionError)
+    assert week['restarts'].get('monitor', 0) == week['stats']['ticks'] // 2000
+    assert week['restarts']['registro'] > 100  # Queda de 9 h no início, sem recursão
+
+
+def test_no_burst_after_suspend():
+    result = simulate(7)['scheduler']
+    assert result['resume_bursts'] and max(result['resume_bursts']) == 1
+    # Travamento maior que o intervalo: ticks perdidos pulados; no máximo o atrasado e o seguinte
+    assert result['stats']['skipped'] > 0
+    assert result['max_burst'] <= 2
+
+
+def test_clock_gaps_detected():
+    result = simulate(7)['scheduler']
+    stats = result['stats']
+    assert stats['suspends'] == result['injected_suspends'] == len(result['resume_bursts'])
+    assert stats['wall_jumps'] == result['injected_jumps'] == 2
+    # Suspensões à noite (13 h) e no almoço (1 h); a última noite vai além do fim da simulação
+    assert stats['suspended_seconds'] == 6 * 13 * 3600 + 6 * 3600
+
+
+def test_phase_spread_by_computer_id():
+    ids = [f'WT-{n:08X}' for n in range(6000)]
+    phases = [phase_offset(computer_id, INTERVAL) for computer_id in ids]
+    assert all(0 <= phase < INTERVAL for phase in phases)
+    assert phases == [phase_offset(computer_id, INTERVAL) for computer_id in ids]  # Fixa por dispositivo
+
+    # Faixas de 6 s recebem ~10% da frota cada
+    buckets = [0] * 10
+    for phase in phases:
+        buckets[int(phase // 6)] += 1
+    assert min(buckets) > 500 and max(buckets) < 700
+
+    scheduler = TickScheduler.from_config({}, INTERVAL, COMPUTER_ID)
+    assert scheduler.phase == phase_offset(COMPUTER_ID, INTERVAL)
+    assert TickScheduler.from_config({'phase': False}, INTERVAL, COMPUTER_ID).phase is None
+
+
+def test_ticks_stay_on_device_phase():
+    result = simulate(7, COMPUTER_ID)['scheduler']
+    phase = phase_offset(COMPUTER_ID, INTERVAL)
+    starts = set(result['starts'])  # Primeiro tick de cada início do loop: partida já adiada
+    # O tick que detecta o ajuste do relógio ainda está na grade antiga; a fase vale a partir do seguinte
+    on_time = [wall for index, (_, wall, tick) in enumerate(result['ticks_detail'])
+               if index not in starts and not tick.wall_jump and not tick.late]
+    assert len(on_time) > 0.9 * result['ticks']
+    # Na fase do dispositivo mesmo após suspensões, ajustes do relógio e reinícios
+    for wall in on_time:
+        offset = (wall - phase) % INTERVAL
+        assert min(offset, INTERVAL - offset) < 1e-3
+    assert result['stats']['wall_jumps'] == result['injected_jumps']
+
+
+def test_jitter_bounded_without_drift():
+    clock = [1000.0]
+    phase = phase_offset(COMPUTER_ID, INTERVAL)
+    scheduler = TickScheduler(INTERVAL, monotonic=lambda: clock[0], wall=lambda: clock[0] + 1.7e9,
+                              boottime=lambda: clock[0], phase=phase, jitter=5, rng=random.Random(7))
+    scheduler.start()
+    offsets = []
+    for _ in range(500):
+        clock[0] += scheduler.remaining()
+        tick = scheduler.begin()
+        assert not tick.skipped and not tick.clock_gap
+        offsets.append((clock[0] + 1.7e9 - phase) % INTERVAL)
+
+    # Dentro de [fase, fase + jitter], espalhado na faixa, e a grade não anda com o jitter
+    assert all(offset <= 5 + 1e-6 for offset in offsets)
+    assert min(offsets) < 0.5 and max(offsets) > 4.5
+    assert abs((scheduler.next_due + 1.7e9 - phase) % INTERVAL) < 1e-6
+
+    # Jitter limitado a meio intervalo
+    assert TickScheduler(INTERVAL, jitter=INTERVAL).jitter == INTERVAL / 2
+
+
+if __name__ == "__main__":
+    tests = [test_stack_does_not_grow, test_no_burst_after_suspend, test_clock_gaps_detected,
+             test_phase_spread_by_computer_id, test_ticks_stay_on_device_phase,
+             test_jitter_bounded_without_drift]
+    print("🧪 TESTE DA AGENDA DE TICKS")
+    print("=" * 40)
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Teste do envio em segundo plano (sender.py)
+    - fila cheia: ack e live descartam a tarefa mais antiga, backlog descarta a nova
+    - tarefa descartada com on_overflow (heartbeats e lotes) vai para o spool, nada se perde
+    - prioridade entre as filas e chaves repetidas
+
+Uso:
+    python3 test_sender.py
+    python3 -m pytest -q test_sender.py
+"""
+
+import contextlib
+import io
+import threading
+import time
+
+from sender import UploadSender
+from test_support import isolated_monitor
+
+
+def task(log, name):
+    return lambda: log.append(name)
+
+
+def wait_busy(sender, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not sender.busy:
+        assert time.monotonic() < deadline, "thread de envio não pegou a tarefa"
+        time.sleep(0.01)
+
+
+def test_overflow_policy_per_lane():
+    sender = UploadSender(capacity={'ack': 2, 'live': 2, 'backlog': 2})  # Sem thread: as filas só enchem
+    ran = []
+    for lane in ('ack', 'live', 'backlog'):
+        for n in range(3):
+            sender.submit(lane, task(ran, f'{lane}-{n}'))
+
+    # ack e live: sai a mais antiga; backlog: a nova é recusada
+    for lane, expected in (('ack', ['ack-1', 'ack-2']), ('live', ['live-1', 'live-2']),
+                           ('backlog', ['backlog-0', 'backlog-1'])):
+        for queued in sender.queues[lane]:
+            queued.run()
+        assert ran[-2:] == expected, (lane, ran)
+        assert sender.counters[lane]['dropped'] == 1
+    assert sender.submit('backlog', task(ran, 'backlog-3')) is False
+
+
+def test_overflow_calls_on_overflow():
+    sender = UploadSender(capacity={'live': 1})
+    spilled = []
+    sender.submit('live', task([], 'a'), on_overflow=lambda: spilled.append('a'))
+    sender.submit('live', task([], 'b'), on_overflow=lambda: spilled.append('b'))
+    assert spilled == ['a']
+    assert sender.counters['live']['spilled'] == 1 and sender.counters['live']['dropped'] == 0
+
+
+def test_stop_spills_leftover():
+    sender = UploadSender()
+    release = threading.Event()
+    sender.start()
+    sender.submit('live', release.wait)  # Thread de envio ocupada até depois do timeout
+    wait_busy(sender)
+    spilled = []
+    sender.submit('live', task([], 'a'), on_overflow=lambda: spilled.append('a'))
+    threading.Timer(0.3, release.set).start()
+    sender.stop(timeout=0.1)
+    assert spilled == ['a']
+
+
+def test_priority_and_coalescing():
+    sender = UploadSender()
+    ran = []
+    sender.submit('backlog', task(ran, 'backlog'))
+    sender.submit('live', task(ran, 'live'))
+    sender.submit('ack', task(ran, 'ack'))
+    assert sender.submit('backlog', task(ran, 'drain'), key='drain_spool')
+    assert not sender.submit('backlog', task(ran, 'drain'), key='drain_spool')
+    assert sender.counters['backlog']['coalesced'] == 1
+
+    sender.start()
+    assert sender.wait_idle(5)
+    sender.stop()
+    assert ran == ['ack', 'live', 'backlog', 'drain']
+
+
+def test_batch_overflow_goes_to_spool():
+    monitor = isolated_monitor()  # Servidor inalcançável
+    try:
+        monitor.sender = UploadSender(capacity={'live': 1})
+        monitor.sender.start()
+        release = threading.Event()
+        monitor.sender.submit('live', release.wait)  # Thread de envio ocupada
+        wait_busy(monitor.sender)
+
+        start = time.time() - 120
+        batches = []
+        for n in range(2):
+            entries = [(start + n * 60, {'type': 'heartbeat', 'computer_id': monitor.computer_id,
+                                         'current_activity': f'a{n}'})]
+            batches.append(entries)
+            with contextlib.redirect_stdout(io.StringIO()):
+                monitor.submit('live', lambda entries=entries: monitor.send_batch(entries),
+                               on_overflow=lambda entries=entries: monitor.spool_entries(entries))
+
+        # O primeiro lote saiu da fila cheia direto para o spool, com o horário original
+        assert [(captured_at, data) for _, captured_at, data in monitor.spool.peek()] == batches[0]
+        assert monitor.sender.counters['live']['spilled'] == 1
+
+        release.set()
+        with contextlib.redirect_stdout(io.StringIO()):
+            monitor.sender.stop()
+        assert monitor.spool.pending == 2  # O segundo falhou no envio e também foi para o spool
+    finally:
+        monitor.spool.close()
+
+
+if __name__ == "__main__":
+    tests = [test_overflow_policy_per_lane, test_overflow_calls_on_overflow, test_stop_spills_leftover,
+             test_priority_and_coalescing, test_batch_overflow_goes_to_spool]
+    print("🧪 TESTE DO ENVIO EM SEGUNDO PLANO")
+    print("=" * 40)
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
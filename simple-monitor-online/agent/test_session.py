@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Teste dos heartbeats com sessão (session.py + monitor_online.py, contra o servidor local)
+    - token assinado: vale na emissão, adulterado ou sem chave não vale
+    - servidor sem WORKTRACK_SESSION_SECRET não emite token: heartbeats completos
+    - ida e volta do delta: o servidor reconstrói o heartbeat completo
+    - instância sem o estado base: o delta não é processado (resync) e o agente reenvia completo
+    - token recusado (session_expired): o minuto vai para o spool e o registro é refeito
+
+Uso:
+    python3 test_session.py
+    python3 -m pytest -q test_session.py
+"""
+
+import contextlib
+import io
+import time
+
+from benchmarks.local_server import AgentProtocol, issue_session_token, verify_session_token
+from test_support import SESSION_SECRET, ProtocolTransport, isolated_monitor, send_tick
+
+
+def registered_monitor(protocol):
+    """Monitor que já se registrou (junto do primeiro heartbeat) no servidor local"""
+    monitor = isolated_monitor()
+    monitor.transport = ProtocolTransport(protocol)
+    with contextlib.redirect_stdout(io.StringIO()):
+        monitor.prepare_registration()
+    assert send_tick(monitor, 'inicio.py')
+    monitor.transport.posts.clear()
+    return monitor
+
+
+def sent(monitor):
+    return [payload for path, payload in monitor.transport.posts if path == '/api/data']
+
+
+def test_token_round_trip():
+    now = time.time()
+    token = issue_session_token('pc-1', 'abc123', now, SESSION_SECRET)
+    claims = verify_session_token(token, SESSION_SECRET)
+    assert claims['computer_id'] == 'pc-1' and claims['metadata_hash'] == 'abc123'
+
+    assert verify_session_token(token, b'outra-chave') is None
+    assert verify_session_token(token[:-1] + ('A' if token[-1] != 'A' else 'B'), SESSION_SECRET) is None
+    assert verify_session_token(issue_session_token('pc-1', 'abc123', now - 2 * 86400, SESSION_SECRET),
+                                SESSION_SECRET) is None  # Vencido
+
+    # Sem chave: nenhum token emitido nem aceito
+    assert issue_session_token('pc-1', 'abc123', now, None) is None
+    assert verify_session_token(token, None) is None
+
+
+def test_no_secret_keeps_full_heartbeats():
+    protocol = AgentProtocol(session_secret=None)
+    monitor = registered_monitor(protocol)
+    try:
+        assert monitor.pending_registration is None and not monitor.session.token
+        assert send_tick(monitor, 'a.py') and send_tick(monitor, 'b.py')
+        for payload in sent(monitor):
+            assert 'session' not in payload and payload['computer_id'] == monitor.computer_id
+    finally:
+        monitor.spool.close()
+
+
+def test_delta_round_trip():
+    protocol = AgentProtocol(session_secret=SESSION_SECRET)
+    monitor = registered_monitor(protocol)
+    try:
+        assert monitor.session.token
+        assert send_tick(monitor, 'a.py') and send_tick(monitor, 'b.py')
+        first, second = sent(monitor)
+        assert 'base' not in first and first['session'] == monitor.session.token  # Primeiro da sessão: completo
+        assert second['base'] == first['seq'] and 'computer_id' not in second
+        assert second['active_window'] == 'b.py'
+        assert 'current_activity' not in second  # Só o que mudou
+
+        computer = protocol.computers[monitor.computer_id]
+        assert computer['active_window'] == 'b.py' and computer['current_activity'] == 'Programando'
+        assert computer['computer_name'] == monitor.computer_name
+    finally:
+        monitor.spool.close()
+
+
+def test_cold_instance_resyncs_without_processing():
+    protocol = AgentProtocol(session_secret=SESSION_SECRET)
+    monitor = registered_monitor(protocol)
+    try:
+        assert send_tick(monitor, 'a.py')
+        monitor.transport.posts.clear()
+
+        # Outra instância (mesma chave, sem o estado base): o delta volta sem ser processado e o
+        # agente reenvia o mesmo heartbeat completo na hora
+        cold = AgentProtocol(session_secret=SESSION_SECRET)
+        monitor.transport = ProtocolTransport(cold)
+        assert send_tick(monitor, 'b.py')
+        rejected, full = sent(monitor)
+        assert 'base' in rejected and 'base' not in full
+        assert full['session'] == rejected['session'] and full['active_window'] == 'b.py'
+        assert cold.computers[monitor.computer_id]['active_window'] == 'b.py'
+        assert monitor.spool.pending == 0
+
+        # A resposta ao delta: resync, sem gravar nada
+        other = AgentProtocol(session_secret=SESSION_SECRET)
+        status, body = other.post_data(dict(rejected))
+        assert status == 200 and body['success'] is False and body['resync'] is True
+        assert not other.computers and not other.minutes
+
+        # Dali em diante, deltas de novo
+        assert send_tick(monitor, 'c.py')
+        assert sent(monitor)[-1]['base'] == full['seq']
+    finally:
+        monitor.spool.close()
+
+
+def test_expired_token_spools_and_registers_again():
+    protocol = AgentProtocol(session_secret=SESSION_SECRET)
+    monitor = registered_monitor(protocol)
+    try:
+        monitor.session.token = monitor.session.token[:-2] + 'xx'  # Assinatura inválida
+        assert send_tick(monitor, 'a.py') is False
+        assert monitor.spool.pending == 1 and monitor.pending_registration
+        assert not monitor.session.token
+
+        # Próximo heartbeat: completo, com o registro junto, e sessão nova
+        assert send_tick(monitor, 'b.py')
+        heartbeat, drain = sent(monitor)[-2:]
+        assert heartbeat['register'] is True and heartbeat['computer_id'] == monitor.computer_id
+        assert monitor.session.token and monitor.pending_registration is None
+        assert drain['type'] == 'heartbeat_batch' and drain['replayed'] and monitor.spool.pending == 0
+    finally:
+        monitor.spool.close()
+
+
+if __name__ == "__main__":
+    tests = [test_token_round_trip, test_no_secret_keeps_full_heartbeats, test_delta_round_trip,
+             test_cold_instance_resyncs_without_processing, test_expired_token_spools_and_registers_again]
+    print("🧪 TESTE DOS HEARTBEATS COM SESSÃO")
+    print("=" * 40)
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Teste do spool local de heartbeats (spool.py)
+    - descarte: primeiro por idade, depois por quantidade e por bytes (mais antigos primeiro)
+    - contador pending depois de um ack parcial e ao reabrir o banco
+
+Uso:
+    python3 test_spool.py
+    python3 -m pytest -q test_spool.py
+"""
+
+import os
+import random
+import tempfile
+import time
+
+from spool import HeartbeatSpool
+
+
+def new_spool(**limits):
+    path = os.path.join(tempfile.mkdtemp(prefix='worktrack-spool-'), 'spool.db')
+    return HeartbeatSpool(path, **limits)
+
+
+def minutes(spool):
+    return [payload['minute'] for _, _, payload in spool.peek(1000)]
+
+
+def test_keeps_captured_at_and_order():
+    spool = new_spool()
+    try:
+        spool.append({'minute': 1}, captured_at=1000.0 + time.time())
+        spool.append({'minute': 2}, captured_at=time.time() - 120)
+        rows = spool.peek()
+        assert [payload for _, _, payload in rows] == [{'minute': 1}, {'minute': 2}]
+        assert rows[1][1] < rows[0][1]  # Ordem de gravação, horário original preservado
+    finally:
+        spool.close()
+
+
+def test_evicts_by_age_first():
+    spool = new_spool(max_entries=3, max_age=3600)
+    try:
+        now = time.time()
+        spool.append({'minute': 1}, captured_at=now - 7200)
+        spool.append({'minute': 2}, captured_at=now - 60)
+        spool.append({'minute': 3}, captured_at=now - 30)
+        # Abaixo do limite de quantidade, mas o primeiro passou de max_age
+        assert minutes(spool) == [2, 3]
+        assert spool.evicted == 1 and spool.pending == 2
+    finally:
+        spool.close()
+
+
+def test_evicts_oldest_by_count():
+    spool = new_spool(max_entries=3)
+    try:
+        for minute in range(1, 6):
+            spool.append({'minute': minute})
+        assert minutes(spool) == [3, 4, 5]
+        assert spool.evicted == 2 and spool.pending == 3
+    finally:
+        spool.close()
+
+
+def test_evicts_oldest_by_bytes():
+    rng = random.Random(7)
+    noise = lambda: ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz0123456789') for _ in range(400))
+    spool = new_spool(max_entries=100, max_bytes=1500)
+    try:
+        for minute in range(1, 7):
+            spool.append({'minute': minute, 'window': noise()})  # ~330 B comprimidos cada
+        total = spool.conn.execute('SELECT SUM(size) FROM heartbeats').fetchone()[0]
+        kept = minutes(spool)
+        assert total <= 1500
+        # Só as mais antigas saem, até caber com a folga de 10% (não o spool inteiro)
+        assert kept == [3, 4, 5, 6]
+        assert spool.evicted == 6 - len(kept) and spool.pending == len(kept)
+    finally:
+        spool.close()
+
+
+def test_pending_after_partial_ack():
+    spool = new_spool()
+    try:
+        for minute in range(1, 6):
+            spool.append({'minute': minute})
+        assert spool.pending == 5
+        ids = [row_id for row_id, _, _ in spool.peek(2)]
+        spool.ack(ids + [99999])  # id já removido não conta
+        assert spool.pending == 3
+        assert minutes(spool) == [3, 4, 5]
+
+        spool.ack([row_id for row_id, _, _ in spool.peek()])
+        assert spool.pending == 0 and spool.peek() == []
+        spool.ack([])
+        assert spool.pending == 0
+    finally:
+        spool.close()
+
+
+def test_pending_survives_reopen():
+    spool = new_spool()
+    spool.append({'minute': 1})
+    spool.append({'minute': 2})
+    spool.close()
+    reopened = HeartbeatSpool(spool.path)
+    try:
+        assert reopened.pending == 2 and reopened.count() == 2
+    finally:
+        reopened.close()
+
+
+if __name__ == "__main__":
+    tests = [test_keeps_captured_at_and_order, test_evicts_by_age_first, test_evicts_oldest_by_count,
+             test_evicts_oldest_by_bytes, test_pending_after_partial_ack, test_pending_survives_reopen]
+    print("🧪 TESTE DO SPOOL")
+    print("=" * 40)
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
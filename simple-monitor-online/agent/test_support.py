@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Apoio aos testes do agente: monitor isolado (spool, cache de registro e arquivos do usuário em
+um diretório temporário), respostas HTTP falsas e transporte para o servidor local em memória
+"""
+
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+
+import registration
+import spool
+
+# Porta fechada: conexão recusada na hora, sem rede
+UNREACHABLE_URL = 'http://127.0.0.1:9'
+
+# Chave dos tokens de sessão do servidor local nos testes (sem chave ele não abre sessão)
+SESSION_SECRET = b'worktrack-test'
+
+
+@contextlib.contextmanager
+def isolated_home():
+    """HOME temporário, inclusive para os caminhos padrão já calculados na importação"""
+    home = tempfile.mkdtemp(prefix='worktrack-test-')
+    previous = (os.environ.get('HOME'), spool.DEFAULT_SPOOL_PATH, registration.DEFAULT_REGISTRATION_PATH)
+    os.environ['HOME'] = home
+    spool.DEFAULT_SPOOL_PATH = os.path.join(home, '.worktrack_monitor', 'spool.db')
+    registration.DEFAULT_REGISTRATION_PATH = os.path.join(home, '.worktrack_monitor', 'registration.json')
+    try:
+        yield home
+    finally:
+        if previous[0] is None:
+            os.environ.pop('HOME', None)
+        else:
+            os.environ['HOME'] = previous[0]
+        spool.DEFAULT_SPOOL_PATH, registration.DEFAULT_REGISTRATION_PATH = previous[1:]
+
+
+def isolated_monitor(server_url=UNREACHABLE_URL, monitor_class=None):
+    """OnlineActivityMonitor sem efeitos fora do diretório temporário (saída descartada)"""
+    if monitor_class is None:
+        from monitor_online import OnlineActivityMonitor as monitor_class
+    with isolated_home(), contextlib.redirect_stdout(io.StringIO()):
+        return monitor_class(server_url)
+
+
+class FakeResponse:
+    """Resposta no formato usado pelo agente (requests.Response)"""
+
+    def __init__(self, status_code=200, body=None, headers=None):
+        self.status_code = status_code
+        self.body = {'success': True} if body is None else body
+        self.headers = headers or {}
+        self.content = json.dumps(self.body).encode('utf-8')
+
+    def json(self):
+        if isinstance(self.body, (dict, list)):
+            return self.body
+        raise ValueError("corpo não é JSON")
+
+
+class ProtocolTransport:
+    """Transporte que entrega os POSTs ao servidor local em memória; timeout_after_processing
+    simula a resposta perdida depois de o servidor já ter gravado"""
+
+    def __init__(self, protocol):
+        self.protocol = protocol
+        self.posts = []
+        self.timeout_after_processing = False
+
+    def post(self, path, payload, **kwargs):
+        self.posts.append((path, payload))
+        status, body = self.protocol.post_data(dict(payload)) if path == '/api/data' else (200, {})
+        if self.timeout_after_processing:
+            self.timeout_after_processing = False
+            raise TimeoutError("timeout de leitura")
+        return FakeResponse(status, body)
+
+    def connection_stats(self):
+        return {'connections_reused': 0, 'requests': len(self.posts)}
+
+    def close(self):
+        pass
+
+
+def send_tick(monitor, window='main.py', activity='Programando'):
+    """Heartbeat de um tick pelo caminho do envio ao vivo (upload_heartbeat); saída descartada"""
+    from sampling import ActivitySnapshot
+    snapshot = ActivitySnapshot('code', window, time.time(), 0.0)
+    data = monitor.build_heartbeat(snapshot, activity, datetime.now())
+    with contextlib.redirect_stdout(io.StringIO()):
+        return monitor.upload_heartbeat(data, time.time(), activity, snapshot)
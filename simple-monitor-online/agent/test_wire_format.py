@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Teste do esquema e do formato de transmissão (wire_format.py + transport.py)
+    - validate: payloads enviados pelo monitor (registro, sessão, delta, lote, spool) são válidos
+    - validate: tipo desconhecido, campo obrigatório ausente e campo fora do esquema
+    - Accept-Post: q=0 exclui, tipos alternativos do MessagePack, desconhecidos ignorados
+    - MessagePack depois do Accept-Post; 415 volta para JSON até reiniciar
+
+Uso:
+    python3 test_wire_format.py
+    python3 -m pytest -q test_wire_format.py
+"""
+
+import contextlib
+import io
+import os
+import time
+from datetime import datetime
+
+import wire_format
+from benchmarks.local_server import AgentProtocol
+from sampling import ActivitySnapshot
+from test_support import SESSION_SECRET, FakeResponse, ProtocolTransport, isolated_monitor, send_tick
+from transport import AgentTransport
+from wire_format import MSGPACK_TYPE, WireCodec, decode, parse_accept_post, schema_key, validate
+
+
+def skip(reason):
+    """Pular o teste (pytest) ou só avisar (execução direta)"""
+    if os.environ.get('PYTEST_CURRENT_TEST'):
+        import pytest
+        pytest.skip(reason)
+    print(f"⏭️ {reason}")
+    return False
+
+
+class FakeSession:
+    """Sessão HTTP que grava as requisições e responde na ordem da fila"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append(kwargs)
+        return self.responses.pop(0)
+
+
+def test_monitor_payloads_are_valid():
+    monitor = isolated_monitor()
+    monitor.transport = ProtocolTransport(AgentProtocol(session_secret=SESSION_SECRET))
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            monitor.prepare_registration()
+        assert send_tick(monitor, 'a.py') and send_tick(monitor, 'b.py')  # Registro junto + delta
+
+        monitor.session.token = monitor.session.token[:-2] + 'xx'  # Token recusado: spool
+        assert send_tick(monitor, 'c.py') is False
+        assert send_tick(monitor, 'd.py')  # Registro de novo + reenvio do spool em lote
+
+        now = time.time()
+        entries = []
+        for n, window in ((1, 'e.py'), (0, 'f.py')):
+            snapshot = ActivitySnapshot('code', window, now, 0.0)
+            entries.append((now - 60 * n, monitor.build_heartbeat(snapshot, 'Programando', datetime.now())))
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert monitor.send_batch(entries)
+
+        payloads = [payload for path, payload in monitor.transport.posts if path == '/api/data']
+        kinds = {schema_key(payload) for payload in payloads}
+        assert {'heartbeat', 'heartbeat_session', 'heartbeat_batch'} <= kinds
+        for payload in payloads:
+            assert validate(payload) == [], (payload, validate(payload))
+    finally:
+        monitor.spool.close()
+
+
+def test_valid_payloads():
+    assert validate({'type': 'register', 'computer_id': 'pc-1', 'computer_name': 'PC',
+                     'metadata': {'setor': 'TI'}, 'metadata_hash': 'abc'}) == []
+    assert validate({'type': 'heartbeat', 'session': 't', 'seq': 2, 'base': 1,
+                     'active_window': 'main.py'}) == []
+    assert validate({'type': 'app_usage', 'computer_id': 'pc-1', 'app_usage': []}) == []
+    assert validate({'type': 'presence', 'computer_id': 'pc-1', 'state': 'active',
+                     'previous_state': 'idle', 'idle_seconds': 300}) == []
+
+
+def test_invalid_payloads():
+    assert validate({'type': 'screenshot', 'computer_id': 'pc-1'}) == ["tipo desconhecido: 'screenshot'"]
+    assert validate({'computer_id': 'pc-1'}) == ["tipo desconhecido: None"]
+    assert validate({'type': 'heartbeat_batch', 'computer_id': 'pc-1'}) == ["campo obrigatório ausente: samples"]
+    assert validate({'type': 'heartbeat', 'computer_id': None}) == ["campo obrigatório ausente: computer_id"]
+    assert validate({'type': 'heartbeat', 'session': 't'}) == ["campo obrigatório ausente: seq"]
+
+    # Identidade não vai no heartbeat compacto da sessão (vem do token)
+    assert validate({'type': 'heartbeat', 'session': 't', 'seq': 2,
+                     'computer_id': 'pc-1'}) == ["campo fora do esquema: computer_id"]
+    assert validate({'type': 'app_usage', 'computer_id': 'pc-1', 'app_usage': [],
+                     'window_title': 'x'}) == ["campo fora do esquema: window_title"]
+
+
+def test_parse_accept_post():
+    assert parse_accept_post('application/msgpack, application/json') == {'msgpack', 'json'}
+    assert parse_accept_post('application/x-msgpack; q=0.8, application/json;q=0') == {'msgpack'}
+    assert parse_accept_post('APPLICATION/VND.MSGPACK') == {'msgpack'}
+    assert parse_accept_post('text/csv, application/json') == {'json'}
+    assert parse_accept_post(None) == set()
+
+
+def test_msgpack_after_accept_post_and_415_fallback():
+    if wire_format.msgpack is None:
+        assert WireCodec.from_config({}) is None  # Sem o pacote: JSON como antes
+        return skip("msgpack não instalado")
+
+    payload = {'type': 'heartbeat', 'computer_id': 'pc-1', 'active_window': 'main.py'}
+    accepts = FakeResponse(headers={'Accept-Post': f'{MSGPACK_TYPE}, application/json'})
+    refused = FakeResponse(415, {'success': False}, {'Accept-Post': MSGPACK_TYPE})
+    transport = AgentTransport('http://worktrack.invalid')
+    transport.session = FakeSession(accepts, accepts, refused, accepts, accepts)
+    transport.codec = WireCodec.from_config({})
+
+    transport.post('/api/data', payload)  # Ainda não sabe o que o servidor aceita
+    transport.post('/api/data', payload)
+    with contextlib.redirect_stdout(io.StringIO()):
+        response = transport.post('/api/data', payload)
+    assert response.status_code == 200  # O reenvio em JSON é a resposta do post
+    transport.post('/api/data', payload)
+
+    first, binary, rejected, resent, after = transport.session.calls
+    assert first['json'] == payload
+    assert binary['headers']['Content-Type'] == MSGPACK_TYPE and binary['headers']['Accept'] == 'application/json'
+    assert decode(binary['data'], MSGPACK_TYPE) == payload
+    assert rejected['headers']['Content-Type'] == MSGPACK_TYPE
+    assert resent['json'] == payload and after['json'] == payload
+    assert transport.format_refused and transport.codec.rejected == 1
+    assert transport.codec.stats()['encoded'] == {'msgpack': 2}
+
+
+if __name__ == "__main__":
+    tests = [test_monitor_payloads_are_valid, test_valid_payloads, test_invalid_payloads,
+             test_parse_accept_post, test_msgpack_after_accept_post_and_415_fallback]
+    print("🧪 TESTE DO FORMATO DE TRANSMISSÃO")
+    print("=" * 40)
+    for test in tests:
+        if test() is not False:
+            print(f"✅ {test.__name__}")
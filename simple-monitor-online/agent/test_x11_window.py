@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Teste da janela ativa no Linux (x11_window.py)
+    - cache de /proc/<pid>/comm: remove só o handle menos usado ao passar de MAX_COMM_HANDLES
+    - servidor X que cai (servidor falso via TCP): a libX11 não encerra o processo, a consulta
+      levanta X11ConnectionLost e o monitor passa para o xprop
+    - com Xvfb instalado: cria uma janela real, marca como ativa e consulta pelo backend do
+      agente e pelo monitor gerado pelo install_silent.py (que embute o mesmo x11_window.py)
+
+Uso:
+    python3 test_x11_window.py
+    python3 -m pytest -q test_x11_window.py
+"""
+
+import contextlib
+import ctypes
+import ctypes.util
+import io
+import os
+import platform
+import shutil
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import monitor_online
+import x11_window
+from x11_window import X11ActiveWindow, X11ConnectionLost
+
+INSTALLER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'installer')
+AGENT_DIR = os.path.dirname(os.path.abspath(__file__))
+TITLE = 'Relatório mensal – WorkTrack'
+
+# Requisições do X que esperam resposta (InternAtom, GetProperty, GetInputFocus, QueryExtension)
+REPLY_OPCODES = {16, 20, 43, 98}
+
+
+def skip(reason):
+    """Pular o teste (pytest) ou só avisar (execução direta)"""
+    if os.environ.get('PYTEST_CURRENT_TEST'):
+        import pytest
+        pytest.skip(reason)
+    print(f"⏭️ {reason}")
+    return False
+
+
+def comm_only_backend():
+    """Backend sem display: só o cache de /proc/<pid>/comm"""
+    backend = X11ActiveWindow.__new__(X11ActiveWindow)
+    backend.comm_files = OrderedDict()
+    return backend
+
+
+def spawn_sleeper():
+    """Processo com comm conhecido (espera o exec trocar o nome herdado do fork)"""
+    process = subprocess.Popen(['sleep', '30'])
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        with open(f'/proc/{process.pid}/comm', encoding='utf-8') as f:
+            if f.read().strip() == 'sleep':
+                return process
+        time.sleep(0.01)
+    raise AssertionError("sleep não iniciou")
+
+
+def test_comm_cache_evicts_least_recently_used():
+    limit = 3
+    original = x11_window.MAX_COMM_HANDLES
+    x11_window.MAX_COMM_HANDLES = limit
+    sleepers = [spawn_sleeper() for _ in range(limit + 1)]
+    backend = comm_only_backend()
+    try:
+        pids = [process.pid for process in sleepers]
+        for pid in pids[:limit]:
+            assert backend.process_name(pid) == 'sleep'
+        handles = dict(backend.comm_files)
+
+        # Usar o primeiro de novo: o menos usado passa a ser o segundo
+        assert backend.process_name(pids[0]) == 'sleep'
+        assert backend.process_name(pids[limit]) == 'sleep'
+
+        assert list(backend.comm_files) == [pids[2], pids[0], pids[3]]
+        assert handles[pids[1]].closed  # Só o removido foi fechado
+        assert not handles[pids[0]].closed and not handles[pids[2]].closed
+        assert backend.comm_files[pids[0]] is handles[pids[0]]  # Handle reaproveitado
+
+        # Processo encerrado: a consulta falha e o handle sai do cache
+        sleepers[0].kill()
+        sleepers[0].wait()
+        assert backend.process_name(pids[0]) is None
+        assert pids[0] not in backend.comm_files
+    finally:
+        x11_window.MAX_COMM_HANDLES = original
+        for process in sleepers:
+            process.kill()
+            process.wait()
+        for handle in backend.comm_files.values():
+            handle.close()
+
+
+def fake_setup_reply():
+    """Resposta de conexão do X (little-endian): um formato, uma tela de 24 bits com um visual"""
+    vendor = b'fake'
+    pixmap_format = struct.pack('<BBB5x', 24, 32, 32)
+    visual = struct.pack('<IBBHIII4x', 0x21, 4, 8, 256, 0xff0000, 0xff00, 0xff)
+    depth = struct.pack('<BxH4x', 24, 1) + visual
+    screen = struct.pack('<IIIIIHHHHHHIBBBB', 0x100, 0x20, 0xffffff, 0, 0, 640, 480, 170, 127,
+                         1, 1, 0x21, 0, 0, 24, 1) + depth
+    body = struct.pack('<IIIIHHBBBBBBBB4x', 1, 0x200000, 0x1fffff, 0, len(vendor), 65535, 1, 1,
+                       0, 0, 32, 32, 8, 255) + vendor + pixmap_format + screen
+    return struct.pack('<BxHHH', 1, 11, 0, len(body) // 4) + body
+
+
+class FakeXServer:
+    """Servidor X mínimo em TCP: aceita a conexão e responde às requisições com respostas vazias
+    (átomo 0, propriedade ausente). drop() derruba as conexões como um servidor X que caiu"""
+
+    def __init__(self):
+        self.sock = socket.socket()
+        for number in range(90, 190):
+            try:
+                self.sock.bind(('127.0.0.1', 6000 + number))
+                break
+            except OSError:
+                continue
+        self.display = f'127.0.0.1:{number}'
+        self.sock.listen(4)
+        self.clients = []
+        threading.Thread(target=self.accept, daemon=True).start()
+
+    def accept(self):
+        while True:
+            try:
+                client, _ = self.sock.accept()
+            except OSError:
+                return
+            self.clients.append(client)
+            threading.Thread(target=self.serve, args=(client,), daemon=True).start()
+
+    def serve(self, client):
+        try:
+            header = client.recv(12)
+            name_length, data_length = struct.unpack('<HH', header[6:10])
+            remaining = ((name_length + 3) & ~3) + ((data_length + 3) & ~3)  # Autorização: ignorada
+            while remaining > 0:
+                remaining -= len(client.recv(remaining))
+            client.sendall(fake_setup_reply())
+
+            buffer, sequence = b'', 0
+            while True:
+                chunk = client.recv(4096)
+                if not chunk:
+                    return
+                buffer += chunk
+                while len(buffer) >= 4:
+                    length = struct.unpack('<H', buffer[2:4])[0] * 4
+                    if len(buffer) < length:
+                        break
+                    opcode, buffer = buffer[0], buffer[length:]
+                    sequence = (sequence + 1) & 0xffff
+                    if opcode in REPLY_OPCODES:
+                        client.sendall(struct.pack('<BxHI24x', 1, sequence, 0))
+        except OSError:
+            pass
+
+    def drop(self):
+        for client in self.clients:
+            with contextlib.suppress(OSError):
+                client.shutdown(socket.SHUT_RDWR)
+            client.close()
+
+    def close(self):
+        self.drop()
+        self.sock.close()
+
+
+# Processo filho: se a libX11 chamar exit(), o teste vê o código de saída em vez de morrer junto
+SERVER_LOSS_SCRIPT = """
+import sys
+from x11_window import X11ActiveWindow, X11ConnectionLost
+backend = X11ActiveWindow(sys.argv[1])
+print('aberto', backend.query(), flush=True)
+sys.stdin.readline()  # Servidor derrubado pelo teste
+try:
+    print('consulta', backend.query(), flush=True)
+except X11ConnectionLost:
+    print('perdida', backend.lost, flush=True)
+backend.close()
+print('vivo', flush=True)
+"""
+
+
+def test_server_loss_does_not_exit():
+    if not ctypes.util.find_library('X11'):
+        return skip("libX11 não instalada")
+    server = FakeXServer()
+    child = subprocess.Popen([sys.executable, '-c', SERVER_LOSS_SCRIPT, server.display], cwd=AGENT_DIR,
+                             stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    try:
+        assert child.stdout.readline() == 'aberto None\n'
+        server.drop()
+        child.stdin.write('\n')
+        child.stdin.flush()
+        output, errors = child.communicate(timeout=10)
+        assert child.returncode == 0, (child.returncode, errors)
+        assert output.splitlines() == ['perdida True', 'vivo']
+    finally:
+        if child.poll() is None:
+            child.kill()
+            child.wait()
+        server.close()
+
+
+class LostBackend:
+    closed = False
+
+    def query(self):
+        raise X11ConnectionLost("conexão com o servidor X perdida")
+
+    def close(self):
+        self.closed = True
+
+
+def test_monitor_falls_back_to_xprop():
+    monitor = monitor_online.OnlineActivityMonitor.__new__(monitor_online.OnlineActivityMonitor)
+    monitor.probe_helper = False
+    monitor.x11_backend = backend = LostBackend()
+    window = {'process_name': 'firefox', 'window_title': TITLE}
+    original = monitor_online.query_subprocess, platform.system
+    monitor_online.query_subprocess = lambda: window
+    platform.system = lambda: 'Linux'
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert monitor.get_active_window() == window
+        assert backend.closed and monitor.x11_backend is False
+        assert monitor.get_active_window() == window  # Segue no xprop sem reabrir o X11
+    finally:
+        monitor_online.query_subprocess, platform.system = original
+
+
+@contextlib.contextmanager
+def xvfb():
+    """Servidor X virtual em um display livre: nome do display"""
+    number = next(n for n in range(90, 190) if not os.path.exists(f'/tmp/.X11-unix/X{n}'))
+    server = subprocess.Popen(['Xvfb', f':{number}', '-nolisten', 'tcp', '-screen', '0', '640x480x24'],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.monotonic() + 10
+        while not os.path.exists(f'/tmp/.X11-unix/X{number}'):
+            assert server.poll() is None and time.monotonic() < deadline, "Xvfb não iniciou"
+            time.sleep(0.05)
+        yield f':{number}'
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def create_active_window(display_name, title):
+    """Janela real com _NET_WM_NAME e _NET_WM_PID, marcada como ativa na raiz (Xvfb não tem
+    gerenciador de janelas). Retorna a função que fecha a conexão"""
+    xlib = x11_window._load_xlib()
+    xlib.XCreateSimpleWindow.argtypes = [ctypes.c_void_p, ctypes.c_ulong] + [ctypes.c_int] * 4 + \
+        [ctypes.c_uint, ctypes.c_ulong, ctypes.c_ulong]
+    xlib.XCreateSimpleWindow.restype = ctypes.c_ulong
+    xlib.XChangeProperty.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.c_ulong, ctypes.c_ulong,
+                                     ctypes.c_int, ctypes.c_int, ctypes.c_void_p, ctypes.c_int]
+    xlib.XMapWindow.argtypes = [ctypes.c_void_p, ctypes.c_ulong]
+    xlib.XSync.argtypes = [ctypes.c_void_p, ctypes.c_int]
+
+    display = xlib.XOpenDisplay(display_name.encode())
+    assert display, f"display {display_name} indisponível"
+    root = xlib.XDefaultRootWindow(display)
+    atom = lambda name: xlib.XInternAtom(display, name, False)
+    window = xlib.XCreateSimpleWindow(display, root, 0, 0, 200, 100, 0, 0, 0)
+
+    encoded = title.encode('utf-8')
+    xlib.XChangeProperty(display, window, atom(b'_NET_WM_NAME'), atom(b'UTF8_STRING'), 8, 0,
+                         encoded, len(encoded))
+    pid = (ctypes.c_long * 1)(os.getpid())
+    xlib.XChangeProperty(display, window, atom(b'_NET_WM_PID'), x11_window.XA_CARDINAL, 32, 0, pid, 1)
+    xlib.XMapWindow(display, window)
+    active = (ctypes.c_long * 1)(window)
+    xlib.XChangeProperty(display, root, atom(b'_NET_ACTIVE_WINDOW'), x11_window.XA_WINDOW, 32, 0, active, 1)
+    xlib.XSync(display, False)
+    return lambda: xlib.XCloseDisplay(display)
+
+
+def installer_monitor():
+    """BackgroundMonitor do código gerado pelo install_silent.py"""
+    sys.path.insert(0, INSTALLER_DIR)
+    try:
+        import install_silent
+    finally:
+        sys.path.remove(INSTALLER_DIR)
+    namespace = {'__name__': 'worktrack_silent'}
+    exec(compile(install_silent.SilentInstaller().get_monitor_code(), 'worktrack_silent', 'exec'), namespace)
+    monitor = namespace['BackgroundMonitor'].__new__(namespace['BackgroundMonitor'])
+    monitor.x11 = None
+    monitor.log = print
+    return monitor
+
+
+def test_active_window_on_xvfb():
+    if not shutil.which('Xvfb'):
+        return skip("Xvfb não instalado")
+
+    with open('/proc/self/comm', encoding='utf-8') as f:
+        process_name = f.read().strip()
+
+    with xvfb() as display_name:
+        close = create_active_window(display_name, TITLE)
+        backend = X11ActiveWindow(display_name)
+        monitor = None
+        previous = os.environ.get('DISPLAY')
+        os.environ['DISPLAY'] = display_name
+        try:
+            assert backend.query() == {'process_name': process_name, 'window_title': TITLE}
+            assert list(backend.comm_files) == [os.getpid()]
+
+            monitor = installer_monitor()
+            assert monitor.get_active_window_linux() == {'app': process_name, 'title': TITLE}
+            assert monitor.x11.comm_files  # Mesmo cache LRU do agente
+        finally:
+            if previous is None:
+                os.environ.pop('DISPLAY', None)
+            else:
+                os.environ['DISPLAY'] = previous
+            backend.close()
+            if monitor is not None and monitor.x11:
+                monitor.x11.close()
+            close()
+
+
+if __name__ == "__main__":
+    print("🧪 TESTE DA JANELA ATIVA (X11)")
+    print("=" * 40)
+    for test in (test_comm_cache_evicts_least_recently_used, test_server_loss_does_not_exit,
+                 test_monitor_falls_back_to_xprop, test_active_window_on_xvfb):
+        if test() is not False:
+            print(f"✅ {test.__name__}")
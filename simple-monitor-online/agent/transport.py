@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Transporte HTTP do Agente
+Sessão keep-alive compartilhada por servidor, timeouts por endpoint,
+pré-aquecimento de conexão, contadores de reutilização, formato binário (wire_format) e
+compressão do corpo (body_encoding) nos endpoints que os anunciam
+"""
+
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+
+from body_encoding import parse_accept_encoding
+from wire_format import JSON_TYPE, encode as encode_payload, media_type, parse_accept_post
+
+# Timeouts (conexão, leitura) em segundos para cada endpoint do servidor
+DEFAULT_TIMEOUTS = {
+    '/api/data': (5, 10),
+    '/api/websocket': (3, 5),
+    '/api/commands': (5, 10),
+}
+DEFAULT_TIMEOUT = (5, 10)
+
+# Pré-aquecimento usa OPTIONS (respondido por todos os endpoints sem tocar no banco)
+PREWARM_PATH = '/api/data'
+PREWARM_TIMEOUT = (3, 3)
+
+# Endpoints com corpo negociável (anunciam os formatos aceitos em Accept-Post e as
+# codificações em Accept-Encoding)
+NEGOTIATED_PATHS = ('/api/data',)
+
+# Resposta a um corpo com Content-Type ou Content-Encoding que o servidor não consegue ler
+UNSUPPORTED_MEDIA_TYPE = 415
+
+# Uma instância de transporte por servidor
+_transports = {}
+_transports_lock = threading.Lock()
+
+
+class AgentTransport:
+    def __init__(self, server_url, timeouts=None, pool_maxsize=4):
+        self.server_url = server_url.rstrip('/')
+
+        self.timeouts = dict(DEFAULT_TIMEOUTS)
+        if timeouts:
+            self.timeouts.update(timeouts)
+
+        # Sessão única com pool de conexões keep-alive
+        self.session = requests.Session()
+        self.adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=1)
+        self.session.mount('https://', self.adapter)
+        self.session.mount('http://', self.adapter)
+        self.session.headers.update({
+            'Connection': 'keep-alive',
+            'User-Agent': 'WorkTrackAgent/1.0'
+        })
+
+        # Compressão do corpo (BodyEncoder, configurado pelo monitor) e codificações aceitas
+        # pelo servidor: None = ainda não sabemos (envia sem compressão)
+        self.encoder = None
+        self.accepted_encodings = None
+        self.encoding_refused = False  # 415 recebido: sem compressão até reiniciar o agente
+
+        # Formato binário (WireCodec, configurado pelo monitor) e formatos aceitos pelo servidor
+        self.codec = None
+        self.accepted_formats = None
+        self.format_refused = False  # 415 recebido: JSON até reiniciar o agente
+
+        # Contadores
+        self.requests_sent = 0
+        self.errors = 0
+        self.prewarms = 0
+        self.last_request_time = 0
+        self._lock = threading.Lock()
+
+    def url(self, path):
+        """Montar URL completa do endpoint"""
+        return f'{self.server_url}{path}'
+
+    def timeout_for(self, path):
+        """Timeout configurado para o endpoint"""
+        return self.timeouts.get(path, DEFAULT_TIMEOUT)
+
+    def request(self, method, path, **kwargs):
+        """Executar requisição reutilizando a sessão do servidor"""
+        kwargs.setdefault('timeout', self.timeout_for(path))
+        try:
+            response = self.session.request(method, self.url(path), **kwargs)
+        except requests.RequestException:
+            with self._lock:
+                self.errors += 1
+            raise
+
+        with self._lock:
+            self.requests_sent += 1
+            self.last_request_time = time.time()
+        return response
+
+    def post(self, path, payload, **kwargs):
+        """POST do payload (MessagePack e/ou comprimido se o servidor aceita)"""
+        body, negotiated = self.encode_body(path, payload)
+        response = self.request('POST', path, **body, **kwargs)
+        if self.check_negotiation(path, response, negotiated):
+            response = self.request('POST', path, json=payload, **kwargs)
+            self.check_negotiation(path, response, None)
+        return response
+
+    def encode_body(self, path, payload):
+        """Argumentos do corpo da requisição (json= ou data= + cabeçalhos) e o que foi
+        negociado: (formato, codificação), ou None para o JSON padrão"""
+        encoder, codec = self.encoder, self.codec
+        if path not in NEGOTIATED_PATHS or (encoder is None and codec is None):
+            return {'json': payload}, None
+
+        body, fmt = None, None
+        if codec is not None and self.accepted_formats:
+            body, fmt = codec.encode(payload, self.accepted_formats)
+        compress = encoder is not None and bool(self.accepted_encodings)
+        if body is None:
+            if not compress:
+                return {'json': payload}, None
+            body = encode_payload(payload, 'json')
+
+        encoding = None
+        if compress:
+            body, encoding = encoder.encode(body, self.accepted_encodings)
+        headers = {'Content-Type': media_type(fmt or 'json')}
+        if fmt:
+            headers['Accept'] = JSON_TYPE  # Respostas continuam em JSON
+        if encoding:
+            headers['Content-Encoding'] = encoding
+            if fmt is None:
+                # JSON comprimido vai como octet-stream (o parser da Vercel tentaria ler o JSON)
+                headers['Content-Type'] = 'application/octet-stream'
+        if fmt is None and encoding is None:
+            return {'data': body, 'headers': headers}, None
+        return {'data': body, 'headers': headers}, (fmt, encoding)
+
+    def check_negotiation(self, path, response, negotiated):
+        """Atualizar formatos e codificações aceitos pela resposta; True se o corpo negociado
+        foi recusado e deve ser reenviado em JSON sem compressão"""
+        if path not in NEGOTIATED_PATHS:
+            return False
+        if negotiated and response.status_code == UNSUPPORTED_MEDIA_TYPE:
+            fmt, encoding = negotiated
+            print(f"⚠️ Servidor recusou corpo {' + '.join(filter(None, negotiated))} - enviando JSON sem compressão")
+            if fmt:
+                self.format_refused = True
+                self.accepted_formats = set()
+                if self.codec is not None:
+                    self.codec.rejected += 1
+            if encoding:
+                self.encoding_refused = True
+                self.accepted_encodings = set()
+                if self.encoder is not None:
+                    self.encoder.rejected += 1
+            return True
+        if not self.format_refused:
+            self.accepted_formats = parse_accept_post(response.headers.get('Accept-Post'))
+        if not self.encoding_refused:
+            self.accepted_encodings = parse_accept_encoding(response.headers.get('Accept-Encoding'))
+        return False
+
+    def get(self, path, params=None, **kwargs):
+        """GET com parâmetros de query"""
+        return self.request('GET', path, params=params, **kwargs)
+
+    def prewarm(self):
+        """Abrir (ou validar) a conexão antes do próximo tick agendado"""
+        try:
+            response = self.session.options(self.url(PREWARM_PATH), timeout=PREWARM_TIMEOUT)
+            self.check_negotiation(PREWARM_PATH, response, None)
+            with self._lock:
+                self.prewarms += 1
+            return True
+        except requests.RequestException:
+            with self._lock:
+                self.errors += 1
+            return False
+
+    def connection_stats(self):
+        """Contadores de conexões abertas e reutilizadas (a partir dos pools do urllib3)"""
+        opened = 0
+        served = 0
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            opened += pool.num_connections
+            served += pool.num_requests
+
+        return {
+            'requests': self.requests_sent,
+            'errors': self.errors,
+            'prewarms': self.prewarms,
+            'connections_opened': opened,
+            'connections_reused': max(0, served - opened)
+        }
+
+    def reset_connections(self):
+        """Descartar as conexões do pool (ex.: após suspensão); a sessão continua utilizável"""
+        self.adapter.poolmanager.clear()
+
+    def close(self):
+        """Fechar todas as conexões do pool"""
+        self.session.close()
+
+
+def get_transport(server_url, **kwargs):
+    """Obter o transporte compartilhado do servidor (cria na primeira chamada)"""
+    key = server_url.rstrip('/')
+    with _transports_lock:
+        transport = _transports.get(key)
+        if transport is None:
+            transport = AgentTransport(key, **kwargs)
+            _transports[key] = transport
+        return transport
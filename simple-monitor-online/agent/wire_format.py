@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Formato de Transmissão dos Payloads (JSON ou MessagePack)
+Esquema único dos payloads agente -> servidor, usado pelo monitor, pelo test_connection.py e
+por ferramentas em Python:
+    - SCHEMA: campos de cada tipo de payload (obrigatórios e opcionais)
+    - MessagePack (pacote opcional msgpack) codifica mais rápido que json.dumps e ocupa menos
+      bytes por amostra; sem o pacote, tudo continua em JSON
+    - o servidor anuncia os formatos que aceita no cabeçalho Accept-Post das respostas; o agente
+      só troca para MessagePack depois do anúncio (Content-Type: application/msgpack) e volta
+      para JSON se receber 415
+"""
+
+import json
+import time
+
+try:
+    import msgpack  # Opcional: formato binário compacto
+except ImportError:
+    msgpack = None
+
+JSON_TYPE = 'application/json'
+MSGPACK_TYPE = 'application/msgpack'
+
+# Formato -> Content-Type (e tipos alternativos reconhecidos nos anúncios do servidor)
+MEDIA_TYPES = {'msgpack': MSGPACK_TYPE, 'json': JSON_TYPE}
+MEDIA_ALIASES = {'application/x-msgpack': 'msgpack', 'application/vnd.msgpack': 'msgpack'}
+
+# Ordem de preferência entre os formatos aceitos pelo servidor
+PREFERENCE = ('msgpack', 'json')
+
+IDENTITY = ('computer_id', 'computer_name', 'user_name', 'os_info')
+SAMPLE = ('current_activity', 'active_window', 'timestamp', 'is_active', 'heartbeat_interval',
+          'upload_queue', 'captured_at')
+# Flags do envio ao vivo: sync (comandos na resposta), registro e resumos app_usage junto do heartbeat
+LIVE = ('sync', 'register', 'metadata', 'metadata_hash', 'app_usage')
+
+# Tipo do payload -> (campos obrigatórios, campos opcionais)
+SCHEMA = {
+    'register': (('computer_id',), IDENTITY[1:] + ('metadata', 'metadata_hash')),
+    'heartbeat': (('computer_id',), IDENTITY[1:] + SAMPLE + LIVE + ('replayed',)),
+    # Heartbeat compacto da sessão (session.py): identidade vem do token
+    'heartbeat_session': (('session', 'seq'), SAMPLE + ('base', 'sync', 'app_usage')),
+    'heartbeat_batch': (('computer_id', 'samples'), IDENTITY[1:] + LIVE + ('replayed',)),
+    # Resumos app_usage ao encerrar o agente (os demais vão junto do heartbeat)
+    'app_usage': (('computer_id', 'app_usage'), ()),
+    'presence': (('computer_id', 'state'), IDENTITY[1:] + ('previous_state', 'idle_since',
+                                                           'returned_at', 'idle_seconds')),
+    'activity': (('computer_id',), IDENTITY[1:] + ('total_minutes', 'current_activity',
+                                                   'active_window', 'timestamp'))
+}
+
+
+def available_formats():
+    """Formatos que o agente consegue produzir"""
+    return PREFERENCE if msgpack is not None else ('json',)
+
+
+def media_type(fmt):
+    return MEDIA_TYPES[fmt]
+
+
+def parse_accept_post(value):
+    """Formatos do cabeçalho Accept-Post (q=0 exclui); tipos desconhecidos são ignorados"""
+    formats = set()
+    for item in (value or '').split(','):
+        media, _, params = item.partition(';')
+        media = media.strip().lower()
+        key, _, weight = params.partition('=')
+        try:
+            if key.strip().lower() == 'q' and float(weight) == 0:
+                continue
+        except ValueError:
+            pass
+        fmt = MEDIA_ALIASES.get(media) or next((f for f, t in MEDIA_TYPES.items() if t == media), None)
+        if fmt:
+            formats.add(fmt)
+    return formats
+
+
+def schema_key(payload):
+    """Entrada do SCHEMA que descreve o payload"""
+    kind = payload.get('type')
+    if kind == 'heartbeat' and 'session' in payload:
+        return 'heartbeat_session'
+    return kind
+
+
+def validate(payload):
+    """Problemas do payload frente ao esquema (lista vazia = válido)"""
+    key = schema_key(payload)
+    if key not in SCHEMA:
+        return [f"tipo desconhecido: {payload.get('type')!r}"]
+    required, optional = SCHEMA[key]
+    problems = [f"campo obrigatório ausente: {field}" for field in required if payload.get(field) is None]
+    known = set(required) | set(optional) | {'type'}
+    problems += [f"campo fora do esquema: {field}" for field in payload if field not in known]
+    return problems
+
+
+def encode(payload, fmt):
+    """Corpo do payload no formato pedido"""
+    if fmt == 'msgpack':
+        return msgpack.packb(payload, use_bin_type=True)
+    return json.dumps(payload, separators=(',', ':')).encode('utf-8')
+
+
+def decode(body, content_type=JSON_TYPE):
+    """Payload de um corpo JSON ou MessagePack (ferramentas e testes)"""
+    media = (content_type or JSON_TYPE).split(';')[0].strip().lower()
+    if media == MSGPACK_TYPE or media in MEDIA_ALIASES:
+        if msgpack is None:
+            raise ValueError("pacote msgpack não instalado")
+        return msgpack.unpackb(body, raw=False)
+    return json.loads(body)
+
+
+class WireCodec:
+    def __init__(self, formats=PREFERENCE):
+        self.formats = [f for f in formats if f in available_formats()]
+
+        # Contadores
+        self.encoded = {}  # formato -> payloads
+        self.bytes_out = {}  # formato -> bytes
+        self.cpu_seconds = 0.0
+        self.rejected = 0  # Servidor respondeu 415 a um corpo binário
+
+    @classmethod
+    def from_config(cls, config):
+        """Criar a partir da seção wire_format do device_config.json (None se desativada ou
+        sem o pacote msgpack: o transporte envia JSON como antes)"""
+        config = config or {}
+        if config.get('enabled') is False or msgpack is None:
+            return None
+        return cls(formats=config.get('formats', PREFERENCE))
+
+    def choose(self, accepted):
+        """Melhor formato aceito pelo servidor (None = JSON padrão do transporte)"""
+        for fmt in self.formats:
+            if fmt in accepted:
+                return fmt
+        return None
+
+    def encode(self, payload, accepted):
+        """(corpo, formato) para enviar; formato None se o servidor não aceita nenhum binário"""
+        fmt = self.choose(accepted)
+        if fmt is None or fmt == 'json':
+            return None, None
+
+        started = time.thread_time()
+        body = encode(payload, fmt)
+        self.cpu_seconds += time.thread_time() - started
+        self.encoded[fmt] = self.encoded.get(fmt, 0) + 1
+        self.bytes_out[fmt] = self.bytes_out.get(fmt, 0) + len(body)
+        return body, fmt
+
+    def stats(self):
+        return {
+            'encoded': dict(self.encoded),
+            'bytes': dict(self.bytes_out),
+            'cpu_ms': round(self.cpu_seconds * 1000, 1),
+            'rejected': self.rejected
+        }
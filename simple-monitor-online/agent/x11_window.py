@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Janela Ativa no Linux (X11)
+Lê _NET_ACTIVE_WINDOW / _NET_WM_PID / _NET_WM_NAME direto da libX11 via ctypes,
+sem processo xprop/xdotool por amostra. O nome do processo vem de /proc/<pid>/comm
+com handles de arquivo mantidos abertos entre as consultas
+
+Se o servidor X cair, a conexão é marcada como perdida (X11ConnectionLost) em vez de a libX11
+encerrar o processo; quem usa o backend volta para a consulta por subprocesso (xprop)
+"""
+
+import ctypes
+import ctypes.util
+import os
+import subprocess
+from collections import OrderedDict
+
+XA_WINDOW = 33
+XA_CARDINAL = 6
+ANY_PROPERTY_TYPE = 0
+SUCCESS = 0
+
+# Máximo de handles de /proc/<pid>/comm mantidos abertos
+MAX_COMM_HANDLES = 64
+
+# Handler de erro do X que ignora erros (BadWindow etc.) em vez de encerrar o processo
+_XErrorHandler = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p)
+_ignore_x_errors = _XErrorHandler(lambda display, event: 0)
+
+# Erro de E/S (servidor X caiu): o handler padrão da libX11 chama exit(). O handler de E/S só
+# registra a conexão perdida; o de saída (libX11 >= 1.7) retorna sem encerrar, e a libX11 passa a
+# recusar novas requisições nessa conexão
+_XIOErrorHandler = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p)
+_XIOErrorExitHandler = ctypes.CFUNCTYPE(None, ctypes.c_void_p, ctypes.c_void_p)
+_lost_displays = set()
+
+
+def _io_error(display):
+    _lost_displays.add(display)
+    return 0
+
+
+def _io_error_exit(display, data):
+    _lost_displays.add(display)  # Retornar aqui evita o exit() da libX11
+
+
+_on_io_error = _XIOErrorHandler(_io_error)
+_on_io_error_exit = _XIOErrorExitHandler(_io_error_exit)
+
+
+class X11ConnectionLost(OSError):
+    """Conexão com o servidor X perdida (usar a consulta por subprocesso)"""
+
+
+def _load_xlib():
+    path = ctypes.util.find_library('X11')
+    if not path:
+        raise OSError("libX11 não encontrada")
+    xlib = ctypes.CDLL(path)
+    xlib.XInitThreads()  # Threads de eventos usam conexões próprias
+
+    xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+    xlib.XOpenDisplay.restype = ctypes.c_void_p
+    xlib.XCloseDisplay.argtypes = [ctypes.c_void_p]
+    xlib.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+    xlib.XDefaultRootWindow.restype = ctypes.c_ulong
+    xlib.XInternAtom.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_int]
+    xlib.XInternAtom.restype = ctypes.c_ulong
+    xlib.XGetWindowProperty.argtypes = [
+        ctypes.c_void_p, ctypes.c_ulong, ctypes.c_ulong, ctypes.c_long, ctypes.c_long,
+        ctypes.c_int, ctypes.c_ulong, ctypes.POINTER(ctypes.c_ulong), ctypes.POINTER(ctypes.c_int),
+        ctypes.POINTER(ctypes.c_ulong), ctypes.POINTER(ctypes.c_ulong),
+        ctypes.POINTER(ctypes.c_void_p)
+    ]
+    xlib.XGetWindowProperty.restype = ctypes.c_int
+    xlib.XFree.argtypes = [ctypes.c_void_p]
+    xlib.XSetErrorHandler.argtypes = [_XErrorHandler]
+    xlib.XSetErrorHandler.restype = ctypes.c_void_p
+    xlib.XSetIOErrorHandler.argtypes = [_XIOErrorHandler]
+    xlib.XSetIOErrorHandler.restype = ctypes.c_void_p
+    if not hasattr(xlib, 'XSetIOErrorExitHandler'):
+        # Sem ele, a libX11 encerra o processo depois de qualquer handler de E/S
+        raise OSError("libX11 sem XSetIOErrorExitHandler (< 1.7)")
+    xlib.XSetIOErrorExitHandler.argtypes = [ctypes.c_void_p, _XIOErrorExitHandler, ctypes.c_void_p]
+    xlib.XSetIOErrorExitHandler.restype = None
+    return xlib
+
+
+class X11ActiveWindow:
+    def __init__(self, display_name=None):
+        self.xlib = _load_xlib()
+        self.xlib.XSetErrorHandler(_ignore_x_errors)
+        self.xlib.XSetIOErrorHandler(_on_io_error)
+
+        display = display_name or os.environ.get('DISPLAY')
+        if not display:
+            raise OSError("DISPLAY não definido")
+        self.display = self.xlib.XOpenDisplay(display.encode())
+        if not self.display:
+            raise OSError(f"Não foi possível abrir o display {display}")
+        self.xlib.XSetIOErrorExitHandler(self.display, _on_io_error_exit, None)
+
+        self.root = self.xlib.XDefaultRootWindow(self.display)
+        self.atoms = {name: self.xlib.XInternAtom(self.display, name.encode(), False)
+                      for name in ('_NET_ACTIVE_WINDOW', '_NET_WM_PID', '_NET_WM_NAME',
+                                   'UTF8_STRING', 'WM_NAME')}
+        self.comm_files = OrderedDict()  # pid -> arquivo /proc/<pid>/comm aberto
+
+    @property
+    def lost(self):
+        """Servidor X caiu: a conexão não aceita mais requisições"""
+        return self.display in _lost_displays
+
+    def check_connection(self):
+        if self.lost:
+            raise X11ConnectionLost("conexão com o servidor X perdida")
+
+    def _get_property(self, window, atom, req_type, max_length=1024):
+        """Ler propriedade da janela: (formato, bytes) ou (0, None)"""
+        self.check_connection()
+        actual_type = ctypes.c_ulong()
+        actual_format = ctypes.c_int()
+        nitems = ctypes.c_ulong()
+        bytes_after = ctypes.c_ulong()
+        prop = ctypes.c_void_p()
+
+        status = self.xlib.XGetWindowProperty(self.display, window, atom, 0, max_length, False,
+                                              req_type, ctypes.byref(actual_type),
+                                              ctypes.byref(actual_format), ctypes.byref(nitems),
+                                              ctypes.byref(bytes_after), ctypes.byref(prop))
+        self.check_connection()
+        if status != SUCCESS or not prop.value:
+            return 0, None
+
+        try:
+            fmt = actual_format.value
+            if fmt == 32:
+                # Itens de formato 32 são entregues como C long
+                data = (ctypes.c_ulong * nitems.value).from_address(prop.value)
+                return fmt, list(data)
+            item_size = 2 if fmt == 16 else 1
+            return fmt, ctypes.string_at(prop.value, nitems.value * item_size)
+        finally:
+            self.xlib.XFree(prop)
+
+    def active_window(self):
+        """ID da janela ativa (0 se nenhuma)"""
+        fmt, data = self._get_property(self.root, self.atoms['_NET_ACTIVE_WINDOW'], XA_WINDOW, 1)
+        return data[0] if fmt == 32 and data else 0
+
+    def window_pid(self, window):
+        fmt, data = self._get_property(window, self.atoms['_NET_WM_PID'], XA_CARDINAL, 1)
+        return data[0] if fmt == 32 and data else None
+
+    def window_title(self, window):
+        fmt, data = self._get_property(window, self.atoms['_NET_WM_NAME'], self.atoms['UTF8_STRING'])
+        if fmt == 8 and data:
+            return data.decode('utf-8', 'replace')
+        fmt, data = self._get_property(window, self.atoms['WM_NAME'], ANY_PROPERTY_TYPE)
+        if fmt == 8 and data:
+            return data.decode('latin-1')
+        return ''
+
+    def process_name(self, pid):
+        """Nome do processo via /proc/<pid>/comm (handle reaproveitado entre consultas)"""
+        handle = self.comm_files.get(pid)
+        if handle is not None:
+            try:
+                handle.seek(0)
+                name = handle.read().strip()
+                if name:
+                    self.comm_files.move_to_end(pid)
+                    return name
+            except OSError:
+                pass
+            # Processo terminou (ou PID reutilizado): reabrir
+            handle.close()
+            del self.comm_files[pid]
+
+        try:
+            handle = open(f'/proc/{pid}/comm', 'r', encoding='utf-8', errors='replace')
+            name = handle.read().strip()
+        except OSError:
+            return None
+
+        self.comm_files[pid] = handle
+        if len(self.comm_files) > MAX_COMM_HANDLES:
+            _, oldest = self.comm_files.popitem(last=False)
+            oldest.close()
+        return name
+
+    def query(self):
+        """Janela ativa: {'process_name', 'window_title'} ou None (X11ConnectionLost se o servidor caiu)"""
+        window = self.active_window()
+        if not window:
+            return None
+
+        pid = self.window_pid(window)
+        process_name = self.process_name(pid) if pid else None
+        return {
+            'process_name': process_name or 'Desconhecido',
+            'window_title': self.window_title(window)
+        }
+
+    def close(self):
+        for handle in self.comm_files.values():
+            handle.close()
+        self.comm_files.clear()
+        if self.display:
+            # Conexão perdida: a libX11 só libera a memória, sem falar com o servidor
+            self.xlib.XCloseDisplay(self.display)
+            _lost_displays.discard(self.display)
+            self.display = None
+
+
+def _xprop(*args):
+    result = subprocess.run(['xprop', *args], capture_output=True, text=True, timeout=5)
+    return result.stdout if result.returncode == 0 else ''
+
+
+def query_subprocess():
+    """Janela ativa via xprop (um processo por consulta): fallback quando a conexão em processo
+    não existe ou caiu. {'process_name', 'window_title'} ou None"""
+    if not os.environ.get('DISPLAY'):
+        return None
+    try:
+        root = _xprop('-root', '_NET_ACTIVE_WINDOW')
+        # "_NET_ACTIVE_WINDOW(WINDOW): window id # 0x2a00007"
+        window = root.split('#', 1)[1].split(',')[0].strip() if '#' in root else ''
+        if not window or int(window, 16) == 0:
+            return None
+
+        fields = {}
+        for line in _xprop('-id', window, '_NET_WM_PID', '_NET_WM_NAME').splitlines():
+            name, sep, value = line.partition(' = ')
+            if sep:
+                fields[name.split('(')[0].strip()] = value.strip()
+    except (OSError, ValueError, subprocess.SubprocessError):
+        return None
+
+    process_name = None
+    pid = fields.get('_NET_WM_PID', '')
+    if pid.isdigit():
+        try:
+            with open(f'/proc/{pid}/comm', encoding='utf-8', errors='replace') as f:
+                process_name = f.read().strip()
+        except OSError:
+            pass
+    title = fields.get('_NET_WM_NAME', '')
+    if len(title) >= 2 and title[0] == title[-1] == '"':
+        title = title[1:-1].replace('\\"', '"').replace('\\\\', '\\')
+    return {'process_name': process_name or 'Desconhecido', 'window_title': title}
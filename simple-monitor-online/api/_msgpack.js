@@ -0,0 +1,107 @@
+/**
+ * Decodificador MessagePack dos corpos enviados pelos agentes (Content-Type: application/msgpack)
+ * Sem dependências; cobre o formato completo exceto extensões (ext/timestamp), que os agentes não usam.
+ * Arquivo com _ no início: a Vercel não o expõe como rota
+ */
+
+const MAX_DEPTH = 64;
+
+class Reader {
+    constructor(buffer) {
+        this.buffer = buffer;
+        this.view = new DataView(buffer.buffer, buffer.byteOffset, buffer.byteLength);
+        this.offset = 0;
+    }
+
+    take(length) {
+        const start = this.offset;
+        this.offset += length;
+        if (this.offset > this.buffer.length) throw new Error('MessagePack truncado');
+        return start;
+    }
+
+    u8() { return this.view.getUint8(this.take(1)); }
+    u16() { return this.view.getUint16(this.take(2)); }
+    u32() { return this.view.getUint32(this.take(4)); }
+
+    str(length) {
+        const start = this.take(length);
+        return this.buffer.toString('utf8', start, start + length);
+    }
+
+    bin(length) {
+        const start = this.take(length);
+        return Buffer.from(this.buffer.subarray(start, start + length));
+    }
+
+    // Cada item ocupa ao menos 1 byte: tamanho declarado maior que o resto do corpo é inválido
+    count(length) {
+        if (length > this.buffer.length - this.offset) throw new Error('MessagePack truncado');
+        return length;
+    }
+
+    array(length, depth) {
+        this.count(length);
+        const items = new Array(length);
+        for (let i = 0; i < length; i++) items[i] = this.value(depth + 1);
+        return items;
+    }
+
+    map(length, depth) {
+        this.count(length * 2);
+        const object = {};
+        for (let i = 0; i < length; i++) {
+            const key = String(this.value(depth + 1));
+            // defineProperty: chave __proto__ vira campo comum, sem trocar o protótipo
+            Object.defineProperty(object, key, { value: this.value(depth + 1), enumerable: true, writable: true, configurable: true });
+        }
+        return object;
+    }
+
+    value(depth = 0) {
+        if (depth > MAX_DEPTH) throw new Error('MessagePack aninhado demais');
+        const byte = this.u8();
+        if (byte <= 0x7f) return byte;
+        if (byte >= 0xe0) return byte - 0x100;
+        if ((byte & 0xf0) === 0x80) return this.map(byte & 0x0f, depth);
+        if ((byte & 0xf0) === 0x90) return this.array(byte & 0x0f, depth);
+        if ((byte & 0xe0) === 0xa0) return this.str(byte & 0x1f);
+
+        switch (byte) {
+            case 0xc0: return null;
+            case 0xc2: return false;
+            case 0xc3: return true;
+            case 0xc4: return this.bin(this.u8());
+            case 0xc5: return this.bin(this.u16());
+            case 0xc6: return this.bin(this.u32());
+            case 0xca: return this.view.getFloat32(this.take(4));
+            case 0xcb: return this.view.getFloat64(this.take(8));
+            case 0xcc: return this.u8();
+            case 0xcd: return this.u16();
+            case 0xce: return this.u32();
+            case 0xcf: return Number(this.view.getBigUint64(this.take(8)));
+            case 0xd0: return this.view.getInt8(this.take(1));
+            case 0xd1: return this.view.getInt16(this.take(2));
+            case 0xd2: return this.view.getInt32(this.take(4));
+            case 0xd3: return Number(this.view.getBigInt64(this.take(8)));
+            case 0xd9: return this.str(this.u8());
+            case 0xda: return this.str(this.u16());
+            case 0xdb: return this.str(this.u32());
+            case 0xdc: return this.array(this.u16(), depth);
+            case 0xdd: return this.array(this.u32(), depth);
+            case 0xde: return this.map(this.u16(), depth);
+            case 0xdf: return this.map(this.u32(), depth);
+            default: throw new Error(`MessagePack: tipo 0x${byte.toString(16)} não suportado`);
+        }
+    }
+}
+
+// Buffer -> valor; erro se o corpo estiver truncado, tiver bytes sobrando ou usar extensões
+function decode(buffer) {
+    const reader = new Reader(buffer);
+    const value = reader.value();
+    if (reader.offset !== buffer.length) throw new Error('MessagePack com bytes sobrando');
+    return value;
+}
+
+module.exports = { decode };
@@ -6,6 +6,76 @@
 // Cache para comandos pendentes
 let pendingCommands = new Map();
 
+// Canais push (SSE) abertos pelos agentes: computer_id -> Set(res)
+let streams = new Map();
+const STREAM_KEEPALIVE_MS = 15000;
+const STREAM_MAX_MS = parseInt(process.env.WORKTRACK_STREAM_MAX_MS || '55000', 10); // abaixo do limite da função
+
+function writeCommandEvent(res, command) {
+    res.write(`id: ${command.id}\nevent: command\ndata: ${JSON.stringify(command)}\n\n`);
+}
+
+// Entregar comando aos canais abertos do computador; retorna true se algum agente recebeu
+function pushCommand(command) {
+    const subscribers = streams.get(command.computer_id);
+    if (!subscribers || subscribers.size === 0) return false;
+
+    subscribers.forEach(res => writeCommandEvent(res, command));
+    command.status = 'sent';
+    return true;
+}
+
+// GET /api/commands?computer_id=...&stream=1 - canal SSE com os comandos do computador
+function openCommandStream(req, res, computerId) {
+    res.writeHead(200, {
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache, no-transform',
+        'Connection': 'keep-alive',
+        'X-Accel-Buffering': 'no'
+    });
+    res.write('retry: 3000\n\n');
+
+    // Comandos que chegaram enquanto o agente estava desconectado
+    pendingCommands.forEach(command => {
+        if (command.computer_id === computerId && command.status === 'pending') {
+            writeCommandEvent(res, command);
+            command.status = 'sent';
+        }
+    });
+
+    if (!streams.has(computerId)) streams.set(computerId, new Set());
+    streams.get(computerId).add(res);
+
+    const keepalive = setInterval(() => res.write(': ping\n\n'), STREAM_KEEPALIVE_MS);
+    // Encerrar antes do timeout da plataforma; o agente reconecta em seguida
+    const maxDuration = setTimeout(() => res.end(), STREAM_MAX_MS);
+
+    // Fim da resposta (agente desconectou ou maxDuration); o 'close' do req dispara logo
+    // depois de ler a requisição no Node >= 16 e removeria o canal na hora
+    res.on('close', () => {
+        clearInterval(keepalive);
+        clearTimeout(maxDuration);
+        const subscribers = streams.get(computerId);
+        if (subscribers) {
+            subscribers.delete(res);
+            if (subscribers.size === 0) streams.delete(computerId);
+        }
+    });
+}
+
+// Comandos pendentes de um computador, marcados como enviados (consulta e sync do /api/data)
+function takePendingCommands(computerId) {
+    const computerCommands = Array.from(pendingCommands.values())
+        .filter(cmd => cmd.computer_id === computerId && cmd.status === 'pending');
+
+    computerCommands.forEach(cmd => {
+        cmd.status = 'sent';
+        pendingCommands.set(cmd.id, cmd);
+    });
+
+    return computerCommands;
+}
+
 module.exports = async function handler(req, res) {
     // CORS headers
     res.setHeader('Access-Control-Allow-Origin', '*');
@@ -18,7 +88,21 @@ module.exports = async function handler(req, res) {
 
     if (req.method === 'POST') {
         try {
-            const { computer_id, action } = req.body;
+            const { computer_id, action, command_id, status } = req.body;
+
+            // Confirmação do agente: comando executado (ou falhou)
+            if (command_id && status) {
+                const command = pendingCommands.get(command_id);
+                if (command) {
+                    command.status = status;
+                    command.acknowledged_at = new Date();
+                    console.log(`✅ Comando ${command.action} ${status} em ${command.computer_id}`);
+                }
+                return res.status(200).json({
+                    success: true,
+                    acknowledged: !!command
+                });
+            }
 
             if (!computer_id || !action) {
                 return res.status(400).json({
@@ -39,11 +123,13 @@ module.exports = async function handler(req, res) {
 
             pendingCommands.set(commandId, command);
 
-            console.log(`🎮 Comando criado: ${action} para ${computer_id}`);
+            const pushed = pushCommand(command);
+            console.log(`🎮 Comando criado: ${action} para ${computer_id}${pushed ? ' (entregue via push)' : ''}`);
 
             return res.status(200).json({
                 success: true,
                 command_id: commandId,
+                pushed,
                 message: `Comando ${action} criado para ${computer_id}`
             });
 
@@ -59,6 +145,10 @@ module.exports = async function handler(req, res) {
     if (req.method === 'GET') {
         const { computer_id } = req.query;
 
+        if (computer_id && req.query.stream) {
+            return openCommandStream(req, res, computer_id);
+        }
+
         if (!computer_id) {
             // Retornar todos os comandos pendentes
             return res.status(200).json({
@@ -67,25 +157,17 @@ module.exports = async function handler(req, res) {
             });
         }
 
-        // Buscar comandos para um computador específico
-        const computerCommands = Array.from(pendingCommands.values())
-            .filter(cmd => cmd.computer_id === computer_id && cmd.status === 'pending');
-
-        // Marcar comandos como enviados
-        computerCommands.forEach(cmd => {
-            cmd.status = 'sent';
-            pendingCommands.set(cmd.id, cmd);
-        });
-
         return res.status(200).json({
             success: true,
-            commands: computerCommands
+            commands: takePendingCommands(computer_id)
         });
     }
 
     return res.status(405).json({ error: 'Método não permitido' });
 };
 
+module.exports.takePendingCommands = takePendingCommands;
+
 // Limpar comandos antigos periodicamente
 setInterval(() => {
     const now = new Date();
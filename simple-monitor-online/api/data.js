@@ -3,8 +3,12 @@
  * Sistema de monitoramento em tempo real com persistência MySQL
  */
 
+const crypto = require('crypto');
+const zlib = require('zlib');
+const msgpack = require('./_msgpack');
 const dao = require('../database/dao');
 const db = require('../database/connection');
+const commandQueue = require('./commands');
 
 // Cache temporário para dados ativos (otimização)
 let computers = new Map();
@@ -14,6 +18,41 @@ let activities = new Map();
 let dailyAccumulator = new Map(); // device_id -> { date, minutes, lastSave }
 let deviceLastSeen = new Map(); // device_id -> timestamp do último heartbeat
 
+// Sessões de heartbeat: o registro devolve um token assinado (HMAC de computer_id, metadata_hash e
+// instante de emissão), validado por qualquer instância sem estado compartilhado - um cold start não
+// derruba a frota. Heartbeats com token levam só os campos que mudaram (base = seq do último aceito);
+// a identidade e o último estado ficam só em cache local (instância nova: identidade do MySQL e resync)
+let sessions = new Map(); // computer_id -> { computer_name, user_name, os_info, state, seq, lastUsed }
+const SESSION_TTL_MS = 24 * 60 * 60 * 1000;
+const SESSION_RENEW_MS = SESSION_TTL_MS / 2; // token mais velho que isso: novo token na resposta
+// Sem WORKTRACK_SESSION_SECRET não há sessão: nenhum token é emitido nem aceito (uma chave padrão
+// conhecida permitiria forjar tokens) e os agentes continuam com heartbeats completos
+const SESSION_SECRET = process.env.WORKTRACK_SESSION_SECRET || null;
+if (!SESSION_SECRET) {
+    console.warn('⚠️ WORKTRACK_SESSION_SECRET não configurado - sessões de heartbeat desativadas');
+}
+
+// Corpos comprimidos aceitos (Content-Encoding), anunciados em Accept-Encoding (RFC 7694);
+// zstd só em versões do Node com zlib.zstdDecompressSync
+const REQUEST_DECODERS = {
+    gzip: zlib.gunzipSync,
+    ...(typeof zlib.zstdDecompressSync === 'function' ? { zstd: zlib.zstdDecompressSync } : {})
+};
+const MAX_DECODED_BYTES = 16 * 1024 * 1024;
+
+// Formatos de corpo aceitos (Content-Type), anunciados em Accept-Post. octet-stream = JSON
+// comprimido (o parser da Vercel só entrega o Buffer cru para esse tipo)
+const REQUEST_FORMATS = {
+    'application/json': raw => JSON.parse(raw.toString('utf8')),
+    'application/msgpack': raw => msgpack.decode(raw),
+    'application/x-msgpack': raw => msgpack.decode(raw),
+    'application/octet-stream': raw => JSON.parse(raw.toString('utf8'))
+};
+const ACCEPT_POST = 'application/json, application/msgpack';
+
+// Intervalo mínimo de envio sugerido aos agentes (segundos, 0 = sem dica) - reduz a carga da frota
+const HEARTBEAT_INTERVAL_HINT = parseInt(process.env.WORKTRACK_HEARTBEAT_INTERVAL || '0', 10);
+
 // Função para obter/criar acumulador diário (CARREGA DO BANCO SE EXISTIR)
 async function getDailyAccumulator(deviceId, date) {
     const key = `${deviceId}_${date}`;
@@ -61,7 +100,8 @@ function getDailyAccumulatorSync(deviceId, date) {
 }
 
 // Função para incrementar tempo automaticamente baseado em heartbeats
-async function processHeartbeat(deviceId, activityData) {
+// (minutes > 1: lote ao vivo, um incremento com as amostras aceitas)
+async function processHeartbeat(deviceId, activityData, minutes = 1) {
     const now = new Date();
     const today = now.toISOString().split('T')[0];
     const currentTime = now.getTime();
@@ -107,10 +147,10 @@ async function processHeartbeat(deviceId, activityData) {
 
         // LÓGICA SIMPLIFICADA: Incrementar 1 minuto para cada heartbeat (agente manda a cada 60s)
         if (timeDiff >= 30000) { // Pelo menos 30 segundos para evitar duplicatas
-            accumulator.minutes += 1; // SEMPRE +1min por heartbeat válido
+            accumulator.minutes = Math.min(960, accumulator.minutes + minutes); // +1min por heartbeat válido
             accumulator.lastActivity = activityData;
 
-            console.log(`⏱️ Heartbeat: +1min para ${deviceId} (Total: ${accumulator.minutes}min) [${Math.round(timeDiff/1000)}s desde último]`);
+            console.log(`⏱️ Heartbeat: +${minutes}min para ${deviceId} (Total: ${accumulator.minutes}min) [${Math.round(timeDiff/1000)}s desde último]`);
 
             // Verificar se deve salvar no banco
             const minutesSinceLastSave = accumulator.minutes - accumulator.lastSave;
@@ -125,7 +165,7 @@ async function processHeartbeat(deviceId, activityData) {
         }
     } else {
         // PRIMEIRO HEARTBEAT - incrementar 1 minuto automaticamente
-        accumulator.minutes += 1;
+        accumulator.minutes = Math.min(960, accumulator.minutes + minutes);
         accumulator.lastActivity = activityData;
 
         console.log(`⏱️ Primeiro heartbeat: +1min para ${deviceId} (Total: ${accumulator.minutes}min)`);
@@ -191,6 +231,9 @@ async function initializeDatabase() {
             // Criar nova tabela de tracking de minutos
             await dao.createMinuteTrackingTable();
 
+            // Criar tabela de tempo por aplicativo
+            await dao.createAppUsageTable();
+
             // Atualizar status dos dispositivos na inicialização
             await dao.updateDevicesStatus();
 
@@ -586,6 +629,8 @@ async function handleRegister(data) {
             computer_name: data.computer_name,
             user_name: data.user_name,
             os_info: data.os_info,
+            metadata: data.metadata || {},
+            metadata_hash: data.metadata_hash,
             last_seen: new Date(),
             status: 'online',
             total_time: 0
@@ -601,6 +646,8 @@ async function handleRegister(data) {
             computer_name: data.computer_name,
             user_name: data.user_name,
             os_info: data.os_info,
+            metadata: data.metadata || {},
+            metadata_hash: data.metadata_hash,
             last_seen: new Date(),
             status: 'online',
             total_time: 0
@@ -782,7 +829,292 @@ async function handleLegacyActivity(data) {
     }
 }
 
+// Heartbeat reenviado pelo spool do agente: só registra o minuto original
+async function handleReplayedHeartbeat(data) {
+    const capturedAt = new Date(data.captured_at * 1000);
+    if (isNaN(capturedAt.getTime()) || capturedAt > new Date()) {
+        console.warn(`⚠️ Heartbeat reenviado com horário inválido: ${data.computer_id}`);
+        return false;
+    }
+
+    try {
+        if (dao.saveMinuteTracking) {
+            await dao.saveMinuteTracking(
+                data.computer_id,
+                data.computer_name || 'Computador Desconhecido',
+                data.user_name || 'Usuário Desconhecido',
+                capturedAt
+            );
+        }
+    } catch (e) {
+        console.error('❌ Erro ao salvar minuto reenviado:', e.message);
+    }
+    return true;
+}
+
+// Lote de heartbeats (heartbeat_batch): cada amostra registra o minuto em que foi coletada
+async function handleHeartbeatBatch(data) {
+    const samples = Array.isArray(data.samples) ? data.samples : [];
+    let accepted = 0;
+
+    for (const sample of samples) {
+        const ok = await handleReplayedHeartbeat({
+            computer_id: data.computer_id,
+            computer_name: data.computer_name,
+            user_name: data.user_name,
+            captured_at: sample.captured_at
+        });
+        if (ok) accepted++;
+    }
+
+    console.log(`📦 Lote recebido: ${data.computer_id} - ${accepted}/${samples.length} amostras${data.replayed ? ' (reenvio)' : ''}`);
+
+    // Atualizar cache em tempo real com a amostra mais recente (reenvios não alteram o estado atual)
+    const latest = samples[samples.length - 1];
+    if (latest && !data.replayed) {
+        // Lote ao vivo: devices.last_seen (senão o dispositivo fica offline após 5 min) e o
+        // agregado legado (daily_history), uma vez por lote com as amostras aceitas
+        try {
+            if (data.computer_name && data.computer_name !== 'undefined') {
+                await dao.registerDevice({
+                    computer_id: data.computer_id,
+                    computer_name: data.computer_name,
+                    user_name: data.user_name,
+                    os_info: data.os_info
+                });
+            }
+            if (accepted > 0) {
+                await processHeartbeat(data.computer_id, {
+                    current_activity: latest.current_activity,
+                    active_window: latest.active_window,
+                    timestamp: latest.timestamp
+                }, accepted);
+            }
+        } catch (e) {
+            console.error('❌ Erro ao atualizar dispositivo do lote:', e.message);
+        }
+
+        const computer = computers.get(data.computer_id) || {
+            id: data.computer_id,
+            total_time: 0
+        };
+        computer.computer_name = data.computer_name || computer.computer_name || 'Computador Desconhecido';
+        computer.user_name = data.user_name || computer.user_name || 'Usuário Desconhecido';
+        computer.os_info = data.os_info || computer.os_info || 'Sistema Desconhecido';
+        computer.current_activity = latest.current_activity || 'Ativo';
+        computer.active_window = latest.active_window;
+        computer.last_seen = new Date();
+        computer.status = 'online';
+        computers.set(data.computer_id, computer);
+    }
+
+    return { accepted };
+}
+
+// Resumos de tempo em primeiro plano por aplicativo, enviados junto do heartbeat ou do lote
+// (app_usage: [{period_start, period_end, usage: [[app, categoria, segundos], ...]}, ...]).
+// Gravação idempotente por período: um resumo reenviado após timeout não soma de novo.
+// Retorna os period_start gravados (o agente descarta só esses)
+async function handleAppUsage(computerId, periods) {
+    const accepted = [];
+    if (!Array.isArray(periods)) return accepted;
+
+    for (const period of periods) {
+        const periodStart = Number(period && period.period_start);
+        if (!Number.isFinite(periodStart) || periodStart <= 0) continue;
+        const usage = Array.isArray(period.usage) ? period.usage.filter(Array.isArray) : [];
+        const periodEnd = period.period_end ? new Date(period.period_end * 1000) : null;
+        const at = periodEnd && !isNaN(periodEnd.getTime()) && periodEnd <= new Date() ? periodEnd : null;
+
+        try {
+            await dao.saveAppUsage(computerId, periodStart, usage, at);
+            accepted.push(period.period_start);
+        } catch (e) {
+            console.error('❌ Erro ao salvar uso por aplicativo:', e.message);
+        }
+    }
+
+    if (accepted.length > 0) {
+        console.log(`🗂️ Uso por aplicativo: ${computerId} - ${accepted.length}/${periods.length} períodos`);
+    }
+    return accepted;
+}
+
+// Retorno após ociosidade/tela bloqueada (agente pausa heartbeats enquanto ocioso)
+async function handlePresence(data) {
+    const minutes = Math.round((data.idle_seconds || 0) / 60);
+    console.log(`👋 ${data.computer_id} voltou após ${minutes}min (${data.previous_state || 'ocioso'})`);
+
+    const computer = computers.get(data.computer_id);
+    if (computer) {
+        computer.status = 'online';
+        computer.last_seen = new Date();
+        computer.current_activity = 'Ativo';
+        computer.idle_since = null;
+        computers.set(data.computer_id, computer);
+    }
+
+    return { accepted: true };
+}
+
+// Corpo da requisição: JSON já lido pela Vercel, ou Buffer/stream em MessagePack e/ou com
+// Content-Encoding, decodificado aqui. null = formato ou codificação não suportados/inválidos
+async function readRequestBody(req) {
+    const encoding = String(req.headers['content-encoding'] || 'identity').trim().toLowerCase();
+    const type = String(req.headers['content-type'] || 'application/json').split(';')[0].trim().toLowerCase();
+    const parse = REQUEST_FORMATS[type];
+    if (encoding === 'identity' && (type === 'application/json' || !parse)) return req.body;
+
+    const decode = encoding === 'identity' ? raw => raw : REQUEST_DECODERS[encoding];
+    if (!decode || !parse) return null;
+    try {
+        let raw = req.body;
+        if (!Buffer.isBuffer(raw)) {
+            const chunks = [];
+            for await (const chunk of req) chunks.push(chunk);
+            raw = Buffer.concat(chunks);
+        }
+        const data = parse(decode(raw, { maxOutputLength: MAX_DECODED_BYTES }));
+        return data && typeof data === 'object' && !Array.isArray(data) ? data : null;
+    } catch (error) {
+        console.warn(`⚠️ Corpo ${type} (${encoding}) inválido:`, error.message);
+        return null;
+    }
+}
+
+function signSession(computerId, metadataHash, issuedAt) {
+    return crypto.createHmac('sha256', SESSION_SECRET)
+        .update(`${computerId}\n${metadataHash}\n${issuedAt}`)
+        .digest('base64url')
+        .slice(0, 22);
+}
+
+// Token: computer_id (base64url).metadata_hash.emissão (base 36).assinatura; undefined sem chave
+function issueSessionToken(computerId, metadataHash, issuedAt = Date.now()) {
+    if (!SESSION_SECRET) return undefined;
+    const hash = typeof metadataHash === 'string' ? metadataHash : '';
+    const id = Buffer.from(String(computerId), 'utf8').toString('base64url');
+    return `${id}.${hash}.${issuedAt.toString(36)}.${signSession(computerId, hash, issuedAt)}`;
+}
+
+// Token válido -> { computer_id, metadata_hash, issued_at }; null se adulterado ou vencido
+function verifySessionToken(token) {
+    if (!SESSION_SECRET) return null;
+    const parts = typeof token === 'string' ? token.split('.') : [];
+    if (parts.length !== 4) return null;
+    const [id, hash, issued, signature] = parts;
+    const computerId = Buffer.from(id, 'base64url').toString('utf8');
+    const issuedAt = parseInt(issued, 36);
+    if (!computerId || !Number.isSafeInteger(issuedAt)) return null;
+
+    const expected = Buffer.from(signSession(computerId, hash, issuedAt));
+    const given = Buffer.from(signature);
+    if (given.length !== expected.length || !crypto.timingSafeEqual(given, expected)) return null;
+    const age = Date.now() - issuedAt;
+    if (age > SESSION_TTL_MS || age < -SESSION_TTL_MS) return null;
+    return { computer_id: computerId, metadata_hash: hash, issued_at: issuedAt };
+}
+
+function pruneSessions(now) {
+    for (const [computerId, session] of sessions) {
+        if (now - session.lastUsed > SESSION_TTL_MS) sessions.delete(computerId);
+    }
+}
+
+// Sessão de heartbeats aberta no registro (register ou heartbeat com register: true); undefined
+// (resposta sem session) se as sessões estão desativadas
+function openSession(data) {
+    if (!SESSION_SECRET) return undefined;
+    const now = Date.now();
+    pruneSessions(now);
+    sessions.set(data.computer_id, {
+        computer_name: data.computer_name,
+        user_name: data.user_name,
+        os_info: data.os_info,
+        state: {},
+        seq: 0,
+        lastUsed: now
+    });
+    return issueSessionToken(data.computer_id, data.metadata_hash, now);
+}
+
+// Identidade de um token emitido por outra instância (ou antes de um cold start): cache de
+// dispositivos ou MySQL (uma consulta por dispositivo por instância)
+async function loadSessionIdentity(computerId) {
+    const cached = computers.get(computerId);
+    if (cached) {
+        return { computer_name: cached.computer_name, user_name: cached.user_name, os_info: cached.os_info };
+    }
+    try {
+        const device = await dao.getDeviceById(computerId);
+        if (device) return { computer_name: device.name, user_name: device.user_name, os_info: device.os_info };
+    } catch (error) {
+        console.error('❌ Erro ao buscar identidade da sessão:', error.message);
+    }
+    return {};
+}
+
+// Heartbeat compacto -> heartbeat completo; null se o token é inválido, venceu ou é de um
+// registro anterior com outros metadados. Delta sobre um estado que esta instância não tem
+// (cold start, outra instância ou base diferente): { resync: true } sem data - o registro parcial
+// não é processado e o agente reenvia o heartbeat completo
+async function expandSessionHeartbeat(data) {
+    const claims = verifySessionToken(data.session);
+    const computer = claims && computers.get(claims.computer_id);
+    if (!claims || (computer && typeof computer.metadata_hash === 'string' &&
+                    computer.metadata_hash !== claims.metadata_hash)) {
+        return null;
+    }
+
+    const now = Date.now();
+    let session = sessions.get(claims.computer_id);
+    if (!session) {
+        // Sem o último estado nesta instância: só um heartbeat completo (sem base) é aceito
+        session = { ...(await loadSessionIdentity(claims.computer_id)), state: {}, seq: null, lastUsed: now };
+        pruneSessions(now);
+        sessions.set(claims.computer_id, session);
+    }
+    session.lastUsed = now;
+
+    const { session: token, seq, base, sync, register, app_usage: appUsage, ...fields } = data;
+    if (base !== undefined && base !== session.seq) {
+        return { resync: true };
+    }
+    session.state = base === undefined ? fields : { ...session.state, ...fields };
+    if (typeof seq === 'number') session.seq = seq;
+
+    return {
+        renewed: now - claims.issued_at > SESSION_RENEW_MS ?
+            issueSessionToken(claims.computer_id, claims.metadata_hash, now) : undefined,
+        data: {
+            ...session.state,
+            computer_id: claims.computer_id,
+            computer_name: session.computer_name,
+            user_name: session.user_name,
+            os_info: session.os_info,
+            sync,
+            app_usage: appUsage
+        }
+    };
+}
+
+// Sync (heartbeat com sync: true): dispensa o POST /api/websocket - a presença é o
+// devices.last_seen que o próprio heartbeat grava, lido pelo GET /api/websocket. Os comandos
+// pendentes desta instância vão na resposta, mas a fila de comandos fica na memória da função
+// /api/commands (na Vercel, outra instância): uma lista vazia aqui não quer dizer que não há
+// comandos, e o agente continua consultando /api/commands
+async function handleSync(data) {
+    return {
+        sync: true,
+        commands: commandQueue.takePendingCommands(data.computer_id)
+    };
+}
+
 async function handleHeartbeat(data) {
+    if (data.replayed && data.captured_at) {
+        return await handleReplayedHeartbeat(data);
+    }
+
     try {
         console.log(`💓 Heartbeat recebido: ${data.computer_id} - ${data.current_activity}`);
 
@@ -905,7 +1237,9 @@ module.exports = async function handler(req, res) {
     // CORS headers
     res.setHeader('Access-Control-Allow-Origin', '*');
     res.setHeader('Access-Control-Allow-Methods', 'POST, GET, OPTIONS');
-    res.setHeader('Access-Control-Allow-Headers', 'Content-Type');
+    res.setHeader('Access-Control-Allow-Headers', 'Content-Type, Content-Encoding');
+    res.setHeader('Accept-Encoding', Object.keys(REQUEST_DECODERS).join(', '));
+    res.setHeader('Accept-Post', ACCEPT_POST);
 
     if (req.method === 'OPTIONS') {
         return res.status(200).end();
@@ -921,6 +1255,16 @@ module.exports = async function handler(req, res) {
                 });
             }
 
+            // Tempo por aplicativo de um dispositivo (?app_usage=true&computer_id=...&date=YYYY-MM-DD)
+            if (req.query && req.query.app_usage === 'true' && req.query.computer_id) {
+                const usage = await dao.getDeviceAppUsage(req.query.computer_id, req.query.date || null);
+                return res.status(200).json({
+                    success: true,
+                    computer_id: req.query.computer_id,
+                    usage
+                });
+            }
+
             // Obter todos os dispositivos do MySQL
             const rawDevices = await getAllDevices();
             // Para cada dispositivo calcular minutos de hoje via minute_tracking
@@ -941,6 +1285,8 @@ module.exports = async function handler(req, res) {
                     d.today_remaining_minutes = d.today_minutes % 60;
                     d.today_formatted = `${d.today_hours}h ${d.today_remaining_minutes}m`;
                 }
+                const cached = computers.get(d.id || d.device_id);
+                if (cached && cached.metadata) d.metadata = cached.metadata;
                 enriched.push(d);
             }
 
@@ -997,11 +1343,40 @@ module.exports = async function handler(req, res) {
 
     if (req.method === 'POST') {
         try {
-            const data = req.body;
+            let data = await readRequestBody(req);
+            if (data === null) {
+                return res.status(415).json({
+                    success: false,
+                    error: 'Content-Type ou Content-Encoding não suportado'
+                });
+            }
+            let result = {};
+
+            // Heartbeat com token de sessão: completar com a identidade e o último estado
+            if (data.type === 'heartbeat' && data.session) {
+                const expanded = await expandSessionHeartbeat(data);
+                if (!expanded) {
+                    return res.status(200).json({
+                        success: false,
+                        session_expired: true,
+                        timestamp: new Date().toISOString()
+                    });
+                }
+                if (expanded.resync) {
+                    return res.status(200).json({
+                        success: false,
+                        resync: true,
+                        timestamp: new Date().toISOString()
+                    });
+                }
+                data = expanded.data;
+                if (expanded.renewed) result.session = expanded.renewed;
+            }
 
             switch (data.type) {
                 case 'register':
                     await handleRegister(data);
+                    result.session = openSession(data);
                     break;
 
                 case 'activity':
@@ -1010,6 +1385,38 @@ module.exports = async function handler(req, res) {
 
                 case 'heartbeat':
                     await handleHeartbeat(data);
+                    if (data.sync) Object.assign(result, await handleSync(data));
+                    if (data.app_usage) result.app_usage_accepted = await handleAppUsage(data.computer_id, data.app_usage);
+                    // Registro junto do heartbeat (o heartbeat já grava nome, usuário e SO)
+                    if (data.register) {
+                        const computer = computers.get(data.computer_id);
+                        if (computer) {
+                            computer.metadata = data.metadata || {};
+                            computer.metadata_hash = data.metadata_hash;
+                        }
+                        result.registered = true;
+                        result.session = openSession(data);
+                    }
+                    break;
+
+                case 'heartbeat_batch':
+                    result = await handleHeartbeatBatch(data);
+                    if (data.sync && !data.replayed) Object.assign(result, await handleSync(data));
+                    if (data.app_usage) result.app_usage_accepted = await handleAppUsage(data.computer_id, data.app_usage);
+                    if (data.register && !data.replayed) {
+                        await handleRegister(data);
+                        result.registered = true;
+                        result.session = openSession(data);
+                    }
+                    break;
+
+                case 'app_usage':
+                    // Só o último resumo, ao encerrar o agente (os demais vão junto do heartbeat)
+                    result.app_usage_accepted = await handleAppUsage(data.computer_id, data.app_usage);
+                    break;
+
+                case 'presence':
+                    result = await handlePresence(data);
                     break;
 
                 case 'cleanup_test_devices':
@@ -1028,10 +1435,15 @@ module.exports = async function handler(req, res) {
                     console.warn('⚠️ Tipo de dados desconhecido:', data.type);
             }
 
+            if (HEARTBEAT_INTERVAL_HINT > 0) {
+                result.heartbeat_interval = HEARTBEAT_INTERVAL_HINT;
+            }
+
             return res.status(200).json({
                 success: true,
                 message: 'Dados recebidos e salvos no MySQL',
-                timestamp: new Date().toISOString()
+                timestamp: new Date().toISOString(),
+                ...result
             });
 
         } catch (error) {
@@ -100,9 +100,32 @@ function isDeviceOnline(lastSeen) {
     return diff < 90000; // 90 segundos (1.5 minutos)
 }
 
+// Presença gravada no banco pelo /api/data (heartbeat com sync não passa por este POST, e cada
+// função da Vercel tem o próprio onlineDevices): entra no cache quando é mais recente
+async function loadSeenDevices() {
+    try {
+        const rows = await DAO.getRecentlySeenDevices(120);
+        const now = Date.now();
+        rows.forEach(row => {
+            const lastSeen = new Date(now - Number(row.seconds_ago) * 1000);
+            const cached = onlineDevices.get(row.id);
+            if (cached && new Date(cached.last_seen) >= lastSeen) return;
+            onlineDevices.set(row.id, {
+                device_id: row.id,
+                computer_name: row.name,
+                user_name: row.user_name,
+                last_seen: lastSeen.toISOString()
+            });
+        });
+    } catch (error) {
+        console.error('❌ Erro ao carregar presença do banco:', error.message);
+    }
+}
+
 // Função para obter todos os dispositivos com status E TEMPO
 async function getAllDevicesStatus() {
     const devices = [];
+    await loadSeenDevices();
     const now = new Date();
 
     for (const [deviceId, device] of onlineDevices) {
@@ -223,4 +246,6 @@ module.exports = async function handler(req, res) {
         success: false,
         error: 'Método não permitido'
     });
-};
\ No newline at end of file
+};
+
+module.exports.updateDeviceStatus = updateDeviceStatus;
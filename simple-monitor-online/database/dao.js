@@ -71,6 +71,33 @@ async function createMinuteTrackingTable() {
     }
 }
 
+// Criar tabela de tempo em primeiro plano por aplicativo (resumos app_usage do agente)
+async function createAppUsageTable() {
+    const query = `
+        CREATE TABLE IF NOT EXISTS app_usage (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            device_id VARCHAR(100) NOT NULL,
+            period_start BIGINT NOT NULL,
+            usage_date DATE NOT NULL,
+            app_name VARCHAR(255) NOT NULL,
+            category VARCHAR(255) NOT NULL DEFAULT '',
+            seconds INT DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            UNIQUE KEY uniq_device_period_app (device_id, period_start, app_name, category),
+            INDEX idx_device_date (device_id, usage_date),
+            FOREIGN KEY (device_id) REFERENCES devices(id) ON DELETE CASCADE
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    `;
+
+    try {
+        await db.executeQuery(query);
+        console.log('✅ Tabela app_usage criada/verificada');
+    } catch (error) {
+        console.error('❌ Erro ao criar tabela app_usage:', error);
+        throw error;
+    }
+}
+
 /**
  * DISPOSITIVOS
  */
@@ -233,6 +260,25 @@ async function getAllDevices() {
     }
 }
 
+// Dispositivos vistos nos últimos maxSeconds (devices.last_seen, gravado pelo /api/data a cada
+// heartbeat): presença compartilhada entre as funções da API, que não dividem memória
+async function getRecentlySeenDevices(maxSeconds = 120) {
+    const query = `
+        SELECT id, name, user_name, last_seen,
+               TIMESTAMPDIFF(SECOND, last_seen, NOW()) as seconds_ago
+        FROM devices
+        WHERE last_seen >= DATE_SUB(NOW(), INTERVAL ? SECOND)
+        ORDER BY last_seen DESC
+    `;
+
+    try {
+        return await db.executeQuery(query, [maxSeconds]);
+    } catch (error) {
+        console.error('❌ Erro ao buscar dispositivos recentes:', error);
+        throw error;
+    }
+}
+
 // Atualizar status online/offline dos dispositivos
 async function updateDevicesStatus() {
     const timeoutMinutes = 5;
@@ -600,8 +646,9 @@ async function getAllDevicesHistory(limit = 100) {
  */
 
 // Salvar um minuto individual de atividade
-async function saveMinuteTracking(deviceId, deviceName, userName) {
-    const now = new Date();
+async function saveMinuteTracking(deviceId, deviceName, userName, at = null) {
+    // `at` permite registrar minutos reenviados pelo spool do agente no horário original
+    const now = at ? new Date(at) : new Date();
     // Truncar para o minuto (zero segundos / ms)
     now.setSeconds(0, 0);
     // Data lógica (considerando offset) – garante que trabalho após meia-noite UTC mas antes da meia-noite local continue no mesmo dia
@@ -771,10 +818,58 @@ async function getMinuteTrackingDailySummary(startDate = null, endDate = null, d
     }
 }
 
+/**
+ * TEMPO POR APLICATIVO
+ */
+
+// Gravar o resumo app_usage de um período ([[app, categoria, segundos], ...]) no dia do fim do
+// período. A chave inclui o início do período (ms): reenviar o mesmo resumo sobrescreve em vez de somar
+async function saveAppUsage(deviceId, periodStart, usage, at = null) {
+    const usageDate = getOffsetDateString(at ? new Date(at) : new Date());
+    const rows = usage.filter(([app, , seconds]) => app && seconds > 0);
+    if (rows.length === 0) return 0;
+
+    const periodMs = Math.round(periodStart * 1000);
+    const placeholders = rows.map(() => '(?, ?, ?, ?, ?, ?)').join(', ');
+    const params = [];
+    for (const [app, category, seconds] of rows) {
+        params.push(deviceId, periodMs, usageDate, String(app).slice(0, 255), String(category || '').slice(0, 255), Math.round(seconds));
+    }
+
+    const query = `
+        INSERT INTO app_usage (device_id, period_start, usage_date, app_name, category, seconds)
+        VALUES ${placeholders}
+        ON DUPLICATE KEY UPDATE seconds = VALUES(seconds), usage_date = VALUES(usage_date)
+    `;
+
+    await db.executeQuery(query, params);
+    return rows.length;
+}
+
+// Tempo por aplicativo de um dispositivo em um dia (padrão: hoje)
+async function getDeviceAppUsage(deviceId, date = null) {
+    const targetDate = date || getOffsetDateString();
+    const query = `
+        SELECT app_name, category, CAST(SUM(seconds) AS SIGNED) AS seconds
+        FROM app_usage
+        WHERE device_id = ? AND usage_date = ?
+        GROUP BY app_name, category
+        ORDER BY seconds DESC
+    `;
+
+    try {
+        return await db.executeQuery(query, [deviceId, targetDate]);
+    } catch (error) {
+        console.error('❌ Erro ao buscar uso por aplicativo:', error);
+        return [];
+    }
+}
+
 module.exports = {
     // Inicialização
     createDailyHistoryTable,
     createMinuteTrackingTable,
+    createAppUsageTable,
 
     // Dispositivos
     registerDevice,
@@ -784,6 +879,7 @@ module.exports = {
     resetDeviceDailyTime,
     updateDeviceInfo,
     updateDevicesStatus,
+    getRecentlySeenDevices,
 
     // Atividades
     registerActivity,
@@ -813,5 +909,9 @@ module.exports = {
     getAllDevicesTodayStats,
     cleanOldMinuteTracking,
     getSystemMinuteTrackingSum,
-    getMinuteTrackingDailySummary
+    getMinuteTrackingDailySummary,
+
+    // Tempo por Aplicativo
+    saveAppUsage,
+    getDeviceAppUsage
 };
\ No newline at end of file
@@ -11,25 +11,9 @@ import subprocess
 import shutil
 from pathlib import Path
 
-def install_monitor():
-    """Instalar o monitor silencioso"""
-    print("🔧 Instalando WorkTrack Monitor Silencioso...")
-    
-    # Configurações
-    home_dir = Path.home()
-    install_dir = home_dir / ".worktrack_monitor"
-    server_url = os.environ.get('WORKTRACK_SERVER_URL') or "https://simple-monitor-online-qjxx1b0hc-marcos10895s-projects.vercel.app"
-    
-    try:
-        # 1. Criar diretório
-        install_dir.mkdir(exist_ok=True, parents=True)
-        print("📁 Diretório criado")
-        
-        # 2. Criar script do monitor
-        monitor_script = install_dir / "monitor.py"
-        
-        with open(monitor_script, 'w', encoding='utf-8') as f:
-            f.write(f'''#!/usr/bin/env python3
+def get_monitor_code(server_url, install_dir):
+    """Código do monitor silencioso (SilentMonitor) gravado em monitor.py"""
+    return f'''#!/usr/bin/env python3
 import json
 import time
 import os
@@ -141,7 +125,27 @@ class SilentMonitor:
 if __name__ == "__main__":
     monitor = SilentMonitor()
     monitor.run()
-''')
+'''
+
+def install_monitor():
+    """Instalar o monitor silencioso"""
+    print("🔧 Instalando WorkTrack Monitor Silencioso...")
+    
+    # Configurações
+    home_dir = Path.home()
+    install_dir = home_dir / ".worktrack_monitor"
+    server_url = os.environ.get('WORKTRACK_SERVER_URL') or "https://simple-monitor-online-qjxx1b0hc-marcos10895s-projects.vercel.app"
+    
+    try:
+        # 1. Criar diretório
+        install_dir.mkdir(exist_ok=True, parents=True)
+        print("📁 Diretório criado")
+        
+        # 2. Criar script do monitor
+        monitor_script = install_dir / "monitor.py"
+        
+        with open(monitor_script, 'w', encoding='utf-8') as f:
+            f.write(get_monitor_code(server_url, install_dir))
         
         print("📝 Script do monitor criado")
         
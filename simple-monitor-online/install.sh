@@ -6,7 +6,12 @@ echo "======================================"
 
 # Baixar agente
 echo "📥 Baixando agente..."
-curl -o monitor_online.py https://raw.githubusercontent.com/vercel/simple-monitor-online/main/agent/monitor_online.py
+AGENT_URL="https://raw.githubusercontent.com/vercel/simple-monitor-online/main/agent"
+# Lista de arquivos do agente: agent/MODULES (a mesma usada pelos instaladores)
+curl -fsSo MODULES "$AGENT_URL/MODULES" || { echo "❌ Não foi possível baixar a lista de módulos"; exit 1; }
+for arquivo in $(grep -v '^[[:space:]]*#' MODULES); do
+    curl -fo "$arquivo" "$AGENT_URL/$arquivo" || { echo "❌ Falha ao baixar $arquivo"; exit 1; }
+done
 
 # Instalar dependências
 echo "📦 Instalando dependências..."
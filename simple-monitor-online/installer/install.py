@@ -12,12 +12,17 @@ import shutil
 import json
 from pathlib import Path
 
+def agent_modules(agent_dir):
+    """Arquivos do agente listados em agent/MODULES (instalados junto do monitor)"""
+    with open(agent_dir / "MODULES", encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
 class SilentInstaller:
     def __init__(self):
         self.system = platform.system()
         self.home_dir = Path.home()
         self.install_dir = self.home_dir / ".worktrack_monitor"
-    self.server_url = os.environ.get('WORKTRACK_SERVER_URL') or "https://simple-monitor-online-qjxx1b0hc-marcos10895s-projects.vercel.app"
+        self.server_url = os.environ.get('WORKTRACK_SERVER_URL') or "https://simple-monitor-online-qjxx1b0hc-marcos10895s-projects.vercel.app"
         
     def install(self):
         """Instalar o monitor silenciosamente"""
@@ -64,13 +69,24 @@ class SilentInstaller:
         
         if monitor_file.exists():
             shutil.copy2(monitor_file, self.install_dir / "monitor.py")
+            
+            # Copiar os módulos do agente (transporte, helpers de consulta, etc.) listados em agent/MODULES
+            for name in agent_modules(script_dir):
+                shutil.copy2(script_dir / name, self.install_dir / name)
         else:
             # Criar arquivo do monitor se não existir
             self.create_monitor_file()
     
     def create_monitor_file(self):
         """Criar arquivo do monitor otimizado para background"""
-        monitor_content = '''#!/usr/bin/env python3
+        monitor_content = self.get_monitor_code()
+        
+        with open(self.install_dir / "monitor.py", 'w', encoding='utf-8') as f:
+            f.write(monitor_content)
+    
+    def get_monitor_code(self):
+        """Retorna o código do monitor background"""
+        return '''#!/usr/bin/env python3
 """
 Monitor de Atividade - Versão Background
 Executa silenciosamente sem interface
@@ -173,15 +189,15 @@ class BackgroundMonitor:
                 
             elif platform.system() == "Darwin":  # macOS
                 # AppleScript para obter app e título da janela (string literal Python)
-                script = ("tell application \"System Events\"\n"
-                          "    set frontApp to name of first application process whose frontmost is true\n"
-                          "    set frontAppTitle to \"\"\n"
-                          "    try\n"
-                          "        tell application frontApp\n"
-                          "            set frontAppTitle to name of front window\n"
-                          "        end tell\n"
-                          "    end try\n"
-                          "    return frontApp & \"|\" & frontAppTitle\n"
+                script = ("tell application \\"System Events\\"\\n"
+                          "    set frontApp to name of first application process whose frontmost is true\\n"
+                          "    set frontAppTitle to \\"\\"\\n"
+                          "    try\\n"
+                          "        tell application frontApp\\n"
+                          "            set frontAppTitle to name of front window\\n"
+                          "        end tell\\n"
+                          "    end try\\n"
+                          "    return frontApp & \\"|\\" & frontAppTitle\\n"
                           "end tell")
                 
                 result = subprocess.run(['osascript', '-e', script], 
@@ -301,9 +317,6 @@ if __name__ == "__main__":
     monitor = BackgroundMonitor(server_url)
     monitor.start()
 '''
-        
-        with open(self.install_dir / "monitor.py", 'w', encoding='utf-8') as f:
-            f.write(monitor_content)
     
     def install_dependencies(self):
         """Instalar dependências Python necessárias"""
@@ -12,12 +12,32 @@ import shutil
 import json
 from pathlib import Path
 
+def agent_modules(agent_dir):
+    """Arquivos do agente listados em agent/MODULES (instalados junto do monitor)"""
+    with open(agent_dir / "MODULES", encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+def x11_window_source():
+    """Código de agent/x11_window.py para embutir no monitor gerado (mesma implementação do agente)"""
+    try:
+        source = (Path(__file__).parent.parent / "agent" / "x11_window.py").read_text(encoding='utf-8')
+    except OSError:
+        # Sem o agente ao lado do instalador: o monitor usa o texto genérico do Linux
+        return ('class X11ConnectionLost(OSError):\n'
+                '    pass\n\n'
+                'class X11ActiveWindow:\n'
+                '    def __init__(self, display_name=None):\n'
+                '        raise OSError("x11_window.py não encontrado na instalação")\n\n'
+                'def query_subprocess():\n'
+                '    return None\n\n')
+    return source.split('\n', 1)[1] + '\n' if source.startswith('#!') else source + '\n'
+
 class SilentInstaller:
     def __init__(self):
         self.system = platform.system()
         self.home_dir = Path.home()
         self.install_dir = self.home_dir / ".worktrack_monitor"
-    self.server_url = os.environ.get('WORKTRACK_SERVER_URL') or "https://simple-monitor-online-qjxx1b0hc-marcos10895s-projects.vercel.app"
+        self.server_url = os.environ.get('WORKTRACK_SERVER_URL') or "https://simple-monitor-online-qjxx1b0hc-marcos10895s-projects.vercel.app"
         
     def install(self):
         """Instalar o monitor silenciosamente"""
@@ -67,6 +87,10 @@ class SilentInstaller:
         
         if monitor_file.exists():
             shutil.copy2(monitor_file, self.install_dir / "monitor.py")
+            
+            # Copiar os módulos do agente (transporte, helpers de consulta, etc.) listados em agent/MODULES
+            for name in agent_modules(script_dir):
+                shutil.copy2(script_dir / name, self.install_dir / name)
         else:
             # Criar arquivo do monitor se não existir
             self.create_monitor_file()
@@ -79,8 +103,8 @@ class SilentInstaller:
             f.write(monitor_content)
     
     def get_monitor_code(self):
-        """Retorna o código do monitor background"""
-        return '''#!/usr/bin/env python3
+        """Retorna o código do monitor background (com agent/x11_window.py embutido)"""
+        code = '''#!/usr/bin/env python3
 """
 Monitor de Atividade - Versão Background
 Executa silenciosamente sem interface
@@ -89,12 +113,91 @@ Executa silenciosamente sem interface
 import json
 import time
 import os
+import re
 import sys
 import subprocess
 import requests
 from datetime import datetime
 import platform
 import threading
+import select
+
+# {X11_WINDOW}
+# Detecção de troca de janela
+DEBOUNCE_SECONDS = 3  # trocas mais curtas que isso são agrupadas
+POLL_INTERVAL = 10  # consulta periódica quando o sistema não fornece eventos de janela
+RESYNC_SECONDS = 240  # reenviar a atividade sem troca (servidor marca offline após 5 min)
+
+# Helper JXA persistente no macOS: uma consulta por linha em vez de um osascript por amostra
+# Resposta: "app<TAB>título" (linha vazia em caso de erro)
+MACOS_PROBE_SCRIPT = (
+    "ObjC.import('Foundation');"
+    "var NL = String.fromCharCode(10), TAB = String.fromCharCode(9);"
+    "var input = $.NSFileHandle.fileHandleWithStandardInput;"
+    "var output = $.NSFileHandle.fileHandleWithStandardOutput;"
+    "var se = Application('System Events'), buf = '', running = true;"
+    "while (running) {"
+    "  var data = input.availableData; if (data.length === 0) break;"
+    "  buf += $.NSString.alloc.initWithDataEncoding(data, $.NSUTF8StringEncoding).js;"
+    "  var i;"
+    "  while ((i = buf.indexOf(NL)) >= 0) {"
+    "    var cmd = buf.slice(0, i).trim(); buf = buf.slice(i + 1);"
+    "    if (cmd === 'quit') { running = false; break; }"
+    "    var out = '';"
+    "    try {"
+    "      var p = se.processes.whose({frontmost: true})[0], t = '';"
+    "      try { t = p.windows[0].name() || ''; } catch (e) {}"
+    "      out = (p.name() + TAB + t).split(NL).join(' ');"
+    "    } catch (e) {}"
+    "    output.writeData($(out + NL).dataUsingEncoding($.NSUTF8StringEncoding));"
+    "  }"
+    "}"
+)
+
+class WindowChangeDetector:
+    """Agrupa trocas rápidas de janela e ignora variações do título (relógios, contadores)"""
+    
+    def __init__(self, debounce=DEBOUNCE_SECONDS):
+        self.debounce = debounce
+        self.current = None  # Chave da atividade efetiva
+        self.window = None  # Janela da atividade efetiva
+        self.pending = None  # (chave, janela, desde) aguardando o debounce
+        self.coalesced = 0  # Trocas descartadas por durarem menos que o debounce
+    
+    @staticmethod
+    def key(window):
+        """Atividade efetiva: app + título como enviado (50 caracteres), sem números"""
+        title = (window.get('title') or '')[:50].lower()
+        return (window.get('app'), re.sub(r'\\d+', '#', title))
+    
+    def observe(self, window, now):
+        """Registrar a janela observada; retorna a janela quando a troca se confirma"""
+        key = self.key(window)
+        
+        if key == self.current:
+            if self.pending:
+                self.coalesced += 1  # Voltou para a janela atual antes do debounce
+            self.pending = None
+            self.window = window
+            return None
+        
+        if self.pending is None or self.pending[0] != key:
+            if self.pending:
+                self.coalesced += 1
+            self.pending = (key, window, now)
+        else:
+            self.pending = (key, window, self.pending[2])
+        
+        # A primeira janela é confirmada imediatamente
+        if self.current is None or now - self.pending[2] >= self.debounce:
+            self.current, self.window = key, window
+            self.pending = None
+            return window
+        return None
+    
+    def deadline(self):
+        """Instante em que a troca pendente se confirma (None se não há troca pendente)"""
+        return self.pending[2] + self.debounce if self.pending else None
 
 class BackgroundMonitor:
     def __init__(self, server_url):
@@ -106,6 +209,16 @@ class BackgroundMonitor:
         self.total_minutes = 0
         self.start_time = time.time()
         self.is_running = False
+        self.mac_probe = None  # Helper osascript persistente (macOS)
+        self.x11 = None  # Conexão X11 em processo (Linux); False = indisponível
+        
+        # Detecção de troca de janela por eventos do sistema (X11 / Windows)
+        self.clock = time.time
+        self.window_event = threading.Event()
+        self.foreground_changed = False  # Evento foi troca de janela (não só de título)
+        self.event_driven = False
+        self.detector = WindowChangeDetector()
+        self.wakeups = 0
         
         # Log silencioso
         self.log_file = os.path.join(os.path.expanduser("~"), ".worktrack_monitor", "monitor.log")
@@ -194,29 +307,190 @@ class BackgroundMonitor:
             return {'app': 'Erro', 'title': 'Erro ao detectar'}
 
     def get_active_window_macos(self):
-        """Obter janela ativa no macOS"""
+        """Obter janela ativa no macOS via helper osascript persistente"""
         try:
-            # Script AppleScript simples
-            script = '''
-            tell application "System Events"
-                set frontApp to name of first application process whose frontmost is true
-                return frontApp
-            end tell
-            '''
-            
-            result = subprocess.run(['osascript', '-e', script], 
-                                  capture_output=True, text=True, timeout=5)
-            
-            if result.returncode == 0 and result.stdout.strip():
-                app_name = result.stdout.strip()
-                return {'app': app_name, 'title': 'Janela ativa'}
-            
+            # (Re)iniciar o helper se ainda não existe ou morreu
+            if self.mac_probe is None or self.mac_probe.poll() is not None:
+                self.mac_probe = subprocess.Popen(['osascript', '-l', 'JavaScript', '-e', MACOS_PROBE_SCRIPT],
+                                                  stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                                  stderr=subprocess.DEVNULL, text=True, bufsize=1)
+            
+            self.mac_probe.stdin.write('probe\\n')
+            self.mac_probe.stdin.flush()
+            
+            # Timeout por consulta: helper travado é descartado e reiniciado na próxima
+            ready, _, _ = select.select([self.mac_probe.stdout], [], [], 5)
+            if not ready:
+                self.mac_probe.kill()
+                self.mac_probe = None
+                return {'app': 'Desconhecido', 'title': 'Sem título'}
+            
+            line = self.mac_probe.stdout.readline().rstrip('\\n')
+            if line:
+                parts = line.split('\\t', 1)
+                return {'app': parts[0], 'title': parts[1] if len(parts) > 1 and parts[1] else 'Janela ativa'}
+            
+            if self.mac_probe.poll() is not None:
+                self.mac_probe = None
             return {'app': 'Desconhecido', 'title': 'Sem título'}
             
         except Exception as e:
             self.log(f"Erro macOS: {e}")
+            self.mac_probe = None
             return {'app': 'Erro', 'title': 'Erro ao detectar'}
 
+    def open_x11(self):
+        """Conexão com o X11 via ctypes (X11ActiveWindow de agent/x11_window.py, embutido acima)"""
+        return X11ActiveWindow()
+
+    def get_active_window_linux(self):
+        """Obter janela ativa no Linux (X11 _NET_ACTIVE_WINDOW + /proc/<pid>/comm)"""
+        if self.x11 is None:
+            try:
+                self.x11 = self.open_x11()
+            except Exception as e:
+                self.log(f"X11 indisponível: {e}")
+                self.x11 = False
+        if self.x11:
+            try:
+                window = self.x11.query()
+            except X11ConnectionLost as e:
+                # Servidor X caiu: a libX11 não encerra o processo, seguimos via xprop
+                self.log(f"{e} - usando xprop")
+                self.x11.close()
+                self.x11 = False
+        if not self.x11:
+            window = query_subprocess()
+            if window is None and not os.environ.get('DISPLAY'):
+                return {'app': 'Sistema Linux', 'title': 'Monitoramento ativo'}
+        
+        if not window:
+            return {'app': 'Desconhecido', 'title': 'Sem título'}
+        return {'app': window['process_name'], 'title': window['window_title'] or 'Sem título'}
+
+    def watch_x11(self, x):
+        """Thread: acordar o loop em PropertyNotify de _NET_ACTIVE_WINDOW ou do título da janela ativa"""
+        import ctypes
+        xlib = x.xlib
+        
+        class XPropertyEvent(ctypes.Structure):
+            _fields_ = [('type', ctypes.c_int), ('serial', ctypes.c_ulong), ('send_event', ctypes.c_int),
+                        ('display', ctypes.c_void_p), ('window', ctypes.c_ulong), ('atom', ctypes.c_ulong),
+                        ('time', ctypes.c_ulong), ('state', ctypes.c_int)]
+        
+        class XEvent(ctypes.Union):
+            _fields_ = [('type', ctypes.c_int), ('xproperty', XPropertyEvent), ('pad', ctypes.c_long * 24)]
+        
+        PROPERTY_NOTIFY, PROPERTY_CHANGE_MASK = 28, 1 << 22
+        xlib.XSelectInput.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.c_long]
+        xlib.XNextEvent.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
+        xlib.XPending.argtypes = [ctypes.c_void_p]
+        xlib.XConnectionNumber.argtypes = [ctypes.c_void_p]
+        
+        display, root = x.display, x.root
+        active_atom, name_atoms = x.atoms['_NET_ACTIVE_WINDOW'], (x.atoms['_NET_WM_NAME'], x.atoms['WM_NAME'])
+        xlib.XSelectInput(display, root, PROPERTY_CHANGE_MASK)
+        watched = 0
+        event = XEvent()
+        
+        while self.is_running:
+            # Receber eventos da nova janela ativa (título) e parar de ouvir a anterior
+            active = x.active_window()
+            if active != watched:
+                if watched:
+                    xlib.XSelectInput(display, watched, 0)
+                if active:
+                    xlib.XSelectInput(display, active, PROPERTY_CHANGE_MASK)
+                watched = active
+                self.foreground_changed = True
+                self.window_event.set()
+            
+            while True:
+                # Esperar no socket (sem consumir CPU); XNextEvent só com evento na fila, para não
+                # ler de uma conexão que o servidor X fechou
+                while not xlib.XPending(display):
+                    x.check_connection()
+                    select.select([xlib.XConnectionNumber(display)], [], [], 5)
+                xlib.XNextEvent(display, ctypes.byref(event))
+                if event.type != PROPERTY_NOTIFY:
+                    continue
+                prop = event.xproperty
+                if prop.window == root and prop.atom == active_atom:
+                    break
+                if prop.window == watched and prop.atom in name_atoms:
+                    self.window_event.set()
+
+    def watch_windows(self):
+        """Thread: acordar o loop via SetWinEventHook (troca de janela e de título em primeiro plano)"""
+        import ctypes
+        from ctypes import wintypes
+        
+        user32 = ctypes.windll.user32
+        user32.GetForegroundWindow.restype = wintypes.HWND
+        WinEventProc = ctypes.WINFUNCTYPE(None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+                                          wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD)
+        user32.SetWinEventHook.argtypes = [wintypes.DWORD, wintypes.DWORD, wintypes.HMODULE, WinEventProc,
+                                           wintypes.DWORD, wintypes.DWORD, wintypes.DWORD]
+        user32.SetWinEventHook.restype = wintypes.HANDLE
+        
+        EVENT_SYSTEM_FOREGROUND, EVENT_OBJECT_NAMECHANGE = 0x0003, 0x800C
+        OBJID_WINDOW, WINEVENT_OUTOFCONTEXT = 0, 0x0000
+        
+        def on_event(hook, event, hwnd, id_object, id_child, thread_id, event_time):
+            if event == EVENT_SYSTEM_FOREGROUND:
+                self.foreground_changed = True
+                self.window_event.set()
+            elif id_object == OBJID_WINDOW and hwnd == user32.GetForegroundWindow():
+                self.window_event.set()
+        
+        callback = WinEventProc(on_event)
+        hooks = [user32.SetWinEventHook(kind, kind, 0, callback, 0, 0, WINEVENT_OUTOFCONTEXT)
+                 for kind in (EVENT_SYSTEM_FOREGROUND, EVENT_OBJECT_NAMECHANGE)]
+        if not all(hooks):
+            raise OSError("SetWinEventHook falhou")
+        
+        # Os callbacks são entregues pela fila de mensagens desta thread
+        msg = wintypes.MSG()
+        while self.is_running and user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+
+    def run_window_watcher(self, watch, *args):
+        try:
+            watch(*args)
+        except Exception as e:
+            self.log(f"Eventos de janela indisponíveis, usando consulta periódica: {e}")
+        # Voltar para a consulta periódica
+        self.event_driven = False
+        self.window_event.set()
+
+    def start_window_watcher(self):
+        """Iniciar a thread de eventos de janela; sem eventos, o loop consulta a cada POLL_INTERVAL"""
+        if os.environ.get('WORKTRACK_WATCH_MODE') == 'poll':
+            return False
+        
+        system = platform.system()
+        if system == "Windows":
+            args = (self.watch_windows,)
+        elif system == "Linux":
+            try:
+                args = (self.watch_x11, self.open_x11())
+            except Exception as e:
+                self.log(f"Eventos X11 indisponíveis: {e}")
+                return False
+        else:
+            return False  # macOS: consulta periódica pelo helper persistente
+        
+        self.event_driven = True
+        threading.Thread(target=self.run_window_watcher, args=args, daemon=True).start()
+        return True
+
+    def wait_for_window_event(self, timeout):
+        """Esperar evento de troca de janela (ou o timeout); retorna True se houve evento"""
+        fired = self.window_event.wait(timeout)
+        self.window_event.clear()
+        return fired
+
     def get_active_window(self):
         """Obter janela ativa baseado no sistema"""
         try:
@@ -225,8 +499,7 @@ class BackgroundMonitor:
             elif platform.system() == "Darwin":
                 return self.get_active_window_macos()
             else:
-                # Linux básico
-                return {'app': 'Sistema Linux', 'title': 'Monitoramento ativo'}
+                return self.get_active_window_linux()
                 
         except Exception as e:
             self.log(f"Erro ao obter janela: {e}")
@@ -267,21 +540,32 @@ class BackgroundMonitor:
 
     def monitor_loop(self):
         self.is_running = True
-        last_window = None
-        last_activity_time = time.time()
+        last_sent = 0
+        last_query = 0
+        
+        if self.start_window_watcher():
+            self.log("Detecção de troca de janela por eventos ativa")
         
         while self.is_running:
             try:
+                self.foreground_changed = False
                 current_window = self.get_active_window()
-                current_time = time.time()
+                current_time = self.clock()
+                last_query = current_time
+                self.wakeups += 1
                 
                 elapsed_minutes = int((current_time - self.start_time) / 60)
                 self.total_minutes = elapsed_minutes
                 
-                if current_window != last_window:
-                    activity = f"Usando {current_window['app']}"
-                    if current_window['title'] and current_window['title'] != "Sem título":
-                        activity += f" - {current_window['title'][:50]}"
+                # Enviar só quando a atividade efetiva muda (ou para manter o dispositivo online)
+                changed_window = self.detector.observe(current_window, current_time)
+                if changed_window is None and current_time - last_sent >= RESYNC_SECONDS:
+                    changed_window = self.detector.window
+                
+                if changed_window:
+                    activity = f"Usando {changed_window['app']}"
+                    if changed_window['title'] and changed_window['title'] != "Sem título":
+                        activity += f" - {changed_window['title'][:50]}"
                     
                     activity_data = {
                         'type': 'activity',
@@ -290,7 +574,7 @@ class BackgroundMonitor:
                         'user_name': self.user_name,
                         'os_info': self.os_info,
                         'activity': activity,
-                        'window': current_window['title'][:100] if current_window['title'] else '',
+                        'window': changed_window['title'][:100] if changed_window['title'] else '',
                         'total_minutes': self.total_minutes,
                         'timestamp': datetime.now().isoformat()
                     }
@@ -298,10 +582,22 @@ class BackgroundMonitor:
                     if self.send_activity(activity_data):
                         self.log(f"Atividade enviada: {activity}")
                     
-                    last_window = current_window
-                    last_activity_time = current_time
+                    last_sent = current_time
+                
+                # Dormir até o próximo evento, a confirmação da troca pendente ou o reenvio
+                timeout = last_sent + RESYNC_SECONDS - current_time if self.event_driven else POLL_INTERVAL
+                deadline = self.detector.deadline()
+                if deadline is not None:
+                    timeout = min(timeout, deadline - current_time)
+                fired = self.wait_for_window_event(max(timeout, 0.1))  # Mínimo evita laço ocupado por arredondamento
                 
-                time.sleep(10)  # Verificar a cada 10 segundos
+                # Rajadas só de título (relógios, contadores): no máximo uma consulta por debounce,
+                # a menos que a janela em primeiro plano mude
+                while fired and self.is_running and not self.foreground_changed:
+                    pacing = last_query + DEBOUNCE_SECONDS - self.clock()
+                    if pacing <= 0:
+                        break
+                    self.wait_for_window_event(pacing)
                 
             except KeyboardInterrupt:
                 break
@@ -333,6 +629,7 @@ if __name__ == "__main__":
     monitor = BackgroundMonitor(server_url)
     monitor.start()
 '''
+        return code.replace('# {X11_WINDOW}\n', x11_window_source())
     
     def install_dependencies(self):
         """Instalar dependências Python necessárias"""